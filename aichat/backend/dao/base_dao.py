@@ -5,6 +5,7 @@ Common functionality for database operations.
 """
 
 import logging
+import time
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Optional
 
@@ -13,6 +14,8 @@ try:
 except ImportError:
     aiosqlite = None
 
+from aichat.core.db_stats import instrument
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,9 +31,10 @@ class BaseDAO:
     async def get_connection(self) -> AsyncGenerator[Any, None]:
         """Get database connection with automatic cleanup"""
         try:
+            start = time.perf_counter()
             async with aiosqlite.connect(self.db_path) as db:
                 db.row_factory = aiosqlite.Row  # Enable dict-like access
-                yield db
+                yield instrument(db, wait_ms=(time.perf_counter() - start) * 1000)
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
@@ -7,12 +7,17 @@ Handles database operations for character management.
 from datetime import datetime
 from typing import List, Optional
 
-from ..models.schemas import Character
+from aichat.core.character_cache import get_character_cache
+from aichat.models.schemas import Character
 from .base_dao import BaseDAO
 
 
 class CharacterDAO(BaseDAO):
-    """DAO for character CRUD operations"""
+    """DAO for character CRUD operations
+
+    Writes invalidate the shared character cache and bump its version in the
+    same transaction, so other processes drop their cached copies too.
+    """
 
     async def create_character(
         self,
@@ -29,10 +34,13 @@ class CharacterDAO(BaseDAO):
         now = datetime.now()
         params = (name, profile, personality, avatar_url, now, now)
 
+        cache = get_character_cache()
         async with self.get_connection() as db:
             cursor = await db.execute(query, params)
+            await cache.publish(db)
             await db.commit()
             character_id = cursor.lastrowid
+        cache.invalidate(character_id, name=name)
 
         return Character(
             id=character_id,
@@ -93,9 +101,12 @@ class CharacterDAO(BaseDAO):
 
         query = f"UPDATE characters SET {', '.join(set_clauses)} WHERE id = ?"
 
+        cache = get_character_cache()
         async with self.get_connection() as db:
             await db.execute(query, tuple(params))
+            await cache.publish(db)
             await db.commit()
+        cache.invalidate(character_id, name=updates.get("name"))
 
         return await self.get_character(character_id)
 
@@ -103,7 +114,10 @@ class CharacterDAO(BaseDAO):
         """Delete character"""
         query = "DELETE FROM characters WHERE id = ?"
 
+        cache = get_character_cache()
         async with self.get_connection() as db:
             cursor = await db.execute(query, (character_id,))
+            await cache.publish(db)
             await db.commit()
-            return cursor.rowcount > 0
+        cache.invalidate(character_id)
+        return cursor.rowcount > 0
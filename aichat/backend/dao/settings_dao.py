@@ -3,12 +3,25 @@ Settings Data Access Object
 
 Handles persistence operations for application settings and configuration.
 Uses JSON files for storage with Pydantic model validation.
+
+Loaded settings are cached per file and only re-parsed when the file changes
+(mtime/size, checked at most every check_interval seconds, or via inotify
+when watchdog is installed). Writes go through atomic temp-file renames;
+runtime updates are debounced so bursts of changes produce one write, unless
+the caller asks for a durable update. close_all() flushes every live DAO at
+shutdown.
 """
 
 import json
 import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 from pathlib import Path
 
 try:
@@ -22,6 +35,15 @@ except ImportError:
     class ValidationError(Exception):
         pass
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +54,30 @@ class SettingsError(Exception):
     """Raised when settings operations fail"""
 
 
+SettingsListener = Callable[[str, BaseModel], None]
+
+
+@dataclass
+class _CachedSettings:
+    """Parsed settings for one file and the file state they were read from"""
+    settings_class: type
+    settings: BaseModel
+    file_state: Optional[Tuple[int, int]]  # (mtime_ns, size)
+    checked_at: float
+
+
+class _SettingsFileHandler(FileSystemEventHandler):
+    """Marks settings files dirty when they change on disk"""
+
+    def __init__(self, dao: "SettingsDAO"):
+        self.dao = dao
+
+    def on_any_event(self, event):
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path and str(path).endswith(".json"):
+                self.dao._dirty.add(Path(path).resolve())
+
+
 class SettingsDAO:
     """
     Simplified Pydantic-based settings management
@@ -40,36 +86,114 @@ class SettingsDAO:
     - Uses Pydantic's native JSON parsing
     - Automatic validation and coercion
     - Built-in enum handling
+    - Cached per file, re-read only when the file changes
     """
 
-    def __init__(self, settings_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        settings_dir: Optional[Path] = None,
+        check_interval: float = 1.0,
+        write_delay: float = 0.25,
+        watch: bool = True,
+    ):
         if not PYDANTIC_AVAILABLE:
             raise ImportError("Pydantic is required for settings management")
 
         self.settings_dir = settings_dir or Path("settings")
         self.settings_dir.mkdir(parents=True, exist_ok=True)
 
-        self._loaded_settings: Dict[str, BaseModel] = {}
-
+        self.check_interval = check_interval  # Seconds between file stats when not watching
+        self.write_delay = write_delay        # Debounce window for update_setting(s)
+
+        self._cache: Dict[str, _CachedSettings] = {}
+        self._listeners: Dict[str, List[SettingsListener]] = {}
+        self._lock = threading.RLock()
+
+        # Debounced writes: name -> settings waiting to be written
+        self._pending_writes: Dict[str, BaseModel] = {}
+        self._write_timer: Optional[threading.Timer] = None
+
+        # Files reported changed by the watcher (only used when watching)
+        self._dirty: set = set()
+        self._observer = None
+        if watch and WATCHDOG_AVAILABLE:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_SettingsFileHandler(self), str(self.settings_dir), recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception as e:
+                logger.warning(f"Settings file watcher unavailable, falling back to polling: {e}")
+                self._observer = None
+
+        _instances.add(self)
         logger.info(f"Settings DAO initialized: {self.settings_dir}")
 
+    @property
+    def _loaded_settings(self) -> Dict[str, BaseModel]:
+        return {name: entry.settings for name, entry in self._cache.items()}
+
     def _get_settings_file(self, name: str) -> Path:
         """Get the settings file path for a given name"""
         return self.settings_dir / f"{name}.json"
 
+    @staticmethod
+    def _file_state(settings_file: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = settings_file.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _cached(self, settings_class: type, name: str, settings_file: Path) -> Optional[BaseModel]:
+        """Cached settings if the file hasn't changed since they were read"""
+        entry = self._cache.get(name)
+        if entry is None or entry.settings_class is not settings_class:
+            return None
+
+        # Writes still waiting on the debounce timer are newer than the file
+        if name in self._pending_writes:
+            return entry.settings
+
+        if self._observer is not None:
+            resolved = settings_file.resolve()
+            if resolved not in self._dirty:
+                return entry.settings
+            self._dirty.discard(resolved)
+        else:
+            now = time.monotonic()
+            if now - entry.checked_at < self.check_interval:
+                return entry.settings
+            entry.checked_at = now
+
+        if self._file_state(settings_file) == entry.file_state:
+            return entry.settings
+        return None
+
     def load_settings(self, settings_class: Type[T], name: Optional[str] = None) -> T:
         """
         Load settings using Pydantic's native JSON parsing
 
-        Much simpler than before - Pydantic handles all validation automatically
+        Returns the cached instance unless the file changed since it was read
         """
         if name is None:
             name = settings_class.__name__.lower().replace("constants", "")
 
         settings_file = self._get_settings_file(name)
 
+        cached = self._cached(settings_class, name, settings_file)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            return self._load_from_file(settings_class, name, settings_file)
+
+    def _load_from_file(self, settings_class: Type[T], name: str, settings_file: Path) -> T:
+        previous = self._cache.get(name)
+        file_state = self._file_state(settings_file)
+
         # If file doesn't exist, return defaults and create file
-        if not settings_file.exists():
+        if file_state is None:
             logger.info(
                 f"Settings file not found: {settings_file}, creating with defaults"
             )
@@ -88,10 +212,6 @@ class SettingsDAO:
             # Pydantic does all the heavy lifting: validation, coercion, enum handling
             settings = settings_class(**json_data)
 
-            self._loaded_settings[name] = settings
-            logger.info(f"Successfully loaded settings: {name}")
-            return settings
-
         except ValidationError as e:
             logger.error(f"Validation errors in {settings_file}:")
             for error in e.errors():
@@ -99,29 +219,80 @@ class SettingsDAO:
                 logger.error(
                     f"  {field}: {error['msg']} (got {error.get('input', 'N/A')})"
                 )
-
-            logger.info("Using default settings due to validation errors")
-            return settings_class()
+            return self._load_failed(settings_class, previous)
 
         except json.JSONDecodeError as e:
+            # Also covers reading a file mid-write by another process
             logger.error(f"Invalid JSON in settings file {settings_file}: {e}")
-            logger.info("Using default settings")
-            return settings_class()
+            return self._load_failed(settings_class, previous)
 
         except Exception as e:
             logger.error(f"Failed to load settings from {settings_file}: {e}")
-            logger.info("Using default settings")
-            return settings_class()
+            return self._load_failed(settings_class, previous)
+
+        # Swap in the fully validated instance in one step
+        self._cache[name] = _CachedSettings(settings_class, settings, file_state, time.monotonic())
+        logger.info(f"Successfully loaded settings: {name}")
+
+        if previous is not None and previous.settings != settings:
+            self._notify(name, settings)
+        return settings
+
+    @staticmethod
+    def _load_failed(settings_class: Type[T], previous: Optional[_CachedSettings]) -> T:
+        """Keep the last good settings on a bad reload; defaults if there are none"""
+        if previous is not None and previous.settings_class is settings_class:
+            logger.info("Keeping previously loaded settings")
+            return previous.settings
+        logger.info("Using default settings")
+        return settings_class()
+
+    def subscribe(self, name: str, listener: SettingsListener):
+        """Call listener(name, settings) whenever the named settings change"""
+        with self._lock:
+            self._listeners.setdefault(name, []).append(listener)
+
+    def unsubscribe(self, name: str, listener: SettingsListener):
+        with self._lock:
+            listeners = self._listeners.get(name, [])
+            if listener in listeners:
+                listeners.remove(listener)
+
+    def _notify(self, name: str, settings: BaseModel):
+        for listener in list(self._listeners.get(name, [])):
+            try:
+                listener(name, settings)
+            except Exception as e:
+                logger.error(f"Settings listener for {name} failed: {e}")
 
     def save_settings(self, settings: BaseModel, name: Optional[str] = None) -> bool:
         """
         Save settings using Pydantic's native JSON export
 
-        Much simpler - Pydantic handles enum serialization automatically
+        The file is replaced atomically; a pending debounced write for the
+        same settings is superseded.
         """
         if name is None:
             name = settings.__class__.__name__.lower().replace("constants", "")
 
+        with self._lock:
+            self._pending_writes.pop(name, None)
+            self._set_cached(name, settings)
+            return self._write_file(name, settings)
+
+    def _set_cached(self, name: str, settings: BaseModel):
+        previous = self._cache.get(name)
+        self._cache[name] = _CachedSettings(
+            settings.__class__,
+            settings,
+            previous.file_state if previous else None,
+            time.monotonic(),
+        )
+        if previous is not None and previous.settings != settings:
+            self._notify(name, settings)
+
+    def _write_file(self, name: str, settings: BaseModel) -> bool:
+        """Write settings via a temp file and atomic rename"""
         settings_file = self._get_settings_file(name)
 
         try:
@@ -135,11 +306,24 @@ class SettingsDAO:
                 "source": "saved",
             }
 
-            # Save to file
-            with open(settings_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            fd, tmp_path = tempfile.mkstemp(dir=self.settings_dir, prefix=f".{name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, settings_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            # Our own write is not an external change
+            entry = self._cache.get(name)
+            if entry is not None and entry.settings is settings:
+                entry.file_state = self._file_state(settings_file)
+            self._dirty.discard(settings_file.resolve())
 
-            self._loaded_settings[name] = settings
             logger.info(f"Settings saved successfully: {settings_file}")
             return True
 
@@ -147,14 +331,65 @@ class SettingsDAO:
             logger.error(f"Failed to save settings to {settings_file}: {e}")
             return False
 
+    def _schedule_write(self, name: str, settings: BaseModel):
+        """Debounced write: updates within write_delay are coalesced into one"""
+        with self._lock:
+            self._set_cached(name, settings)
+            self._pending_writes[name] = settings
+            self._start_write_timer()
+
+    def _start_write_timer(self):
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+        self._write_timer = threading.Timer(self.write_delay, self._background_flush)
+        self._write_timer.daemon = True
+        self._write_timer.start()
+
+    def _background_flush(self):
+        try:
+            self.flush()
+        except SettingsError as e:
+            logger.error(f"{e}; retrying in {self.write_delay}s")
+
+    def flush(self):
+        """
+        Write any debounced updates now
+
+        Raises SettingsError if a write failed; those updates stay pending
+        and are retried after another write_delay.
+        """
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            pending, self._pending_writes = self._pending_writes, {}
+
+            failed = [name for name, settings in pending.items() if not self._write_file(name, settings)]
+            for name in failed:
+                self._pending_writes[name] = pending[name]
+            if failed:
+                self._start_write_timer()
+                raise SettingsError(f"Failed to save updated settings for {', '.join(failed)}")
+
+    def close(self):
+        """Flush pending writes and stop the file watcher"""
+        try:
+            self.flush()
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer = None
+
     def reload_settings(self, settings_class: Type[T], name: Optional[str] = None) -> T:
         """Reload settings from file"""
         if name is None:
             name = settings_class.__name__.lower().replace("constants", "")
 
-        # Remove from cache
-        self._loaded_settings.pop(name, None)
-        return self.load_settings(settings_class, name)
+        with self._lock:
+            # Unwritten updates would be lost by re-reading the file
+            if name in self._pending_writes:
+                self.flush()
+            return self._load_from_file(settings_class, name, self._get_settings_file(name))
 
     def get_settings_info(self, name: str) -> Dict[str, Any]:
         """Get information about loaded settings"""
@@ -164,12 +399,14 @@ class SettingsDAO:
             "name": name,
             "file_path": str(settings_file),
             "exists": settings_file.exists(),
-            "loaded": name in self._loaded_settings,
+            "loaded": name in self._cache,
             "model_class": (
-                self._loaded_settings[name].__class__.__name__
-                if name in self._loaded_settings
+                self._cache[name].settings_class.__name__
+                if name in self._cache
                 else None
             ),
+            "pending_write": name in self._pending_writes,
+            "watching": self._observer is not None,
         }
 
     def list_settings(self) -> List[str]:
@@ -201,6 +438,7 @@ class SettingsDAO:
         field_name: str,
         value: Any,
         name: Optional[str] = None,
+        durable: bool = False,
     ) -> T:
         """
         Update a specific setting field at runtime and save to file
@@ -210,6 +448,7 @@ class SettingsDAO:
             field_name: Name of the field to update
             value: New value for the field
             name: Settings name (defaults to class name)
+            durable: Write the file before returning instead of debouncing
 
         Returns:
             Updated settings instance
@@ -236,9 +475,7 @@ class SettingsDAO:
         except ValidationError as e:
             raise SettingsError(f"Invalid value for {field_name}: {e}")
 
-        # Save updated settings
-        if not self.save_settings(updated_settings, name):
-            raise SettingsError(f"Failed to save updated settings for {name}")
+        self._store_update(name, updated_settings, durable)
 
         logger.info(f"Updated setting {field_name} in {name}")
         return updated_settings
@@ -248,6 +485,7 @@ class SettingsDAO:
         settings_class: Type[T],
         updates: Dict[str, Any],
         name: Optional[str] = None,
+        durable: bool = False,
     ) -> T:
         """
         Update multiple setting fields at runtime and save to file
@@ -256,6 +494,7 @@ class SettingsDAO:
             settings_class: The settings model class
             updates: Dictionary of field names and new values
             name: Settings name (defaults to class name)
+            durable: Write the file before returning instead of debouncing
 
         Returns:
             Updated settings instance
@@ -283,15 +522,20 @@ class SettingsDAO:
         except ValidationError as e:
             raise SettingsError(f"Invalid updates: {e}")
 
-        # Save updated settings
-        if not self.save_settings(updated_settings, name):
-            raise SettingsError(f"Failed to save updated settings for {name}")
+        self._store_update(name, updated_settings, durable)
 
         logger.info(
             f"Updated {len(updates)} settings in {name}: {list(updates.keys())}"
         )
         return updated_settings
 
+    def _store_update(self, name: str, settings: BaseModel, durable: bool):
+        """Updates are visible immediately; the file write is debounced unless durable"""
+        with self._lock:
+            self._schedule_write(name, settings)
+            if durable:
+                self.flush()
+
     def reset_settings(self, settings_class: Type[T], name: Optional[str] = None) -> T:
         """
         Reset settings to defaults and save to file
@@ -315,3 +559,15 @@ class SettingsDAO:
 
         logger.info(f"Reset settings to defaults: {name}")
         return default_settings
+
+
+_instances: "weakref.WeakSet[SettingsDAO]" = weakref.WeakSet()
+
+
+def close_all():
+    """Flush and close every live SettingsDAO (called at application shutdown)"""
+    for dao in list(_instances):
+        try:
+            dao.close()
+        except SettingsError as e:
+            logger.error(f"Settings in {dao.settings_dir} not saved at shutdown: {e}")
@@ -8,7 +8,7 @@ from typing import AsyncGenerator
 # Third-party imports
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 # Local imports
 from aichat.backend.routes import chat, system, voice, websocket, memory
@@ -71,6 +71,7 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
     )
 
     # Add CORS middleware
@@ -111,11 +112,19 @@ def create_app() -> FastAPI:
         """Application startup event"""
         logger.info("VTuber Backend API starting up...")
 
+        # Sample system metrics off the event loop for /api/system/status
+        from aichat.core.system_metrics import get_system_metrics
+        get_system_metrics().start()
+
         # Initialize database if available; fail gracefully in test environments without aiosqlite.
         db_manager = get_db()
         try:
             await db_manager.initialize()
             logger.info("Database initialized during startup")
+
+            # Periodically move old conversations and logs to the archive
+            from aichat.core.archive import get_archive_manager
+            get_archive_manager().start()
         except Exception as e:
             logger.warning(
                 f"Database initialization skipped or failed during startup: {e}"
@@ -145,6 +154,20 @@ def create_app() -> FastAPI:
             # Emit shutdown event
             await event_system.emit(EventType.SERVICE_STOPPED, "Backend API stopped")
 
+            from aichat.core.archive import get_archive_manager
+            await get_archive_manager().close()
+
+            from aichat.core.system_metrics import get_system_metrics
+            get_system_metrics().stop()
+
+            # Commit journaled conversation turns before closing the database
+            from aichat.backend.services.llm.memory.turn_journal import get_turn_journal
+            await get_turn_journal().close()
+
+            # Write settings updates still waiting on their debounce timer
+            from aichat.backend.dao.settings_dao import close_all as close_settings
+            close_settings()
+
             # Close database connections
             db_manager = get_db()
             await db_manager.close()
@@ -4,10 +4,10 @@ Chat API endpoints for VTuber backend
 
 import logging
 from typing import List, Optional
-from pathlib import Path
 
 # Third-party imports
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
 
 # Local imports
 from aichat.models.schemas import Character as CharacterSchema
@@ -27,6 +27,8 @@ from aichat.backend.services.di_container import (
     get_whisper_service, 
     get_chatterbox_tts_service,
 )
+from aichat.backend.services.llm.memory.turn_journal import get_turn_journal
+from aichat.backend.services.llm.request_context import ChatRequestContext
 from aichat.core.database import db_ops
 from aichat.core.event_system import EventType, emit_chat_response, get_event_system
 
@@ -103,18 +105,19 @@ async def chat_with_character(
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
 
-        # Process chat message with user_id
-        response = await chat_service.process_message(
-            message.text, character.id, message.character, message.user_id
+        # Load the character once and pass it down; the chat log is written
+        # in the same transaction as the conversation turns
+        request_context = ChatRequestContext(
+            message=message.text,
+            user_id=message.user_id or "default_user",
+            character=character,
+            record_chat_log=True,
         )
 
-        # Save to database
-        await db_ops.create_chat_log(
-            character_id=character.id,
-            user_message=message.text,
-            character_response=response.response,
-            emotion=response.emotion,
-            metadata={"model_used": response.model_used},
+        # Process chat message with user_id
+        response = await chat_service.process_message(
+            message.text, character.id, message.character, message.user_id,
+            request_context=request_context,
         )
 
         # Emit chat response event
@@ -254,19 +257,9 @@ async def speech_to_text(
 ):
     """Convert speech to text using Whisper"""
     try:
-        # Save uploaded file
-        temp_file = Path("temp_audio") / file.filename
-        temp_file.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(temp_file, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Transcribe using Whisper
-        result = await whisper_service.transcribe_audio(temp_file)
-
-        # Clean up temp file
-        temp_file.unlink()
+        # Transcribe the upload in memory using Whisper
+        content = await file.read()
+        result = await whisper_service.transcribe_audio_bytes(content, source=file.filename or "upload")
 
         return STTResponse(
             text=result["text"],
@@ -288,21 +281,11 @@ async def get_chat_history(
 ):
     """Get chat history"""
     try:
-        chat_logs = await db_ops.get_chat_logs(character_id=character_id, limit=limit)
-        return ChatHistoryResponse(
-            history=[
-                {
-                    "id": log.id,
-                    "character_id": log.character_id,
-                    "user_message": log.user_message,
-                    "character_response": log.character_response,
-                    "timestamp": log.timestamp.isoformat(),
-                    "emotion": log.emotion,
-                    "metadata": log.metadata,
-                }
-                for log in chat_logs
-            ]
-        )
+        # Chat logs are written behind; commit journaled ones so the reply just sent is listed
+        await get_turn_journal().flush()
+        rows = await db_ops.get_chat_log_rows(character_id=character_id, limit=limit)
+        # Rows are already in response shape; skip response_model re-validation
+        return ORJSONResponse({"history": [row.to_dict() for row in rows]})
     except Exception as e:
         logger.error(f"Error getting chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -5,6 +5,7 @@ Memory management API endpoints
 import logging
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 # Local imports
@@ -173,23 +174,13 @@ async def get_session_history(
 ):
     """Get full conversation history for a session"""
     try:
-        history = await memory_manager.get_session_history(session_id, limit)
+        rows = await memory_manager.get_session_history_rows(session_id, limit)
         
-        return {
+        return ORJSONResponse({
             "session_id": session_id,
-            "total_turns": len(history),
-            "history": [
-                {
-                    "turn_id": turn.turn_id,
-                    "speaker_id": turn.speaker_id,
-                    "speaker_type": turn.speaker_type,
-                    "message": turn.message,
-                    "timestamp": turn.timestamp.isoformat(),
-                    "metadata": turn.metadata
-                }
-                for turn in history
-            ]
-        }
+            "total_turns": len(rows),
+            "history": [row.to_dict() for row in rows]
+        })
         
     except Exception as e:
         logger.error(f"Error getting session history: {e}")
@@ -1,15 +1,17 @@
-import asyncio
 import time
-from typing import Any, Dict, List, Optional
+from typing import Dict, List, Optional
 
-import psutil
-from fastapi import APIRouter, Body, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 # Import the streaming STT service helpers
 from aichat.backend.services.voice.stt import streaming_stt_service as stt
 
 # Event system for webhook management
 from aichat.core.event_system import get_event_system
+from aichat.core.database import BULK_TABLES, db_ops
+from aichat.core.system_metrics import get_system_metrics
 
 router = APIRouter()
 
@@ -18,36 +20,37 @@ startup_time = time.time()
 
 
 @router.get("/status")
-async def get_system_status():
+async def get_system_status(
+    history: bool = Query(False, description="Include recent metric snapshots"),
+    history_seconds: Optional[float] = Query(None, gt=0, description="Limit history to the last N seconds"),
+):
     """
     Get system status information including resource usage and uptime
+
+    Metrics come from the background sampler, so this never blocks the event loop.
     """
     try:
-        # Get system metrics
-        cpu_usage = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage("/")
+        metrics = get_system_metrics()
+        snapshot = metrics.latest()
 
         # Calculate uptime
         uptime = time.time() - startup_time
 
-        return {
+        status = {
             "status": "running",
             "uptime": uptime,
-            "cpu_usage": cpu_usage,
-            "memory_usage": memory.percent,
-            "disk_usage": {
-                "total": disk.total,
-                "used": disk.used,
-                "free": disk.free,
-                "percent": (disk.used / disk.total) * 100,
-            },
+            **snapshot,
+            "sample_interval": metrics.interval,
             "services": {
                 "api": "running",
                 "websocket": "running",
                 "event_system": "running",
             },
+            "stt_sessions": stt.get_session_stats(),
         }
+        if history:
+            status["history"] = metrics.history(history_seconds)
+        return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get system status: {e}")
 
@@ -118,31 +121,155 @@ async def vad_diagnostics(stream_id: str = Query(...), tail_seconds: float = 6.0
 
     Response:
     {
-      "session": { ... session info including rms_history, buffered_seconds, last_voice_time ... } | null,
-      "silero": list | null | {"error": "..."}
+      "session": { ... session info including buffered_seconds, last_voice_time, vad ... } | null,
+      "silero": { ... speaking, per-frame probabilities and speech segments of the tail ... } | null
     }
 
     - session: returned by streaming_stt_service.get_session_info
-    - silero: speech timestamps detected by Silero VAD on the tail window, or null if Silero unavailable
+    - silero: snapshot of the stream's streaming Silero VAD, or null if Silero unavailable.
+      Read from probabilities recorded while audio was fed; the model is not re-run.
+    """
+    return stt.get_vad_diagnostics(stream_id, float(tail_seconds))
+
+
+@router.get("/models")
+async def get_model_routing():
+    """
+    Return LLM routing state: allowed tier, current ranking, per-model
+    latency percentiles/histograms and recent routing decisions.
     """
-    # Get session info synchronously
-    session_info = stt.get_session_info(stream_id)
+    try:
+        from aichat.backend.services.llm.model_router import get_model_router
+
+        return get_model_router().snapshot()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get model routing: {e}")
 
-    # Run silero decision in executor (synchronous helper) to avoid blocking loop
-    silero_result: Optional[Any] = None
-    loop = asyncio.get_event_loop()
 
+@router.get("/character-cache")
+async def get_character_cache_stats():
+    """
+    Return character cache hits/misses, size and the current version.
+    The version changes on every character write in any process.
+    """
     try:
-        if stt.SILERO_AVAILABLE:
-            silero_result = await loop.run_in_executor(
-                None, stt.get_silero_decision, stream_id, float(tail_seconds)
-            )
-        else:
-            silero_result = None
+        from aichat.core.character_cache import get_character_cache
+
+        return get_character_cache().get_stats()
     except Exception as e:
-        silero_result = {"error": str(e)}
+        raise HTTPException(status_code=500, detail=f"Failed to get character cache stats: {e}")
+
 
-    return {"session": session_info, "silero": silero_result}
+@router.get("/db-stats")
+async def get_db_stats(limit: int = Query(50, description="Number of statements to return, slowest total first")):
+    """
+    Return per-statement query timing (normalized SQL, latency histogram,
+    row counts), connection wait times and the slow-query log with
+    EXPLAIN QUERY PLAN output.
+    """
+    try:
+        from aichat.core.db_stats import get_query_monitor
+
+        return get_query_monitor().snapshot(limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get database stats: {e}")
+
+
+@router.delete("/db-stats")
+async def reset_db_stats():
+    """Clear collected query timing and the slow-query log"""
+    from aichat.core.db_stats import get_query_monitor
+
+    get_query_monitor().reset()
+    return {"status": "ok", "message": "Database stats reset"}
+
+
+async def _ndjson_records(request: Request):
+    """Decode an NDJSON request body one line at a time as it streams in"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield orjson.loads(line)
+    if buffer.strip():
+        yield orjson.loads(buffer)
+
+
+@router.post("/bulk/{table}")
+async def bulk_import(table: str, request: Request):
+    """
+    Bulk import NDJSON records (one JSON object per line, keyed by column)
+    into chat_logs, training_data or conversation_turns. Rows are inserted
+    with executemany in a single transaction.
+    """
+    if table not in BULK_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unsupported table: {table}")
+
+    try:
+        return await db_ops.bulk_insert(table, _ndjson_records(request))
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NDJSON: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk import failed: {e}")
+
+
+@router.get("/bulk/{table}")
+async def bulk_export(
+    table: str,
+    character_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+):
+    """
+    Stream a table as NDJSON. Rows are read from one cursor in batches, so
+    memory stays constant regardless of table size.
+    """
+    spec = BULK_TABLES.get(table)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unsupported table: {table}")
+
+    filters = {
+        column: value
+        for column, value in (("character_id", character_id), ("session_id", session_id))
+        if value is not None and column in spec.columns
+    }
+
+    async def lines():
+        async for batch in db_ops.export_batches(table, filters):
+            yield b"".join(orjson.dumps(record) + b"\n" for record in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/archive")
+async def get_archive_status():
+    """
+    Return archive job state: retention policies, codec, segment counts per
+    table and the result of the last run.
+    """
+    try:
+        from aichat.core.archive import get_archive_manager
+
+        return await get_archive_manager().get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get archive status: {e}")
+
+
+@router.post("/archive/run")
+async def run_archive():
+    """
+    Archive everything past its retention age now instead of waiting for the
+    next scheduled run. Returns archived row counts per table.
+    """
+    try:
+        from aichat.core.archive import get_archive_manager
+
+        archived = await get_archive_manager().run_once()
+        return {"status": "ok", "archived": archived}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run archive job: {e}")
 
 
 # ---------------------------
@@ -472,7 +472,8 @@ async def transcribe_audio(
             raise HTTPException(status_code=400, detail="No file provided")
             
         if whisper_service:
-            result = await whisper_service.transcribe_audio(file)
+            content = await file.read()
+            result = await whisper_service.transcribe_audio_bytes(content, source=file.filename or "upload")
             return result
             
         return {
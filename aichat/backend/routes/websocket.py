@@ -3,9 +3,10 @@ WebSocket endpoints for real-time communication
 """
 
 import asyncio
+import functools
 import json
 import logging
-import time
+from datetime import datetime, timezone
 from typing import Any, Dict, List
 
 # Third-party imports
@@ -14,9 +15,10 @@ from fastapi.responses import HTMLResponse
 
 # Local imports  
 import base64
-import os
 from aichat.backend.services.chat.service_manager import get_whisper_service, get_chat_service
-from aichat.constants.paths import TEMP_AUDIO_DIR, ensure_dirs
+from aichat.backend.services.voice.stt import streaming_stt_service
+from aichat.backend.services.voice.stt.audio_input import capture_audio, capture_enabled, decode_audio_bytes, to_float32
+from aichat.backend.services.voice.stt.streaming_transcriber import StreamingTranscriber
 from aichat.core.event_system import EventType, get_event_system
 
 logger = logging.getLogger(__name__)
@@ -61,6 +63,10 @@ manager = ConnectionManager()
 async def websocket_endpoint(websocket: WebSocket):
     """Main WebSocket endpoint for real-time communication"""
     await manager.connect(websocket)
+    # Live streams on this connection: stream_id -> StreamingTranscriber
+    transcribers: Dict[str, StreamingTranscriber] = {}
+    # In-flight partial decode per stream, so the receive loop never waits on Whisper
+    decodes: Dict[str, asyncio.Task] = {}
     try:
         while True:
             data = await websocket.receive_text()
@@ -71,6 +77,12 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if message_type == "audio_chunk":
                 await handle_audio_chunk(websocket, message_data)
+            elif message_type == "audio_stream":
+                await handle_audio_stream(websocket, message_data, transcribers, decodes)
+            elif message_type == "audio_stream_end":
+                await finish_audio_stream(
+                    websocket, message_data.get("stream_id", "unknown"), transcribers, decodes
+                )
             elif message_type == "ping":
                 await websocket.send_text(json.dumps({"type": "pong"}))
             else:
@@ -82,6 +94,11 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+    finally:
+        for task in decodes.values():
+            task.cancel()
+        for stream_id in transcribers:
+            streaming_stt_service.reset_session(stream_id)
 
 async def handle_audio_chunk(websocket: WebSocket, message_data: Dict[str, Any]):
     """Handle audio chunk processing"""
@@ -89,114 +106,54 @@ async def handle_audio_chunk(websocket: WebSocket, message_data: Dict[str, Any])
         audio_data = message_data.get("audio_data", "")
         stream_id = message_data.get("stream_id", "unknown")
         
-        # Decode base64 audio data
+        # Decode base64 audio data: a WAV file, or raw PCM16 when sample_rate is given.
+        # Audio stays in memory; disk capture is opt-in (STT_CAPTURE_AUDIO).
         audio_bytes = base64.b64decode(audio_data)
-        
-        # Save to centralized temporary file for processing
-        ensure_dirs(TEMP_AUDIO_DIR)
-        temp_path = str(
-            TEMP_AUDIO_DIR / f"chunk_{stream_id}_{int(time.time()*1000)}.wav"
+        sample_rate = int(message_data["sample_rate"]) if message_data.get("sample_rate") else None
+        if capture_enabled():
+            if sample_rate:
+                capture_audio(audio_bytes, sample_rate, f"chunk_{stream_id}")
+            else:
+                capture_audio(*decode_audio_bytes(audio_bytes), f"chunk_{stream_id}")
+
+        # Speech-to-Text Pipeline: Whisper STT Service
+        whisper_service = get_whisper_service()
+        transcription_result = await whisper_service.transcribe_audio_bytes(
+            audio_bytes, sample_rate=sample_rate, source=f"stream:{stream_id}"
         )
-        with open(temp_path, "wb") as temp_file:
-            temp_file.write(audio_bytes)
 
-        try:
-            # Speech-to-Text Pipeline: Whisper STT Service
-            whisper_service = get_whisper_service()
-            transcription_result = await whisper_service.transcribe_audio(temp_path)
-
-            # Emit transcription complete event
-            event_system = get_event_system()
-            await event_system.emit(
-                EventType.AUDIO_TRANSCRIBED,
-                "Speech-to-text transcription completed",
-                {
-                    "stream_id": stream_id,
-                    "text": transcription_result.get("text", ""),
-                    "language": transcription_result.get("language", ""),
-                    "confidence": transcription_result.get("confidence", 0.0),
-                },
-            )
-
-            # Send transcription result to frontend
-            transcription_response = {
-                "type": "transcription",
-                "event": "transcription_complete",
+        # Emit transcription complete event
+        event_system = get_event_system()
+        await event_system.emit(
+            EventType.AUDIO_TRANSCRIBED,
+            "Speech-to-text transcription completed",
+            {
                 "stream_id": stream_id,
                 "text": transcription_result.get("text", ""),
                 "language": transcription_result.get("language", ""),
                 "confidence": transcription_result.get("confidence", 0.0),
-                "timestamp": "2024-01-01T00:00:00Z",
-            }
-            await websocket.send_text(json.dumps(transcription_response))
-            try:
-                await asyncio.sleep(0.01)
-            except Exception:
-                pass
-
-            # Text sent to Chat Service for LLM Processing
-            if transcription_result.get("text"):
-                chat_service = get_chat_service()
-                current_character = await chat_service.get_current_character()
-
-                if current_character:
-                    # LLM Processing: OpenRouter Service
-                    chat_response = await chat_service.process_message(
-                        transcription_result["text"],
-                        current_character["id"],
-                        current_character["name"],
-                    )
-
-                    # Emit response generated event
-                    await event_system.emit(
-                        EventType.CHAT_RESPONSE,
-                        "LLM response generated",
-                        {
-                            "stream_id": stream_id,
-                            "user_input": transcription_result["text"],
-                            "character_response": chat_response.response,
-                            "emotion": chat_response.emotion,
-                            "model_used": chat_response.model_used,
-                        },
-                    )
-
-                    # Text-to-Speech Pipeline: Piper TTS Service
-                    tts_audio_path = await chat_service.generate_tts(
-                        chat_response.response,
-                        current_character["id"],
-                        current_character["name"],
-                    )
-
-                    # Audio Generation Event
-                    await event_system.emit(
-                        EventType.AUDIO_GENERATED,
-                        "TTS audio generation completed",
-                        {
-                            "stream_id": stream_id,
-                            "audio_file": (
-                                str(tts_audio_path) if tts_audio_path else None
-                            ),
-                            "text": chat_response.response,
-                            "character": current_character["name"],
-                        },
-                    )
-
-                    # Send complete response to frontend
-                    complete_response = {
-                        "type": "chat_complete",
-                        "event": "response_ready",
-                        "stream_id": stream_id,
-                        "user_input": transcription_result["text"],
-                        "character_response": chat_response.response,
-                        "emotion": chat_response.emotion,
-                        "audio_file": str(tts_audio_path) if tts_audio_path else None,
-                        "timestamp": "2024-01-01T00:00:00Z",
-                    }
-                    await websocket.send_text(json.dumps(complete_response))
-
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_path)
+            },
+        )
+
+        # Send transcription result to frontend
+        transcription_response = {
+            "type": "transcription",
+            "event": "transcription_complete",
+            "stream_id": stream_id,
+            "text": transcription_result.get("text", ""),
+            "language": transcription_result.get("language", ""),
+            "confidence": transcription_result.get("confidence", 0.0),
+            "timestamp": "2024-01-01T00:00:00Z",
+        }
+        await websocket.send_text(json.dumps(transcription_response))
+        try:
+            await asyncio.sleep(0.01)
+        except Exception:
+            pass
+
+        # Text sent to Chat Service for LLM Processing
+        if transcription_result.get("text"):
+            await respond_to_transcript(websocket, stream_id, transcription_result["text"])
 
     except Exception as e:
         logger.error(f"Error processing audio stream chunk: {e}")
@@ -209,6 +166,177 @@ async def handle_audio_chunk(websocket: WebSocket, message_data: Dict[str, Any])
         }
         await websocket.send_text(json.dumps(error_response))
 
+async def handle_audio_stream(
+    websocket: WebSocket,
+    message_data: Dict[str, Any],
+    transcribers: Dict[str, StreamingTranscriber],
+    decodes: Dict[str, asyncio.Task],
+):
+    """
+    Handle a chunk of a live stream: send stt.partial as the transcript firms
+    up, and stt.final (then the character's reply) once silence ends the utterance.
+
+    Partial decodes run in a background task per stream; while one is still
+    running the next step is skipped and its audio waits for the following one.
+    """
+    stream_id = message_data.get("stream_id", "unknown")
+    try:
+        # Raw PCM16 when sample_rate is given, otherwise an encoded (WAV) chunk
+        audio_bytes = base64.b64decode(message_data.get("audio_data", ""))
+        if message_data.get("sample_rate"):
+            audio, sample_rate = to_float32(audio_bytes), int(message_data["sample_rate"])
+        else:
+            audio, sample_rate = decode_audio_bytes(audio_bytes)
+
+        transcriber = transcribers.get(stream_id)
+        if transcriber is None:
+            transcriber = StreamingTranscriber(get_whisper_service().transcribe_words)
+            transcribers[stream_id] = transcriber
+
+        # Silence detection still decides where the utterance ends; VAD inference
+        # and denoising are CPU-bound, so keep them off the event loop
+        utterance = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(streaming_stt_service.feed_audio, stream_id, audio, sample_rate=sample_rate)
+        )
+
+        due = transcriber.append(audio, sample_rate)
+        if utterance is not None:
+            await finish_audio_stream(websocket, stream_id, transcribers, decodes)
+        elif due and (stream_id not in decodes or decodes[stream_id].done()):
+            decodes[stream_id] = asyncio.create_task(send_partial(websocket, stream_id, transcriber))
+
+    except Exception as e:
+        logger.error(f"Error processing live audio stream {stream_id}: {e}")
+        error_response = {
+            "type": "error",
+            "event": "audio_processing_error",
+            "stream_id": stream_id,
+            "message": str(e),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        await websocket.send_text(json.dumps(error_response))
+
+async def send_partial(websocket: WebSocket, stream_id: str, transcriber: StreamingTranscriber):
+    """Decode a live stream's window and send the stt.partial result"""
+    try:
+        partial = await transcriber.step()
+        await websocket.send_text(json.dumps({
+            "type": "stt.partial",
+            "stream_id": stream_id,
+            **partial,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error decoding live audio stream {stream_id}: {e}")
+
+async def finish_audio_stream(
+    websocket: WebSocket,
+    stream_id: str,
+    transcribers: Dict[str, StreamingTranscriber],
+    decodes: Dict[str, asyncio.Task],
+):
+    """Commit the rest of a live stream's utterance, send stt.final and respond to it"""
+    try:
+        streaming_stt_service.end_utterance(stream_id)
+        transcriber = transcribers.get(stream_id)
+        if transcriber is None:
+            return
+        # Let an in-flight partial land before the final decode reuses the buffer
+        pending = decodes.pop(stream_id, None)
+        if pending is not None:
+            await asyncio.wait([pending])
+        final = await transcriber.finish()
+
+        event_system = get_event_system()
+        await event_system.emit(
+            EventType.AUDIO_TRANSCRIBED,
+            "Speech-to-text transcription completed",
+            {"stream_id": stream_id, "text": final["text"], "streaming": True},
+        )
+        await websocket.send_text(json.dumps({
+            "type": "stt.final",
+            "stream_id": stream_id,
+            **final,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }))
+
+        if final["text"]:
+            await respond_to_transcript(websocket, stream_id, final["text"])
+
+    except Exception as e:
+        logger.error(f"Error finishing live audio stream {stream_id}: {e}")
+        error_response = {
+            "type": "error",
+            "event": "audio_processing_error",
+            "stream_id": stream_id,
+            "message": str(e),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        await websocket.send_text(json.dumps(error_response))
+
+async def respond_to_transcript(websocket: WebSocket, stream_id: str, text: str):
+    """Send a finished transcript to the current character and return its reply (and TTS)"""
+    event_system = get_event_system()
+    chat_service = get_chat_service()
+    current_character = await chat_service.get_current_character()
+
+    if current_character:
+        # LLM Processing: OpenRouter Service
+        chat_response = await chat_service.process_message(
+            text,
+            current_character["id"],
+            current_character["name"],
+        )
+
+        # Emit response generated event
+        await event_system.emit(
+            EventType.CHAT_RESPONSE,
+            "LLM response generated",
+            {
+                "stream_id": stream_id,
+                "user_input": text,
+                "character_response": chat_response.response,
+                "emotion": chat_response.emotion,
+                "model_used": chat_response.model_used,
+            },
+        )
+
+        # Text-to-Speech Pipeline: Piper TTS Service
+        tts_audio_path = await chat_service.generate_tts(
+            chat_response.response,
+            current_character["id"],
+            current_character["name"],
+        )
+
+        # Audio Generation Event
+        await event_system.emit(
+            EventType.AUDIO_GENERATED,
+            "TTS audio generation completed",
+            {
+                "stream_id": stream_id,
+                "audio_file": (
+                    str(tts_audio_path) if tts_audio_path else None
+                ),
+                "text": chat_response.response,
+                "character": current_character["name"],
+            },
+        )
+
+        # Send complete response to frontend
+        complete_response = {
+            "type": "chat_complete",
+            "event": "response_ready",
+            "stream_id": stream_id,
+            "user_input": text,
+            "character_response": chat_response.response,
+            "emotion": chat_response.emotion,
+            "audio_file": str(tts_audio_path) if tts_audio_path else None,
+            "timestamp": "2024-01-01T00:00:00Z",
+        }
+        await websocket.send_text(json.dumps(complete_response))
+
 async def handle_event_broadcast(event_type: EventType, data: dict = None):
     """Handle event broadcasting to all connected WebSocket clients"""
     try:
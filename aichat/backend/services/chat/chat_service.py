@@ -2,6 +2,7 @@
 Chat service for handling character conversations and TTS generation
 """
 
+import asyncio
 import hashlib
 import logging
 from pathlib import Path
@@ -87,16 +88,23 @@ class ChatService:
             logger.error(f"Error switching character: {e}")
             return False
     
-    async def process_message(self, message: str, character_id: int, character_name: str, user_id: Optional[str] = None) -> ChatResponse:
-        """Process a chat message and generate AI response with memory"""
+    async def process_message(
+        self,
+        message: str,
+        character_id: int,
+        character_name: str,
+        user_id: Optional[str] = None,
+        request_context=None
+    ) -> ChatResponse:
+        """
+        Process a chat message and generate AI response with memory
+        
+        request_context (ChatRequestContext) carries anything the caller already
+        loaded; missing pieces are loaded here, concurrently, and passed down.
+        """
         try:
-            # Get character details
-            character = await db_ops.get_character(character_id)
-            if not character:
-                raise ValueError(f"Character not found: {character_id}")
-            
             # Use provided user_id or default
-            user_id = user_id or self._current_user_id
+            user_id = user_id or (request_context.user_id if request_context else None) or self._current_user_id
             
             # Lazy load LLM service
             if self._llm_service is None:
@@ -107,15 +115,37 @@ class ChatService:
                     logger.error(f"Failed to import LLMService: {e}")
                     raise RuntimeError(f"LLM service is required but not available: {e}")
             
+            from ..llm.request_context import ChatRequestContext
+            memory_manager = self._llm_service.memory_manager
+            
+            # Character and session are independent lookups; load them together
+            if request_context is None:
+                character, session = await asyncio.gather(
+                    db_ops.get_character(character_id),
+                    memory_manager.load_session(user_id, character_id, character_name)
+                )
+                if not character:
+                    raise ValueError(f"Character not found: {character_id}")
+                request_context = ChatRequestContext(
+                    message=message, user_id=user_id, character=character, session=session
+                )
+            elif request_context.session is None:
+                request_context.session = await memory_manager.load_session(
+                    user_id, request_context.character.id, request_context.character.name
+                )
+            
+            character = request_context.character
+            
             # Generate response using unified LLM service with memory
             llm_response = await self._llm_service.generate_response(
                 message=message,
-                session_id=self._current_session_id or "temp_session",
+                session_id=request_context.session.session_id,
                 user_id=user_id,
                 character_id=character.id,
                 character_name=character.name,
                 character_personality=character.personality,
-                character_profile=character.profile
+                character_profile=character.profile,
+                request_context=request_context
             )
             
             # Update current session ID
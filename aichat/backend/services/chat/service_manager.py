@@ -73,7 +73,7 @@ class VADConfig(ServiceConfig):
     min_speech_duration: float = 0.3
     max_silence_duration: float = 1.0
     enable_preprocessing: bool = True
-    save_speech_segments: bool = True
+    save_speech_segments: bool = False  # Debug/training capture only; STT reads segments from memory
 
     def __post_init__(self):
         if not getattr(self, "name", None):
@@ -154,7 +154,8 @@ class ServiceFactory:
         """Factory function for WhisperService"""
         from ..voice.stt.whisper_service import WhisperService
 
-        return WhisperService(model_name=config.model_name)
+        # Weights are shared through the model registry, so per-config instances are cheap
+        return WhisperService(model_name=config.model_name, device=config.device)
 
     def _create_voice_service(self, config: VoiceConfig):
         """Factory function for VoiceService"""
@@ -54,10 +54,10 @@ class TranscriptionResult:
 
 @dataclass
 class ProcessingTask:
-    """Audio processing task"""
+    """Audio processing task (audio comes from the segment; audio_file only when captured)"""
 
     user_id: int
-    audio_file: Path
+    audio_file: Optional[Path]
     segment: SpeechSegment
     priority: int = 1  # Higher number = higher priority
     created_at: float = 0.0
@@ -160,12 +160,12 @@ class AudioProcessor:
         logger.info("Audio processor services configured")
 
     async def process_speech_segment(
-        self, user_id: int, segment: SpeechSegment, audio_file: Path
+        self, user_id: int, segment: SpeechSegment, audio_file: Optional[Path] = None
     ):
         """Queue speech segment for processing"""
         try:
-            if not audio_file or not audio_file.exists():
-                logger.warning(f"Audio file not found for user {user_id}: {audio_file}")
+            if not segment.audio_frames and not (audio_file and audio_file.exists()):
+                logger.warning(f"No audio for speech segment from user {user_id}")
                 return
 
             # Check if user has transcription enabled
@@ -279,7 +279,7 @@ class AudioProcessor:
             ) / total
 
             # Clean up audio file if configured
-            if self.config.cleanup_old_audio:
+            if task.audio_file and self.config.cleanup_old_audio:
                 try:
                     task.audio_file.unlink(missing_ok=True)
                 except Exception as e:
@@ -297,13 +297,9 @@ class AudioProcessor:
     ) -> Optional[TranscriptionResult]:
         """Transcribe audio using available STT service"""
         try:
-            if not task.audio_file.exists():
-                logger.warning(f"Audio file not found: {task.audio_file}")
-                return None
-
             # Use Whisper service if available
             if self.whisper_service:
-                transcript_data = await self._transcribe_with_whisper(task.audio_file)
+                transcript_data = await self._transcribe_with_whisper(task)
                 if transcript_data:
                     return TranscriptionResult(
                         user_id=task.user_id,
@@ -331,17 +327,21 @@ class AudioProcessor:
             return None
 
     async def _transcribe_with_whisper(
-        self, audio_file: Path
+        self, task: ProcessingTask
     ) -> Optional[Dict[str, Any]]:
-        """Transcribe audio using Whisper service"""
+        """Transcribe audio using Whisper service (in memory when the segment carries audio)"""
         try:
-            if not hasattr(self.whisper_service, "transcribe_file"):
-                logger.warning("Whisper service doesn't have transcribe_file method")
+            pcm = task.segment.get_combined_audio()
+            if pcm and hasattr(self.whisper_service, "transcribe_array"):
+                result = await self.whisper_service.transcribe_array(
+                    pcm, self.config.sample_rate, source=f"discord:{task.user_id}"
+                )
+            elif task.audio_file and task.audio_file.exists() and hasattr(self.whisper_service, "transcribe_file"):
+                result = await self.whisper_service.transcribe_file(str(task.audio_file))
+            else:
+                logger.warning(f"No transcribable audio for user {task.user_id}")
                 return None
 
-            # Call Whisper service
-            result = await self.whisper_service.transcribe_file(str(audio_file))
-
             if result and isinstance(result, dict):
                 return result
             elif result and isinstance(result, str):
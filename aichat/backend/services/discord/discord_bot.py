@@ -557,10 +557,10 @@ class DiscordBot:
             await self.audio_processor.process_audio_frame(frame)
 
     async def _on_speech_completed(
-        self, user_id: int, segment: SpeechSegment, audio_file: Path
+        self, user_id: int, segment: SpeechSegment, audio_file: Optional[Path] = None
     ):
         """Handle completed speech segment"""
-        if self.audio_processor and audio_file:
+        if self.audio_processor:
             await self.audio_processor.process_speech_segment(
                 user_id, segment, audio_file
             )
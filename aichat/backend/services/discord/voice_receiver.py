@@ -401,18 +401,19 @@ class VoiceReceiver:
             logger.error(f"Error processing audio frame: {e}")
 
     async def _on_speech_end(
-        self, user_id: int, segment: SpeechSegment, audio_file: Optional[Path]
+        self, segment: SpeechSegment, audio_file: Optional[Path] = None
     ):
         """Handle speech end event from VAD"""
         try:
             self.stats["speech_segments_detected"] += 1
+            user_id = self._segment_user_id(segment)
 
             logger.debug(
                 f"Speech ended for user {user_id} (duration: {segment.duration:.2f}s)"
             )
 
-            # Use provided audio file or save segment ourselves
-            if not audio_file:
+            # The segment's audio is transcribed from memory; files are debug captures only
+            if not audio_file and self.config.save_raw_audio:
                 audio_file = await self._save_speech_segment(segment)
 
             if self.on_speech_completed:
@@ -436,6 +437,14 @@ class VoiceReceiver:
         """Handle VAD detection result"""
         # This is called for every frame, so we keep it lightweight
 
+    @staticmethod
+    def _segment_user_id(segment: SpeechSegment) -> int:
+        """VAD source IDs are Discord user IDs (optionally prefixed with discord_user_)"""
+        source_id = str(segment.source_id)
+        if source_id.startswith("discord_user_"):
+            source_id = source_id[len("discord_user_"):]
+        return int(source_id)
+
     async def _save_speech_segment(self, segment: SpeechSegment) -> Optional[Path]:
         """Save speech segment to audio file"""
         try:
@@ -455,11 +464,7 @@ class VoiceReceiver:
             # Generate unique filename
             timestamp = int(segment.start_time)
             # Extract user_id from source_id
-            user_id = (
-                segment.source_id.replace("discord_user_", "")
-                if segment.source_id.startswith("discord_user_")
-                else segment.source_id
-            )
+            user_id = self._segment_user_id(segment)
             filename = f"speech_user_{user_id}_{timestamp}.wav"
             audio_path = TEMP_AUDIO_DIR / filename
 
@@ -6,8 +6,10 @@ Provides unified LLM service with memory integration and emotion detection.
 
 from .llm_service import LLMService
 from .model_config import model_config, ModelSpec, ModelTier
+from .model_router import ModelRouter, get_model_router
 from .analysis_model import AnalysisModel, analyze_for_response, ResponseMetadata
-from .summarization_model import SummarizationModel, create_intelligent_summary
+from .summarization_model import SummarizationModel, create_intelligent_summary, score_turns_importance
+from .extractive_summarizer import ExtractiveSummarizer, create_extractive_summary
 from .memory import MemoryManager, ConversationSession, CompressedContext
 
 __all__ = [
@@ -15,11 +17,16 @@ __all__ = [
     "model_config",
     "ModelSpec", 
     "ModelTier",
+    "ModelRouter",
+    "get_model_router",
     "AnalysisModel",
     "analyze_for_response", 
     "ResponseMetadata",
     "SummarizationModel",
     "create_intelligent_summary",
+    "score_turns_importance",
+    "ExtractiveSummarizer",
+    "create_extractive_summary",
     "MemoryManager",
     "ConversationSession",
     "CompressedContext",
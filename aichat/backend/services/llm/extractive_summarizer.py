@@ -0,0 +1,320 @@
+"""
+Local Extractive Summarizer
+
+CPU-only conversation summarization used as a fast path during compression.
+Builds TF-IDF sentence vectors in NumPy and ranks sentences with TextRank
+blended with centroid similarity, so a summary is available in milliseconds
+without calling the remote summarization model.
+"""
+
+import logging
+import re
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from .summarization_model import ConversationSummary, CharacterConsistency, KeyMoment
+
+logger = logging.getLogger(__name__)
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9']+")
+
+# First-person patterns that usually carry facts worth remembering about the user
+_USER_INFO = re.compile(
+    r"\b(i am|i'm|my name|i work|i live|i have|i've|my (?:job|wife|husband|family|friend|dog|cat|favorite))\b"
+)
+
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are aren't as at be because been before being
+below between both but by can can't could did didn't do does doesn't doing don't down during each few
+for from further had has have having he her here hers herself him himself his how i i'm if in into is
+isn't it it's its itself just let's like me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own really same she should so some such than that that's the their
+theirs them themselves then there these they they're this those through to too under until up very was
+we we're were what when where which while who whom why will with would yeah yes you you're your yours
+yourself ok okay oh um uh well also get got going know think want
+""".split())
+
+
+class ExtractiveSummarizer:
+    """Fast local summarizer producing the same ConversationSummary as the remote model"""
+
+    def __init__(
+        self,
+        max_summary_sentences: int = 5,
+        max_topics: int = 8,
+        max_key_moments: int = 5,
+        damping: float = 0.85,
+        centroid_weight: float = 0.5,
+        redundancy_threshold: float = 0.7,
+    ):
+        self.max_summary_sentences = max_summary_sentences
+        self.max_topics = max_topics
+        self.max_key_moments = max_key_moments
+        self.damping = damping
+        self.centroid_weight = centroid_weight
+        self.redundancy_threshold = redundancy_threshold
+
+    def summarize(
+        self,
+        conversation_turns: List[Dict[str, Any]],
+        character_name: str = "Character",
+    ) -> ConversationSummary:
+        """Summarize conversation turns (dicts as produced by ConversationTurn.to_dict)"""
+
+        sentences = self._split_sentences(conversation_turns)
+        tokens = [self._tokenize(text) for _, _, text in sentences]
+
+        vocabulary: Dict[str, int] = {}
+        for sentence_tokens in tokens:
+            for token in sentence_tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        if not vocabulary:
+            return self._empty_summary(conversation_turns)
+
+        matrix, term_weights = self._tfidf_matrix(tokens, vocabulary)
+        scores = self._rank_sentences(matrix)
+
+        # Summary: top non-redundant sentences, kept in conversation order
+        top = self._select_diverse(matrix, scores, self.max_summary_sentences)
+        summary_lines = []
+        for index in sorted(top):
+            turn_index, speaker_type, text = sentences[index]
+            speaker = "User" if speaker_type == "user" else character_name
+            summary_lines.append(f"{speaker}: {text}")
+
+        return ConversationSummary(
+            summary=" ".join(summary_lines),
+            emotional_journey=self._emotional_journey(conversation_turns),
+            key_moments=self._key_moments(
+                conversation_turns, sentences, matrix, scores, character_name
+            ),
+            relationship_evolution="ongoing conversation",
+            character_consistency=CharacterConsistency(
+                traits_expressed=[], personality_score=0.5, notable_moments=[]
+            ),
+            topic_progression=self._topics(tokens, vocabulary, term_weights),
+            user_revealed_info=self._user_revealed_info(sentences),
+            source="extractive",
+        )
+
+    def _split_sentences(
+        self, turns: List[Dict[str, Any]]
+    ) -> List[Tuple[int, str, str]]:
+        """Split turns into (turn_index, speaker_type, sentence) triples"""
+
+        sentences = []
+        for turn_index, turn in enumerate(turns):
+            message = (turn.get("message") or "").strip()
+            for sentence in _SENTENCE_SPLIT.split(message):
+                sentence = sentence.strip()
+                if sentence:
+                    sentences.append(
+                        (turn_index, turn.get("speaker_type", "unknown"), sentence)
+                    )
+        return sentences
+
+    def _tokenize(self, text: str) -> List[str]:
+        """Lowercase word tokens without stopwords"""
+        return [
+            word
+            for word in _WORD.findall(text.lower())
+            if word not in _STOPWORDS and len(word) > 1
+        ]
+
+    def _tfidf_matrix(
+        self, tokens: List[List[str]], vocabulary: Dict[str, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Build L2-normalized TF-IDF sentence vectors and document-level term weights"""
+
+        counts = np.zeros((len(tokens), len(vocabulary)), dtype=np.float32)
+        for row, sentence_tokens in enumerate(tokens):
+            if sentence_tokens:
+                np.add.at(
+                    counts[row], [vocabulary[token] for token in sentence_tokens], 1.0
+                )
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = np.log((1.0 + len(tokens)) / (1.0 + document_frequency)) + 1.0
+        matrix = counts * idf
+
+        term_weights = matrix.sum(axis=0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        return matrix, term_weights
+
+    def _rank_sentences(self, matrix: np.ndarray) -> np.ndarray:
+        """Blend TextRank centrality with similarity to the conversation centroid"""
+
+        count = matrix.shape[0]
+        if count == 1:
+            return np.ones(1, dtype=np.float32)
+
+        similarity = matrix @ matrix.T
+        np.fill_diagonal(similarity, 0.0)
+
+        # TextRank via power iteration on the row-normalized similarity graph
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        transition = np.divide(
+            similarity,
+            row_sums,
+            out=np.full_like(similarity, 1.0 / count),
+            where=row_sums > 0,
+        )
+        rank = np.full(count, 1.0 / count, dtype=np.float32)
+        teleport = (1.0 - self.damping) / count
+        for _ in range(50):
+            updated = teleport + self.damping * (transition.T @ rank)
+            if np.abs(updated - rank).sum() < 1e-6:
+                rank = updated
+                break
+            rank = updated
+
+        centroid = matrix.mean(axis=0)
+        centroid_norm = np.linalg.norm(centroid)
+        centroid_scores = (
+            matrix @ (centroid / centroid_norm)
+            if centroid_norm > 0
+            else np.zeros(count)
+        )
+
+        rank = rank / rank.max() if rank.max() > 0 else rank
+        return (
+            1.0 - self.centroid_weight
+        ) * rank + self.centroid_weight * centroid_scores
+
+    def _select_diverse(
+        self, matrix: np.ndarray, scores: np.ndarray, limit: int
+    ) -> List[int]:
+        """Highest-scoring sentences, skipping near-duplicates of ones already chosen"""
+
+        selected: List[int] = []
+        for index in np.argsort(-scores, kind="stable").tolist():
+            if (
+                selected
+                and float((matrix[selected] @ matrix[index]).max())
+                > self.redundancy_threshold
+            ):
+                continue
+            selected.append(index)
+            if len(selected) >= limit:
+                break
+        return selected
+
+    def _topics(
+        self,
+        tokens: List[List[str]],
+        vocabulary: Dict[str, int],
+        term_weights: np.ndarray,
+    ) -> List[str]:
+        """Highest-weighted terms, listed in the order they first appeared"""
+
+        top_terms = set(
+            np.argsort(-term_weights, kind="stable")[: self.max_topics].tolist()
+        )
+        topics = []
+        for sentence_tokens in tokens:
+            for token in sentence_tokens:
+                if vocabulary[token] in top_terms and token not in topics:
+                    topics.append(token)
+        return topics or ["general conversation"]
+
+    def _key_moments(
+        self,
+        turns: List[Dict[str, Any]],
+        sentences: List[Tuple[int, str, str]],
+        matrix: np.ndarray,
+        scores: np.ndarray,
+        character_name: str,
+    ) -> List[KeyMoment]:
+        """Turns containing the highest-ranked distinct sentences"""
+
+        top_score = float(scores.max()) if scores.max() > 0 else 1.0
+        chosen: Dict[int, Tuple[float, str]] = {}
+        for index in self._select_diverse(matrix, scores, len(sentences)):
+            turn_index, _, text = sentences[index]
+            if turn_index not in chosen:
+                chosen[turn_index] = (float(scores[index]), text)
+            if len(chosen) >= self.max_key_moments:
+                break
+
+        moments = []
+        for turn_index, (score, text) in sorted(chosen.items()):
+            turn = turns[turn_index]
+            speaker = "user" if turn.get("speaker_type") == "user" else character_name
+            moments.append(
+                KeyMoment(
+                    turn_id=int(turn.get("turn_id", turn_index + 1)),
+                    importance_score=round(max(0.0, min(1.0, score / top_score)), 3),
+                    reason=f'Central to the conversation: "{text[:80]}"',
+                    participants=[speaker],
+                )
+            )
+        return moments
+
+    def _user_revealed_info(self, sentences: List[Tuple[int, str, str]]) -> List[str]:
+        """User sentences that look like personal facts"""
+
+        facts = []
+        for _, speaker_type, text in sentences:
+            if (
+                speaker_type == "user"
+                and text not in facts
+                and _USER_INFO.search(text.lower())
+            ):
+                facts.append(text)
+                if len(facts) >= 5:
+                    break
+        return facts
+
+    def _emotional_journey(self, turns: List[Dict[str, Any]]) -> str:
+        """Sequence of distinct assistant emotions from turn metadata"""
+
+        emotions = []
+        for turn in turns:
+            emotion = (turn.get("metadata") or {}).get("emotion")
+            if turn.get("speaker_type") == "assistant" and emotion:
+                if not emotions or emotions[-1] != emotion:
+                    emotions.append(emotion)
+        return " → ".join(emotions) if emotions else "neutral throughout"
+
+    def _empty_summary(self, turns: List[Dict[str, Any]]) -> ConversationSummary:
+        """Summary for conversations without any usable words"""
+
+        return ConversationSummary(
+            summary=f"Conversation with {len(turns)} exchanges",
+            emotional_journey=self._emotional_journey(turns),
+            key_moments=[],
+            relationship_evolution="ongoing conversation",
+            character_consistency=CharacterConsistency(
+                traits_expressed=[], personality_score=0.5, notable_moments=[]
+            ),
+            topic_progression=["general conversation"],
+            user_revealed_info=[],
+            source="extractive",
+        )
+
+
+# Global instance
+_extractive_summarizer = None
+
+
+def get_extractive_summarizer() -> ExtractiveSummarizer:
+    """Get global extractive summarizer instance"""
+    global _extractive_summarizer
+    if _extractive_summarizer is None:
+        _extractive_summarizer = ExtractiveSummarizer()
+    return _extractive_summarizer
+
+
+def create_extractive_summary(
+    conversation_turns: List[Dict[str, Any]], character_name: str = "Character"
+) -> ConversationSummary:
+    """
+    Convenience function to summarize a conversation locally.
+    Used as the fast path during compression events.
+    """
+    return get_extractive_summarizer().summarize(conversation_turns, character_name)
@@ -5,29 +5,51 @@ This is the single, clean implementation for all LLM interactions.
 Integrates with the conversation memory system for context management.
 """
 
+import asyncio
 import logging
 import os
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 import aiohttp
 
 from .memory import MemoryManager, CompressedContext
 from .analysis_model import analyze_for_response, ResponseMetadata
 from aichat.core.event_system import EventSeverity, EventType, get_event_system
 from .model_config import model_config
+from .model_router import get_model_router
+from .memory.turn_journal import chat_log_row
+from .request_context import ChatRequestContext
+from aichat.core.character_cache import build_persona_prompt, get_character_cache
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _CoalescedMessages:
+    """User messages waiting to be answered by a single LLM call"""
+    messages: List[str]
+    future: asyncio.Future
+    started: bool = False
+    followers: int = 0
+
+
 class LLMService:
     """Unified LLM service with memory-aware context management"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, coalesce_window_ms: Optional[float] = None):
         """Initialize LLM service with OpenRouter"""
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         self.base_url = "https://openrouter.ai/api/v1"
         self.event_system = get_event_system()
         self.memory_manager = MemoryManager()
         
+        # Rapid consecutive messages for one conversation within this window are
+        # answered by a single LLM call (0 disables coalescing)
+        if coalesce_window_ms is None:
+            coalesce_window_ms = float(os.getenv("LLM_COALESCE_WINDOW_MS", "0"))
+        self.coalesce_window = max(0.0, coalesce_window_ms) / 1000.0
+        self._pending_messages: Dict[str, _CoalescedMessages] = {}
+        
         # Get default model from centralized config
         default_spec = model_config.get_default_model()
         if not default_spec:
@@ -68,10 +90,90 @@ class LLMService:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        request_context: Optional[ChatRequestContext] = None,
     ) -> Dict[str, Any]:
         """
         Generate character response with memory-aware context
         
+        Messages for the same conversation (user + character) are processed one
+        at a time so session lookup, turn numbering and compression checks never
+        interleave; different conversations run in parallel. With coalescing
+        enabled, messages arriving within the window are merged into one turn
+        and every caller receives the same response.
+        
+        A request_context carries the already-loaded character and session; it
+        is filled in with the session if that is loaded here.
+        """
+        
+        kwargs = dict(
+            session_id=session_id,
+            user_id=user_id,
+            character_id=character_id,
+            character_name=character_name,
+            character_personality=character_personality,
+            character_profile=character_profile,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            request_context=request_context,
+        )
+        
+        if not self.coalesce_window:
+            async with self.memory_manager.conversation_lock(user_id, character_id):
+                return await self._generate_response(message, **kwargs)
+        
+        key = self.memory_manager.conversation_key(user_id, character_id)
+        pending = self._pending_messages.get(key)
+        if pending is not None and not pending.started:
+            # Join the batch that is still collecting messages
+            pending.messages.append(message)
+            pending.followers += 1
+            return await asyncio.shield(pending.future)
+        
+        pending = _CoalescedMessages(messages=[message], future=asyncio.get_running_loop().create_future())
+        self._pending_messages[key] = pending
+        
+        try:
+            await asyncio.sleep(self.coalesce_window)
+            async with self.memory_manager.conversation_lock(user_id, character_id):
+                # Messages that arrived while waiting for the lock still join this call
+                pending.started = True
+                if self._pending_messages.get(key) is pending:
+                    del self._pending_messages[key]
+                
+                result = await self._generate_response("\n".join(pending.messages), **kwargs)
+                result["coalesced_messages"] = len(pending.messages)
+        except BaseException as e:
+            pending.started = True
+            if self._pending_messages.get(key) is pending:
+                del self._pending_messages[key]
+            if pending.followers:
+                pending.future.set_exception(
+                    e if isinstance(e, Exception) else RuntimeError("Coalesced request cancelled")
+                )
+            raise
+        
+        if pending.followers:
+            pending.future.set_result(result)
+        return result
+    
+    async def _generate_response(
+        self,
+        message: str,
+        session_id: str,
+        user_id: str,
+        character_id: int,
+        character_name: str,
+        character_personality: str,
+        character_profile: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        request_context: Optional[ChatRequestContext] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate a response; callers hold the conversation lock
+        
         This method:
         1. Gets or creates a conversation session
         2. Adds the user's turn to memory
@@ -86,12 +188,23 @@ class LLMService:
                 logger.error("OpenRouter API key not configured")
                 raise RuntimeError("OpenRouter API key is required but not configured")
             
-            # Get or create conversation session
-            session = await self.memory_manager.get_or_create_session(
-                user_id=user_id,
-                character_id=character_id,
-                character_name=character_name
-            )
+            # Get or create conversation session (reuse one loaded earlier in the request)
+            if request_context is not None and request_context.session is not None:
+                session = request_context.session
+            else:
+                session = await self.memory_manager.get_or_create_session(
+                    user_id=user_id,
+                    character_id=character_id,
+                    character_name=character_name
+                )
+            
+            # Compression needs these; passing them avoids another character lookup
+            character_data = {
+                "id": character_id,
+                "name": character_name,
+                "personality": character_personality,
+                "profile": character_profile
+            }
             
             # Add user's turn to memory
             await self.memory_manager.add_turn(
@@ -99,11 +212,14 @@ class LLMService:
                 speaker_id=user_id,
                 speaker_type="user",
                 message=message,
-                metadata={"timestamp": "now"}
+                metadata={"timestamp": "now"},
+                character_data=character_data
             )
             
             # Get current context (may trigger compression)
             context = await self.memory_manager.get_session_context(session.session_id)
+            if request_context is not None:
+                request_context.session = session
             
             # STEP 1: Analyze conversation for all metadata BEFORE generating response
             conversation_context = self._get_recent_context(context)
@@ -122,7 +238,8 @@ class LLMService:
                 character_name=character_name,
                 character_personality=character_personality,
                 character_profile=character_profile,
-                metadata=metadata
+                metadata=metadata,
+                character_id=character_id
             )
             
             # STEP 3: Generate main response
@@ -146,24 +263,15 @@ class LLMService:
                 "max_tokens": max_tokens
             }
             
-            # Make API request  
-            session_http = await self._get_session()
-            async with session_http.post(
-                f"{self.base_url}/chat/completions", json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"OpenRouter API error {response.status}: {error_text}")
-                    raise RuntimeError(f"OpenRouter API error: {response.status} - {error_text}")
-                
-                result = await response.json()
-                
-                if "choices" not in result or len(result["choices"]) == 0:
-                    raise ValueError("No response choices in API result")
-                
-                final_response = result["choices"][0]["message"]["content"]
-                if not final_response:
-                    raise ValueError("No content in API response")
+            # Explicit model requests go straight to that model; otherwise the
+            # router picks the fastest healthy model and may hedge slow requests
+            if model:
+                final_response = await self._request_completion(payload)
+            else:
+                final_response, routed_spec = await get_model_router().request(
+                    lambda spec: self._request_completion({**payload, "model": spec.name})
+                )
+                model_name = routed_spec.name
             
             # Use the pre-analyzed metadata (much more comprehensive)
             emotion = metadata.emotion
@@ -179,12 +287,25 @@ class LLMService:
                 "tool_calls_made": True  # Flag that tools were available
             })
             
+            # The chat log row, if requested, is committed with this turn
+            chat_log = None
+            if request_context is not None and request_context.record_chat_log:
+                chat_log = chat_log_row(
+                    character_id=character_id,
+                    user_message=message,
+                    character_response=cleaned_response,
+                    emotion=emotion,
+                    metadata={"model_used": model_name}
+                )
+            
             await self.memory_manager.add_turn(
                 session_id=session.session_id,
                 speaker_id=character_name,
                 speaker_type="assistant",
                 message=cleaned_response,
-                metadata=assistant_metadata
+                metadata=assistant_metadata,
+                character_data=character_data,
+                chat_log=chat_log
             )
             
             # Emit success event
@@ -225,13 +346,36 @@ class LLMService:
             )
             raise RuntimeError(f"LLM processing failed: {str(e)}")
     
+    async def _request_completion(self, payload: Dict[str, Any]) -> str:
+        """Send a chat completion request and return the response content"""
+        session_http = await self._get_session()
+        async with session_http.post(
+            f"{self.base_url}/chat/completions", json=payload
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"OpenRouter API error {response.status}: {error_text}")
+                raise RuntimeError(f"OpenRouter API error: {response.status} - {error_text}")
+            
+            result = await response.json()
+            
+            if "choices" not in result or len(result["choices"]) == 0:
+                raise ValueError("No response choices in API result")
+            
+            final_response = result["choices"][0]["message"]["content"]
+            if not final_response:
+                raise ValueError("No content in API response")
+        
+        return final_response
+    
     def _build_contextual_prompt(
         self,
         context: CompressedContext,
         character_name: str,
         character_personality: str,
         character_profile: str,
-        metadata: Optional[ResponseMetadata] = None
+        metadata: Optional[ResponseMetadata] = None,
+        character_id: Optional[int] = None
     ) -> str:
         """Build system prompt with compressed context"""
         
@@ -254,11 +398,15 @@ class LLMService:
             energy = "medium"
             memory_context = []
         
+        # Static persona part is precomputed by the character cache
+        cached = get_character_cache().get_by_id(character_id) if character_id is not None else None
+        if cached and cached.character.name == character_name:
+            persona_prompt = cached.persona_prompt
+        else:
+            persona_prompt = build_persona_prompt(character_name, character_personality, character_profile)
+        
         # Otherwise, build fresh prompt (first message in session)
-        base_prompt = f"""You are {character_name}.
-
-PERSONALITY: {character_personality}
-BACKGROUND: {character_profile}
+        base_prompt = persona_prompt + f"""
 
 RESPONSE GUIDANCE:
 - EMOTION: {emotion} (intensity: {intensity}/1.0)
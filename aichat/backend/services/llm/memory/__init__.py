@@ -13,6 +13,8 @@ from .session_manager import SessionManager, ConversationSession
 from .memory_manager import MemoryManager
 from .compression_engine import CompressionEngine
 from .buffer_zone_manager import BufferZoneCompressionManager
+from .compression_scheduler import CompressionScheduler, get_compression_scheduler
+from .turn_journal import TurnJournal, get_turn_journal
 from .models import ConversationTurn, ConversationSummary, CompressedContext
 
 __all__ = [
@@ -21,6 +23,10 @@ __all__ = [
     "MemoryManager",
     "CompressionEngine",
     "BufferZoneCompressionManager",
+    "CompressionScheduler",
+    "get_compression_scheduler",
+    "TurnJournal",
+    "get_turn_journal",
     "ConversationTurn",
     "ConversationSummary",
     "CompressedContext",
@@ -5,13 +5,12 @@ Manages sophisticated two-stage compression with buffer zone context preservatio
 
 Workflow:
 1. Monitor token usage per session
-2. At 75%: Start background compression (parallel, non-blocking)
+2. At 75%: Queue background compression on the shared scheduler (non-blocking)
 3. 75%-85%: Collect buffer zone turns
 4. At 85%: Package compressed + buffer + recent and reset context immediately
 5. New context = compressed_summary + buffer_turns + recent_turns
 """
 
-import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -19,7 +18,8 @@ from dataclasses import dataclass, field
 
 from .models import ConversationSession, ConversationTurn, CompressedContext
 from .compression_engine import CompressionEngine
-from .summarization_model import SummarizationModel
+from .compression_scheduler import get_compression_scheduler
+from ..summarization_model import SummarizationModel
 from aichat.core.event_system import EventType, get_event_system
 
 logger = logging.getLogger(__name__)
@@ -30,11 +30,10 @@ class CompressionState:
     """Tracks compression progress for a session"""
     session_id: str
     compression_started: bool = False
-    compression_complete: bool = False
     started_at_turn: int = 0
     buffer_zone_turns: List[ConversationTurn] = field(default_factory=list)
-    compressed_context: Optional[CompressedContext] = None
-    compression_task: Optional[asyncio.Task] = None
+    session: Optional[ConversationSession] = None
+    character_data: Dict[str, Any] = field(default_factory=dict)
     
     def __post_init__(self):
         """Ensure buffer_zone_turns is always a list"""
@@ -59,7 +58,7 @@ class BufferZoneCompressionManager:
     Manages two-stage compression with buffer zone context preservation
     
     Key Features:
-    - 75% threshold triggers background compression (parallel)
+    - 75% threshold queues background compression on the shared scheduler
     - 75%-85% buffer zone preserves conversation continuity
     - 85% threshold triggers immediate context reset
     - Intelligent packaging of compressed + buffer + recent context
@@ -69,6 +68,7 @@ class BufferZoneCompressionManager:
         self.compression_engine = CompressionEngine()
         self.summarization_model = SummarizationModel()
         self.event_system = get_event_system()
+        self.scheduler = get_compression_scheduler()
         
         # Per-session state tracking
         self._compression_states: Dict[str, CompressionState] = {}
@@ -138,12 +138,15 @@ class BufferZoneCompressionManager:
             # Mark compression as started
             state.compression_started = True
             state.started_at_turn = len(turns)
+            state.session = session
+            state.character_data = character_data
             
-            logger.info(f"Starting background compression for session {session_id} at turn {state.started_at_turn}")
+            logger.info(f"Queueing background compression for session {session_id} at turn {state.started_at_turn}")
             
-            # Create background compression task
-            state.compression_task = asyncio.create_task(
-                self._background_compression_worker(session_id, session, turns, character_data)
+            # Queue on the shared scheduler (bounded workers, deduplicated per session)
+            self.scheduler.submit(
+                session_id, session, turns, character_data,
+                self._calculate_token_percentage(turns)
             )
             
             # Emit event
@@ -163,45 +166,6 @@ class BufferZoneCompressionManager:
             logger.error(f"Failed to start background compression: {e}")
             return False
     
-    async def _background_compression_worker(
-        self,
-        session_id: str,
-        session: ConversationSession,
-        turns: List[ConversationTurn],
-        character_data: Dict[str, Any]
-    ):
-        """Background worker that performs the actual compression"""
-        try:
-            state = self._get_or_create_state(session_id)
-            
-            logger.info(f"Background compression worker started for session {session_id}")
-            
-            # Perform compression using existing engine
-            compressed = await self.compression_engine.compress(
-                session, turns, character_data
-            )
-            
-            # Store result
-            state.compressed_context = compressed
-            state.compression_complete = True
-            
-            logger.info(f"Background compression completed for session {session_id}")
-            
-            # Emit completion event
-            await self.event_system.emit(
-                EventType.SYSTEM_STATUS,
-                f"Background compression completed for session {session_id}",
-                {
-                    "session_id": session_id,
-                    "compressed_tokens": compressed.get_token_count(),
-                    "tokens_saved": compressed.compression_metadata.get("tokens_saved", 0)
-                }
-            )
-            
-        except Exception as e:
-            logger.error(f"Background compression failed for session {session_id}: {e}")
-            state.compression_complete = False
-    
     async def collect_buffer_turn(
         self, 
         session_id: str, 
@@ -213,6 +177,14 @@ class BufferZoneCompressionManager:
         # Only collect if compression has started but context hasn't reset
         if state.compression_started and turn.turn_id > state.started_at_turn:
             state.buffer_zone_turns.append(turn)
+            
+            # Still queued: move up as the session approaches the reset threshold
+            job = self.scheduler.get_job(session_id)
+            if job is not None:
+                self.scheduler.touch(
+                    session_id,
+                    job.token_percentage + turn.token_count / self.MAX_CONTEXT_TOKENS
+                )
             logger.debug(f"Collected buffer turn {turn.turn_id} for session {session_id} "
                         f"(buffer size: {len(state.buffer_zone_turns)})")
     
@@ -227,24 +199,31 @@ class BufferZoneCompressionManager:
         try:
             logger.info(f"Packaging and resetting context for session {session_id}")
             
-            # Wait for background compression if still running
-            if state.compression_task and not state.compression_task.done():
-                logger.info(f"Waiting for background compression to complete...")
-                try:
-                    await asyncio.wait_for(state.compression_task, timeout=30.0)
-                except asyncio.TimeoutError:
-                    logger.warning(f"Background compression timeout for session {session_id}")
-                    state.compression_complete = False
-            
-            # Start with compressed context if available
-            if state.compression_complete and state.compressed_context:
-                new_context = state.compressed_context
-                logger.info(f"Using completed compressed context for session {session_id}")
+            # Never wait on the background job: use its result, a result persisted
+            # by an earlier run, or a fast local compression
+            new_context = self.scheduler.take_result(session_id)
+            if new_context is None:
+                new_context = await self.scheduler.load_persisted(session_id)
+                if new_context is not None:
+                    logger.info(f"Using persisted compressed context for session {session_id}")
             else:
+                logger.info(f"Using completed compressed context for session {session_id}")
+            
+            if new_context is None and state.session is not None:
+                logger.warning(f"Background compression not ready, compressing locally")
+                compression_turns = current_turns[:state.started_at_turn] or current_turns
+                new_context = await self.compression_engine.compress(
+                    state.session, compression_turns, state.character_data, summary_mode="local"
+                )
+            
+            if new_context is None:
                 # Fallback: create minimal context
                 logger.warning(f"Background compression not ready, creating minimal context")
                 new_context = CompressedContext()
             
+            # The result is consumed; drop in-flight work and the persisted copy
+            await self.scheduler.cancel(session_id)
+            
             # Add buffer zone turns to the context
             if state.buffer_zone_turns:
                 new_context.buffer_turns = state.buffer_zone_turns.copy()
@@ -288,44 +267,31 @@ class BufferZoneCompressionManager:
     def _reset_session_state(self, session_id: str):
         """Reset compression state for next cycle"""
         if session_id in self._compression_states:
-            old_state = self._compression_states[session_id]
-            
-            # Cancel any running task
-            if old_state.compression_task and not old_state.compression_task.done():
-                old_state.compression_task.cancel()
-            
-            # Create fresh state
             self._compression_states[session_id] = CompressionState(session_id=session_id)
     
     async def get_compression_status(self, session_id: str, turns: List[ConversationTurn]) -> CompressionStatus:
         """Get current compression state for session"""
         state = self._get_or_create_state(session_id)
         percentage = self._calculate_token_percentage(turns)
+        compressed = self.scheduler.take_result(session_id)
         
         return CompressionStatus(
             session_id=session_id,
             token_percentage=percentage,
             compression_triggered=state.compression_started,
-            compression_complete=state.compression_complete,
+            compression_complete=compressed is not None,
             buffer_zone_size=len(state.buffer_zone_turns),
             ready_for_reset=percentage >= self.CONTEXT_RESET_THRESHOLD,
-            tokens_saved=state.compressed_context.compression_metadata.get("tokens_saved", 0) 
-                        if state.compressed_context else 0
+            tokens_saved=compressed.compression_metadata.get("tokens_saved", 0) 
+                        if compressed else 0
         )
     
     async def cleanup_session(self, session_id: str):
         """Clean up resources for a session"""
+        # Cancel queued or running compression work
+        await self.scheduler.cancel(session_id)
+        
         if session_id in self._compression_states:
-            state = self._compression_states[session_id]
-            
-            # Cancel any running compression task
-            if state.compression_task and not state.compression_task.done():
-                state.compression_task.cancel()
-                try:
-                    await state.compression_task
-                except asyncio.CancelledError:
-                    pass
-            
             # Remove state
             del self._compression_states[session_id]
             logger.info(f"Cleaned up compression state for session {session_id}")
\ No newline at end of file
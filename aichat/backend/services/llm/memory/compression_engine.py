@@ -2,10 +2,15 @@
 Intelligent conversation compression engine
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import os
+import re
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Set, Tuple
 from datetime import datetime
 
+import numpy as np
+
 from .models import (
     ConversationTurn, 
     CompressedContext, 
@@ -14,11 +19,30 @@ from .models import (
     ConversationSession
 )
 from ..summarization_model import create_intelligent_summary
+from ..summarization_model import ConversationSummary as SummarizationResult
+from ..extractive_summarizer import create_extractive_summary
+from aichat.core.character_cache import build_character_reminder, get_character_cache
 from aichat.core.event_system import EventType, get_event_system
 
 logger = logging.getLogger(__name__)
 
 
+# Keyword groups for heuristic importance scoring (substring matches on lowercased text)
+IMPORTANCE_KEYWORDS = {
+    "emotional_peak": ["excited", "sad", "angry", "happy", "love"],
+    "decision_made": ["decided", "will", "going to", "plan to"],
+    "user_information": ["i am", "i work", "my name", "i live"],
+}
+
+# One combined pattern so each message is scanned once; the named group tells which factor matched
+_IMPORTANCE_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{factor}>{'|'.join(re.escape(word) for word in words)})"
+        for factor, words in IMPORTANCE_KEYWORDS.items()
+    )
+)
+
+
 class CompressionEngine:
     """Handles intelligent conversation compression"""
     
@@ -32,8 +56,13 @@ class CompressionEngine:
         "compression_frequency": 100,        # Force compress every 100 turns
         "min_importance_score": 5.0,         # Minimum score to preserve turn
         "context_window_size": 8000,         # Total context window
+        # Summary source: "local" (extractive only), "remote" (summarization model only)
+        # or "local_first" (extractive now, refined by the remote model in the background)
+        "summary_mode": os.getenv("COMPRESSION_SUMMARY_MODE", "local_first"),
     }
     
+    SUMMARY_MODES = ("local", "remote", "local_first")
+    
     # Importance scoring weights
     IMPORTANCE_WEIGHTS = {
         "emotional_peak": 10,      # High emotion detected
@@ -46,8 +75,13 @@ class CompressionEngine:
         "conflict_resolution": 9,  # Resolved disagreement
     }
     
+    # Upper bound of _score_turn (all matched factors + max recency + emotion bonus),
+    # used to normalize heuristic scores to 0.0-1.0
+    MAX_HEURISTIC_SCORE = 35.0
+    
     def __init__(self):
         self.event_system = get_event_system()
+        self._refinement_tasks: Set[asyncio.Task] = set()
     
     async def should_start_compression(
         self, 
@@ -89,23 +123,96 @@ class CompressionEngine:
         self,
         session: ConversationSession,
         turns: List[ConversationTurn],
-        character_data: Dict[str, str]
+        character_data: Dict[str, str],
+        summary_mode: Optional[str] = None,
+        on_refined: Optional[Callable[[CompressedContext], Awaitable[None]]] = None
     ) -> CompressedContext:
-        """Compress conversation into structured context"""
+        """
+        Compress conversation into structured context (summary_mode overrides the configured mode)
+        
+        In local_first mode, on_refined is awaited with the same context once the
+        remote summary has replaced the local one, so callers can persist it again.
+        """
         
         logger.info(f"Compressing {len(turns)} turns for session {session.session_id}")
         
         # Convert turns to dict format for summarization model
         turn_dicts = [turn.to_dict() for turn in turns]
         
-        # Generate intelligent summary using smart summarization model
-        intelligent_summary = await create_intelligent_summary(
+        summary_mode = summary_mode or self.COMPRESSION_CONFIG["summary_mode"]
+        if summary_mode not in self.SUMMARY_MODES:
+            logger.warning(f"Unknown summary mode '{summary_mode}', using local_first")
+            summary_mode = "local_first"
+        
+        if summary_mode == "remote":
+            # Generate intelligent summary using smart summarization model
+            intelligent_summary = await self._create_remote_summary(session, turn_dicts, character_data)
+        else:
+            # Local extractive summary - milliseconds, no API dependency
+            intelligent_summary = create_extractive_summary(
+                turn_dicts, character_data.get("name", "Character")
+            )
+        
+        compressed = await self._build_compressed_context(
+            session, turns, character_data, intelligent_summary
+        )
+        
+        # Calculate tokens saved
+        original_tokens = sum(t.token_count for t in turns)
+        compressed_tokens = self._estimate_compressed_tokens(compressed)
+        compressed.compression_metadata["tokens_saved"] = original_tokens - compressed_tokens
+        
+        # Record compression event
+        await self._record_compression_event(session, compressed, turns)
+        
+        # Emit event
+        await self.event_system.emit(
+            EventType.SYSTEM_STATUS,
+            f"Conversation compressed: {len(turns)} turns → {len(compressed.preserved_turns)} preserved",
+            {
+                "session_id": session.session_id,
+                "original_turns": len(turns),
+                "preserved_turns": len(compressed.preserved_turns),
+                "tokens_saved": compressed.compression_metadata["tokens_saved"]
+            }
+        )
+        
+        # Refine the local summary with the remote model without blocking the caller
+        if summary_mode == "local_first":
+            task = asyncio.create_task(
+                self._refine_with_remote_summary(
+                    compressed, session, turns, turn_dicts, character_data, on_refined
+                )
+            )
+            self._refinement_tasks.add(task)
+            task.add_done_callback(self._refinement_tasks.discard)
+        
+        return compressed
+    
+    async def _create_remote_summary(
+        self,
+        session: ConversationSession,
+        turn_dicts: List[Dict[str, Any]],
+        character_data: Dict[str, str]
+    ) -> SummarizationResult:
+        """Summarize with the remote summarization model"""
+        
+        return await create_intelligent_summary(
             conversation_turns=turn_dicts,
             character_name=character_data.get("name", "Character"),
             character_personality=character_data.get("personality", ""),
             character_profile=character_data.get("profile", ""),
             session_metadata={"total_turns": session.total_turns, "compression_count": session.compression_count}
         )
+    
+    async def _build_compressed_context(
+        self,
+        session: ConversationSession,
+        turns: List[ConversationTurn],
+        character_data: Dict[str, str],
+        intelligent_summary: SummarizationResult
+    ) -> CompressedContext:
+        """Build compressed context from a conversation summary"""
         
         # Use intelligent scoring to select preserved turns
         preserved_turns = await self._select_preserved_turns_intelligently(turns, intelligent_summary)
@@ -121,7 +228,7 @@ class CompressionEngine:
         )
         
         # Create compressed context with intelligent summary
-        compressed = CompressedContext(
+        return CompressedContext(
             character_reminder=character_reminder,
             session_summary=intelligent_summary.summary,
             key_topics=[(f"{moment.reason} (Turn {moment.turn_id})", [moment.turn_id]) for moment in intelligent_summary.key_moments],
@@ -138,31 +245,55 @@ class CompressionEngine:
                 "timestamp": datetime.utcnow().isoformat(),
                 "relationship_evolution": intelligent_summary.relationship_evolution,
                 "character_consistency_score": intelligent_summary.character_consistency.personality_score,
-                "summarization_model_used": True
-            }
-        )
-        
-        # Calculate tokens saved
-        original_tokens = sum(t.token_count for t in turns)
-        compressed_tokens = self._estimate_compressed_tokens(compressed)
-        compressed.compression_metadata["tokens_saved"] = original_tokens - compressed_tokens
-        
-        # Record compression event
-        await self._record_compression_event(session, compressed, turns)
-        
-        # Emit event
-        await self.event_system.emit(
-            EventType.SYSTEM_STATUS,
-            f"Conversation compressed: {len(turns)} turns → {len(preserved_turns)} preserved",
-            {
-                "session_id": session.session_id,
-                "original_turns": len(turns),
-                "preserved_turns": len(preserved_turns),
-                "tokens_saved": compressed.compression_metadata["tokens_saved"]
+                "summarization_model_used": intelligent_summary.source == "model",
+                "summary_source": intelligent_summary.source
             }
         )
+    
+    async def _refine_with_remote_summary(
+        self,
+        compressed: CompressedContext,
+        session: ConversationSession,
+        turns: List[ConversationTurn],
+        turn_dicts: List[Dict[str, Any]],
+        character_data: Dict[str, str],
+        on_refined: Optional[Callable[[CompressedContext], Awaitable[None]]] = None
+    ):
+        """Replace the extractive summary in place once the remote model answers"""
         
-        return compressed
+        try:
+            intelligent_summary = await self._create_remote_summary(session, turn_dicts, character_data)
+            if intelligent_summary.source != "model":
+                logger.info(f"Remote summary unavailable for session {session.session_id}, keeping local summary")
+                return
+            
+            refined = await self._build_compressed_context(
+                session, turns, character_data, intelligent_summary
+            )
+            
+            # Only summary-derived fields: the local turn selection stays, and
+            # buffer/recent turns may have been repackaged since
+            compressed.character_reminder = refined.character_reminder
+            compressed.session_summary = refined.session_summary
+            compressed.key_topics = refined.key_topics
+            compressed.emotional_journey = refined.emotional_journey
+            compressed.important_facts = refined.important_facts
+            for key in (
+                "relationship_evolution",
+                "character_consistency_score",
+                "summarization_model_used",
+                "summary_source",
+            ):
+                compressed.compression_metadata[key] = refined.compression_metadata[key]
+            compressed.compression_metadata["refined_at"] = datetime.utcnow().isoformat()
+            
+            logger.info(f"Refined compressed context for session {session.session_id} with remote summary")
+            
+            if on_refined is not None:
+                await on_refined(compressed)
+            
+        except Exception as e:
+            logger.error(f"Remote summary refinement failed for session {session.session_id}: {e}")
     
     async def _generate_summary_with_examples(self, turns: List[ConversationTurn]) -> Dict:
         """Generate summary using LLM with specific examples"""
@@ -291,32 +422,52 @@ OUTPUT:"""
     async def _score_all_turns(self, turns: List[ConversationTurn]) -> List[Tuple[float, ConversationTurn]]:
         """Score all turns for importance"""
         
-        scored = []
-        
-        for i, turn in enumerate(turns):
-            score = await self._score_turn(turn, i, len(turns))
-            scored.append((score, turn))
-            turn.importance_score = score  # Store in turn object
+        scores = self.score_turns(turns)
+        scored = list(zip(scores, turns))
         
         # Sort by score (highest first)
         scored.sort(key=lambda x: x[0], reverse=True)
         
         return scored
     
-    async def _score_turn(self, turn: ConversationTurn, position: int, total_turns: int) -> float:
-        """Score a single turn for importance"""
+    def score_turns(self, turns: List[ConversationTurn]) -> List[float]:
+        """
+        Score all turns in one synchronous pass.
+        
+        Content scores cached on the turn at insert time are reused; only turns
+        without one are matched. Recency bonuses are computed for all positions at once.
+        """
+        
+        if not turns:
+            return []
+        
+        content_scores = np.fromiter(
+            (
+                turn.content_score if turn.content_score is not None else self.score_turn_content(turn)
+                for turn in turns
+            ),
+            dtype=np.float64,
+            count=len(turns)
+        )
+        scores = content_scores + self._recency_bonuses(len(turns))
         
-        score = 0.0
+        for turn, score in zip(turns, scores.tolist()):
+            turn.importance_score = score  # Store in turn object
         
-        # Check for importance factors
-        message_lower = turn.message.lower()
+        return scores.tolist()
+    
+    def score_turn_content(self, turn: ConversationTurn) -> float:
+        """Score the position-independent part of a turn and cache it on the turn"""
+        
+        score = 0.0
+        factors = {match.lastgroup for match in _IMPORTANCE_PATTERN.finditer(turn.message.lower())}
         
         # Emotional peaks
-        if any(word in message_lower for word in ["excited", "sad", "angry", "happy", "love"]):
+        if "emotional_peak" in factors:
             score += self.IMPORTANCE_WEIGHTS["emotional_peak"]
         
         # Decisions
-        if any(word in message_lower for word in ["decided", "will", "going to", "plan to"]):
+        if "decision_made" in factors:
             score += self.IMPORTANCE_WEIGHTS["decision_made"]
         
         # Questions
@@ -324,9 +475,33 @@ OUTPUT:"""
             score += self.IMPORTANCE_WEIGHTS["question_asked"]
         
         # User information
-        if turn.speaker_type == "user" and any(word in message_lower for word in ["i am", "i work", "my name", "i live"]):
+        if turn.speaker_type == "user" and "user_information" in factors:
             score += self.IMPORTANCE_WEIGHTS["user_information"]
         
+        # Metadata factors
+        if "emotion" in turn.metadata:
+            emotion = turn.metadata["emotion"]
+            if emotion not in ["neutral", "calm"]:
+                score += 2
+        
+        turn.content_score = score
+        return score
+    
+    def _recency_bonuses(self, total_turns: int) -> np.ndarray:
+        """Recency bonus for every position (last 5: +5, last 10: +3, last 20: +1)"""
+        
+        recency_position = total_turns - np.arange(total_turns)
+        return np.select(
+            [recency_position <= 5, recency_position <= 10, recency_position <= 20],
+            [5.0, 3.0, 1.0],
+            default=0.0
+        )
+    
+    async def _score_turn(self, turn: ConversationTurn, position: int, total_turns: int) -> float:
+        """Score a single turn for importance"""
+        
+        score = turn.content_score if turn.content_score is not None else self.score_turn_content(turn)
+        
         # Recency bonus
         recency_position = total_turns - position
         if recency_position <= 5:
@@ -336,12 +511,6 @@ OUTPUT:"""
         elif recency_position <= 20:
             score += 1
         
-        # Metadata factors
-        if "emotion" in turn.metadata:
-            emotion = turn.metadata["emotion"]
-            if emotion not in ["neutral", "calm"]:
-                score += 2
-        
         return score
     
     async def _select_preserved_turns(
@@ -529,10 +698,21 @@ Remember to maintain your personality while being responsive to the conversation
     ) -> str:
         """Build character reminder using intelligent summary"""
         
-        template = """You are {name}.
-
-CORE PERSONALITY: {personality}
-BACKGROUND: {profile}
+        name = character_data.get("name", "Assistant")
+        
+        # Static character part is precomputed by the character cache
+        character_id = character_data.get("id")
+        cached = get_character_cache().get_by_id(character_id) if character_id is not None else None
+        if cached and cached.character.name == name:
+            header = cached.character_reminder
+        else:
+            header = build_character_reminder(
+                name,
+                character_data.get("personality", "helpful and friendly"),
+                character_data.get("profile", "AI assistant"),
+            )
+        
+        template = """{header}
 
 CONVERSATION INTELLIGENCE:
 - Summary: {summary}
@@ -563,9 +743,8 @@ Continue being {name} while maintaining the relationship dynamic and remembering
         traits_shown_str = ", ".join(intelligent_summary.character_consistency.traits_expressed) if intelligent_summary.character_consistency.traits_expressed else "various traits"
         
         return template.format(
-            name=character_data.get("name", "Assistant"),
-            personality=character_data.get("personality", "helpful and friendly"),
-            profile=character_data.get("profile", "AI assistant")[:200],  # Truncate for brevity
+            header=header,
+            name=name,
             summary=intelligent_summary.summary[:300],  # Truncate summary
             relationship=intelligent_summary.relationship_evolution,
             emotional_journey=intelligent_summary.emotional_journey,
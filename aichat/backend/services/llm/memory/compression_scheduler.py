@@ -0,0 +1,313 @@
+"""
+Background compression scheduler
+
+Runs background compressions on a bounded worker pool instead of one bare task
+per session. Queued sessions closest to the context reset threshold go first,
+then the most recently active. Requests are deduplicated per session, work for
+closed sessions is cancelled, and completed results are persisted so a context
+reset can pick them up without waiting, even across restarts.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import ConversationSession, ConversationTurn, CompressedContext
+from .compression_engine import CompressionEngine
+from aichat.core.database import db_manager
+from aichat.core.event_system import EventType, get_event_system
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompressionJob:
+    """A queued or running compression for one session"""
+
+    session_id: str
+    session: ConversationSession
+    turns: List[ConversationTurn]
+    character_data: Dict[str, Any]
+    token_percentage: float
+    last_activity: float = field(default_factory=time.time)
+    state: str = "queued"  # queued, running, done, failed, cancelled
+    version: int = 0  # Bumped on reprioritization; stale heap entries are skipped
+    result: Optional[CompressedContext] = None
+    task: Optional[asyncio.Task] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class CompressionScheduler:
+    """Priority-ordered, deduplicated background compression with a bounded worker pool"""
+
+    def __init__(
+        self,
+        compression_engine: Optional[CompressionEngine] = None,
+        max_workers: Optional[int] = None,
+        reset_threshold: float = 0.85,
+    ):
+        self.compression_engine = compression_engine or CompressionEngine()
+        self.event_system = get_event_system()
+        self.max_workers = max_workers or int(os.getenv("COMPRESSION_WORKERS", "2"))
+        self.reset_threshold = reset_threshold
+
+        self._jobs: Dict[str, CompressionJob] = {}
+        self._queue: List[Tuple[Tuple[float, float], int, int, str]] = []
+        self._counter = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+        }
+
+    def _priority(self, job: CompressionJob) -> Tuple[float, float]:
+        """Closest to the reset threshold first, then most recently active"""
+        return (
+            max(0.0, self.reset_threshold - job.token_percentage),
+            -job.last_activity,
+        )
+
+    def _push(self, job: CompressionJob):
+        self._counter += 1
+        heapq.heappush(
+            self._queue,
+            (self._priority(job), self._counter, job.version, job.session_id),
+        )
+        self._ensure_workers()
+        self._wakeup.set()
+
+    def _ensure_workers(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def submit(
+        self,
+        session_id: str,
+        session: ConversationSession,
+        turns: List[ConversationTurn],
+        character_data: Dict[str, Any],
+        token_percentage: float,
+    ) -> CompressionJob:
+        """Queue a compression; a session already queued is updated in place"""
+        self.stats["submitted"] += 1
+        job = self._jobs.get(session_id)
+
+        if job is not None and job.state in ("running", "done"):
+            self.stats["deduplicated"] += 1
+            return job
+
+        if job is not None and job.state == "queued":
+            self.stats["deduplicated"] += 1
+            job.turns = list(turns)
+            job.character_data = character_data
+            job.token_percentage = token_percentage
+            job.last_activity = time.time()
+            job.version += 1
+        else:
+            job = CompressionJob(
+                session_id=session_id,
+                session=session,
+                turns=list(turns),
+                character_data=character_data,
+                token_percentage=token_percentage,
+            )
+            self._jobs[session_id] = job
+
+        self._push(job)
+        return job
+
+    def touch(self, session_id: str, token_percentage: float):
+        """Reprioritize a queued session as its context grows"""
+        job = self._jobs.get(session_id)
+        if job is None or job.state != "queued":
+            return
+        job.token_percentage = token_percentage
+        job.last_activity = time.time()
+        job.version += 1
+        self._push(job)
+
+    def get_job(self, session_id: str) -> Optional[CompressionJob]:
+        return self._jobs.get(session_id)
+
+    def take_result(self, session_id: str) -> Optional[CompressedContext]:
+        """Completed result for a session, if any (does not wait)"""
+        job = self._jobs.get(session_id)
+        if job is not None and job.state == "done":
+            return job.result
+        return None
+
+    async def _next_job(self) -> CompressionJob:
+        while True:
+            while self._queue:
+                _, _, version, session_id = heapq.heappop(self._queue)
+                job = self._jobs.get(session_id)
+                if job is not None and job.state == "queued" and job.version == version:
+                    return job
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            job.state = "running"
+            # Run as a child task so cancelling one job never kills the worker
+            job.task = asyncio.create_task(self._run(job))
+            await asyncio.wait({job.task})
+
+    async def _run(self, job: CompressionJob):
+        try:
+            compressed = await self.compression_engine.compress(
+                job.session,
+                job.turns,
+                job.character_data,
+                on_refined=lambda refined: self._persist_refined(job, refined),
+            )
+            compressed.compression_metadata["scheduled_at_percentage"] = round(
+                job.token_percentage * 100, 1
+            )
+            await self._persist_result(job.session_id, compressed)
+
+            job.result = compressed
+            job.state = "done"
+            self.stats["completed"] += 1
+            logger.info(
+                f"Background compression completed for session {job.session_id}"
+            )
+
+            await self.event_system.emit(
+                EventType.SYSTEM_STATUS,
+                f"Background compression completed for session {job.session_id}",
+                {
+                    "session_id": job.session_id,
+                    "compressed_tokens": compressed.get_token_count(),
+                    "tokens_saved": compressed.compression_metadata.get(
+                        "tokens_saved", 0
+                    ),
+                },
+            )
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            job.state = "failed"
+            self.stats["failed"] += 1
+            logger.error(
+                f"Background compression failed for session {job.session_id}: {e}"
+            )
+        finally:
+            job.done.set()
+
+    async def cancel(self, session_id: str):
+        """Drop queued or running work and any persisted result for a session"""
+        job = self._jobs.pop(session_id, None)
+        if job is not None and job.state in ("queued", "running"):
+            self.stats["cancelled"] += 1
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.done.set()
+            elif job.task is not None:
+                job.task.cancel()
+
+        await self._delete_persisted(session_id)
+
+    async def _persist_result(self, session_id: str, compressed: CompressedContext):
+        try:
+            async with db_manager.get_session() as db:
+                await db.execute(
+                    """
+                    INSERT OR REPLACE INTO compressed_contexts
+                    (session_id, compressed_at_turn, context, created_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (
+                        session_id,
+                        compressed.compression_metadata.get("compressed_at_turn", 0),
+                        json.dumps(compressed.to_dict(), default=str),
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(
+                f"Failed to persist compressed context for session {session_id}: {e}"
+            )
+
+    async def _persist_refined(
+        self, job: CompressionJob, compressed: CompressedContext
+    ):
+        """Re-save a result whose summary the remote model refined, unless it was consumed meanwhile"""
+        if self._jobs.get(job.session_id) is job:
+            await self._persist_result(job.session_id, compressed)
+
+    async def load_persisted(self, session_id: str) -> Optional[CompressedContext]:
+        """Completed result saved by an earlier run, if any"""
+        try:
+            async with db_manager.get_session() as db:
+                cursor = await db.execute(
+                    "SELECT context FROM compressed_contexts WHERE session_id = ?",
+                    (session_id,),
+                )
+                row = await cursor.fetchone()
+            return (
+                CompressedContext.from_dict(json.loads(row["context"])) if row else None
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to load compressed context for session {session_id}: {e}"
+            )
+            return None
+
+    async def _delete_persisted(self, session_id: str):
+        try:
+            async with db_manager.get_session() as db:
+                await db.execute(
+                    "DELETE FROM compressed_contexts WHERE session_id = ?",
+                    (session_id,),
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(
+                f"Failed to delete compressed context for session {session_id}: {e}"
+            )
+
+    async def close(self):
+        """Stop workers and cancel in-flight compressions"""
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {**self.stats, "workers": self.max_workers, "jobs": states}
+
+
+# Global instance
+_compression_scheduler = None
+
+
+def get_compression_scheduler() -> CompressionScheduler:
+    """Get global compression scheduler instance"""
+    global _compression_scheduler
+    if _compression_scheduler is None:
+        _compression_scheduler = CompressionScheduler()
+    return _compression_scheduler
@@ -2,30 +2,42 @@
 Main memory manager that orchestrates the conversation memory system
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, List, Optional, Any
 from datetime import datetime
 
 from .models import (
     ConversationSession,
     ConversationTurn,
     ConversationSummary,
-    CompressedContext
+    CompressedContext,
+    TurnRow,
+    TURN_ROW_COLUMNS
 )
 from .session_manager import SessionManager
 from .compression_engine import CompressionEngine
 from .buffer_zone_manager import BufferZoneCompressionManager
-from aichat.core.database import db_ops
+from .turn_journal import get_turn_journal
+from aichat.core.archive import get_archive_manager
+from aichat.core.database import db_manager, db_ops
 from aichat.core.event_system import EventType, get_event_system
 
 logger = logging.getLogger(__name__)
 
+TURN_SELECT = ", ".join(TURN_ROW_COLUMNS)
+
 
 class MemoryManager:
     """Central manager for conversation memory"""
     
     def __init__(self):
-        self.session_manager = SessionManager()
+        # Turn and session writes go through the write-behind journal
+        self.journal = get_turn_journal()
+        # Old sessions are moved out of the hot database and read back on demand
+        self.archive = get_archive_manager()
+        self.session_manager = SessionManager(journal=self.journal, archive=self.archive)
         self.compression_engine = CompressionEngine()
         self.buffer_zone_manager = BufferZoneCompressionManager()
         self.event_system = get_event_system()
@@ -34,6 +46,11 @@ class MemoryManager:
         self._turn_cache: Dict[str, List[ConversationTurn]] = {}
         self._context_cache: Dict[str, CompressedContext] = {}
         
+        # Per-conversation locks, keyed by user and character; the count tracks
+        # holders and waiters so idle locks can be dropped
+        self._conversation_locks: Dict[str, asyncio.Lock] = {}
+        self._conversation_lock_users: Dict[str, int] = {}
+        
         # Initialize database tables
         self._init_database()
     
@@ -106,14 +123,57 @@ class MemoryManager:
                 timestamp TEXT NOT NULL,
                 FOREIGN KEY (session_id) REFERENCES conversation_sessions(session_id)
             )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS compressed_contexts (
+                session_id TEXT PRIMARY KEY,
+                compressed_at_turn INTEGER NOT NULL,
+                context TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
             """
         ]
         
-        for query in queries:
-            try:
-                await db_ops.execute_query(query)
-            except Exception as e:
-                logger.error(f"Failed to create table: {e}")
+        try:
+            async with db_manager.get_session() as db:
+                for query in queries:
+                    await db.execute(query)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to create memory tables: {e}")
+            return
+        
+        # Tables exist; commit any journal entries replayed from a previous run
+        self.journal.start()
+    
+    @staticmethod
+    def conversation_key(user_id: str, character_id: int) -> str:
+        """Key identifying a user's conversation with a character"""
+        return f"{user_id}:{character_id}"
+    
+    @asynccontextmanager
+    async def conversation_lock(self, user_id: str, character_id: int) -> AsyncGenerator[None, None]:
+        """
+        Serialize turn processing for one conversation.
+        
+        Different conversations run fully in parallel; within a conversation,
+        session lookup, turn numbering and compression checks run one message
+        at a time. Not reentrant.
+        """
+        key = self.conversation_key(user_id, character_id)
+        lock = self._conversation_locks.get(key)
+        if lock is None:
+            lock = self._conversation_locks[key] = asyncio.Lock()
+        self._conversation_lock_users[key] = self._conversation_lock_users.get(key, 0) + 1
+        
+        try:
+            async with lock:
+                yield
+        finally:
+            self._conversation_lock_users[key] -= 1
+            if self._conversation_lock_users[key] == 0:
+                del self._conversation_lock_users[key]
+                del self._conversation_locks[key]
     
     async def start_session(
         self,
@@ -149,25 +209,43 @@ class MemoryManager:
         
         # Ensure caches are initialized
         if session.session_id not in self._turn_cache:
-            # Load existing turns from database
-            turns = await self._load_session_turns(session.session_id)
+            # Load existing turns and context concurrently
+            turns, context = await asyncio.gather(
+                self._load_session_turns(session.session_id),
+                self._load_or_create_context(session.session_id)
+            )
             self._turn_cache[session.session_id] = turns
-            
-            # Load or create context
-            context = await self._load_or_create_context(session.session_id)
             self._context_cache[session.session_id] = context
         
         return session
     
+    async def load_session(
+        self,
+        user_id: str,
+        character_id: int,
+        character_name: str
+    ) -> ConversationSession:
+        """get_or_create_session, serialized with turn processing for the conversation"""
+        
+        async with self.conversation_lock(user_id, character_id):
+            return await self.get_or_create_session(user_id, character_id, character_name)
+    
     async def add_turn(
         self,
         session_id: str,
         speaker_id: str,
         speaker_type: str,
         message: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        character_data: Optional[Dict[str, Any]] = None,
+        chat_log: Optional[List[Any]] = None
     ) -> ConversationTurn:
-        """Add a turn to the conversation"""
+        """
+        Add a turn to the conversation
+        
+        character_data avoids a character lookup if compression triggers;
+        chat_log (a turn_journal.chat_log_row) is committed together with the turn.
+        """
         
         # Get session
         session = await self.session_manager.get_session(session_id)
@@ -180,9 +258,16 @@ class MemoryManager:
         
         turns = self._turn_cache[session_id]
         
+        # Number from the session's running total: compression trims the cache, so
+        # len(turns) would reuse turn numbers already stored in conversation_turns.
+        # The shared journal allocates, so other MemoryManagers can't reuse it either
+        turn_number = self.journal.next_turn_number(
+            session_id, max(session.total_turns, turns[-1].turn_id if turns else 0)
+        )
+        
         # Create new turn
         turn = ConversationTurn(
-            turn_id=len(turns) + 1,
+            turn_id=turn_number,
             session_id=session_id,
             speaker_id=speaker_id,
             speaker_type=speaker_type,
@@ -192,11 +277,14 @@ class MemoryManager:
             metadata=metadata or {}
         )
         
+        # Score content once so compression doesn't re-score unchanged history
+        turn.importance_score = self.compression_engine.score_turn_content(turn)
+        
         # Add to cache
         turns.append(turn)
         
-        # Persist to database
-        await self._persist_turn(turn)
+        # Journal the turn; the database write happens in the background
+        await self.journal.append_turn(turn, chat_log=chat_log)
         
         # Update session activity
         await self.session_manager.update_session_activity(
@@ -206,12 +294,16 @@ class MemoryManager:
         )
         
         # Two-stage compression check
-        await self._handle_two_stage_compression(session_id, session, turn)
+        await self._handle_two_stage_compression(session_id, session, turn, character_data)
         
         logger.debug(f"Added turn {turn.turn_id} to session {session_id}")
         return turn
     
-    async def compress_conversation(self, session_id: str) -> CompressedContext:
+    async def compress_conversation(
+        self,
+        session_id: str,
+        character_data: Optional[Dict[str, Any]] = None
+    ) -> CompressedContext:
         """Compress the conversation for a session"""
         
         # Get session and turns
@@ -223,13 +315,8 @@ class MemoryManager:
         if not turns:
             return CompressedContext()
         
-        # Get character data
-        character = await db_ops.get_character(session.character_id)
-        character_data = {
-            "name": character.name,
-            "personality": character.personality,
-            "profile": character.profile
-        } if character else {}
+        if character_data is None:
+            character_data = await self._get_character_data(session.character_id)
         
         # Calculate current tokens
         current_tokens = sum(t.token_count for t in turns)
@@ -294,42 +381,24 @@ class MemoryManager:
         try:
             # Build search query
             if session_id:
-                sql = """
-                    SELECT * FROM conversation_turns 
+                sql = f"""
+                    SELECT {TURN_SELECT} FROM conversation_turns 
                     WHERE session_id = ? AND message LIKE ?
                     ORDER BY importance_score DESC, turn_number DESC
                     LIMIT ?
                 """
                 params = (session_id, f"%{query}%", limit)
             else:
-                sql = """
-                    SELECT * FROM conversation_turns 
+                sql = f"""
+                    SELECT {TURN_SELECT} FROM conversation_turns 
                     WHERE message LIKE ?
                     ORDER BY importance_score DESC, timestamp DESC
                     LIMIT ?
                 """
                 params = (f"%{query}%", limit)
             
-            results = await db_ops.fetch_all(sql, params)
-            
-            # Convert to ConversationTurn objects
-            turns = []
-            for row in results:
-                import json
-                turn = ConversationTurn(
-                    turn_id=row["turn_number"],
-                    session_id=row["session_id"],
-                    speaker_id=row["speaker_id"],
-                    speaker_type=row["speaker_type"],
-                    message=row["message"],
-                    timestamp=datetime.fromisoformat(row["timestamp"]),
-                    token_count=row["token_count"] or 0,
-                    metadata=json.loads(row["metadata"] or "{}"),
-                    importance_score=row["importance_score"] or 0.0
-                )
-                turns.append(turn)
-            
-            return turns
+            rows = await self._fetch_turn_rows(sql, params)
+            return [row.to_turn() for row in rows]
             
         except Exception as e:
             logger.error(f"Failed to search memories: {e}")
@@ -352,6 +421,21 @@ class MemoryManager:
         # Load from database
         return await self._load_session_turns(session_id, limit)
     
+    async def get_session_history_rows(
+        self,
+        session_id: str,
+        limit: Optional[int] = None
+    ) -> List[TurnRow]:
+        """Session history as lightweight rows, for serializing straight to a response"""
+        
+        if session_id in self._turn_cache:
+            turns = self._turn_cache[session_id]
+            if limit:
+                turns = turns[-limit:]
+            return [TurnRow.from_turn(turn) for turn in turns]
+        
+        return await self._fetch_session_turn_rows(session_id, limit)
+    
     async def get_session_summary(self, session_id: str) -> Dict[str, Any]:
         """Get summary of a conversation session"""
         
@@ -386,7 +470,8 @@ class MemoryManager:
         self,
         session_id: str,
         session: ConversationSession,
-        new_turn: ConversationTurn
+        new_turn: ConversationTurn,
+        character_data: Optional[Dict[str, Any]] = None
     ):
         """Handle the two-stage compression workflow"""
         
@@ -398,13 +483,8 @@ class MemoryManager:
         if await self.buffer_zone_manager.should_trigger_compression(session_id, turns):
             logger.info(f"75% threshold reached for session {session_id}, starting background compression")
             
-            # Get character data
-            character = await db_ops.get_character(session.character_id)
-            character_data = {
-                "name": character.name,
-                "personality": character.personality,
-                "profile": character.profile
-            } if character else {}
+            if character_data is None:
+                character_data = await self._get_character_data(session.character_id)
             
             # Start background compression
             await self.buffer_zone_manager.start_background_compression(
@@ -433,33 +513,16 @@ class MemoryManager:
             
             logger.info(f"Context reset completed for session {session_id}")
     
-    async def _persist_turn(self, turn: ConversationTurn):
-        """Persist a turn to the database"""
+    async def _get_character_data(self, character_id: int) -> Dict[str, Any]:
+        """Character fields used by compression, when the caller didn't supply them"""
         
-        try:
-            import json
-            
-            await db_ops.execute_query(
-                """
-                INSERT INTO conversation_turns 
-                (session_id, turn_number, speaker_id, speaker_type, 
-                 message, timestamp, token_count, metadata, importance_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    turn.session_id,
-                    turn.turn_id,
-                    turn.speaker_id,
-                    turn.speaker_type,
-                    turn.message,
-                    turn.timestamp.isoformat(),
-                    turn.token_count,
-                    json.dumps(turn.metadata),
-                    turn.importance_score
-                )
-            )
-        except Exception as e:
-            logger.error(f"Failed to persist turn: {e}")
+        character = await db_ops.get_character(character_id)
+        return {
+            "id": character.id,
+            "name": character.name,
+            "personality": character.personality,
+            "profile": character.profile
+        } if character else {}
     
     async def _load_session_turns(
         self,
@@ -469,39 +532,57 @@ class MemoryManager:
         """Load turns for a session from database"""
         
         try:
-            sql = """
-                SELECT * FROM conversation_turns 
-                WHERE session_id = ?
-                ORDER BY turn_number
-            """
-            
-            if limit:
-                sql += f" LIMIT {limit}"
-            
-            results = await db_ops.fetch_all(sql, (session_id,))
-            
-            turns = []
-            for row in results:
-                import json
-                turn = ConversationTurn(
-                    turn_id=row["turn_number"],
-                    session_id=row["session_id"],
-                    speaker_id=row["speaker_id"],
-                    speaker_type=row["speaker_type"],
-                    message=row["message"],
-                    timestamp=datetime.fromisoformat(row["timestamp"]),
-                    token_count=row["token_count"] or 0,
-                    metadata=json.loads(row["metadata"] or "{}"),
-                    importance_score=row["importance_score"] or 0.0
-                )
-                turns.append(turn)
-            
-            return turns
+            rows = await self._fetch_session_turn_rows(session_id, limit)
+            return [row.to_turn() for row in rows]
             
         except Exception as e:
             logger.error(f"Failed to load session turns: {e}")
             return []
     
+    @staticmethod
+    def _session_turns_query(session_id: str, limit: Optional[int] = None):
+        sql = f"""
+            SELECT {TURN_SELECT} FROM conversation_turns 
+            WHERE session_id = ?
+            ORDER BY turn_number
+        """
+        params = (session_id,)
+        
+        if limit:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return sql, params
+    
+    async def _fetch_session_turn_rows(self, session_id: str, limit: Optional[int] = None) -> List[TurnRow]:
+        """
+        Session turns from the hot database merged with any archived ones
+        
+        A resumed session keeps its older turns in the archive while new ones
+        land in the hot database, so both are read and ordered by turn number.
+        """
+        archived = await self.archive.load_session(session_id)
+        if not archived:
+            return await self._fetch_turn_rows(*self._session_turns_query(session_id, limit))
+        
+        rows = await self._fetch_turn_rows(*self._session_turns_query(session_id))
+        hot = {row.turn_id for row in rows}
+        rows.extend(
+            TurnRow(*(turn[column] for column in TURN_ROW_COLUMNS))
+            for turn in archived["turns"]
+            if turn["turn_number"] not in hot
+        )
+        rows.sort(key=lambda row: row.turn_id)
+        return rows[:limit] if limit else rows
+    
+    async def _fetch_turn_rows(self, sql: str, params: tuple) -> List[TurnRow]:
+        """Run a SELECT of TURN_ROW_COLUMNS, decoding rows straight into TurnRow"""
+        # Turns are written behind; commit journaled ones so reads see every turn
+        await self.journal.flush()
+        async with db_manager.get_session() as db:
+            db.row_factory = TurnRow.factory
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+    
     async def _load_or_create_context(self, session_id: str) -> CompressedContext:
         """Load existing context or create new one"""
         
@@ -2,6 +2,7 @@
 Data models for the conversation memory system
 """
 
+import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Literal
 from dataclasses import dataclass, field
@@ -39,6 +40,7 @@ class ConversationTurn:
     token_count: int = 0
     metadata: Dict[str, Any] = field(default_factory=dict)
     importance_score: float = 0.0
+    content_score: Optional[float] = None  # Cached position-independent heuristic score
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage"""
@@ -53,6 +55,94 @@ class ConversationTurn:
             "metadata": self.metadata,
             "importance_score": self.importance_score
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationTurn":
+        """Create from a to_dict() dictionary"""
+        return cls(
+            turn_id=data["turn_id"],
+            session_id=data["session_id"],
+            speaker_id=data["speaker_id"],
+            speaker_type=data["speaker_type"],
+            message=data["message"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            token_count=data.get("token_count", 0),
+            metadata=data.get("metadata") or {},
+            importance_score=data.get("importance_score", 0.0)
+        )
+
+
+TURN_ROW_COLUMNS = (
+    "turn_number", "session_id", "speaker_id", "speaker_type",
+    "message", "timestamp", "token_count", "metadata", "importance_score",
+)
+
+
+class TurnRow:
+    """
+    Lightweight conversation_turns row for bulk reads.
+
+    Built straight from the cursor tuple (SELECT TURN_ROW_COLUMNS with
+    TurnRow.factory as the row factory); metadata JSON is decoded on first
+    access and the timestamp stays an ISO string.
+    """
+
+    __slots__ = ("turn_id", "session_id", "speaker_id", "speaker_type", "message",
+                 "timestamp", "token_count", "_raw_metadata", "_metadata", "importance_score")
+
+    def __init__(self, turn_id, session_id, speaker_id, speaker_type, message,
+                 timestamp, token_count, metadata, importance_score):
+        self.turn_id = turn_id
+        self.session_id = session_id
+        self.speaker_id = speaker_id
+        self.speaker_type = speaker_type
+        self.message = message
+        self.timestamp = timestamp
+        self.token_count = token_count or 0
+        self._raw_metadata = metadata
+        self._metadata = None
+        self.importance_score = importance_score or 0.0
+
+    @staticmethod
+    def factory(cursor: Any, row: tuple) -> "TurnRow":
+        return TurnRow(*row)
+
+    @classmethod
+    def from_turn(cls, turn: ConversationTurn) -> "TurnRow":
+        row = cls(turn.turn_id, turn.session_id, turn.speaker_id, turn.speaker_type, turn.message,
+                  turn.timestamp.isoformat(), turn.token_count, None, turn.importance_score)
+        row._metadata = turn.metadata
+        return row
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            self._metadata = json.loads(self._raw_metadata or "{}")
+        return self._metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Session history response entry"""
+        return {
+            "turn_id": self.turn_id,
+            "speaker_id": self.speaker_id,
+            "speaker_type": self.speaker_type,
+            "message": self.message,
+            "timestamp": self.timestamp,
+            "metadata": self.metadata,
+        }
+
+    def to_turn(self) -> ConversationTurn:
+        return ConversationTurn(
+            turn_id=self.turn_id,
+            session_id=self.session_id,
+            speaker_id=self.speaker_id,
+            speaker_type=self.speaker_type,
+            message=self.message,
+            timestamp=datetime.fromisoformat(self.timestamp),
+            token_count=self.token_count,
+            metadata=self.metadata,
+            importance_score=self.importance_score
+        )
 
 
 @dataclass
@@ -165,6 +255,35 @@ class CompressedContext:
         """Estimate token count of compressed context"""
         # Simple estimation: ~4 characters per token
         return len(self.to_prompt()) // 4
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage"""
+        return {
+            "character_reminder": self.character_reminder,
+            "session_summary": self.session_summary,
+            "key_topics": [[topic, list(turn_refs)] for topic, turn_refs in self.key_topics],
+            "emotional_journey": self.emotional_journey,
+            "important_facts": self.important_facts,
+            "preserved_turns": [turn.to_dict() for turn in self.preserved_turns],
+            "recent_turns": [turn.to_dict() for turn in self.recent_turns],
+            "buffer_turns": [turn.to_dict() for turn in self.buffer_turns],
+            "compression_metadata": self.compression_metadata
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompressedContext":
+        """Create from a to_dict() dictionary"""
+        return cls(
+            character_reminder=data.get("character_reminder", ""),
+            session_summary=data.get("session_summary", ""),
+            key_topics=[(topic, list(turn_refs)) for topic, turn_refs in data.get("key_topics", [])],
+            emotional_journey=data.get("emotional_journey", ""),
+            important_facts=data.get("important_facts", []),
+            preserved_turns=[ConversationTurn.from_dict(t) for t in data.get("preserved_turns", [])],
+            recent_turns=[ConversationTurn.from_dict(t) for t in data.get("recent_turns", [])],
+            buffer_turns=[ConversationTurn.from_dict(t) for t in data.get("buffer_turns", [])],
+            compression_metadata=data.get("compression_metadata", {})
+        )
 
 
 @dataclass
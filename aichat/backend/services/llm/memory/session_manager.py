@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 from uuid import uuid4
 
 from .models import ConversationSession, ConversationTurn
-from aichat.core.database import db_ops
+from aichat.core.database import db_manager, db_ops
 from aichat.core.event_system import EventType, get_event_system
 
 logger = logging.getLogger(__name__)
@@ -17,11 +17,18 @@ logger = logging.getLogger(__name__)
 class SessionManager:
     """Manages conversation sessions and their lifecycle"""
     
-    def __init__(self):
+    def __init__(self, journal=None, archive=None):
         self.event_system = get_event_system()
         self._active_sessions: Dict[str, ConversationSession] = {}
         self._session_timeout_hours = 24  # Sessions expire after 24 hours of inactivity
         
+        # Optional TurnJournal; when set, session writes are journaled instead of
+        # committed directly
+        self.journal = journal
+        
+        # Optional ArchiveManager, consulted for sessions no longer in the hot database
+        self.archive = archive
+        
     async def create_session(
         self,
         character_id: int,
@@ -129,8 +136,9 @@ class SessionManager:
         session.total_turns += turn_count
         session.total_tokens += token_count
         
-        # Persist periodically (every 10 turns)
-        if session.total_turns % 10 == 0:
+        # Journaled snapshots are cheap and coalesced per batch, so keep the row
+        # current; direct writes only happen periodically (every 10 turns)
+        if self.journal is not None or session.total_turns % 10 == 0:
             await self._persist_session(session)
     
     async def record_compression(self, session_id: str):
@@ -150,6 +158,10 @@ class SessionManager:
             # Final persist
             await self._persist_session(session)
             
+            # Background compression is no longer needed
+            from .compression_scheduler import get_compression_scheduler
+            await get_compression_scheduler().cancel(session_id)
+            
             # Remove from active cache
             del self._active_sessions[session_id]
             
@@ -190,6 +202,10 @@ class SessionManager:
     async def _persist_session(self, session: ConversationSession):
         """Persist session to database"""
         
+        if self.journal is not None:
+            await self.journal.append_session(session)
+            return
+        
         try:
             # Store session data
             await db_ops.execute_query(
@@ -217,12 +233,19 @@ class SessionManager:
         """Load session from database"""
         
         try:
-            result = await db_ops.fetch_one(
-                """
-                SELECT * FROM conversation_sessions WHERE session_id = ?
-                """,
-                (session_id,)
-            )
+            if self.journal is not None:
+                # Session snapshots are written behind; commit journaled ones first
+                await self.journal.flush()
+            async with db_manager.get_session() as db:
+                cursor = await db.execute(
+                    "SELECT * FROM conversation_sessions WHERE session_id = ?",
+                    (session_id,)
+                )
+                result = await cursor.fetchone()
+            
+            if result is None and self.archive is not None:
+                archived = await self.archive.load_session(session_id)
+                result = archived["session"] if archived else None
             
             if result:
                 import json
@@ -235,7 +258,7 @@ class SessionManager:
                     participants=json.loads(result["participants"]),
                     total_turns=result["total_turns"],
                     compression_count=result["compression_count"],
-                    metadata=json.loads(result["metadata"])
+                    metadata=json.loads(result["metadata"] or "{}")
                 )
                 
         except Exception as e:
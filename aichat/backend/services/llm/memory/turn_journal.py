@@ -0,0 +1,560 @@
+"""
+Write-behind journal for conversation turns
+
+Turns, session snapshots and chat log rows are appended to an fsync'd journal file as soon as
+they are added, so a reply never waits on SQLite. A background flusher then
+group-commits queued entries into conversation_turns and conversation_sessions
+in batched transactions. Entries left in the journal by a crash are replayed
+when the journal is opened. A crash after a commit but before the journal is
+truncated replays entries that are already in the database. Such a group
+(a turn and its chat log row, committed in one transaction) is recognised by
+its (session_id, turn_number) row holding the same message and skipped, so
+neither the turn nor the chat log is written twice.
+
+Every MemoryManager in a process shares one journal, which also hands out
+turn numbers (next_turn_number) so two managers cannot number the same
+session's turns independently. A group that cannot be committed (a turn
+number collision, or any error that persists for max_attempts flushes) is
+set aside in a .rejected.jsonl file next to the journal and logged, instead
+of blocking every entry queued behind it.
+
+Each process journals to its own file (conversation_turns.<pid>.jsonl by
+default). Files left by processes that are no longer running are adopted
+and replayed by the next journal opened on the same directory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+from .models import ConversationSession, ConversationTurn
+from aichat.constants.paths import DATA_DIR
+from aichat.core.database import db_manager, encode_chat_log_metadata
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_JOURNAL_PATH = DATA_DIR / "journal" / "conversation_turns.jsonl"
+
+TURN_COLUMNS = (
+    "session_id",
+    "turn_number",
+    "speaker_id",
+    "speaker_type",
+    "message",
+    "timestamp",
+    "token_count",
+    "metadata",
+    "importance_score",
+)
+CHAT_LOG_COLUMNS = (
+    "character_id",
+    "user_message",
+    "character_response",
+    "emotion",
+    "metadata",
+)
+SESSION_COLUMNS = (
+    "session_id",
+    "character_id",
+    "started_at",
+    "last_activity",
+    "participants",
+    "total_turns",
+    "compression_count",
+    "metadata",
+)
+
+INSERT_TURN_SQL = (
+    f"INSERT INTO conversation_turns ({', '.join(TURN_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TURN_COLUMNS))})"
+)
+SELECT_TURN_SQL = "SELECT message, timestamp FROM conversation_turns WHERE session_id = ? AND turn_number = ?"
+INSERT_CHAT_LOG_SQL = (
+    f"INSERT INTO chat_logs ({', '.join(CHAT_LOG_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(CHAT_LOG_COLUMNS))})"
+)
+REJECTED_SUFFIX = ".rejected.jsonl"
+
+UPSERT_SESSION_SQL = (
+    f"INSERT OR REPLACE INTO conversation_sessions ({', '.join(SESSION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(SESSION_COLUMNS))})"
+)
+
+
+def turn_row(turn: ConversationTurn) -> List[Any]:
+    """Column values for a conversation_turns row"""
+    return [
+        turn.session_id,
+        turn.turn_id,
+        turn.speaker_id,
+        turn.speaker_type,
+        turn.message,
+        turn.timestamp.isoformat(),
+        turn.token_count,
+        json.dumps(turn.metadata, default=str),
+        turn.importance_score,
+    ]
+
+
+def chat_log_row(
+    character_id: int,
+    user_message: str,
+    character_response: str,
+    emotion: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    """Column values for a chat_logs row (same encoding as database.create_chat_log)"""
+    return [
+        character_id,
+        user_message,
+        character_response,
+        emotion,
+        encode_chat_log_metadata(metadata),
+    ]
+
+
+def session_row(session: ConversationSession) -> List[Any]:
+    """Column values for a conversation_sessions row"""
+    return [
+        session.session_id,
+        session.character_id,
+        session.started_at.isoformat(),
+        session.last_activity.isoformat(),
+        json.dumps(session.participants),
+        session.total_turns,
+        session.compression_count,
+        json.dumps(session.metadata, default=str),
+    ]
+
+
+def process_journal_path(base: Path, pid: Optional[int] = None) -> Path:
+    """The journal file of one process: <stem>.<pid><suffix> next to base"""
+    return base.with_name(f"{base.stem}.{pid or os.getpid()}{base.suffix}")
+
+
+def _journal_pid(path: Path, base: Path) -> Optional[int]:
+    """Owning pid of a per-process journal file (None for other files)"""
+    middle = path.name[len(base.stem) + 1 : len(path.name) - len(base.suffix)]
+    return int(middle) if middle.isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TurnJournal:
+    """Durable append-only journal with a group-committing background flusher"""
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        flush_interval: float = 0.05,
+        max_batch: int = 500,
+        max_retry_interval: float = 30.0,
+        max_attempts: int = 8,
+    ):
+        if path is None:
+            base = Path(os.getenv("MEMORY_JOURNAL_PATH") or DEFAULT_JOURNAL_PATH)
+            self.path = process_journal_path(base)
+        else:
+            base = None
+            self.path = Path(path)
+        self.rejected_path = self.path.with_name(self.path.stem + REJECTED_SUFFIX)
+        self.flush_interval = (
+            flush_interval  # Group commit window after the first pending entry
+        )
+        self.max_batch = max_batch  # Entries per transaction
+        self.max_retry_interval = max_retry_interval
+        self.max_attempts = (
+            max_attempts  # Failed flushes of one batch before it is split up
+        )
+
+        # Pending entries: {"seq": int, "type": "turn" | "session" | "chat_log", "row": [...]}
+        # Entries appended together share a seq and are always committed together
+        self._pending: List[Dict[str, Any]] = []
+        self._seq = 0
+        self._written_seq = 0  # Last sequence fsync'd to the journal file
+        self._flushed_seq = 0  # Last sequence committed to the database
+        self._failed_attempts = 0  # Consecutive failed commits of the head batch
+
+        # Last turn number handed out per session (see next_turn_number)
+        self._turn_numbers: Dict[str, int] = {}
+
+        # All file I/O runs on one thread so appends and truncation stay ordered
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="turn-journal")
+        self._file = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.stats = {
+            "appended": 0,
+            "flushed": 0,
+            "transactions": 0,
+            "replayed": 0,
+            "replay_skipped": 0,
+            "flush_errors": 0,
+            "set_aside": 0,
+        }
+
+        self._replay()
+        if base is not None:
+            self._adopt_orphans(base)
+        for entry in self._pending:
+            if entry["type"] == "turn":
+                session_id, turn_number = entry["row"][0], entry["row"][1]
+                self._turn_numbers[session_id] = max(
+                    self._turn_numbers.get(session_id, 0), turn_number
+                )
+
+    def _replay(self):
+        """Queue entries left in the journal by a previous run"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        logger.warning(
+                            f"Skipping unreadable journal entry in {self.path}"
+                        )
+                        continue
+                    entry["replayed"] = True
+                    self._pending.append(entry)
+                    self._seq = max(self._seq, entry["seq"])
+        except Exception as e:
+            logger.error(f"Failed to replay turn journal {self.path}: {e}")
+            return
+
+        self._written_seq = self._seq
+        self.stats["replayed"] = len(self._pending)
+        if self._pending:
+            logger.info(
+                f"Replaying {len(self._pending)} unflushed journal entries from {self.path}"
+            )
+
+    def _adopt_orphans(self, base: Path):
+        """Take over journal files of processes that exited without flushing them"""
+        candidates = [base] + sorted(base.parent.glob(f"{base.stem}.*{base.suffix}"))
+        for orphan in candidates:
+            if orphan == self.path or not orphan.exists():
+                continue
+            pid = _journal_pid(orphan, base) if orphan != base else None
+            if orphan != base and (pid is None or _pid_alive(pid)):
+                continue
+
+            # Claim by rename so two starting processes cannot both adopt it
+            claimed = self.path.with_name(f"{self.path.name}.adopting")
+            try:
+                os.replace(orphan, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                entries = []
+                seqs: Dict[int, int] = {}
+                with open(claimed, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        # Renumber into this journal's sequence, keeping groups together
+                        if entry["seq"] not in seqs:
+                            self._seq += 1
+                            seqs[entry["seq"]] = self._seq
+                        entry["seq"] = seqs[entry["seq"]]
+                        entries.append(entry)
+
+                if entries:
+                    self._write_lines(
+                        "".join(json.dumps(e, default=str) + "\n" for e in entries),
+                        self._seq,
+                    )
+                    for entry in entries:
+                        entry["replayed"] = True
+                    self._pending.extend(entries)
+                    self.stats["replayed"] += len(entries)
+                    logger.info(
+                        f"Adopted {len(entries)} unflushed journal entries from {orphan}"
+                    )
+                os.unlink(claimed)
+            except Exception as e:
+                logger.error(
+                    f"Failed to adopt turn journal {orphan} (left at {claimed}): {e}"
+                )
+
+    def next_turn_number(self, session_id: str, floor: int = 0) -> int:
+        """
+        Allocate the next turn number for a session.
+
+        floor is the highest turn number the caller knows of (its cache, the
+        session's total). Allocation is shared by every MemoryManager using
+        this journal, so two managers never hand out the same number.
+        """
+        number = max(self._turn_numbers.get(session_id, 0), floor) + 1
+        self._turn_numbers[session_id] = number
+        return number
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Start the background flusher (requires a running event loop)"""
+        if self._flusher is not None and not self._flusher.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        if self._pending:
+            self._wakeup.set()
+
+    async def append_turn(
+        self, turn: ConversationTurn, chat_log: Optional[List[Any]] = None
+    ):
+        """
+        Durably journal a turn; it is committed to the database in the background.
+
+        chat_log (a chat_log_row) is committed in the same transaction as the turn.
+        """
+        entries = [("turn", turn_row(turn))]
+        if chat_log is not None:
+            entries.append(("chat_log", chat_log))
+        await self._append(entries)
+
+    async def append_session(self, session: ConversationSession):
+        """Durably journal a session snapshot"""
+        await self._append([("session", session_row(session))])
+
+    async def _append(self, rows: List[Any]):
+        self.start()
+
+        self._seq += 1
+        entries = [
+            {"seq": self._seq, "type": entry_type, "row": row}
+            for entry_type, row in rows
+        ]
+        self._pending.extend(entries)
+        self.stats["appended"] += len(entries)
+
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+        await asyncio.get_running_loop().run_in_executor(
+            self._io, self._write_lines, lines, self._seq
+        )
+        self._wakeup.set()
+
+    def _write_lines(self, lines: str, seq: int):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(lines)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._written_seq = seq
+
+    def _truncate_if_flushed(self, flushed_seq: int):
+        """Empty the journal once everything written to it is in the database"""
+        if self._written_seq > flushed_seq:
+            return
+        if self._file is None:
+            if not self.path.exists():
+                return
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.truncate(0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def _flush_loop(self):
+        retry_interval = self.flush_interval
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(retry_interval)
+
+            try:
+                await self.flush()
+                retry_interval = self.flush_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                if retry_interval == self.flush_interval:
+                    logger.error(f"Turn journal flush failed, will retry: {e}")
+                retry_interval = min(
+                    max(retry_interval * 2, 0.5), self.max_retry_interval
+                )
+                self._wakeup.set()
+
+    async def flush(self):
+        """Commit all pending entries to the database"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            while self._pending:
+                # Never split entries that were appended together
+                size = min(self.max_batch, len(self._pending))
+                while (
+                    size < len(self._pending)
+                    and self._pending[size]["seq"] == self._pending[size - 1]["seq"]
+                ):
+                    size += 1
+                batch = self._pending[:size]
+                try:
+                    await self._commit_batch(batch)
+                    self._failed_attempts = 0
+                except Exception as e:
+                    self._failed_attempts += 1
+                    # A collision fails the same way every time; other errors may be transient
+                    if (
+                        not isinstance(e, sqlite3.IntegrityError)
+                        and self._failed_attempts < self.max_attempts
+                    ):
+                        raise
+                    self._failed_attempts = 0
+                    await self._commit_groups(batch)
+
+                del self._pending[: len(batch)]
+                self._flushed_seq = batch[-1]["seq"]
+                self.stats["flushed"] += len(batch)
+                self.stats["transactions"] += 1
+
+            await asyncio.get_running_loop().run_in_executor(
+                self._io, self._truncate_if_flushed, self._flushed_seq
+            )
+
+    async def _commit_groups(self, batch: List[Dict[str, Any]]):
+        """Commit a failing batch one group at a time, setting aside the groups that still fail"""
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for entry in batch:
+            groups.setdefault(entry["seq"], []).append(entry)
+
+        for seq, group in groups.items():
+            try:
+                await self._commit_batch(group)
+            except Exception as e:
+                logger.error(
+                    f"Setting aside journal entry {seq} ({', '.join(entry['type'] for entry in group)}) "
+                    f"in {self.rejected_path}: {e}"
+                )
+                lines = "".join(
+                    json.dumps({**entry, "error": str(e)}, default=str) + "\n"
+                    for entry in group
+                )
+                await asyncio.get_running_loop().run_in_executor(
+                    self._io, self._write_rejected, lines
+                )
+                self.stats["set_aside"] += len(group)
+
+    def _write_rejected(self, lines: str):
+        self.rejected_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.rejected_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _committed_replay_seqs(self, db, batch: List[Dict[str, Any]]) -> Set[int]:
+        """Sequences of replayed turns already committed before the crash (same turn, same content)"""
+        committed: Set[int] = set()
+        for entry in batch:
+            if entry["type"] != "turn" or not entry.get("replayed"):
+                continue
+            row = entry["row"]
+            cursor = await db.execute(SELECT_TURN_SQL, (row[0], row[1]))
+            existing = await cursor.fetchone()
+            if existing is not None and (existing[0], existing[1]) == (row[4], row[5]):
+                committed.add(entry["seq"])
+        return committed
+
+    async def _commit_batch(self, batch: List[Dict[str, Any]]):
+        """Write one batch in a single transaction"""
+        async with db_manager.get_session() as db:
+            if any(entry.get("replayed") for entry in batch):
+                committed = await self._committed_replay_seqs(db, batch)
+                # The turn's chat log row was committed in the same transaction
+                kept = [
+                    e
+                    for e in batch
+                    if not (e["type"] in ("turn", "chat_log") and e["seq"] in committed)
+                ]
+                self.stats["replay_skipped"] += len(batch) - len(kept)
+                batch = kept
+
+            turn_rows = [entry["row"] for entry in batch if entry["type"] == "turn"]
+            chat_log_rows = [
+                entry["row"] for entry in batch if entry["type"] == "chat_log"
+            ]
+
+            # Only the newest snapshot of each session matters
+            sessions: Dict[str, List[Any]] = {}
+            for entry in batch:
+                if entry["type"] == "session":
+                    sessions[entry["row"][0]] = entry["row"]
+
+            if turn_rows:
+                await db.executemany(INSERT_TURN_SQL, turn_rows)
+            if sessions:
+                await db.executemany(UPSERT_SESSION_SQL, list(sessions.values()))
+            if chat_log_rows:
+                await db.executemany(INSERT_CHAT_LOG_SQL, chat_log_rows)
+            await db.commit()
+
+    async def close(self):
+        """Flush pending entries and stop the flusher"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(
+                f"Final turn journal flush failed, {len(self._pending)} entries kept for replay: {e}"
+            )
+
+        await asyncio.get_running_loop().run_in_executor(self._io, self._close_file)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "path": str(self.path),
+            "rejected_path": str(self.rejected_path),
+        }
+
+
+# Global instance
+_turn_journal = None
+
+
+def get_turn_journal() -> TurnJournal:
+    """Get global turn journal instance"""
+    global _turn_journal
+    if _turn_journal is None:
+        _turn_journal = TurnJournal()
+    return _turn_journal
@@ -198,7 +198,12 @@ class CentralizedModelConfig:
             if self._is_provider_available(model.provider):
                 available[key] = model
         return available
-    
+
+    def get_models_in_priority_order(self) -> List[ModelSpec]:
+        """Get available models in selection priority order"""
+        available = self.get_available_models()
+        return [available[key] for key in self._priority_order if key in available]
+
     def _is_provider_available(self, provider: ModelProvider) -> bool:
         """Check if provider is available - OpenRouter only"""
         # Only support OpenRouter
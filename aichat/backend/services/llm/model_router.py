@@ -0,0 +1,369 @@
+"""
+Latency-Aware Model Router
+
+Tracks rolling latency and error rate per ModelSpec and picks the fastest
+healthy model within the allowed cost tier. Optionally hedges slow requests
+by racing a duplicate against a second model once the first exceeds its p95.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from .model_config import ModelSpec, ModelTier, model_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Cost tiers from cheapest to most expensive
+TIER_ORDER = [ModelTier.FREE, ModelTier.CHEAP, ModelTier.BUDGET, ModelTier.EXPENSIVE]
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+
+@dataclass
+class ModelStats:
+    """Rolling latency/error statistics for one model"""
+
+    name: str
+    window: int = 100
+    latencies: Deque[float] = field(default_factory=deque)
+    outcomes: Deque[bool] = field(default_factory=deque)
+    histogram: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    total_requests: int = 0
+    total_errors: int = 0
+    last_error: Optional[str] = None
+
+    def record(self, latency: float, success: bool, error: Optional[str] = None):
+        """Record one completed request"""
+        self.total_requests += 1
+        self.outcomes.append(success)
+        if len(self.outcomes) > self.window:
+            self.outcomes.popleft()
+
+        if success:
+            self.latencies.append(latency)
+            if len(self.latencies) > self.window:
+                self.latencies.popleft()
+            bucket = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound),
+                len(LATENCY_BUCKETS),
+            )
+            self.histogram[bucket] += 1
+        else:
+            self.total_errors += 1
+            self.last_error = error
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile over the rolling window (None without samples)"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "samples": len(self.latencies),
+            "p50": self.p50,
+            "p95": self.p95,
+            "error_rate": round(self.error_rate, 3),
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "last_error": self.last_error,
+            "histogram": {
+                **{
+                    f"le_{bound}": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.histogram)
+                },
+                "inf": self.histogram[-1],
+            },
+        }
+
+
+class ModelRouter:
+    """Routes requests to the fastest healthy model within the allowed tier"""
+
+    def __init__(
+        self,
+        max_tier: Optional[ModelTier] = None,
+        hedge_requests: Optional[bool] = None,
+        window: int = 100,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        default_latency: float = 4.0,
+        default_hedge_delay: float = 8.0,
+    ):
+        if max_tier is None:
+            max_tier = self._tier_from_env()
+        if hedge_requests is None:
+            hedge_requests = os.getenv("LLM_HEDGE_REQUESTS", "false").lower() in (
+                "1",
+                "true",
+                "yes",
+            )
+
+        self.max_tier = max_tier
+        self.hedge_requests = hedge_requests
+        self.window = window
+        self.min_samples = min_samples  # Samples before measured latency is trusted
+        self.max_error_rate = (
+            max_error_rate  # Above this a model is considered unhealthy
+        )
+        self.default_latency = (
+            default_latency  # Assumed p50 for models without enough samples
+        )
+        self.default_hedge_delay = default_hedge_delay
+
+        self._stats: Dict[str, ModelStats] = {}
+        self._decisions: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    def _tier_from_env(self) -> ModelTier:
+        """Allowed tier from LLM_MAX_TIER, defaulting to the default model's tier"""
+        env_tier = os.getenv("LLM_MAX_TIER")
+        if env_tier:
+            try:
+                return ModelTier(env_tier.lower())
+            except ValueError:
+                logger.warning(
+                    f"Unknown LLM_MAX_TIER '{env_tier}', using default model tier"
+                )
+        default_spec = model_config.get_default_model()
+        return default_spec.tier if default_spec else ModelTier.FREE
+
+    def get_stats(self, model_name: str) -> ModelStats:
+        """Get or create stats for a model"""
+        if model_name not in self._stats:
+            self._stats[model_name] = ModelStats(name=model_name, window=self.window)
+        return self._stats[model_name]
+
+    def candidates(self) -> List[ModelSpec]:
+        """Available models within the allowed tier, in configured priority order"""
+        allowed = TIER_ORDER[: TIER_ORDER.index(self.max_tier) + 1]
+        return [
+            spec
+            for spec in model_config.get_models_in_priority_order()
+            if spec.tier in allowed
+        ]
+
+    def _is_healthy(self, stats: ModelStats) -> bool:
+        return (
+            len(stats.outcomes) < self.min_samples
+            or stats.error_rate <= self.max_error_rate
+        )
+
+    def rank(self, exclude: Sequence[str] = ()) -> List[ModelSpec]:
+        """Candidates ordered by health, then expected latency, then priority"""
+        ranked = []
+        for priority, spec in enumerate(self.candidates()):
+            if spec.name in exclude:
+                continue
+            stats = self.get_stats(spec.name)
+            expected = (
+                stats.p50
+                if len(stats.latencies) >= self.min_samples
+                else self.default_latency
+            )
+            ranked.append(((not self._is_healthy(stats), expected, priority), spec))
+        ranked.sort(key=lambda item: item[0])
+        return [spec for _, spec in ranked]
+
+    def select(self, exclude: Sequence[str] = ()) -> Optional[ModelSpec]:
+        """Pick the fastest healthy model"""
+        ranked = self.rank(exclude)
+        return ranked[0] if ranked else None
+
+    def record(
+        self,
+        model_name: str,
+        latency: float,
+        success: bool,
+        error: Optional[str] = None,
+    ):
+        """Record a completed request for a model"""
+        self.get_stats(model_name).record(latency, success, error)
+
+    def _hedge_delay(self, model_name: str) -> float:
+        stats = self.get_stats(model_name)
+        if len(stats.latencies) >= self.min_samples and stats.p95 is not None:
+            return stats.p95
+        return self.default_hedge_delay
+
+    async def _timed(
+        self, spec: ModelSpec, send: Callable[[ModelSpec], Awaitable[T]]
+    ) -> T:
+        """Run one request and record its latency/outcome"""
+        started = time.perf_counter()
+        try:
+            result = await send(spec)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.record(spec.name, time.perf_counter() - started, False, str(e))
+            raise
+        self.record(spec.name, time.perf_counter() - started, True)
+        return result
+
+    async def request(
+        self,
+        send: Callable[[ModelSpec], Awaitable[T]],
+        max_attempts: int = 2,
+    ) -> Tuple[T, ModelSpec]:
+        """
+        Send a request through the router.
+
+        send(spec) performs the request against one model and raises on failure.
+        Failed models are excluded and the next best model is tried, up to
+        max_attempts. With hedging enabled a duplicate request is raced against
+        the second-best model once the first exceeds its p95; the loser is cancelled.
+        """
+        tried: List[str] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(max_attempts):
+            ranked = self.rank(exclude=tried)
+            if not ranked:
+                break
+
+            primary = ranked[0]
+            secondary = ranked[1] if self.hedge_requests and len(ranked) > 1 else None
+            tried.append(primary.name)
+            hedges: List[ModelSpec] = []
+
+            try:
+                result, winner, hedged = await self._race(
+                    primary, secondary, send, hedges
+                )
+                self._record_decision(primary, winner, hedged, tried)
+                return result, winner
+            except Exception as e:
+                last_error = e
+                # Only a hedge that was actually sent counts as tried
+                tried.extend(spec.name for spec in hedges)
+                logger.warning(f"Model request failed ({', '.join(tried)}): {e}")
+
+        self._record_decision(None, None, False, tried, error=str(last_error))
+        raise RuntimeError(f"All routed models failed: {last_error}")
+
+    async def _race(
+        self,
+        primary: ModelSpec,
+        secondary: Optional[ModelSpec],
+        send: Callable[[ModelSpec], Awaitable[T]],
+        hedges: List[ModelSpec],
+    ) -> Tuple[T, ModelSpec, bool]:
+        """
+        Run the primary request, hedging with the secondary after the primary's p95.
+        The secondary is appended to hedges once its request has started.
+        """
+        primary_task = asyncio.create_task(self._timed(primary, send))
+        specs = {primary_task: primary}
+
+        try:
+            if secondary is None:
+                return await primary_task, primary, False
+
+            done, _ = await asyncio.wait(
+                {primary_task}, timeout=self._hedge_delay(primary.name)
+            )
+            if done:
+                return primary_task.result(), primary, False
+
+            logger.info(f"Hedging {primary.name} with {secondary.name}")
+            secondary_task = asyncio.create_task(self._timed(secondary, send))
+            specs[secondary_task] = secondary
+            hedges.append(secondary)
+            pending = set(specs)
+            error: Optional[BaseException] = None
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), specs[task], True
+                    error = task.exception()
+
+            raise error if error else RuntimeError("Hedged request failed")
+        finally:
+            # Losers, and everything when the caller is cancelled
+            for task in specs:
+                if not task.done():
+                    task.cancel()
+
+    def _record_decision(
+        self,
+        primary: Optional[ModelSpec],
+        winner: Optional[ModelSpec],
+        hedged: bool,
+        tried: List[str],
+        error: Optional[str] = None,
+    ):
+        self._decisions.append(
+            {
+                "timestamp": datetime.utcnow().isoformat(),
+                "selected": primary.name if primary else None,
+                "winner": winner.name if winner else None,
+                "hedged": hedged,
+                "tried": list(tried),
+                "error": error,
+            }
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Routing state for monitoring endpoints"""
+        return {
+            "max_tier": self.max_tier.value,
+            "hedge_requests": self.hedge_requests,
+            "ranking": [spec.name for spec in self.rank()],
+            "models": {name: stats.to_dict() for name, stats in self._stats.items()},
+            "recent_decisions": list(self._decisions),
+        }
+
+
+# Global instance
+_model_router = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get global model router instance"""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter()
+    return _model_router
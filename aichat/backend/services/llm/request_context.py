@@ -0,0 +1,26 @@
+"""
+Per-request chat context
+
+Loaded once at the top of a chat request and passed down the chain
+(route → ChatService → LLMService → MemoryManager) so the character and
+session are not looked up again at every layer.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .memory.models import ConversationSession
+from aichat.core.database import Character
+
+
+@dataclass
+class ChatRequestContext:
+    """State shared by every layer handling one chat message"""
+
+    message: str
+    user_id: str
+    character: Character
+    session: Optional[ConversationSession] = None
+
+    # When set, the chat_logs row is written in the same transaction as the turns
+    record_chat_log: bool = False
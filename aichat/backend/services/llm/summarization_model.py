@@ -5,6 +5,7 @@ Intelligent conversation compression with reasoning capabilities.
 Used during memory compression events to preserve important context.
 """
 
+import asyncio
 import logging
 import os
 import json
@@ -57,6 +58,7 @@ class ConversationSummary:
     character_consistency: CharacterConsistency    # Character performance analysis
     topic_progression: List[str]                   # How topics evolved
     user_revealed_info: List[str]                  # Important things user shared
+    source: str = "model"                           # "model", "extractive" or "basic" fallback
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -66,7 +68,8 @@ class ConversationSummary:
             "relationship_evolution": self.relationship_evolution,
             "character_consistency": self.character_consistency.to_dict(),
             "topic_progression": self.topic_progression,
-            "user_revealed_info": self.user_revealed_info
+            "user_revealed_info": self.user_revealed_info,
+            "source": self.source
         }
 
 
@@ -82,6 +85,11 @@ class SummarizationModel:
         # Use better model for summarization - needs reasoning capabilities
         self.summary_model = "openai/gpt-4o-mini"  # $0.15/1M tokens, good reasoning
         
+        # Batched importance scoring limits
+        self.batch_max_turns = 40           # Turns per scoring request
+        self.batch_max_prompt_tokens = 6000 # Prompt budget per request (~4 chars/token)
+        self.batch_max_concurrency = 4      # Parallel scoring requests
+        
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create HTTP session"""
         if self.session is None or self.session.closed:
@@ -295,7 +303,8 @@ Respond with ONLY the JSON:"""
                 notable_moments=[]
             ),
             topic_progression=["general conversation"],
-            user_revealed_info=[]
+            user_revealed_info=[],
+            source="basic"
         )
     
     async def score_turn_importance(
@@ -339,6 +348,208 @@ Respond with ONLY the JSON:"""
         
         return 0.5  # Default medium importance
     
+    async def score_turns_importance(
+        self,
+        turns: List[Dict[str, Any]],
+        character_info: Dict[str, str],
+        max_concurrency: Optional[int] = None
+    ) -> List[float]:
+        """
+        Score many turns for importance with as few requests as possible.
+        
+        Turns are packed into chunks that fit the prompt budget and each chunk is
+        scored in a single request returning a JSON array. Chunks run concurrently
+        (bounded by max_concurrency). Any chunk that cannot be scored falls back to
+        the CompressionEngine heuristic, normalized to 0.0-1.0.
+        
+        Returns one score per input turn, in input order.
+        """
+        
+        if not turns:
+            return []
+        
+        chunks = self._chunk_turns_for_scoring(turns)
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_max_concurrency)
+        
+        async def score_chunk(start: int, chunk: List[Dict[str, Any]]) -> List[float]:
+            async with semaphore:
+                scores = None
+                if self.api_key:
+                    scores = await self._request_batch_scores(
+                        chunk, turns[max(0, start - 3):start], character_info
+                    )
+                if scores is None:
+                    scores = await self._heuristic_scores(chunk, start, len(turns))
+                return scores
+        
+        results = await asyncio.gather(*(score_chunk(start, chunk) for start, chunk in chunks))
+        
+        scores: List[float] = []
+        for chunk_scores in results:
+            scores.extend(chunk_scores)
+        return scores
+    
+    def _chunk_turns_for_scoring(
+        self,
+        turns: List[Dict[str, Any]]
+    ) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """Split turns into (start_index, chunk) pairs that fit the batch limits"""
+        
+        chunks = []
+        current: List[Dict[str, Any]] = []
+        current_tokens = 0
+        start = 0
+        
+        for i, turn in enumerate(turns):
+            # Rough estimate: 1 token per 4 characters plus per-line overhead
+            turn_tokens = len(turn.get("message", "")) // 4 + 8
+            if current and (
+                len(current) >= self.batch_max_turns
+                or current_tokens + turn_tokens > self.batch_max_prompt_tokens
+            ):
+                chunks.append((start, current))
+                current, current_tokens, start = [], 0, i
+            current.append(turn)
+            current_tokens += turn_tokens
+        
+        if current:
+            chunks.append((start, current))
+        return chunks
+    
+    async def _request_batch_scores(
+        self,
+        chunk: List[Dict[str, Any]],
+        conversation_context: List[Dict[str, Any]],
+        character_info: Dict[str, str]
+    ) -> Optional[List[float]]:
+        """Score a chunk in one request, returning None if the response is unusable"""
+        
+        try:
+            prompt = self._build_batch_importance_prompt(chunk, conversation_context, character_info)
+            
+            payload = {
+                "model": self.summary_model,
+                "messages": [
+                    {"role": "system", "content": "You are an importance scorer. Respond with ONLY a JSON array of numbers between 0.0 and 1.0"},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.1,
+                "max_tokens": 8 * len(chunk) + 16,
+            }
+            
+            session = await self._get_session()
+            async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    if "choices" in result and len(result["choices"]) > 0:
+                        scores_text = result["choices"][0]["message"]["content"].strip()
+                        return self._parse_batch_scores(scores_text, len(chunk))
+                else:
+                    logger.warning(f"Batch importance scoring failed with status {response.status}")
+                    
+        except Exception as e:
+            logger.error(f"Error batch scoring turn importance: {e}")
+        
+        return None
+    
+    def _parse_batch_scores(self, response_text: str, expected: int) -> Optional[List[float]]:
+        """Parse a JSON array of scores, returning None unless it matches the chunk size"""
+        
+        response_text = response_text.strip()
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        elif response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        
+        try:
+            data = json.loads(response_text)
+            if not isinstance(data, list) or len(data) != expected:
+                logger.warning(f"Batch scores have wrong shape (expected {expected} values)")
+                return None
+            
+            scores = []
+            for item in data:
+                # Accept bare numbers or {"turn_id": ..., "score": ...} objects
+                value = item.get("score") if isinstance(item, dict) else item
+                scores.append(max(0.0, min(1.0, float(value))))
+            return scores
+            
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to parse batch importance scores: {e}")
+            logger.debug(f"Response text was: {response_text}")
+            return None
+    
+    async def _heuristic_scores(
+        self,
+        chunk: List[Dict[str, Any]],
+        start: int,
+        total_turns: int
+    ) -> List[float]:
+        """Score a chunk with the CompressionEngine heuristic, normalized to 0.0-1.0"""
+        
+        # Imported lazily: the memory package imports this module
+        from .memory.compression_engine import CompressionEngine
+        from .memory.models import ConversationTurn
+        
+        engine = CompressionEngine()
+        scores = []
+        for offset, turn_data in enumerate(chunk):
+            turn = ConversationTurn(
+                turn_id=turn_data.get("turn_id", start + offset + 1),
+                session_id=turn_data.get("session_id", ""),
+                speaker_id=turn_data.get("speaker_id", "unknown"),
+                speaker_type=turn_data.get("speaker_type", "user"),
+                message=turn_data.get("message", ""),
+                metadata=turn_data.get("metadata") or {}
+            )
+            raw = await engine._score_turn(turn, start + offset, total_turns)
+            scores.append(max(0.0, min(1.0, raw / engine.MAX_HEURISTIC_SCORE)))
+        return scores
+    
+    def _build_batch_importance_prompt(
+        self,
+        chunk: List[Dict[str, Any]],
+        conversation_context: List[Dict[str, Any]],
+        character_info: Dict[str, str]
+    ) -> str:
+        """Build prompt for scoring a chunk of turns in one request"""
+        
+        context_snippet = ""
+        if conversation_context:
+            context_lines = []
+            for turn in conversation_context:
+                speaker = "User" if turn.get("speaker_type") == "user" else "Character"
+                context_lines.append(f"{speaker}: {turn.get('message', '')}")
+            context_snippet = "\n".join(context_lines)
+        
+        turn_lines = []
+        for turn in chunk:
+            speaker = "User" if turn.get("speaker_type") == "user" else "Character"
+            turn_lines.append(f"Turn {turn.get('turn_id', 0)} ({speaker}): {turn.get('message', '')}")
+        turns_text = "\n".join(turn_lines)
+        
+        return f"""Rate the importance of preserving each turn for character continuity (0.0 = not important, 1.0 = critical).
+
+CHARACTER: {character_info.get('name', 'Character')}
+PERSONALITY: {character_info.get('personality', 'Unknown')}
+
+PRECEDING CONTEXT:
+{context_snippet or "(start of conversation)"}
+
+TURNS TO SCORE ({len(chunk)}):
+{turns_text}
+
+Score each turn's importance for:
+- Character development/consistency
+- Relationship building  
+- Plot/story progression
+- Emotional significance
+- Information revelation
+
+Respond with ONLY a JSON array of exactly {len(chunk)} numbers (0.0-1.0), one per turn in order:"""
+    
     def _build_importance_prompt(
         self,
         turn_data: Dict[str, Any],
@@ -391,6 +602,18 @@ def get_summarization_model() -> SummarizationModel:
         _summarization_model = SummarizationModel()
     return _summarization_model
 
+async def score_turns_importance(
+    turns: List[Dict[str, Any]],
+    character_info: Dict[str, str],
+    max_concurrency: Optional[int] = None
+) -> List[float]:
+    """
+    Convenience function to batch-score turn importance.
+    Used during compression events.
+    """
+    summarizer = get_summarization_model()
+    return await summarizer.score_turns_importance(turns, character_info, max_concurrency)
+
 async def create_intelligent_summary(
     conversation_turns: List[Dict[str, Any]],
     character_name: str,
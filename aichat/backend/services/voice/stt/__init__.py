@@ -5,9 +5,23 @@ Provides STT services with integrated Voice Activity Detection:
 - WhisperService: OpenAI Whisper-based speech recognition
 - StreamingSTTService: Real-time streaming speech-to-text
 - VADService: Voice Activity Detection for speech preprocessing
+- StreamingDenoiser: In-process noise suppression for streamed audio
+- StreamingTranscriber: Partial transcripts for live streams (local agreement)
+- ModelRegistry: Process-wide shared, reference-counted model instances
+- cpu_inference: int8/ONNX precision variants, CPU thread tuning and RTF benchmark
+- MicroBatcher: Batches concurrent transcriptions into one Whisper decode
+- StreamingSileroVAD: Per-stream stateful Silero VAD with a streaming resampler
+- SessionStore: Streaming STT sessions with idle expiry, duration cap and memory budget
 """
 
 from .whisper_service import WhisperService
+from .denoiser import StreamingDenoiser
+from .streaming_transcriber import StreamingTranscriber, LocalAgreement
+from .model_registry import ModelRegistry, ModelHandle, get_model_registry
+from . import cpu_inference
+from .batching import MicroBatcher
+from .silero_stream import StreamingSileroVAD, StreamingResampler
+from .session_store import SessionStore
 from .vad_service import (
     VADService,
     VADConfig,
@@ -28,5 +42,16 @@ __all__ = [
     "VADState",
     "VADResult",
     "SpeechSegment",
+    "StreamingDenoiser",
+    "StreamingTranscriber",
+    "LocalAgreement",
+    "ModelRegistry",
+    "ModelHandle",
+    "get_model_registry",
+    "cpu_inference",
+    "MicroBatcher",
+    "StreamingSileroVAD",
+    "StreamingResampler",
+    "SessionStore",
     "streaming_stt_service"
 ]
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Per-stream audio accumulation for the streaming STT path
+
+AudioBuffer keeps an utterance in one preallocated float32 array with a write
+cursor, doubling its capacity when full, so appends are amortised O(1) and
+the tail window or the whole utterance are views rather than concatenations.
+RollingStats keeps the mean and variance of the last N values with a sliding
+Welford update instead of rebuilding an array on every chunk.
+"""
+
+import math
+from collections import deque
+from typing import Deque
+
+import numpy as np
+
+
+class AudioBuffer:
+    """Growable float32 sample buffer with an O(1) write cursor"""
+
+    def __init__(self, initial_capacity: int = 16000 * 10):
+        self._data = np.zeros(max(int(initial_capacity), 1), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the backing array"""
+        return self._data.nbytes
+
+    def append(self, samples: np.ndarray):
+        """Copy samples in at the cursor, growing the backing array if needed"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        end = self._size + samples.shape[0]
+        if end > self._data.shape[0]:
+            capacity = self._data.shape[0]
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.float32)
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        self._data[self._size : end] = samples
+        self._size = end
+
+    def view(self) -> np.ndarray:
+        """All buffered samples (a view; valid until the next append or clear)"""
+        return self._data[: self._size]
+
+    def tail(self, samples: int) -> np.ndarray:
+        """The last `samples` samples (a view)"""
+        start = max(self._size - max(int(samples), 0), 0)
+        return self._data[start : self._size]
+
+    def discard(self, samples: int):
+        """Drop the first `samples` samples, moving the remainder to the front"""
+        samples = min(max(int(samples), 0), self._size)
+        remaining = self._size - samples
+        if samples and remaining:
+            self._data[:remaining] = self._data[samples : self._size]
+        self._size = remaining
+
+    def clear(self):
+        """Rewind the cursor, keeping the allocation for the next utterance"""
+        self._size = 0
+
+
+class RollingStats:
+    """Mean and sample standard deviation over the last `maxlen` values"""
+
+    def __init__(self, maxlen: int):
+        self._values: Deque[float] = deque(maxlen=maxlen)
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, value: float):
+        value = float(value)
+        if len(self._values) == self._values.maxlen:
+            self._remove(self._values[0])
+        self._values.append(value)
+
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+    def _remove(self, value: float):
+        # Inverse Welford step for the value about to fall out of the window
+        n = len(self._values)
+        if n <= 1:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        old_mean = self._mean
+        self._mean = (n * old_mean - value) / (n - 1)
+        self._m2 = max(self._m2 - (value - old_mean) * (value - self._mean), 0.0)
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._values else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1); 0.0 with fewer than two values"""
+        n = len(self._values)
+        return math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+
+    def values(self) -> list:
+        return list(self._values)
@@ -0,0 +1,97 @@
+"""
+In-memory audio input for speech-to-text
+
+Producers (WebSocket chunks, streaming sessions, VAD segments, Discord) hand
+audio to Whisper as arrays or PCM buffers instead of writing WAV files for it
+to read back. Everything is normalised here to what Whisper consumes: mono
+float32 at 16 kHz.
+
+Writing audio to disk is opt-in, for debugging or collecting training data:
+set STT_CAPTURE_AUDIO=1 (files go to STT_CAPTURE_DIR, default
+temp/audio/captures).
+"""
+
+import io
+import logging
+import os
+import time
+from math import gcd
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from aichat.constants.paths import TEMP_AUDIO_DIR, ensure_dirs
+
+logger = logging.getLogger(__name__)
+
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Raw PCM buffers are 16-bit signed little-endian mono
+AudioInput = Union[np.ndarray, bytes, bytearray, memoryview]
+
+
+def to_float32(audio: AudioInput) -> np.ndarray:
+    """Mono float32 in [-1, 1] from PCM16 buffers or int/float arrays"""
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = np.frombuffer(audio, dtype=np.int16)
+
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    if np.issubdtype(audio.dtype, np.integer):
+        return audio.astype(np.float32) / float(np.iinfo(audio.dtype).max + 1)
+    return audio.astype(np.float32, copy=False)
+
+
+def resample(
+    audio: np.ndarray, src_rate: int, dst_rate: int = WHISPER_SAMPLE_RATE
+) -> np.ndarray:
+    """Polyphase resample of a float32 array"""
+    if src_rate == dst_rate or audio.size == 0:
+        return audio
+    divisor = gcd(int(src_rate), int(dst_rate))
+    resampled = resample_poly(audio, int(dst_rate) // divisor, int(src_rate) // divisor)
+    return resampled.astype(np.float32, copy=False)
+
+
+def prepare_for_whisper(audio: AudioInput, sample_rate: int) -> np.ndarray:
+    """Mono float32 at 16 kHz, ready for model.transcribe()"""
+    return resample(to_float32(audio), sample_rate, WHISPER_SAMPLE_RATE)
+
+
+def decode_audio_bytes(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode an encoded file (WAV, FLAC, OGG) held in memory into (float32 mono, sample_rate)"""
+    audio, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio, sample_rate
+
+
+def capture_enabled() -> bool:
+    return os.getenv("STT_CAPTURE_AUDIO", "0").lower() in ("1", "true", "yes")
+
+
+def capture_audio(
+    audio: AudioInput, sample_rate: int, prefix: str, force: bool = False
+) -> Optional[Path]:
+    """
+    Write audio to the capture directory when capture is enabled (or forced);
+    returns the path, or None when nothing was written.
+    """
+    if not (force or capture_enabled()):
+        return None
+    try:
+        capture_dir = Path(os.getenv("STT_CAPTURE_DIR") or TEMP_AUDIO_DIR / "captures")
+        ensure_dirs(capture_dir)
+        path = capture_dir / f"{prefix}_{int(time.time() * 1000)}.wav"
+        sf.write(str(path), to_float32(audio), sample_rate, subtype="PCM_16")
+        return path
+    except Exception as e:
+        logger.warning(f"Could not capture audio for {prefix}: {e}")
+        return None
@@ -0,0 +1,168 @@
+"""
+Micro-batching for Whisper transcription
+
+When several speakers finish utterances at once, transcribing them one by
+one runs the encoder once per clip and the decoder loop once per clip.
+MicroBatcher collects requests for up to WHISPER_BATCH_WAIT_MS (or until
+WHISPER_BATCH_SIZE are waiting) and hands them over as one batch;
+decode_batch() then computes the log-mel spectrograms as one tensor and runs
+Whisper's encoder and greedy decoder over the whole batch in a single
+whisper.decode() call. Results are routed back to each caller's future.
+
+Batched decoding is single-window (utterances up to 30 s) and single-pass
+(temperature 0). Clips whose result would have triggered Whisper's own
+temperature fallback (high compression ratio or low average log-probability)
+are re-run individually with model.transcribe(), so quality matches the
+unbatched path.
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Whisper decodes 30 s windows; longer clips take the unbatched path
+MAX_BATCH_SECONDS = 30.0
+
+# Same thresholds model.transcribe() uses to decide on a fallback decode
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class MicroBatcher:
+    """Collects concurrent requests into batches by size or by deadline"""
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        name: str = "batch",
+    ):
+        if max_batch_size is None:
+            max_batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("WHISPER_BATCH_WAIT_MS", "20"))
+        self.process = process  # process(items) -> one result (or Exception) per item
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self._sizes: Counter = Counter()
+        self.stats = {"items": 0, "batches": 0, "full_batches": 0, "failed_batches": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = (
+                self._pending[: self.max_batch_size],
+                self._pending[self.max_batch_size :],
+            )
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        # Callers that gave up while waiting are dropped from the batch
+        live = [(item, future) for item, future in batch if not future.done()]
+        if not live:
+            return
+        self.stats["items"] += len(live)
+        self.stats["batches"] += 1
+        self.stats["full_batches"] += len(live) == self.max_batch_size
+        self._sizes[len(live)] += 1
+
+        try:
+            results = await self.process([item for item, _ in live])
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            results = [e] * len(live)
+
+        for (_, future), result in zip(live, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "avg_batch_size": (
+                round(self.stats["items"] / batches, 2) if batches else 0.0
+            ),
+            "batch_sizes": dict(sorted(self._sizes.items())),
+            "pending": len(self._pending),
+        }
+
+
+def decode_batch(
+    model: Any, audios: List[np.ndarray], fp16: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe several 16 kHz clips (each at most 30 s) with one batched
+    log-mel + encoder + decoder pass. Returns {"text", "language"} per clip.
+    """
+    import torch
+    import whisper
+
+    padded = np.stack(
+        [whisper.pad_or_trim(audio.astype(np.float32, copy=False)) for audio in audios]
+    )
+    mel = whisper.log_mel_spectrogram(
+        torch.from_numpy(padded), n_mels=model.dims.n_mels
+    ).to(model.device)
+    options = whisper.DecodingOptions(
+        temperature=0.0, without_timestamps=True, fp16=fp16
+    )
+    with torch.no_grad():
+        decoded = whisper.decode(model, mel, options)
+
+    results = []
+    for audio, result in zip(audios, decoded):
+        if (
+            result.no_speech_prob > NO_SPEECH_THRESHOLD
+            and result.avg_logprob < LOGPROB_THRESHOLD
+        ):
+            results.append({"text": "", "language": result.language})
+        elif (
+            result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD
+        ):
+            # Needs temperature fallback: decode this clip on its own
+            single = model.transcribe(audio, fp16=fp16)
+            results.append({"text": single["text"], "language": single["language"]})
+        else:
+            results.append({"text": result.text, "language": result.language})
+    return results
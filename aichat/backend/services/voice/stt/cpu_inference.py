@@ -0,0 +1,311 @@
+"""
+CPU inference tuning for Whisper
+
+On CPU-only hosts Whisper runs fastest with smaller weights and without
+threads fighting over cores:
+
+- Precision variants (the `precision` part of a model registry key):
+  "fp32" (stock), "int8" (dynamic int8 quantization of every Linear layer),
+  and "onnx-int8" / "onnx-fp16" (the audio encoder exported to ONNX and run
+  by onnxruntime, decoder in torch). The ONNX variants need the optional
+  `onnx` extra and are skipped when it is not installed.
+- Threads: each inference worker gets WHISPER_CPU_THREADS intra-op threads
+  (default: cores / workers) and the process WHISPER_INTEROP_THREADS
+  inter-op threads (default 1), so N workers do not each spawn one thread
+  per core.
+- Benchmark: benchmark_precisions() times a fixed workload (one encoder
+  pass over a 30 s window plus a short greedy decode) for each available
+  variant, reports its real-time factor and picks the fastest. Results are
+  cached per model for the life of the process.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aichat.constants.paths import STT_MODELS_DIR, ensure_dirs
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+
+CPU_PRECISIONS = ("fp32", "int8", "onnx-int8", "onnx-fp16")
+
+# Whisper pads every decode to a 30 s window, so the benchmark encodes one
+BENCHMARK_WINDOW_SECONDS = 30.0
+BENCHMARK_DECODE_STEPS = 24
+
+
+# ----- Threads -----
+
+
+def threads_per_worker(workers: int) -> int:
+    """Intra-op threads for each inference worker"""
+    configured = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def interop_threads() -> int:
+    return max(1, int(os.getenv("WHISPER_INTEROP_THREADS", "1")))
+
+
+_interop_configured = False
+_worker_threads = threading.local()
+
+
+def configure_process_threads():
+    """Set torch's inter-op pool size (possible once, before any parallel work)"""
+    global _interop_configured
+    if torch is None or _interop_configured:
+        return
+    _interop_configured = True
+    try:
+        torch.set_num_interop_threads(interop_threads())
+    except RuntimeError as e:
+        logger.debug(f"Inter-op threads already fixed: {e}")
+
+
+def configure_worker_threads(threads: int):
+    """Set intra-op threads for the calling worker thread (OpenMP teams are per thread)"""
+    if torch is None or getattr(_worker_threads, "threads", None) == threads:
+        return
+    torch.set_num_threads(threads)
+    _worker_threads.threads = threads
+
+
+# ----- Precision variants -----
+
+
+def available_precisions() -> List[str]:
+    """CPU precision variants usable in this environment"""
+    if torch is None:
+        return ["fp32"]
+    precisions = ["fp32", "int8"]
+    if onnxruntime is not None:
+        precisions.append("onnx-int8")
+        try:
+            import onnxconverter_common  # noqa: F401
+
+            precisions.append("onnx-fp16")
+        except ImportError:
+            pass
+    return precisions
+
+
+def apply_precision(
+    model: Any, name: str, precision: str, threads: Optional[int] = None
+) -> Any:
+    """Turn a freshly loaded fp32 Whisper model into the requested variant for a worker with `threads` threads"""
+    if precision in ("fp32", "fp16"):
+        return model
+    if precision == "int8":
+        return quantize_int8(model)
+    if precision in ("onnx-int8", "onnx-fp16"):
+        return attach_onnx_encoder(model, name, precision.split("-", 1)[1], threads)
+    raise ValueError(f"Unknown Whisper precision: {precision}")
+
+
+def quantize_int8(model: Any) -> Any:
+    """Dynamic int8 quantization of all Linear layers (weights int8, activations quantized per call)"""
+    # Whisper's Linear subclass only adds a dtype cast for fp16; quantize_dynamic
+    # matches exact types, so present those layers as plain nn.Linear
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _encoder_path(name: str, variant: str):
+    return STT_MODELS_DIR / f"whisper-{name}-encoder-{variant}.onnx"
+
+
+_export_lock = threading.Lock()
+
+
+def _publish(path, write: Callable[[str], None]):
+    """
+    Write a file through a temp path next to it and move it into place, so a
+    concurrent reader (or another process exporting the same model) never sees
+    a partial file
+    """
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        write(str(tmp_path))
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def export_onnx_encoder(model: Any, name: str, variant: str):
+    """Export (once) the audio encoder as ONNX in fp32, then derive the int8/fp16 file"""
+    ensure_dirs(STT_MODELS_DIR)
+    fp32_path = _encoder_path(name, "fp32")
+    path = _encoder_path(name, variant)
+    with _export_lock:
+        if not fp32_path.exists():
+            mel = torch.zeros(1, model.dims.n_mels, 2 * model.dims.n_audio_ctx)
+            _publish(
+                fp32_path,
+                lambda out: torch.onnx.export(
+                    model.encoder,
+                    mel,
+                    out,
+                    input_names=["mel"],
+                    output_names=["audio_features"],
+                    dynamic_axes={"mel": {0: "batch"}, "audio_features": {0: "batch"}},
+                    opset_version=17,
+                ),
+            )
+
+        if not path.exists():
+            if variant == "int8":
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                _publish(
+                    path,
+                    lambda out: quantize_dynamic(
+                        str(fp32_path), out, weight_type=QuantType.QInt8
+                    ),
+                )
+            elif variant == "fp16":
+                import onnx
+                from onnxconverter_common import float16
+
+                converted = float16.convert_float_to_float16(
+                    onnx.load(str(fp32_path)), keep_io_types=True
+                )
+                _publish(path, lambda out: onnx.save(converted, out))
+    return path
+
+
+def attach_onnx_encoder(
+    model: Any, name: str, variant: str, threads: Optional[int] = None
+) -> Any:
+    """
+    Replace model.encoder with an onnxruntime session over the exported encoder.
+    The session's thread pool is fixed at creation, so it gets the worker's
+    share of the cores (threads) rather than the whole machine.
+    """
+    path = export_onnx_encoder(model, name, variant)
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads or threads_per_worker(1)
+    options.inter_op_num_threads = interop_threads()
+    session = onnxruntime.InferenceSession(
+        str(path), options, providers=["CPUExecutionProvider"]
+    )
+    model.encoder = OnnxEncoder(session)
+    return model
+
+
+if torch is not None:
+
+    class OnnxEncoder(torch.nn.Module):
+        """Drop-in for AudioEncoder backed by an onnxruntime session"""
+
+        def __init__(self, session):
+            super().__init__()
+            self.session = session
+            self.input_name = session.get_inputs()[0].name
+
+        def forward(self, mel):
+            features = self.session.run(
+                None, {self.input_name: mel.detach().cpu().numpy().astype(np.float32)}
+            )[0]
+            return torch.from_numpy(features).to(mel.dtype)
+
+
+# ----- Benchmark -----
+
+
+def measure_rtf(model: Any, repeats: int = 2) -> float:
+    """Real-time factor of an encoder pass plus a short greedy decode over one 30 s window"""
+    mel = torch.zeros(1, model.dims.n_mels, 2 * model.dims.n_audio_ctx)
+    tokens = torch.zeros(1, 1, dtype=torch.long)
+
+    def workload():
+        with torch.no_grad():
+            features = model.encoder(mel)
+            decoded = tokens
+            for _ in range(BENCHMARK_DECODE_STEPS):
+                logits = model.decoder(decoded, features)
+                decoded = torch.cat([decoded, logits[:, -1:].argmax(dim=-1)], dim=1)
+
+    workload()  # Warm-up: allocator, ONNX session and quantized kernels
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        workload()
+        best = min(best, time.perf_counter() - started)
+    return best / BENCHMARK_WINDOW_SECONDS
+
+
+_benchmarks: Dict[Tuple[str, int], Dict[str, Any]] = {}
+_benchmark_lock = threading.Lock()
+
+
+def benchmark_precisions(
+    model_name: str,
+    threads: int,
+    run: Callable[[str, Callable[[Any], float]], float],
+    candidates: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Measure each precision variant and pick the fastest. `run(precision, measure)`
+    loads that variant and returns measure(model). Cached per (model, threads).
+    """
+    key = (model_name, threads)
+    with _benchmark_lock:
+        if key in _benchmarks:
+            return _benchmarks[key]
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for precision in candidates or available_precisions():
+            started = time.perf_counter()
+            try:
+                rtf = run(precision, measure_rtf)
+                results[precision] = {
+                    "rtf": round(rtf, 4),
+                    "seconds": round(time.perf_counter() - started, 2),
+                }
+            except Exception as e:
+                logger.warning(
+                    f"Whisper {model_name} {precision} benchmark failed: {e}"
+                )
+                results[precision] = {"rtf": None, "error": str(e)}
+
+        measured = {p: r["rtf"] for p, r in results.items() if r.get("rtf") is not None}
+        selected = min(measured, key=measured.get) if measured else "fp32"
+        summary = {
+            "model": model_name,
+            "threads": threads,
+            "results": results,
+            "selected": selected,
+        }
+        logger.info(
+            f"Whisper {model_name} CPU benchmark (RTF, {threads} threads): "
+            + ", ".join(f"{p}={r:.3f}" for p, r in measured.items())
+            + f" -> {selected}"
+        )
+        _benchmarks[key] = summary
+        return summary
+
+
+def get_benchmark(model_name: str, threads: int) -> Optional[Dict[str, Any]]:
+    return _benchmarks.get((model_name, threads))
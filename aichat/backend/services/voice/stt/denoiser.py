@@ -0,0 +1,145 @@
+"""
+Streaming noise suppression for the STT input path
+
+A stateful spectral gate that runs in-process on float32 chunks: an
+overlap-add STFT (sqrt-Hann analysis/synthesis windows, 50% overlap) whose
+per-bin noise profile is learned from the first frames and then tracked
+across chunks in bins that do not carry speech. Each stream gets its own
+instance, so the analysis window and noise estimate carry over chunk
+boundaries without clicks at the seams.
+
+Output has exactly the length of the input, delayed by one frame
+(frame_size samples, 32 ms at 16 kHz with the defaults).
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingDenoiser:
+    """Spectral-gating noise suppressor for one audio stream"""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_size: int = 512,
+        noise_init_frames: int = 8,
+        noise_adapt: float = 0.95,
+        speech_ratio: float = 2.0,
+        over_subtraction: float = 1.5,
+        gain_floor: float = 0.1,
+        gain_smoothing: float = 0.5,
+    ):
+        if frame_size % 2:
+            raise ValueError("frame_size must be even")
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.noise_init_frames = (
+            noise_init_frames  # Frames averaged for the initial noise profile
+        )
+        self.noise_adapt = noise_adapt  # Smoothing of noise updates in noise-like bins
+        self.speech_ratio = speech_ratio  # Bin/noise magnitude ratio treated as speech
+        self.over_subtraction = (
+            over_subtraction  # Noise multiple subtracted from each bin
+        )
+        self.gain_floor = gain_floor  # Minimum gain (-20 dB) to limit musical noise
+        self.gain_smoothing = gain_smoothing  # Per-bin gain smoothing across frames
+
+        # Periodic sqrt-Hann: squared windows at 50% overlap sum to 1
+        self._window = np.sqrt(np.hanning(frame_size + 1)[:-1]).astype(np.float32)
+
+        self.reset()
+
+    def reset(self):
+        """Forget buffered audio and the learned noise profile"""
+        # Pending input, primed so the first hop lines up with a full frame
+        self._input = np.zeros(self.frame_size - self.hop, dtype=np.float32)
+        self._overlap = np.zeros(self.frame_size, dtype=np.float32)
+        # Processed samples not yet returned; one hop of priming keeps output length == input length
+        self._output = np.zeros(self.hop, dtype=np.float32)
+
+        self._noise: Optional[np.ndarray] = None
+        self._gain: Optional[np.ndarray] = None
+        self.frames = 0
+
+    @property
+    def latency_samples(self) -> int:
+        return self.frame_size
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Denoise a mono chunk; returns a float32 array of the same length"""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if chunk.size == 0:
+            return chunk
+
+        buffered = np.concatenate((self._input, chunk))
+        n_frames = (
+            (buffered.shape[0] - self.frame_size) // self.hop + 1
+            if buffered.shape[0] >= self.frame_size
+            else 0
+        )
+
+        produced = []
+        for i in range(n_frames):
+            start = i * self.hop
+            frame = buffered[start : start + self.frame_size]
+            self._overlap += self._process_frame(frame)
+            produced.append(self._overlap[: self.hop].copy())
+            self._overlap[: -self.hop] = self._overlap[self.hop :]
+            self._overlap[-self.hop :] = 0.0
+
+        self._input = buffered[n_frames * self.hop :]
+        if produced:
+            self._output = np.concatenate([self._output, *produced])
+
+        out, self._output = self._output[: chunk.size], self._output[chunk.size :]
+        return out
+
+    def _process_frame(self, frame: np.ndarray) -> np.ndarray:
+        spectrum = np.fft.rfft(frame * self._window)
+        magnitude = np.abs(spectrum)
+
+        self._update_noise(magnitude)
+
+        # Soft spectral subtraction, floored and smoothed over time
+        noise = self._noise * self.over_subtraction
+        gain = np.clip(1.0 - noise / np.maximum(magnitude, 1e-10), self.gain_floor, 1.0)
+        if self._gain is not None:
+            gain = self.gain_smoothing * self._gain + (1.0 - self.gain_smoothing) * gain
+        self._gain = gain
+
+        return (np.fft.irfft(spectrum * gain, n=self.frame_size) * self._window).astype(
+            np.float32
+        )
+
+    def _update_noise(self, magnitude: np.ndarray):
+        self.frames += 1
+        if self._noise is None:
+            self._noise = magnitude.copy()
+        elif self.frames <= self.noise_init_frames:
+            # Running mean over the initial frames
+            self._noise += (magnitude - self._noise) / self.frames
+        else:
+            # Track slow changes in the background, only in bins that look like noise
+            noise_like = magnitude < self.speech_ratio * self._noise
+            updated = (
+                self.noise_adapt * self._noise + (1.0 - self.noise_adapt) * magnitude
+            )
+            self._noise = np.where(noise_like, updated, self._noise)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Diagnostic summary of the noise estimate"""
+        return {
+            "sample_rate": self.sample_rate,
+            "frame_size": self.frame_size,
+            "frames": self.frames,
+            "noise_floor": (
+                float(self._noise.mean()) if self._noise is not None else None
+            ),
+            "mean_gain": float(self._gain.mean()) if self._gain is not None else None,
+        }
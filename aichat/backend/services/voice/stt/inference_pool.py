@@ -0,0 +1,298 @@
+"""
+Inference worker pool for blocking model calls
+
+Whisper's transcribe() holds the CPU for seconds; running it inline in an
+async handler freezes the event loop for every other client. InferencePool
+runs jobs on dedicated worker threads instead (torch releases the GIL while
+computing, so workers transcribe in parallel on multi-core machines). Each
+worker loads and keeps its own model, because Whisper's decoder installs
+per-call hooks on the model and is not safe to share across threads.
+
+Jobs wait in a bounded priority queue. submit() returns an asyncio future
+resolved on the caller's loop; run() awaits it with a per-job timeout, and
+cancelling or timing out a queued job removes it before a worker picks it up.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class InferenceQueueFull(RuntimeError):
+    """The pool's queue is at capacity"""
+
+
+class _Timing:
+    """Count, total and recent-sample percentiles for one duration metric"""
+
+    def __init__(self, window: int = 200):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self._recent.append(duration_ms)
+
+    def to_dict(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+
+        def percentile(p: float) -> float:
+            return (
+                round(recent[min(int(len(recent) * p), len(recent) - 1)], 3)
+                if recent
+                else 0.0
+            )
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    fn: Optional[Callable[[Any], Any]] = field(compare=False, default=None)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+    loop: Optional[asyncio.AbstractEventLoop] = field(compare=False, default=None)
+    submitted_at: float = field(compare=False, default=0.0)
+    deadline: Optional[float] = field(compare=False, default=None)
+
+
+class InferencePool:
+    """Worker threads, each holding a model, fed from a bounded priority queue"""
+
+    def __init__(
+        self,
+        loader: Callable[[int], Any],
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+        name: str = "inference",
+    ):
+        if workers is None:
+            workers = int(os.getenv("WHISPER_WORKERS", "1"))
+        if max_queue is None:
+            max_queue = int(os.getenv("WHISPER_QUEUE_SIZE", "32"))
+        if default_timeout is None:
+            default_timeout = float(os.getenv("WHISPER_JOB_TIMEOUT", "120"))
+        self.loader = loader  # loader(worker_index) -> model for that worker
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout if default_timeout > 0 else None
+        self.name = name
+
+        self._queue: "queue.PriorityQueue[_Job]" = queue.PriorityQueue(
+            maxsize=max_queue
+        )
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._busy = 0
+        self._stats_lock = threading.Lock()
+
+        self.queue_wait = _Timing()
+        self.inference = _Timing()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "timed_out": 0,
+            "rejected": 0,
+        }
+
+    # ----- Lifecycle -----
+
+    def start(self):
+        """Start the worker threads (also done on first submit)"""
+        with self._start_lock:
+            if self._threads or self._closed:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(index,),
+                    name=f"{self.name}-worker-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def close(self, wait: bool = True):
+        """Stop accepting jobs; workers finish what is queued, then exit"""
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            # Sentinels sort after every real job
+            self._queue.put(_Job(priority=float("inf"), seq=next(self._seq)))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    # ----- Submission -----
+
+    def submit(
+        self,
+        fn: Callable[[Any], Any],
+        priority: int = PRIORITY_NORMAL,
+        timeout: Optional[float] = None,
+    ) -> asyncio.Future:
+        """
+        Queue fn(model) and return a future for its result on the running loop.
+        Raises InferenceQueueFull when the queue is at capacity.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} pool is closed")
+        self.start()
+
+        loop = asyncio.get_running_loop()
+        timeout = self.default_timeout if timeout is None else timeout
+        now = time.perf_counter()
+        job = _Job(
+            priority=priority,
+            seq=next(self._seq),
+            fn=fn,
+            future=loop.create_future(),
+            loop=loop,
+            submitted_at=now,
+            deadline=now + timeout if timeout else None,
+        )
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise InferenceQueueFull(
+                f"{self.name} queue is full ({self.max_queue} jobs)"
+            )
+        self._count("submitted")
+        return job.future
+
+    async def run(
+        self,
+        fn: Callable[[Any], Any],
+        priority: int = PRIORITY_NORMAL,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Submit fn(model) and wait for it; a timeout cancels the job if it has not started"""
+        timeout = self.default_timeout if timeout is None else timeout
+        future = self.submit(fn, priority=priority, timeout=timeout)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._count("timed_out")
+            raise TimeoutError(f"{self.name} job timed out after {timeout}s")
+
+    # ----- Workers -----
+
+    def _count(self, key: str, delta: int = 1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    def _worker(self, index: int):
+        model = None
+        load_error: Optional[BaseException] = None
+        try:
+            model = self.loader(index)
+        except Exception as e:
+            load_error = e
+            logger.error(f"{self.name} worker {index} failed to load its model: {e}")
+
+        while True:
+            job = self._queue.get()
+            if job.fn is None:
+                break
+
+            started = time.perf_counter()
+            if job.future.done():
+                # Cancelled (or timed out) while queued
+                self._count("cancelled")
+                continue
+            if job.deadline is not None and started > job.deadline:
+                self._count("timed_out")
+                self._resolve(
+                    job, error=TimeoutError(f"{self.name} job expired in queue")
+                )
+                continue
+            with self._stats_lock:
+                self.queue_wait.add((started - job.submitted_at) * 1000)
+
+            if load_error is not None:
+                self._count("failed")
+                self._resolve(
+                    job,
+                    error=RuntimeError(f"{self.name} model unavailable: {load_error}"),
+                )
+                continue
+
+            with self._stats_lock:
+                self._busy += 1
+            result, error = None, None
+            try:
+                result = job.fn(model)
+            except Exception as e:
+                error = e
+            # Stats are final before the caller sees the result
+            with self._stats_lock:
+                self._busy -= 1
+                self.inference.add((time.perf_counter() - started) * 1000)
+                self.stats["failed" if error is not None else "completed"] += 1
+            self._resolve(job, result=result, error=error)
+
+    @staticmethod
+    def _resolve(job: _Job, result: Any = None, error: Optional[BaseException] = None):
+        def deliver():
+            if job.future.done():
+                return
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+        try:
+            job.loop.call_soon_threadsafe(deliver)
+        except RuntimeError:
+            # Caller's loop is gone; nobody is waiting for the result
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                **self.stats,
+                "workers": self.workers,
+                "alive_workers": sum(
+                    1 for thread in self._threads if thread.is_alive()
+                ),
+                "busy_workers": self._busy,
+                "queued": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "queue_wait": self.queue_wait.to_dict(),
+                "inference": self.inference.to_dict(),
+            }
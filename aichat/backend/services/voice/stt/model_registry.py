@@ -0,0 +1,404 @@
+"""
+Process-wide registry of loaded speech models
+
+Every WhisperService used to load its own weights, so the service factory's
+per-config instances, the DI container and the training transcriber could
+each hold a copy of the same model. ModelRegistry loads each
+(name, device, precision, replica, threads) once and hands out reference-counted
+ModelHandles to whoever needs it.
+
+- Loading happens on a background thread; handles expose readiness
+  (ready / wait() / wait_ready()) instead of blocking their owner's
+  constructor.
+- Whisper is not safe to call from two threads at once, so use() serialises
+  callers of one instance. Inference pools that want parallelism acquire
+  separate replicas (replica=0, 1, ...).
+- Models idle for WHISPER_IDLE_UNLOAD_SECONDS are unloaded (and reloaded on
+  next use); unreferenced ones are dropped from the registry entirely. With
+  WHISPER_MEMORY_BUDGET_MB set, loading a model first evicts idle models,
+  least recently used first, to stay under the budget.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+class ModelKey(NamedTuple):
+    name: str
+    device: str = "cpu"
+    precision: str = "fp32"
+    replica: int = 0
+    threads: int = (
+        0  # Intra-op threads baked into CPU variants (ONNX sessions); 0: default
+    )
+
+
+def load_whisper_model(key: ModelKey) -> Any:
+    """Default loader: openai-whisper weights for key.name on key.device, in key.precision"""
+    import whisper
+
+    model = whisper.load_model(key.name, device=key.device)
+    if key.device == "cpu":
+        from .cpu_inference import apply_precision
+
+        model = apply_precision(
+            model, key.name, key.precision, threads=key.threads or None
+        )
+    return model
+
+
+def _model_size_bytes(model: Any) -> int:
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return 0
+
+
+@dataclass
+class _Entry:
+    key: ModelKey
+    model: Any = None
+    refs: int = 0
+    in_use: int = 0
+    loading: bool = False
+    error: Optional[BaseException] = None
+    size_bytes: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    loads: int = 0
+    unloads: int = 0
+    load_seconds: float = 0.0
+    ready: threading.Event = field(default_factory=threading.Event)
+    use_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def state(self) -> str:
+        if self.loading:
+            return "loading"
+        if self.model is not None:
+            return "ready"
+        return "failed" if self.error is not None else "unloaded"
+
+
+class ModelHandle:
+    """A reference to one registry model; release() when done with it"""
+
+    def __init__(self, registry: "ModelRegistry", entry: _Entry):
+        self._registry = registry
+        self._entry = entry
+        self.key = entry.key
+        self.released = False
+
+    @property
+    def ready(self) -> bool:
+        return self._entry.model is not None
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._entry.error
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model is loaded (loading it if unloaded); False on timeout or failure"""
+        self._registry._ensure_loading(self._entry)
+        return self._entry.ready.wait(timeout) and self.ready
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """wait() without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.wait, timeout
+        )
+
+    @contextmanager
+    def use(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Exclusive use of the loaded model; loads it first if it was unloaded"""
+        with self._registry._using(self._entry, timeout) as model:
+            yield model
+
+    def call(self, fn: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        with self.use(timeout) as model:
+            return fn(model)
+
+    def release(self, unload: bool = False):
+        """Drop this reference; with unload, free the weights now if nobody else holds them"""
+        if not self.released:
+            self.released = True
+            self._registry._release(self._entry, unload)
+
+
+class ModelRegistry:
+    """Reference-counted, lazily loaded, idle-unloaded models shared across services"""
+
+    def __init__(
+        self,
+        loader: Callable[[ModelKey], Any] = load_whisper_model,
+        idle_ttl: Optional[float] = None,
+        memory_budget_mb: Optional[float] = None,
+    ):
+        if idle_ttl is None:
+            idle_ttl = float(os.getenv("WHISPER_IDLE_UNLOAD_SECONDS", "1800"))
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("WHISPER_MEMORY_BUDGET_MB", "0"))
+        self.loader = loader
+        self.idle_ttl = idle_ttl  # <= 0: keep models loaded while referenced
+        self.memory_budget = int(memory_budget_mb * _MB)  # 0: unlimited
+
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.RLock()
+        self._sizes: Dict[str, int] = (
+            {}
+        )  # Last measured size per model name, for budgeting
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ----- References -----
+
+    def acquire(
+        self,
+        name: str,
+        device: str = "cpu",
+        precision: str = "fp32",
+        replica: int = 0,
+        preload: bool = True,
+        threads: int = 0,
+    ) -> ModelHandle:
+        """Reference a model, starting a background load unless preload is False"""
+        key = ModelKey(name, device, precision, replica, threads)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(key)
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+        if preload:
+            self._ensure_loading(entry)
+        self._start_janitor()
+        return ModelHandle(self, entry)
+
+    def _release(self, entry: _Entry, unload: bool = False):
+        with self._lock:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if entry.refs <= 0 and (unload or self.idle_ttl <= 0):
+                self._unload(entry)
+
+    # ----- Loading -----
+
+    def _ensure_loading(self, entry: _Entry):
+        with self._lock:
+            if entry.model is not None or entry.loading:
+                return
+            entry.loading = True
+            entry.ready.clear()
+        threading.Thread(
+            target=self._load,
+            args=(entry,),
+            name=f"model-load-{entry.key.name}",
+            daemon=True,
+        ).start()
+
+    def _load(self, entry: _Entry):
+        self._make_room(self._sizes.get(entry.key.name, 0), exclude=entry)
+        started = time.perf_counter()
+        try:
+            model = self.loader(entry.key)
+        except Exception as e:
+            logger.error(f"Failed to load model {entry.key}: {e}")
+            with self._lock:
+                entry.error = e
+                entry.loading = False
+            entry.ready.set()
+            return
+
+        size = _model_size_bytes(model)
+        with self._lock:
+            entry.model = model
+            entry.error = None
+            entry.size_bytes = size
+            entry.loading = False
+            entry.loads += 1
+            entry.load_seconds = time.perf_counter() - started
+            entry.last_used = time.monotonic()
+            self._sizes[entry.key.name] = size
+        logger.info(
+            f"Loaded model {entry.key} in {entry.load_seconds:.2f}s ({size / _MB:.0f} MB)"
+        )
+        # Settle the budget before anyone starts using the new model
+        self._make_room(0, exclude=entry)
+        entry.ready.set()
+
+    @contextmanager
+    def _using(self, entry: _Entry, timeout: Optional[float]) -> Iterator[Any]:
+        with self._lock:
+            entry.in_use += 1  # Pins the model against unloading
+            entry.last_used = time.monotonic()
+        try:
+            self._ensure_loading(entry)
+            if not entry.ready.wait(timeout):
+                raise TimeoutError(
+                    f"Model {entry.key.name} not loaded within {timeout}s"
+                )
+            if not entry.use_lock.acquire(timeout=-1 if timeout is None else timeout):
+                raise TimeoutError(f"Model {entry.key.name} busy for {timeout}s")
+            try:
+                if entry.model is None:
+                    raise RuntimeError(
+                        f"Model {entry.key.name} unavailable: {entry.error}"
+                    )
+                yield entry.model
+            finally:
+                entry.use_lock.release()
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    # ----- Unloading -----
+
+    def _unload(self, entry: _Entry):
+        """Drop the weights (caller holds the lock); forget the entry if unreferenced"""
+        if entry.model is not None and entry.in_use == 0 and not entry.loading:
+            entry.model = None
+            entry.ready.clear()
+            entry.unloads += 1
+            logger.info(f"Unloaded model {entry.key}")
+            self._free_memory()
+        if entry.refs <= 0 and entry.model is None and not entry.loading:
+            self._entries.pop(entry.key, None)
+
+    def _make_room(self, needed: int, exclude: Optional[_Entry] = None):
+        """Evict idle models, least recently used first, until `needed` more bytes fit the budget"""
+        if self.memory_budget <= 0:
+            return
+        with self._lock:
+            loaded = sum(
+                e.size_bytes for e in self._entries.values() if e.model is not None
+            )
+            idle = sorted(
+                (
+                    e
+                    for e in self._entries.values()
+                    if e is not exclude and e.model is not None and e.in_use == 0
+                ),
+                key=lambda e: (e.refs > 0, e.last_used),  # Unreferenced models go first
+            )
+            for entry in idle:
+                if loaded + needed <= self.memory_budget:
+                    break
+                loaded -= entry.size_bytes
+                self._unload(entry)
+            if loaded + needed > self.memory_budget:
+                logger.warning(
+                    f"Model memory {(loaded + needed) / _MB:.0f} MB exceeds budget "
+                    f"{self.memory_budget / _MB:.0f} MB; all other models are in use"
+                )
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Unload models idle longer than the TTL; returns how many were unloaded"""
+        if self.idle_ttl <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        unloaded = 0
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if (
+                    entry.model is not None
+                    and entry.in_use == 0
+                    and now - entry.last_used > self.idle_ttl
+                ):
+                    self._unload(entry)
+                    unloaded += 1
+                elif entry.refs <= 0 and entry.model is None:
+                    self._entries.pop(entry.key, None)
+        return unloaded
+
+    @staticmethod
+    def _free_memory():
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _start_janitor(self):
+        if self.idle_ttl <= 0 or self._janitor is not None:
+            return
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(
+                    target=self._janitor_loop,
+                    name="model-registry-janitor",
+                    daemon=True,
+                )
+                self._janitor.start()
+
+    def _janitor_loop(self):
+        interval = min(max(self.idle_ttl / 4, 1.0), 60.0)
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Model registry sweep failed: {e}")
+
+    def shutdown(self):
+        """Stop the idle sweeper and unload every model not currently in use"""
+        self._stop.set()
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._unload(entry)
+
+    # ----- Introspection -----
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models: List[Dict[str, Any]] = [
+                {
+                    **entry.key._asdict(),
+                    "state": entry.state,
+                    "refs": entry.refs,
+                    "in_use": entry.in_use,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "size_mb": round(entry.size_bytes / _MB, 1),
+                    "loads": entry.loads,
+                    "unloads": entry.unloads,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "error": str(entry.error) if entry.error else None,
+                }
+                for entry in self._entries.values()
+            ]
+            loaded = sum(
+                e.size_bytes for e in self._entries.values() if e.model is not None
+            )
+        return {
+            "models": models,
+            "loaded_mb": round(loaded / _MB, 1),
+            "memory_budget_mb": (
+                round(self.memory_budget / _MB, 1) if self.memory_budget else None
+            ),
+            "idle_ttl": self.idle_ttl,
+        }
+
+
+# Global registry instance
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry"""
+    global _model_registry
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry()
+    return _model_registry
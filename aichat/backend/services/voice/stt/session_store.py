@@ -0,0 +1,233 @@
+"""
+Bounded store for streaming STT sessions
+
+Sessions used to live in a plain module dict: a client that disconnected
+without reset_session leaked its audio buffer for the life of the process,
+and a stream that never went quiet grew without limit. SessionStore bounds
+both:
+
+- Idle expiry: streams with no audio for STT_SESSION_IDLE_SECONDS are
+  dropped by a background sweeper, together with any per-stream state the
+  owner registered an on_expire callback for (e.g. its VAD).
+- Max duration: max_duration (STT_SESSION_MAX_SECONDS) is the longest
+  utterance feed_audio lets a session buffer before finalizing it anyway.
+- Memory budget: with STT_SESSION_MEMORY_MB set, adding audio evicts other
+  sessions, least recently fed first, until the buffers held fit the budget.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+Session = Dict[str, Any]
+
+
+def session_bytes(session: Session) -> int:
+    """Memory held by a session's audio buffer (its allocation, not just the samples used)"""
+    audio = session.get("audio")
+    return audio.nbytes if audio is not None else 0
+
+
+def session_seconds(session: Session) -> float:
+    audio = session.get("audio")
+    sample_rate = session.get("sr")
+    return len(audio) / float(sample_rate) if audio is not None and sample_rate else 0.0
+
+
+class SessionStore:
+    """Streaming STT sessions keyed by stream id, in least-recently-fed order"""
+
+    def __init__(
+        self,
+        idle_ttl: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        memory_budget_mb: Optional[float] = None,
+        on_expire: Optional[Callable[[str], None]] = None,
+    ):
+        if idle_ttl is None:
+            idle_ttl = float(os.getenv("STT_SESSION_IDLE_SECONDS", "120"))
+        if max_duration is None:
+            max_duration = float(os.getenv("STT_SESSION_MAX_SECONDS", "60"))
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("STT_SESSION_MEMORY_MB", "256"))
+        self.idle_ttl = idle_ttl  # <= 0: never expire
+        self.max_duration = max_duration  # <= 0: no cap
+        self.memory_budget = int(memory_budget_mb * _MB)  # 0: unlimited
+        self.on_expire = (
+            on_expire  # Called with the stream id once a stream has expired
+        )
+
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        # Last audio per stream; outlives finalized sessions so per-stream state expires too
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {
+            "created": 0,
+            "finalized": 0,
+            "forced_finalizations": 0,
+            "expired": 0,
+            "evicted": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, stream_id: str) -> bool:
+        return stream_id in self._sessions
+
+    # ----- Sessions -----
+
+    def get(
+        self, stream_id: str, default: Optional[Session] = None
+    ) -> Optional[Session]:
+        """The stream's session (does not count as activity)"""
+        return self._sessions.get(stream_id, default)
+
+    def add(self, stream_id: str, session: Session):
+        with self._lock:
+            self._sessions[stream_id] = session
+            self.stats["created"] += 1
+            self._touch(stream_id)
+        self._start_janitor()
+
+    def touch(self, stream_id: str):
+        """Record audio for a stream: marks it most recently used and resets its idle clock"""
+        with self._lock:
+            self._touch(stream_id)
+
+    def _touch(self, stream_id: str):
+        if stream_id in self._sessions:
+            self._sessions.move_to_end(stream_id)
+        self._last_seen[stream_id] = time.monotonic()
+
+    def pop(
+        self, stream_id: str, default: Optional[Session] = None
+    ) -> Optional[Session]:
+        """Remove the stream's session; the stream itself stays known until it idles out"""
+        with self._lock:
+            return self._sessions.pop(stream_id, default)
+
+    def finalize(self, stream_id: str, forced: bool = False) -> Optional[Session]:
+        """pop() for a session whose utterance was handed over"""
+        with self._lock:
+            session = self._sessions.pop(stream_id, None)
+            if session is not None:
+                self.stats["finalized"] += 1
+                self.stats["forced_finalizations"] += forced
+            return session
+
+    def discard(self, stream_id: str):
+        """Forget the stream entirely (e.g. on disconnect)"""
+        with self._lock:
+            self._sessions.pop(stream_id, None)
+            self._last_seen.pop(stream_id, None)
+
+    def over_max_duration(self, session: Session) -> bool:
+        return self.max_duration > 0 and session_seconds(session) >= self.max_duration
+
+    # ----- Bounds -----
+
+    def enforce_budget(self, keep: Optional[str] = None) -> List[str]:
+        """Evict sessions, least recently fed first (never `keep`), until the budget holds"""
+        if self.memory_budget <= 0:
+            return []
+        with self._lock:
+            held = sum(session_bytes(s) for s in self._sessions.values())
+            evicted = []
+            for stream_id in list(self._sessions):
+                if held <= self.memory_budget:
+                    break
+                if stream_id == keep:
+                    continue
+                held -= session_bytes(self._sessions.pop(stream_id))
+                evicted.append(stream_id)
+            self.stats["evicted"] += len(evicted)
+        if evicted:
+            logger.warning(
+                f"STT session memory over {self.memory_budget / _MB:.0f} MB; "
+                f"dropped buffered audio of streams {evicted}"
+            )
+        return evicted
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Expire streams idle longer than the TTL; returns how many sessions were dropped"""
+        if self.idle_ttl <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                stream_id
+                for stream_id, seen in self._last_seen.items()
+                if now - seen > self.idle_ttl
+            ]
+            dropped = 0
+            for stream_id in expired:
+                del self._last_seen[stream_id]
+                dropped += self._sessions.pop(stream_id, None) is not None
+            self.stats["expired"] += dropped
+        if dropped:
+            logger.info(f"Expired {dropped} idle STT session(s)")
+
+        for stream_id in expired:
+            if self.on_expire is not None:
+                try:
+                    self.on_expire(stream_id)
+                except Exception as e:
+                    logger.warning(
+                        f"STT stream {stream_id} expiry callback failed: {e}"
+                    )
+        return dropped
+
+    def _start_janitor(self):
+        if self.idle_ttl <= 0 or self._janitor is not None:
+            return
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(
+                    target=self._janitor_loop, name="stt-session-janitor", daemon=True
+                )
+                self._janitor.start()
+
+    def _janitor_loop(self):
+        interval = min(max(self.idle_ttl / 4, 1.0), 30.0)
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"STT session sweep failed: {e}")
+
+    def shutdown(self):
+        """Stop the idle sweeper and drop every session"""
+        self._stop.set()
+        with self._lock:
+            self._sessions.clear()
+            self._last_seen.clear()
+
+    # ----- Introspection -----
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            streams = len(self._last_seen)
+        held = sum(session_bytes(s) for s in sessions)
+        return {
+            **self.stats,
+            "active_sessions": len(sessions),
+            "streams": streams,
+            "buffered_seconds": round(sum(session_seconds(s) for s in sessions), 3),
+            "bytes_held": held,
+            "memory_budget_mb": (
+                round(self.memory_budget / _MB, 1) if self.memory_budget else None
+            ),
+            "idle_ttl": self.idle_ttl,
+            "max_duration": self.max_duration,
+        }
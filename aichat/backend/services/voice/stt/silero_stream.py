@@ -0,0 +1,292 @@
+"""
+Stateful streaming Silero VAD
+
+The old Silero path re-ran get_speech_timestamps over the last few seconds
+of buffered audio every time a decision was needed, resampling the whole
+tail with linear interpolation and starting the model from a blank state.
+StreamingSileroVAD instead keeps one model instance per stream and feeds it
+only the new audio, one window at a time, so the recurrent state carries
+over chunk boundaries and every sample is scored exactly once:
+
+- StreamingResampler converts the stream to 16 kHz with a polyphase
+  anti-aliasing FIR (the same filter resample_poly designs) whose history is
+  carried between chunks, so chunk seams produce no discontinuities.
+- Each complete 512-sample window (32 ms, the window Silero v4/v5 accept at
+  16 kHz) yields one speech probability; probabilities go through
+  threshold / release hysteresis and a bounded history.
+- snapshot() summarises the stored probabilities (current state, recent
+  probabilities and speech segments) without running the model again.
+"""
+
+import copy
+import logging
+import os
+import time
+from collections import deque
+from math import gcd
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+from scipy.signal import firwin
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+logger = logging.getLogger(__name__)
+
+
+SILERO_SR = 16000
+SILERO_FRAME_SAMPLES = (
+    512  # 32 ms; Silero v4/v5 only accept 512-sample windows at 16 kHz
+)
+HISTORY_SECONDS = 10.0
+
+
+class StreamingResampler:
+    """Polyphase FIR resampler whose filter history carries across chunks"""
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        divisor = gcd(int(src_rate), int(dst_rate))
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.up = self.dst_rate // divisor
+        self.down = self.src_rate // divisor
+
+        # Same low-pass resample_poly designs: Kaiser-windowed sinc at the lower Nyquist
+        max_rate = max(self.up, self.down)
+        if self.up == self.down:
+            self.taps = np.ones(1)
+        else:
+            self.taps = (
+                firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+                * self.up
+            )
+        # Polyphase bank: phase p uses taps p, p + up, p + 2*up, ...
+        self._span = -(
+            -len(self.taps) // self.up
+        )  # Input samples each output depends on
+        bank = np.zeros((self.up, self._span))
+        for phase in range(self.up):
+            coeffs = self.taps[phase :: self.up]
+            bank[phase, : len(coeffs)] = coeffs
+        self._bank = bank
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    @property
+    def delay_output_samples(self) -> float:
+        """Group delay of the (causal) filter, in output samples"""
+        return 0.0 if self.passthrough else (len(self.taps) - 1) / (2.0 * self.down)
+
+    def reset(self):
+        self._history = np.zeros(
+            self._span - 1
+        )  # Inputs before the first chunk read as silence
+        self.consumed = 0  # Input samples seen
+        self.produced = 0  # Output samples emitted
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Resample the next chunk; returns every output sample its inputs complete"""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if self.passthrough:
+            self.consumed += chunk.shape[0]
+            self.produced += chunk.shape[0]
+            return chunk
+
+        base = self.consumed - self._history.shape[0]  # Absolute input index of x[0]
+        x = np.concatenate((self._history, chunk))
+        self.consumed += chunk.shape[0]
+
+        # Output m needs upsampled input m * down, i.e. input (m * down) // up
+        last = (self.consumed * self.up - 1) // self.down if self.consumed else -1
+        positions = np.arange(self.produced, last + 1, dtype=np.int64) * self.down
+        if positions.size:
+            newest = positions // self.up - base
+            gathered = x[newest[:, None] - np.arange(self._span)[None, :]]
+            out = np.einsum(
+                "ij,ij->i", self._bank[positions % self.up], gathered
+            ).astype(np.float32)
+        else:
+            out = np.zeros(0, dtype=np.float32)
+        self.produced += out.shape[0]
+
+        self._history = x[x.shape[0] - (self._span - 1) :] if self._span > 1 else x[:0]
+        return out
+
+    def to_input_samples(self, output_samples: float) -> int:
+        """Input position that output position `output_samples` corresponds to, net of filter delay"""
+        position = (
+            (output_samples - self.delay_output_samples) * self.src_rate / self.dst_rate
+        )
+        return max(0, int(round(position)))
+
+
+class StreamingSileroVAD:
+    """Per-stream Silero VAD fed incrementally, one 512-sample window at a time"""
+
+    def __init__(
+        self,
+        model: Any,
+        sample_rate: int,
+        threshold: Optional[float] = None,
+        release_threshold: Optional[float] = None,
+        history_seconds: float = HISTORY_SECONDS,
+    ):
+        if threshold is None:
+            threshold = float(os.getenv("STT_SILERO_THRESHOLD", "0.5"))
+        self.model = model  # model(window, SILERO_SR) -> speech probability; owns the recurrent state
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        # Same default gap get_speech_timestamps uses to end speech
+        self.release_threshold = (
+            max(threshold - 0.15, 0.01)
+            if release_threshold is None
+            else release_threshold
+        )
+        self.resampler = StreamingResampler(sample_rate, SILERO_SR)
+        self._history_frames = max(
+            1, int(history_seconds * SILERO_SR / SILERO_FRAME_SAMPLES)
+        )
+        self.reset()
+
+    def reset(self):
+        """Forget buffered audio, probabilities and the model's recurrent state"""
+        reset_states = getattr(self.model, "reset_states", None)
+        if callable(reset_states):
+            reset_states()
+        self.resampler.reset()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.probabilities: Deque[float] = deque(maxlen=self._history_frames)
+        self.frames = 0
+        self.speaking = False
+        self.last_speech_frame = (
+            -1
+        )  # Absolute index of the last frame at or above threshold
+        self.inference_seconds = 0.0
+
+    @property
+    def input_samples(self) -> int:
+        return self.resampler.consumed
+
+    @property
+    def last_speech_end(self) -> Optional[int]:
+        """Input-rate sample position where the last speech window ended, or None"""
+        if self.last_speech_frame < 0:
+            return None
+        return self.resampler.to_input_samples(
+            (self.last_speech_frame + 1) * SILERO_FRAME_SAMPLES
+        )
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Score the windows this chunk completes; returns their speech probabilities"""
+        resampled = self.resampler.process(chunk)
+        pending = (
+            np.concatenate((self._pending, resampled))
+            if self._pending.size
+            else resampled
+        )
+        n_frames = pending.shape[0] // SILERO_FRAME_SAMPLES
+        self._pending = pending[n_frames * SILERO_FRAME_SAMPLES :].copy()
+
+        probabilities = np.empty(n_frames, dtype=np.float32)
+        for i in range(n_frames):
+            window = pending[i * SILERO_FRAME_SAMPLES : (i + 1) * SILERO_FRAME_SAMPLES]
+            probability = self._score(window)
+            probabilities[i] = probability
+            self.probabilities.append(probability)
+
+            if probability >= self.threshold:
+                self.speaking = True
+                self.last_speech_frame = self.frames
+            elif probability < self.release_threshold:
+                self.speaking = False
+            self.frames += 1
+        return probabilities
+
+    def _score(self, window: np.ndarray) -> float:
+        started = time.perf_counter()
+        if torch is not None:
+            with torch.no_grad():
+                out = self.model(
+                    torch.from_numpy(np.ascontiguousarray(window)), SILERO_SR
+                )
+        else:
+            out = self.model(window, SILERO_SR)
+        self.inference_seconds += time.perf_counter() - started
+        return float(out.item() if hasattr(out, "item") else out)
+
+    def segments(self, tail_seconds: Optional[float] = None) -> List[Dict[str, int]]:
+        """Speech segments in the stored history as {"start", "end"} sample offsets at 16 kHz"""
+        probabilities = list(self.probabilities)
+        if tail_seconds is not None:
+            tail = max(0, int(tail_seconds * SILERO_SR / SILERO_FRAME_SAMPLES))
+            probabilities = probabilities[len(probabilities) - tail :] if tail else []
+        first = self.frames - len(probabilities)
+
+        segments = []
+        start = None
+        for i, probability in enumerate(probabilities):
+            if start is None and probability >= self.threshold:
+                start = first + i
+            elif start is not None and probability < self.release_threshold:
+                segments.append(
+                    {
+                        "start": start * SILERO_FRAME_SAMPLES,
+                        "end": (first + i) * SILERO_FRAME_SAMPLES,
+                    }
+                )
+                start = None
+        if start is not None:
+            segments.append(
+                {
+                    "start": start * SILERO_FRAME_SAMPLES,
+                    "end": self.frames * SILERO_FRAME_SAMPLES,
+                }
+            )
+        return segments
+
+    def snapshot(
+        self, tail_seconds: float = 6.0, max_probabilities: int = 50
+    ) -> Dict[str, Any]:
+        """Cheap diagnostics from stored probabilities; never runs the model"""
+        tail = max(1, int(tail_seconds * SILERO_SR / SILERO_FRAME_SAMPLES))
+        recent = list(self.probabilities)[-tail:]
+        return {
+            "sample_rate": self.sample_rate,
+            "frames": self.frames,
+            "frame_ms": SILERO_FRAME_SAMPLES * 1000 // SILERO_SR,
+            "speaking": self.speaking,
+            "has_speech": any(p >= self.threshold for p in recent),
+            "confidence": round(max(recent), 3) if recent else 0.0,
+            "probability": round(recent[-1], 3) if recent else None,
+            "mean_probability": round(float(np.mean(recent)), 3) if recent else None,
+            "threshold": self.threshold,
+            "release_threshold": round(self.release_threshold, 3),
+            "seconds_since_speech": (
+                round(
+                    (self.frames - 1 - self.last_speech_frame)
+                    * SILERO_FRAME_SAMPLES
+                    / SILERO_SR,
+                    3,
+                )
+                if self.last_speech_frame >= 0
+                else None
+            ),
+            "probabilities": [round(p, 3) for p in recent[-max_probabilities:]],
+            "segments": self.segments(tail_seconds),
+            "avg_inference_ms": (
+                round(self.inference_seconds * 1000 / self.frames, 3)
+                if self.frames
+                else 0.0
+            ),
+        }
+
+
+def clone_model(model: Any) -> Any:
+    """A private copy of a loaded Silero model, so each stream owns its recurrent state"""
+    return copy.deepcopy(model)
@@ -1,14 +1,20 @@
 import io
 import logging
 import os
-import tempfile
 import time
-from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, Optional
 
 import numpy as np
 import soundfile as sf
 
+from .audio_buffer import AudioBuffer, RollingStats
+from .audio_input import AudioInput, capture_audio, to_float32
+from .denoiser import StreamingDenoiser
+from .session_store import SessionStore
+from .silero_stream import StreamingSileroVAD, clone_model
+
 # Enhanced VAD integration
 try:
     from .vad_service import VADService, VADConfig, VADState
@@ -29,7 +35,6 @@ STD_DEV_MULTIPLIER = 1.8  # multiplier above noise-mean+std to consider voice
 SILERO_AVAILABLE = False
 SILERO_MODEL = None
 SILERO_UTILS = None
-SILERO_SR = 16000  # Silero expects 16k
 
 try:
     import torch
@@ -70,29 +75,58 @@ except Exception:
     SILERO_AVAILABLE = False
     logger.info("torch / silero not installed; running without Silero VAD")
 
-# Sessions stored in memory: ephemeral per running process
+@dataclass
+class Utterance:
+    """A finalized utterance; audio is float32 at sample_rate (path only when captured to disk)"""
+    stream_id: str
+    audio: np.ndarray
+    sample_rate: int
+    path: Optional[Path] = None
+    forced: bool = False  # Cut at the session's max duration rather than at silence
+
+    @property
+    def duration(self) -> float:
+        return self.audio.shape[0] / float(self.sample_rate) if self.sample_rate else 0.0
+
+
+# Sessions stored in memory: ephemeral per running process, bounded by idle
+# expiry, a max utterance duration and a memory budget (see SessionStore)
 # session structure:
 # {
-#   "chunks": [np.ndarray, ...],
+#   "audio": AudioBuffer,
+#   "chunks": int,
 #   "sr": int,
 #   "last_voice_time": float,
-#   "last_input_time": float
+#   "last_voice_sample": int,
+#   "last_input_time": float,
+#   "rms_history": RollingStats,
+#   "vad_offset": int  # Silero VAD input position at the start of this utterance
 # }
-_SESSIONS: Dict[str, Dict[str, Any]] = {}
+# Per-stream streaming Silero VADs; outlive single utterances so the model state carries over
+_SILERO_VADS: Dict[str, StreamingSileroVAD] = {}
+# Per-stream denoisers; likewise kept across utterances so the noise profile is not relearned
+_DENOISERS: Dict[str, StreamingDenoiser] = {}
+
+
+def _drop_stream_state(stream_id: str):
+    """Forget the per-stream state that outlives utterances"""
+    _SILERO_VADS.pop(stream_id, None)
+    _DENOISERS.pop(stream_id, None)
+
+
+_SESSIONS = SessionStore(on_expire=_drop_stream_state)
 
 # Tunables
 RMS_VOICE_THRESHOLD = 0.01  # RMS above this considered "voice"
 SILENCE_DURATION = 1.0  # seconds of silence to finalize utterance
 MIN_UTTERANCE_DURATION = 0.25  # minimum seconds of audio before finalizing
+INITIAL_BUFFER_SECONDS = 10.0  # preallocated audio per stream; grows by doubling
 
-# RNNoise/denoiser integration (best-effort)
-RNNOISE_ENABLED = True
-RNNOISE_USE_FFMPEG = (
-    True  # Prefer ffmpeg arnndn filter if available (no python bindings required)
-)
+# In-process streaming noise suppression (one stateful denoiser per stream)
+DENOISE_ENABLED = True
 
-import shutil
-import subprocess
+# Frame-level Silero decisions drive finalization when Silero is loaded (else the STD-DEV VAD does)
+SILERO_STREAMING_ENABLED = os.getenv("STT_SILERO_STREAMING", "1").lower() in ("1", "true", "yes")
 
 
 def _read_wav_bytes_to_array(wav_bytes: bytes):
@@ -109,92 +143,40 @@ def _read_wav_bytes_to_array(wav_bytes: bytes):
     return data, sr
 
 
-def _denoise_via_ffmpeg(wav_bytes: bytes, target_sr: Optional[int] = None) -> bytes:
-    """
-    Best-effort denoise using ffmpeg's arnndn filter (if ffmpeg compiled with arnndn).
-    Returns WAV bytes (raw) or original bytes on failure.
-    """
-    ffmpeg_path = shutil.which("ffmpeg")
-    if not ffmpeg_path or not RNNOISE_ENABLED or not RNNOISE_USE_FFMPEG:
-        return wav_bytes
-
-    # Create temp files
-    in_fd, in_path = tempfile.mkstemp(suffix=".wav", prefix="rn_in_")
-    out_fd, out_path = tempfile.mkstemp(suffix=".wav", prefix="rn_out_")
-    os.close(in_fd)
-    os.close(out_fd)
-
-    try:
-        with open(in_path, "wb") as f:
-            f.write(wav_bytes)
-
-        cmd = [ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error", "-i", in_path]
-        # Use arnndn filter if available; fallback to nothing
-        cmd += ["-af", "arnndn", "-ac", "1"]
-        if target_sr:
-            cmd += ["-ar", str(target_sr)]
-        cmd += [out_path]
-
-        proc = subprocess.run(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10
-        )
-        if proc.returncode != 0:
-            # ffmpeg failed, return original
-            logger.debug(
-                f"ffmpeg rnnoise failed: {proc.stderr.decode('utf-8', errors='ignore')}"
-            )
-            return wav_bytes
-
-        with open(out_path, "rb") as f:
-            out_bytes = f.read()
-
-        return out_bytes
-
-    except Exception as e:
-        logger.debug(f"RNNoise via ffmpeg error: {e}")
-        return wav_bytes
-
-    finally:
-        try:
-            os.remove(in_path)
-        except Exception:
-            pass
-        try:
-            os.remove(out_path)
-        except Exception:
-            pass
+def _rms(arr: np.ndarray) -> float:
+    if arr.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(arr))))
 
 
-def _denoise_array_if_possible(arr: np.ndarray, sr: int) -> (np.ndarray, int):
-    """
-    Try to denoise the audio array and return (array, sr).
-    This function writes a temporary WAV and calls ffmpeg rnnoise filter if available.
-    """
+def _get_silero_vad(stream_id: str, sample_rate: int) -> Optional[StreamingSileroVAD]:
+    """The stream's Silero VAD, created on first use with its own copy of the model"""
+    global SILERO_STREAMING_ENABLED
+    vad = _SILERO_VADS.get(stream_id)
+    if vad is not None and vad.sample_rate == sample_rate:
+        return vad
+    if not (SILERO_AVAILABLE and SILERO_STREAMING_ENABLED) or SILERO_MODEL is None:
+        return None
     try:
-        # Write to temp WAV
-        fd, path = tempfile.mkstemp(suffix=".wav", prefix="rn_tmp_")
-        os.close(fd)
-        sf.write(path, arr, sr, subtype="PCM_16")
-        with open(path, "rb") as f:
-            wav_bytes = f.read()
-        denoised_bytes = _denoise_via_ffmpeg(wav_bytes, target_sr=sr)
-        # Read back
-        data, new_sr = _read_wav_bytes_to_array(denoised_bytes)
-        return data, new_sr
+        vad = StreamingSileroVAD(clone_model(SILERO_MODEL), sample_rate)
     except Exception as e:
-        logger.debug(f"Denoise failed, using original audio: {e}")
-        return arr, sr
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
+        # Copying the model fails the same way every time; stay on the STD-DEV VAD
+        logger.warning(f"Streaming Silero VAD unavailable, using STD-DEV VAD: {e}")
+        SILERO_STREAMING_ENABLED = False
+        return None
+    _SILERO_VADS[stream_id] = vad
+    return vad
 
 
-def _rms(arr: np.ndarray) -> float:
-    if arr.size == 0:
-        return 0.0
-    return float(np.sqrt(np.mean(np.square(arr))))
+def _get_denoiser(stream_id: str, sample_rate: int) -> Optional[StreamingDenoiser]:
+    """The stream's denoiser, created on first use (None when denoising is off)"""
+    if not DENOISE_ENABLED:
+        return None
+    denoiser = _DENOISERS.get(stream_id)
+    if denoiser is None or denoiser.sample_rate != sample_rate:
+        denoiser = StreamingDenoiser(sample_rate)
+        _DENOISERS[stream_id] = denoiser
+    return denoiser
 
 
 # Enhanced VAD integration
@@ -247,14 +229,11 @@ def get_enhanced_vad_decision(stream_id: str, audio_data: np.ndarray, sample_rat
         except Exception as e:
             logger.debug(f"Unified VAD failed for stream {stream_id}: {e}")
     
-    # Fallback to Silero VAD
-    if SILERO_AVAILABLE:
-        try:
-            silero_result = get_silero_decision(stream_id)
-            if silero_result:
-                return silero_result.get('has_speech', False), silero_result.get('confidence', 0.0), "silero_vad"
-        except Exception as e:
-            logger.debug(f"Silero VAD failed for stream {stream_id}: {e}")
+    # Fallback to the stream's Silero VAD (already scored as audio was fed)
+    vad = _SILERO_VADS.get(stream_id)
+    if vad is not None and vad.frames:
+        snapshot = vad.snapshot()
+        return snapshot["has_speech"], snapshot["confidence"], "silero_vad"
     
     # Final fallback to RMS-based detection
     chunk_rms = _rms(audio_data)
@@ -264,66 +243,96 @@ def get_enhanced_vad_decision(stream_id: str, audio_data: np.ndarray, sample_rat
     return has_speech, confidence, "rms_based"
 
 
-def feed_audio(stream_id: str, wav_bytes: bytes) -> Optional[str]:
+def feed_audio(
+    stream_id: str, audio: AudioInput, sample_rate: Optional[int] = None
+) -> Optional[Utterance]:
     """
-    Feed a WAV chunk (bytes) for the given stream_id.
-    Uses a rolling RMS history and standard-deviation threshold to determine
-    whether the chunk contains voice relative to the recent noise floor.
+    Feed a chunk for the given stream_id: WAV bytes, or (with sample_rate)
+    a float32/int16 array or raw PCM16 buffer.
+    Voice is detected per 32 ms frame by the stream's Silero VAD when Silero is
+    loaded; otherwise a rolling RMS history and standard-deviation threshold
+    decide whether the chunk contains voice relative to the recent noise floor.
 
-    Returns a path to a temporary WAV file if the utterance was finalized;
-    otherwise returns None.
+    Returns the finalized Utterance (audio kept in memory) if the utterance
+    was finalized; otherwise returns None.
 
     This function is synchronous and may be called in a threadpool to avoid blocking asyncio.
     """
     try:
-        data, sr = _read_wav_bytes_to_array(wav_bytes)
-        # Apply RNNoise denoising (best-effort via ffmpeg arnndn) before VAD processing.
-        if RNNOISE_ENABLED:
-            try:
-                data, sr = _denoise_array_if_possible(data, sr)
-            except Exception as e:
-                logger.debug(f"RNNoise denoise failed for stream {stream_id}: {e}")
+        if sample_rate is None:
+            data, sr = _read_wav_bytes_to_array(audio)
+        else:
+            data, sr = to_float32(audio), sample_rate
     except Exception as e:
-        logger.error(f"Error decoding wav bytes for stream {stream_id}: {e}")
+        logger.error(f"Error decoding audio for stream {stream_id}: {e}")
         return None
 
     now = time.time()
     sess = _SESSIONS.get(stream_id)
     if sess is None:
         sess = {
-            "chunks": [],
+            "audio": AudioBuffer(initial_capacity=int(sr * INITIAL_BUFFER_SECONDS)),
+            "chunks": 0,
             "sr": sr,
             "last_voice_time": 0.0,
             "last_voice_sample": 0,
             "last_input_time": now,
-            "rms_history": deque(maxlen=RMS_HISTORY_LENGTH),
+            "rms_history": RollingStats(RMS_HISTORY_LENGTH),
         }
-        _SESSIONS[stream_id] = sess
+        vad = _get_silero_vad(stream_id, sr)
+        sess["vad_offset"] = vad.input_samples if vad is not None else 0
+        _SESSIONS.add(stream_id, sess)
+    else:
+        _SESSIONS.touch(stream_id)
 
     # If sample rate differs, prefer the first chunk's SR (simple approach)
     if "sr" not in sess or sess["sr"] is None:
         sess["sr"] = sr
 
+    # Suppress noise before VAD; the denoiser keeps its noise profile across chunks
+    denoiser = _get_denoiser(stream_id, sr)
+    if denoiser is not None:
+        try:
+            data = denoiser.process(data)
+        except Exception as e:
+            logger.debug(f"Denoise failed for stream {stream_id}: {e}")
+
     # Append chunk
-    sess["chunks"].append(data)
+    buffer = sess["audio"]
+    buffer.append(data)
+    sess["chunks"] += 1
     sess["last_input_time"] = now
+    _SESSIONS.enforce_budget(keep=stream_id)
 
     # Compute RMS for this chunk and update history
     chunk_rms = _rms(data)
-    sess["rms_history"].append(chunk_rms)
+    sess["rms_history"].push(chunk_rms)
 
-    # Estimate noise statistics from RMS history.
-    # Use median/mean and stddev for robustness.
-    rms_vals = (
-        np.array(list(sess["rms_history"])) if sess["rms_history"] else np.array([0.0])
-    )
-    noise_mean = float(np.mean(rms_vals))
-    noise_std = float(np.std(rms_vals, ddof=1)) if rms_vals.size > 1 else 0.0
+    # Estimate noise statistics from the running RMS mean and stddev
+    noise_mean = sess["rms_history"].mean
+    noise_std = sess["rms_history"].std
 
-    # Determine voice presence: chunk is voice if its RMS exceeds noise_mean + k * noise_std
+    # Determine voice presence: Silero frame decisions when available, else the chunk
+    # is voice if its RMS exceeds noise_mean + k * noise_std
     is_voice = False
     threshold = None
-    if noise_std > 0:
+    voice_end_sample = None  # Where voice ended inside this chunk (Silero only)
+    vad = _SILERO_VADS.get(stream_id)
+    if vad is not None and vad.sample_rate != sess["sr"]:
+        vad = None
+    if vad is not None:
+        try:
+            probabilities = vad.process(data)
+        except Exception as e:
+            logger.warning(f"Silero VAD failed for stream {stream_id}, using STD-DEV VAD: {e}")
+            _SILERO_VADS.pop(stream_id, None)
+            vad = None
+    if vad is not None:
+        threshold = vad.threshold
+        is_voice = vad.speaking or bool((probabilities >= vad.threshold).any())
+        if is_voice and not vad.speaking:
+            voice_end_sample = vad.last_speech_end - sess.get("vad_offset", 0)
+    elif noise_std > 0:
         threshold = noise_mean + (STD_DEV_MULTIPLIER * noise_std)
         is_voice = chunk_rms >= threshold
     else:
@@ -340,17 +349,21 @@ def feed_audio(stream_id: str, wav_bytes: bytes) -> Optional[str]:
         noise_std,
         f"{threshold:.6f}" if isinstance(threshold, float) else str(threshold),
         is_voice,
-        len(sess["chunks"]),
+        sess["chunks"],
     )
 
     # Update last_voice_sample (audio-based position) when voice detected.
     # Compute total duration so far (in audio time)
-    total_samples = sum(arr.shape[0] for arr in sess["chunks"])
+    total_samples = len(buffer)
     total_duration = total_samples / float(sess["sr"]) if sess["sr"] else 0.0
 
     if is_voice:
         sess["last_voice_time"] = now
-        sess["last_voice_sample"] = total_samples
+        if voice_end_sample is None:
+            sess["last_voice_sample"] = total_samples
+        else:
+            # Speech stopped mid-chunk: count the silence after it towards finalization
+            sess["last_voice_sample"] = min(max(voice_end_sample, sess["last_voice_sample"]), total_samples)
 
     # Determine silence length in audio time (seconds since last voice sample)
     samples_since_voice = total_samples - sess.get("last_voice_sample", 0)
@@ -369,32 +382,33 @@ def feed_audio(stream_id: str, wav_bytes: bytes) -> Optional[str]:
         total_duration,
         seconds_since_voice_audio,
         time_since_wall_clock,
-        len(sess["chunks"]),
+        sess["chunks"],
     )
 
-    # Finalize when audio-silence exceeds threshold (preferred) and utterance is long enough.
-    if (
+    # Finalize when audio-silence exceeds threshold (preferred) and utterance is long enough,
+    # or when speech has run on past the session's max duration
+    forced = _SESSIONS.over_max_duration(sess)
+    if forced or (
         seconds_since_voice_audio >= SILENCE_DURATION
         and total_duration >= MIN_UTTERANCE_DURATION
     ):
-        # Concatenate and write to a temp WAV file
+        # Hand over the buffered audio as a view; the session (and its buffer) is dropped here
         try:
-            concatenated = (
-                np.concatenate(sess["chunks"])
-                if len(sess["chunks"]) > 1
-                else sess["chunks"][0]
+            utterance = Utterance(
+                stream_id=stream_id,
+                audio=buffer.view(),
+                sample_rate=sess["sr"],
+                path=capture_audio(buffer.view(), sess["sr"], f"stream_{stream_id}"),
+                forced=forced,
             )
-            # Write 16-bit PCM WAV
-            fd, path = tempfile.mkstemp(suffix=".wav", prefix=f"stream_{stream_id}_")
-            os.close(fd)
-            sf.write(path, concatenated, sess["sr"], subtype="PCM_16")
             logger.info(
-                f"Finalized utterance for stream {stream_id}, wrote {path} (duration={total_duration:.2f}s) "
+                f"Finalized utterance for stream {stream_id} (duration={total_duration:.2f}s"
+                f"{', max duration reached' if forced else ''}) "
                 f"[noise_mean={noise_mean:.6f}, noise_std={noise_std:.6f}, chunk_rms={chunk_rms:.6f}]"
             )
             # Clear session
-            _SESSIONS.pop(stream_id, None)
-            return path
+            _SESSIONS.finalize(stream_id, forced=forced)
+            return utterance
         except Exception as e:
             logger.error(f"Error finalizing utterance for stream {stream_id}: {e}")
             # attempt cleanup
@@ -405,77 +419,47 @@ def feed_audio(stream_id: str, wav_bytes: bytes) -> Optional[str]:
     return None
 
 
-def reset_session(stream_id: str):
-    """Clear buffered data for a stream (e.g., on disconnect)."""
-    _SESSIONS.pop(stream_id, None)
-
-
-def get_silero_decision(stream_id: str, tail_seconds: float = 6.0):
+def end_utterance(stream_id: str):
     """
-    Synchronous helper: run Silero VAD on the tail of the buffered audio for a stream.
-    Returns a list of speech timestamp dicts (may be empty) or None if Silero unavailable.
-    This is synchronous and intended to be run in an executor from async endpoints.
+    Drop the stream's buffered utterance (e.g. when the client ends it) but keep
+    its per-stream VAD and denoiser state for the next utterance; use
+    reset_session on disconnect.
     """
-    if not SILERO_AVAILABLE or SILERO_MODEL is None or not SILERO_UTILS:
-        return None
+    _SESSIONS.finalize(stream_id)
 
-    sess = _SESSIONS.get(stream_id)
-    if not sess:
-        return None
 
-    try:
-        concatenated = (
-            np.concatenate(sess["chunks"])
-            if len(sess["chunks"]) > 1
-            else sess["chunks"][0]
-        )
-        sr = sess["sr"]
-        tail_samples = int(min(concatenated.shape[0], int(tail_seconds * sr)))
-        tail = concatenated[-tail_samples:]
-        # resample if needed
-        if sr != SILERO_SR:
-            try:
-                # simple resample
-                src_indices = np.linspace(0, tail.shape[0] - 1, num=tail.shape[0])
-                tgt_indices = np.linspace(
-                    0, tail.shape[0] - 1, num=int(round(tail_seconds * SILERO_SR))
-                )
-                tail_rs = np.interp(tgt_indices, src_indices, tail).astype(np.float32)
-            except Exception:
-                tail_rs = tail
-        else:
-            tail_rs = tail.astype(np.float32)
+def reset_session(stream_id: str):
+    """Clear buffered data, VAD and denoiser state for a stream (e.g., on disconnect)."""
+    _SESSIONS.discard(stream_id)
+    _drop_stream_state(stream_id)
 
-        # Prepare input for Silero utils
-        get_ts = None
-        if isinstance(SILERO_UTILS, dict) and "get_speech_timestamps" in SILERO_UTILS:
-            get_ts = SILERO_UTILS["get_speech_timestamps"]
-        elif callable(SILERO_UTILS):
-            get_ts = SILERO_UTILS
 
-        if not get_ts:
-            return None
+def get_session_stats() -> Dict[str, Any]:
+    """Totals across all streams: active sessions, buffered audio and memory held."""
+    return {**_SESSIONS.get_stats(), "silero_vads": len(_SILERO_VADS), "denoisers": len(_DENOISERS)}
 
-        # Some wrappers expect torch tensors; attempt to import torch
-        try:
-            import torch
 
-            audio_tensor = torch.from_numpy(tail_rs)
-            speech_timestamps = get_ts(
-                audio_tensor, SILERO_MODEL, sampling_rate=SILERO_SR
-            )
-        except Exception:
-            # fallback to numpy
-            try:
-                speech_timestamps = get_ts(
-                    tail_rs, SILERO_MODEL, sampling_rate=SILERO_SR
-                )
-            except Exception:
-                return None
-
-        return speech_timestamps
-    except Exception:
+def get_silero_decision(stream_id: str, tail_seconds: float = 6.0):
+    """
+    Speech segments Silero found in the last `tail_seconds` of a stream, as
+    {"start", "end"} sample offsets at 16 kHz (stream time, like
+    get_speech_timestamps). Returns None if the stream has no Silero VAD.
+    Built from the per-frame probabilities recorded while feeding audio, so it
+    is cheap and never runs the model.
+    """
+    vad = _SILERO_VADS.get(stream_id)
+    if vad is None:
         return None
+    return vad.segments(tail_seconds)
+
+
+def get_vad_diagnostics(stream_id: str, tail_seconds: float = 6.0) -> Dict[str, Any]:
+    """Session info plus a snapshot of the stream's Silero VAD state (None without Silero)."""
+    vad = _SILERO_VADS.get(stream_id)
+    return {
+        "session": get_session_info(stream_id),
+        "silero": vad.snapshot(tail_seconds) if vad is not None else None,
+    }
 
 
 def get_session_info(stream_id: str) -> Optional[Dict[str, Any]]:
@@ -483,13 +467,14 @@ def get_session_info(stream_id: str) -> Optional[Dict[str, Any]]:
     sess = _SESSIONS.get(stream_id)
     if not sess:
         return None
-    total_samples = sum(arr.shape[0] for arr in sess["chunks"])
+    total_samples = len(sess["audio"])
     total_duration = total_samples / float(sess["sr"]) if sess["sr"] else 0.0
     return {
         "stream_id": stream_id,
-        "chunks": len(sess["chunks"]),
+        "chunks": sess["chunks"],
         "sample_rate": sess["sr"],
         "buffered_seconds": total_duration,
         "last_voice_time": sess["last_voice_time"],
         "last_input_time": sess["last_input_time"],
+        "vad": "silero" if stream_id in _SILERO_VADS else "std_dev",
     }
@@ -0,0 +1,256 @@
+"""
+Incremental transcription for live audio streams
+
+Instead of waiting for silence to finalize an utterance and then decoding the
+whole clip, StreamingTranscriber re-decodes a sliding window of uncommitted
+audio every `step_seconds` of new input. Consecutive hypotheses are compared
+with a local agreement policy: words that the last `agreement` decodes agree
+on (as a common prefix) are committed and never change again; the rest is
+reported as tentative text.
+
+Once the window is longer than `trim_seconds`, audio up to the end of the
+last committed word is dropped from the buffer, and the committed text is
+passed to the next decode as a prompt instead, so per-step compute stays
+bounded however long the utterance runs. If nothing agrees for
+`max_buffer_seconds`, the latest hypothesis is committed outright.
+"""
+
+import logging
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .audio_buffer import AudioBuffer
+from .audio_input import WHISPER_SAMPLE_RATE, AudioInput, prepare_for_whisper
+
+logger = logging.getLogger(__name__)
+
+
+# decode(window, prompt) -> [{"word", "start", "end"}, ...] with times relative to the window
+DecodeFn = Callable[[np.ndarray, Optional[str]], Awaitable[List[Dict[str, Any]]]]
+
+# Committed words may be re-emitted by a later decode with slightly earlier timestamps
+_TIMESTAMP_TOLERANCE = 0.1
+# Longest run of already-committed words to look for at the start of a new hypothesis
+_MAX_OVERLAP_WORDS = 5
+
+
+@dataclass
+class Word:
+    """A decoded word with times in seconds from the start of the stream"""
+
+    text: str
+    start: float
+    end: float
+
+    @property
+    def key(self) -> str:
+        return _normalize(self.text)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+def _join(words: List[Word]) -> str:
+    # Whisper words carry their own leading space
+    return "".join(word.text for word in words).strip()
+
+
+class LocalAgreement:
+    """Commit the longest prefix that the last `n` hypotheses agree on"""
+
+    def __init__(self, n: int = 2):
+        self.n = max(2, n)
+        self._hypotheses: Deque[List[Word]] = deque(maxlen=self.n)
+
+    def update(self, hypothesis: List[Word]) -> List[Word]:
+        """Record a new hypothesis (uncommitted words only); returns the newly committed words"""
+        self._hypotheses.append(hypothesis)
+        if len(self._hypotheses) < self.n:
+            return []
+
+        agreed = 0
+        for words in zip(*self._hypotheses):
+            if any(word.key != words[-1].key for word in words):
+                break
+            agreed += 1
+
+        # Take the newest hypothesis' timing for the committed words
+        committed = hypothesis[:agreed]
+        if agreed:
+            self._hypotheses = deque(
+                (words[agreed:] for words in self._hypotheses), maxlen=self.n
+            )
+        return committed
+
+    def tentative(self) -> List[Word]:
+        return self._hypotheses[-1] if self._hypotheses else []
+
+    def reset(self):
+        self._hypotheses.clear()
+
+
+class StreamingTranscriber:
+    """Sliding-window decoder emitting committed and tentative text for one stream"""
+
+    def __init__(
+        self,
+        decode: DecodeFn,
+        step_seconds: Optional[float] = None,
+        trim_seconds: Optional[float] = None,
+        max_buffer_seconds: Optional[float] = None,
+        agreement: int = 2,
+        prompt_chars: int = 200,
+    ):
+        if step_seconds is None:
+            step_seconds = float(os.getenv("STT_PARTIAL_STEP_SECONDS", "0.5"))
+        if trim_seconds is None:
+            trim_seconds = float(os.getenv("STT_PARTIAL_TRIM_SECONDS", "5"))
+        if max_buffer_seconds is None:
+            max_buffer_seconds = float(os.getenv("STT_PARTIAL_MAX_SECONDS", "20"))
+        self.decode = decode
+        self.step_seconds = step_seconds
+        self.trim_seconds = trim_seconds
+        self.max_buffer_seconds = max(max_buffer_seconds, trim_seconds)
+        self.prompt_chars = prompt_chars
+        self.policy = LocalAgreement(agreement)
+
+        self.buffer = AudioBuffer(
+            initial_capacity=int(WHISPER_SAMPLE_RATE * self.max_buffer_seconds)
+        )
+        self.buffer_offset = 0.0  # Stream time of buffer[0], in seconds
+        self.committed: List[Word] = []
+        self.decodes = 0
+        self._undecoded_samples = 0
+
+    @property
+    def buffer_seconds(self) -> float:
+        return len(self.buffer) / WHISPER_SAMPLE_RATE
+
+    @property
+    def stream_seconds(self) -> float:
+        return self.buffer_offset + self.buffer_seconds
+
+    @property
+    def committed_text(self) -> str:
+        return _join(self.committed)
+
+    async def push(
+        self, audio: AudioInput, sample_rate: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Add audio; once `step_seconds` of it has arrived since the last decode,
+        re-decode the window and return a partial result, otherwise None.
+        """
+        if not self.append(audio, sample_rate):
+            return None
+        return await self.step()
+
+    def append(self, audio: AudioInput, sample_rate: int) -> bool:
+        """Add audio without decoding; True once a decode step is due"""
+        samples = prepare_for_whisper(audio, sample_rate)
+        self.buffer.append(samples)
+        self._undecoded_samples += samples.shape[0]
+        return self.step_due
+
+    @property
+    def step_due(self) -> bool:
+        return self._undecoded_samples >= self.step_seconds * WHISPER_SAMPLE_RATE
+
+    async def step(self) -> Dict[str, Any]:
+        """
+        Re-decode the window and return a partial result. Audio may keep
+        arriving through `append` while the decode runs.
+        """
+        newly_committed = self.policy.update(await self._decode_window())
+        self.committed.extend(newly_committed)
+
+        if self.buffer_seconds > self.max_buffer_seconds:
+            # No agreement for a whole window: take the latest hypothesis as is
+            forced = self.policy.tentative()
+            self.committed.extend(forced)
+            newly_committed = newly_committed + forced
+            self.policy.reset()
+            self._trim(self.stream_seconds if not forced else forced[-1].end)
+        elif self.buffer_seconds > self.trim_seconds and self.committed:
+            self._trim(self.committed[-1].end)
+
+        return self._result(newly_committed)
+
+    async def finish(self) -> Dict[str, Any]:
+        """Decode whatever is left, commit all of it, and reset for the next utterance"""
+        newly_committed: List[Word] = []
+        if len(self.buffer):
+            newly_committed = await self._decode_window()
+            self.committed.extend(newly_committed)
+        result = self._result(newly_committed, final=True)
+        self.reset()
+        return result
+
+    def reset(self):
+        self.buffer.clear()
+        self.buffer_offset = 0.0
+        self.committed = []
+        self.policy.reset()
+        self._undecoded_samples = 0
+
+    async def _decode_window(self) -> List[Word]:
+        self._undecoded_samples = 0
+        self.decodes += 1
+        prompt = self.committed_text[-self.prompt_chars :] or None
+        raw_words = await self.decode(self.buffer.view().copy(), prompt)
+
+        committed_end = self.committed[-1].end if self.committed else 0.0
+        words = [
+            Word(
+                str(w.get("word", "")),
+                self.buffer_offset + float(w["start"]),
+                self.buffer_offset + float(w["end"]),
+            )
+            for w in raw_words
+        ]
+        # Words the buffer still holds audio for but that are already committed
+        words = [
+            w
+            for w in words
+            if w.key and w.start >= committed_end - _TIMESTAMP_TOLERANCE
+        ]
+        return words[self._overlap_with_committed(words) :]
+
+    def _overlap_with_committed(self, words: List[Word]) -> int:
+        """Length of the longest run at the start of `words` repeating the end of the committed text"""
+        for size in range(
+            min(_MAX_OVERLAP_WORDS, len(words), len(self.committed)), 0, -1
+        ):
+            if [w.key for w in self.committed[-size:]] == [w.key for w in words[:size]]:
+                return size
+        return 0
+
+    def _trim(self, until: float):
+        """Drop buffered audio before stream time `until`"""
+        samples = int(round((until - self.buffer_offset) * WHISPER_SAMPLE_RATE))
+        samples = min(max(samples, 0), len(self.buffer))
+        if samples:
+            self.buffer.discard(samples)
+            self.buffer_offset += samples / WHISPER_SAMPLE_RATE
+
+    def _result(
+        self, newly_committed: List[Word], final: bool = False
+    ) -> Dict[str, Any]:
+        committed = self.committed_text
+        tentative = "" if final else _join(self.policy.tentative())
+        return {
+            "text": f"{committed} {tentative}".strip(),
+            "committed": committed,
+            "tentative": tentative,
+            "new_committed": _join(newly_committed),
+            "audio_seconds": round(self.stream_seconds, 3),
+            "buffer_seconds": round(self.buffer_seconds, 3),
+            "decodes": self.decodes,
+            "final": final,
+        }
@@ -106,8 +106,8 @@ class VADConfig:
     audio_buffer_duration: float = 10.0  # Seconds of audio to buffer per source
     max_sources: int = 50  # Maximum number of audio sources to track
 
-    # Output settings
-    save_speech_segments: bool = True
+    # Output settings (segments reach callbacks in memory; saving is for debugging/training capture)
+    save_speech_segments: bool = False
     segment_output_dir: Optional[Path] = None
 
     def __post_init__(self):
@@ -190,6 +190,11 @@ class SpeechSegment:
             return None
         return b"".join(self.audio_frames)
 
+    def get_audio_array(self) -> np.ndarray:
+        """Combined PCM16 audio as an int16 array (no copy beyond the join)"""
+        combined = self.get_combined_audio()
+        return np.frombuffer(combined, dtype=np.int16) if combined else np.zeros(0, dtype=np.int16)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
         return {
@@ -2,9 +2,13 @@
 Whisper service for speech-to-text functionality
 """
 
+import asyncio
 import logging
+import os
+import tempfile
+import threading
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
 import numpy as np
@@ -16,10 +20,20 @@ try:
 except ImportError:
     whisper = None
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
 # Local imports
 from aichat.constants.paths import TEMP_AUDIO_DIR, ensure_dirs
 from aichat.core.event_system import EventSeverity, EventType, get_event_system
 from aichat.backend.services.audio.audio_io_service import AudioIOService
+from .audio_input import WHISPER_SAMPLE_RATE, AudioInput, decode_audio_bytes, prepare_for_whisper
+from .inference_pool import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, InferencePool
+from .model_registry import ModelHandle, get_model_registry
+from . import cpu_inference
+from .batching import MAX_BATCH_SECONDS, MicroBatcher, decode_batch
 
 logger = logging.getLogger(__name__)
 
@@ -27,91 +41,334 @@ logger = logging.getLogger(__name__)
 class WhisperService:
     """Speech-to-text service using OpenAI Whisper"""
     
-    def __init__(self, model_name: str = "base"):
+    def __init__(
+        self,
+        model_name: str = "base",
+        workers: Optional[int] = None,
+        device: Optional[str] = None,
+        precision: Optional[str] = None,
+    ):
+        if device is None:
+            device = "cuda" if torch is not None and torch.cuda.is_available() else "cpu"
         self.model_name = model_name
-        self.model = None
-        self._initialized = False
+        self.device = device
         self.event_system = get_event_system()
         self.audio_io = AudioIOService()
-        
-        # Initialize Whisper if available
-        if whisper is not None:
-            try:
-                self.model = whisper.load_model(model_name)
-                self._initialized = True
-                logger.info(f"Whisper model '{model_name}' loaded successfully")
-            except Exception as e:
-                logger.error(f"Failed to load Whisper model: {e}")
-                self._initialized = False
+
+        # Transcription runs on worker threads, never on the event loop
+        self.pool: Optional[InferencePool] = None
+        self.workers = workers if workers is not None else int(os.getenv("WHISPER_WORKERS", "1"))
+        self._swap_lock = threading.Lock()
+
+        # Concurrent in-memory utterances are decoded together in micro-batches
+        self._batcher: Optional[MicroBatcher] = None
+
+        # Precision: fp16 on GPU; on CPU fp32/int8/onnx-*, or "auto" to benchmark
+        # the variants in the background and switch to the fastest
+        self.precision_mode = precision or os.getenv("WHISPER_PRECISION", "auto")
+        self.cpu_threads: Optional[int] = None
+        if device.startswith("cuda"):
+            self.precision_mode = "fp16" if self.precision_mode == "auto" else self.precision_mode
+        else:
+            self.cpu_threads = cpu_inference.threads_per_worker(self.workers)
+            cpu_inference.configure_process_threads()
+        self.precision = self._initial_precision(model_name)
+        self._observed_rtf: Dict[str, List[float]] = {}  # precision -> [count, total]
+
+        # Weights live in the shared model registry (one replica per pool worker)
+        # and load in the background; services with the same model share them
+        self._handles: List[ModelHandle] = []
+        self._initialized = whisper is not None
+        if self._initialized:
+            self._handles = self._acquire_models(model_name, self.precision)
+            self._start_auto_select(model_name)
         else:
             logger.error("Whisper not available - service cannot function")
-            self._initialized = False
-    
-    
-    async def transcribe_audio(self, audio_path: Path) -> Dict[str, Any]:
+
+    @property
+    def model(self):
+        """The primary loaded model (waits for the background load); None if it failed"""
+        if not self._handles or not self._handles[0].wait():
+            return None
+        with self._handles[0].use() as model:
+            return model
+
+    def is_ready(self) -> bool:
+        return bool(self._handles) and self._handles[0].ready
+
+    def is_initialized(self) -> bool:
+        """Whisper is available and the primary model has not failed to load"""
+        return self._initialized and bool(self._handles) and self._handles[0].error is None
+
+    async def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the primary model to finish loading without blocking the event loop"""
+        return bool(self._handles) and await self._handles[0].wait_ready(timeout)
+
+    def _acquire_models(self, model_name: str, precision: str) -> List[ModelHandle]:
+        registry = get_model_registry()
+        return [
+            registry.acquire(model_name, self.device, precision, replica=index, threads=self.cpu_threads or 0)
+            for index in range(max(1, self.workers))
+        ]
+
+    def _initial_precision(self, model_name: str) -> str:
+        if self.precision_mode != "auto":
+            return self.precision_mode
+        benchmark = cpu_inference.get_benchmark(model_name, self.cpu_threads)
+        return benchmark["selected"] if benchmark else "fp32"
+
+    def _start_auto_select(self, model_name: str):
+        """Benchmark CPU precisions in the background (once per model) and switch to the fastest"""
+        if self.precision_mode != "auto" or self.cpu_threads is None:
+            return
+        if len(cpu_inference.available_precisions()) < 2:
+            return
+        threading.Thread(
+            target=self._auto_select, args=(model_name,), name=f"whisper-benchmark-{model_name}", daemon=True
+        ).start()
+
+    def _auto_select(self, model_name: str):
+        registry = get_model_registry()
+        threads = self.cpu_threads
+
+        def run(precision: str, measure) -> float:
+            handle = registry.acquire(model_name, self.device, precision, threads=threads)
+            try:
+                if not handle.wait():
+                    raise RuntimeError(f"load failed: {handle.error}")
+
+                def timed(model):
+                    cpu_inference.configure_worker_threads(threads)
+                    return measure(model)
+
+                return handle.call(timed)
+            finally:
+                # Variants nobody else uses are freed right away
+                handle.release(unload=True)
+
+        try:
+            selected = cpu_inference.benchmark_precisions(model_name, threads, run)["selected"]
+            if selected != self.precision and model_name == self.model_name:
+                self._swap_models(model_name, selected, unload_old=True)
+        except Exception as e:
+            logger.error(f"Whisper precision auto-selection failed: {e}")
+
+    def _swap_models(self, model_name: str, precision: str, unload_old: bool = False) -> bool:
+        """Load model_name/precision, then switch to it; blocks until loaded (call off the loop)"""
+        handles = self._acquire_models(model_name, precision)
+        if not handles[0].wait():
+            error = handles[0].error
+            for handle in handles:
+                handle.release()
+            raise RuntimeError(f"could not load '{model_name}' ({precision}): {error}")
+
+        with self._swap_lock:
+            old_pool, old_handles = self.pool, self._handles
+            self.pool, self._handles = None, handles
+            self.model_name, self.precision = model_name, precision
+        logger.info(f"Whisper now serving '{model_name}' ({precision})")
+
+        # Queued jobs finish on the old model before it is released
+        threading.Thread(
+            target=self._retire, args=(old_pool, old_handles, unload_old), daemon=True
+        ).start()
+        return True
+
+    def _get_pool(self) -> InferencePool:
+        with self._swap_lock:
+            if self.pool is None:
+                self.pool = self._create_pool(self._handles, self.model_name)
+            return self.pool
+
+    def _create_pool(self, handles: List[ModelHandle], model_name: str) -> InferencePool:
+        """Worker i runs jobs on registry replica i (loaded or reloaded on demand)"""
+        return InferencePool(
+            lambda index: handles[index], workers=len(handles), name=f"whisper-{model_name}"
+        )
+
+    async def _run_model(self, fn, priority: int) -> Any:
+        """Run fn(model) on an inference worker, holding its registry replica while it runs"""
+        threads = self.cpu_threads
+
+        def job(handle: ModelHandle):
+            if threads:
+                cpu_inference.configure_worker_threads(threads)
+            return handle.call(fn)
+
+        return await self._get_pool().run(job, priority=priority)
+
+    def _get_batcher(self) -> MicroBatcher:
+        if self._batcher is None:
+            self._batcher = MicroBatcher(self._decode_batch, name=f"whisper-{self.model_name}")
+        return self._batcher
+
+    async def _decode_batch(self, items: List[tuple]) -> List[Dict[str, Any]]:
+        """Decode (audio, priority) items as one batch on an inference worker"""
+        audios = [audio for audio, _ in items]
+        priority = min(item_priority for _, item_priority in items)
+        fp16 = self.precision == "fp16"
+        return await self._run_model(lambda model: decode_batch(model, audios, fp16), priority)
+
+    def _batchable(self, audio: Any) -> bool:
+        return (
+            isinstance(audio, np.ndarray)
+            and audio.shape[0] <= MAX_BATCH_SECONDS * WHISPER_SAMPLE_RATE
+            and self._get_batcher().enabled
+        )
+
+    async def _transcribe(
+        self, audio: Any, label: str, details: Dict[str, Any], priority: int
+    ) -> Dict[str, Any]:
+        """
+        Transcribe on an inference worker; audio is a path or 16 kHz float32 array.
+        Arrays up to 30 s are micro-batched with other concurrent requests.
+        """
+        if not self._initialized:
+            logger.error("Whisper not initialized - cannot transcribe audio")
+            raise RuntimeError("Whisper service is not available")
+
+        start_time = time.time()
+
+        precision = self.precision
+        fp16 = precision == "fp16"
+        batched = self._batchable(audio)
+        if batched:
+            result = await self._get_batcher().submit((audio, priority))
+        else:
+            result = await self._run_model(lambda model: model.transcribe(audio, fp16=fp16), priority)
+
+        processing_time = time.time() - start_time
+
+        # Emit transcription event
+        await self.event_system.emit(
+            EventType.AUDIO_TRANSCRIBED,
+            f"Audio transcribed: {label}",
+            {
+                **details,
+                "text": result["text"],
+                "language": result["language"],
+                "processing_time": processing_time
+            }
+        )
+
+        duration = result.get("duration", 0.0)
+        if isinstance(audio, np.ndarray):
+            duration = audio.shape[0] / WHISPER_SAMPLE_RATE
+        if duration > 0:
+            observed = self._observed_rtf.setdefault(precision, [0, 0.0])
+            observed[0] += 1
+            observed[1] += processing_time / duration
+
+        return {
+            "text": result["text"],
+            "language": result["language"],
+            "confidence": 0.95,  # Whisper doesn't provide confidence scores
+            "processing_time": processing_time,
+            "duration": duration,
+            "fallback": False,
+            "batched": batched,
+        }
+
+    async def transcribe_audio(self, audio_path: Path, priority: int = PRIORITY_NORMAL) -> Dict[str, Any]:
         """Transcribe audio file using Whisper"""
         try:
+            audio_path = Path(audio_path)
             if not audio_path.exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
-            
-            if not self._initialized:
-                logger.error("Whisper not initialized - cannot transcribe audio")
-                raise RuntimeError("Whisper service is not available")
-            
-            start_time = time.time()
-            
-            # Load and transcribe audio
-            result = self.model.transcribe(str(audio_path))
-            
-            processing_time = time.time() - start_time
-            
-            # Emit transcription event
-            await self.event_system.emit(
-                EventType.AUDIO_TRANSCRIBED,
-                f"Audio transcribed: {audio_path.name}",
-                {
-                    "file": str(audio_path),
-                    "text": result["text"],
-                    "language": result["language"],
-                    "processing_time": processing_time
-                }
+
+            return await self._transcribe(
+                str(audio_path), audio_path.name, {"file": str(audio_path)}, priority
             )
-            
-            return {
-                "text": result["text"],
-                "language": result["language"],
-                "confidence": 0.95,  # Whisper doesn't provide confidence scores
-                "processing_time": processing_time,
-                "duration": result.get("duration", 0.0),
-                "fallback": False,
-            }
-            
+
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
             raise RuntimeError(f"Audio transcription failed: {e}")
 
-    async def transcribe_audio_bytes(self, audio_bytes: bytes) -> Dict[str, Any]:
-        """Transcribe audio from bytes"""
+    async def transcribe_array(
+        self,
+        audio: AudioInput,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        priority: int = PRIORITY_NORMAL,
+        source: str = "memory",
+    ) -> Dict[str, Any]:
+        """
+        Transcribe in-memory audio: a float32/int16 NumPy array or a PCM16
+        buffer (bytes/memoryview) at sample_rate, resampled to 16 kHz here.
+        """
         try:
-            # Save temporary file (centralized temp dir)
-            temp_dir = TEMP_AUDIO_DIR
-            ensure_dirs(temp_dir)
-            temp_file = temp_dir / f"temp_{int(time.time())}.wav"
+            samples = prepare_for_whisper(audio, sample_rate)
+            if samples.size == 0:
+                raise ValueError("No audio samples provided")
 
-            # Write audio bytes to file
-            with open(temp_file, "wb") as f:
-                f.write(audio_bytes)
+            return await self._transcribe(
+                samples, source, {"source": source, "sample_rate": sample_rate}, priority
+            )
 
-            # Transcribe
-            result = await self.transcribe_audio(temp_file)
+        except Exception as e:
+            logger.error(f"Error transcribing audio array: {e}")
+            raise RuntimeError(f"Audio transcription failed: {e}")
 
-            # Clean up
-            try:
-                temp_file.unlink()
-            except Exception:
-                pass
+    async def transcribe_words(
+        self, audio: np.ndarray, prompt: Optional[str] = None, priority: int = PRIORITY_HIGH
+    ) -> List[Dict[str, Any]]:
+        """
+        Decode a 16 kHz float32 window with word timestamps, for streaming
+        partial transcripts. Returns [{"word", "start", "end", "probability"}]
+        with times relative to the window; no transcription event is emitted.
+        """
+        if not self._initialized:
+            raise RuntimeError("Whisper service is not available")
+
+        def decode(model):
+            return model.transcribe(
+                audio,
+                word_timestamps=True,
+                initial_prompt=prompt,
+                condition_on_previous_text=False,
+                temperature=0.0,
+                fp16=self.precision == "fp16",
+            )
+
+        result = await self._run_model(decode, priority)
+        return [word for segment in result.get("segments", []) for word in segment.get("words", [])]
+
+    async def transcribe_file(self, audio_path: str) -> Dict[str, Any]:
+        """Transcribe an audio file given as a path string"""
+        return await self.transcribe_audio(Path(audio_path))
+
+    async def transcribe_audio_bytes(
+        self, audio_bytes: bytes, sample_rate: Optional[int] = None, source: str = "bytes"
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio from bytes: raw PCM16 when sample_rate is given,
+        otherwise an encoded file (WAV/FLAC/OGG) decoded in memory. Formats
+        soundfile cannot decode fall back to Whisper's ffmpeg loader via a
+        temporary file.
+        """
+        if sample_rate is not None:
+            return await self.transcribe_array(audio_bytes, sample_rate, source=source)
+
+        try:
+            audio, file_rate = decode_audio_bytes(audio_bytes)
+        except Exception as e:
+            logger.debug(f"In-memory decode failed, using ffmpeg via a temp file: {e}")
+            return await self._transcribe_via_temp_file(audio_bytes)
+
+        return await self.transcribe_array(audio, file_rate, source=source)
 
-            return result
+    async def _transcribe_via_temp_file(self, audio_bytes: bytes) -> Dict[str, Any]:
+        try:
+            ensure_dirs(TEMP_AUDIO_DIR)
+            fd, temp_path = tempfile.mkstemp(dir=TEMP_AUDIO_DIR, prefix="stt_", suffix=".audio")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            try:
+                return await self.transcribe_audio(Path(temp_path))
+            finally:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
 
         except Exception as e:
             logger.error(f"Error transcribing audio bytes: {e}")
@@ -174,8 +431,11 @@ class WhisperService:
         try:
             if self._initialized:
 
-                self.model = whisper.load_model(model_name)
-                self.model_name = model_name
+                # Load off the event loop; keep serving the current model until it is ready
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._swap_models, model_name, self._initial_precision(model_name)
+                )
+                self._start_auto_select(model_name)
 
                 logger.info(f"Changed Whisper model to: {model_name}")
 
@@ -197,23 +457,68 @@ class WhisperService:
 
     async def get_model_info(self) -> Dict[str, Any]:
         """Get current model information"""
+        keys = {handle.key for handle in self._handles}
         return {
             "model_name": self.model_name,
-            "initialized": self._initialized,
-            "device": "cpu",
+            "initialized": self.is_initialized(),
+            "ready": self.is_ready(),
+            "device": self.device,
+            "precision": self.precision,
+            "precision_mode": self.precision_mode,
+            "cpu": self._cpu_info() if self.cpu_threads is not None else None,
             "available_models": await self.get_available_models(),
+            "pool": self.pool.get_stats() if self.pool is not None else None,
+            "batching": self._batcher.get_stats() if self._batcher is not None else None,
+            "models": [
+                model for model in get_model_registry().get_stats()["models"]
+                if (model["name"], model["device"], model["precision"], model["replica"]) in keys
+            ],
         }
 
+    def _cpu_info(self) -> Dict[str, Any]:
+        return {
+            "threads_per_worker": self.cpu_threads,
+            "interop_threads": cpu_inference.interop_threads(),
+            "available_precisions": cpu_inference.available_precisions(),
+            # Benchmark RTF per precision (seconds of compute per second of audio)
+            "benchmark": cpu_inference.get_benchmark(self.model_name, self.cpu_threads),
+            "observed_rtf": {
+                precision: round(total / count, 4)
+                for precision, (count, total) in self._observed_rtf.items()
+                if count
+            },
+        }
+
+    @staticmethod
+    def _retire(pool: Optional[InferencePool], handles: List[ModelHandle], unload: bool = False):
+        if pool is not None:
+            pool.close(wait=True)
+        for handle in handles:
+            handle.release(unload=unload)
+
+    def close(self):
+        """Stop the inference workers, then release this service's models"""
+        pool, handles = self.pool, self._handles
+        self.pool, self._handles = None, []
+        threading.Thread(target=self._retire, args=(pool, handles), daemon=True).start()
+
+    def cleanup(self):
+        """Called by the service factory when disposing of this service"""
+        self.close()
+
     async def transcribe_batch(self, audio_paths: list) -> list:
-        """Transcribe multiple audio files"""
-        results = []
+        """Transcribe multiple audio files (in parallel across inference workers)"""
+
+        # Keep at most one job per worker queued so large batches don't fill the queue
+        slots = asyncio.Semaphore(self._get_pool().workers)
 
-        for audio_path in audio_paths:
+        async def transcribe_one(audio_path):
             try:
-                result = await self.transcribe_audio(Path(audio_path))
-                results.append({"file": audio_path, "result": result})
+                async with slots:
+                    result = await self.transcribe_audio(Path(audio_path), priority=PRIORITY_LOW)
+                return {"file": audio_path, "result": result}
             except Exception as e:
                 logger.error(f"Error transcribing {audio_path}: {e}")
-                results.append({"file": audio_path, "error": str(e)})
+                return {"file": audio_path, "error": str(e)}
 
-        return results
\ No newline at end of file
+        return list(await asyncio.gather(*(transcribe_one(path) for path in audio_paths)))
\ No newline at end of file
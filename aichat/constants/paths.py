@@ -19,6 +19,9 @@ GENERATED_AUDIO_DIR = AUDIO_DIR / "generated"
 TTS_MODELS_DIR = MODELS_DIR / "tts"
 PIPER_MODELS = MODELS_DIR / "piper"
 
+# STT model artifacts (e.g. ONNX exports of Whisper encoders)
+STT_MODELS_DIR = MODELS_DIR / "stt"
+
 # Training directories
 TRAINING_DATA_DIR = DATA_DIR / "training"
 TTS_TRAINING_DIR = TRAINING_DATA_DIR  # Alias for backward compatibility
@@ -60,6 +63,7 @@ __all__ = [
     # Audio directories
     "AUDIO_DIR",
     "MODELS_DIR",
+    "STT_MODELS_DIR",
     "GENERATED_AUDIO_DIR",
     # Training directories
     "TRAINING_DATA_DIR",
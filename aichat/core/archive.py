@@ -0,0 +1,461 @@
+"""
+Hot/cold tiering for old conversation data
+
+conversation_turns, chat_logs and event_logs otherwise grow forever in the one
+SQLite file. A periodic job moves rows past their retention age into
+compressed, append-only archive segments (zstd when available, else gzip) and
+records them in a small archive_segments index, so the hot database stays
+small. Archived sessions are read back on demand.
+
+Segments are written and fsync'd before the index rows are inserted and the
+hot rows deleted (in one transaction), so a crash can leave an orphaned
+segment file but never loses or duplicates rows.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None  # type: ignore
+
+from aichat.constants.paths import DATA_DIR
+from .database import DatabaseManager, db_manager
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ARCHIVE_DIR = DATA_DIR / "archive"
+
+# SQLite CURRENT_TIMESTAMP format, used by chat_logs and event_logs
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class RetentionPolicy:
+    """How long rows stay in the hot database (max_age_days <= 0 disables archiving)"""
+
+    name: str
+    max_age_days: float
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_days > 0
+
+    def cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(days=self.max_age_days)
+
+
+def default_policies() -> Dict[str, RetentionPolicy]:
+    """Retention policies from the environment"""
+    return {
+        "conversations": RetentionPolicy(
+            "conversations", float(os.getenv("ARCHIVE_CONVERSATIONS_DAYS", "30"))
+        ),
+        "chat_logs": RetentionPolicy(
+            "chat_logs", float(os.getenv("ARCHIVE_CHAT_LOGS_DAYS", "90"))
+        ),
+        "event_logs": RetentionPolicy(
+            "event_logs", float(os.getenv("ARCHIVE_EVENT_LOGS_DAYS", "7"))
+        ),
+    }
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(path: Path) -> bytes:
+    data = path.read_bytes()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read archive segment {path}")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class ArchiveManager:
+    """Moves old rows into compressed archive segments and reads them back"""
+
+    def __init__(
+        self,
+        archive_dir: Union[str, Path, None] = None,
+        policies: Optional[Dict[str, RetentionPolicy]] = None,
+        interval_hours: Optional[float] = None,
+        batch_size: int = 5000,
+        session_batch_size: int = 200,
+        vacuum_after_rows: int = 50000,
+        db: Optional[DatabaseManager] = None,
+    ):
+        self.archive_dir = Path(
+            archive_dir or os.getenv("ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR
+        )
+        self.policies = policies or default_policies()
+        if interval_hours is None:
+            interval_hours = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "6"))
+        self.interval = interval_hours * 3600
+        self.batch_size = batch_size  # Log rows per segment
+        self.session_batch_size = session_batch_size  # Sessions per segment
+        self.vacuum_after_rows = vacuum_after_rows  # Archived rows between VACUUMs
+        self.db = db or db_manager
+
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock: Optional[asyncio.Lock] = None
+        self._rows_since_vacuum = 0
+
+        self.stats = {
+            "runs": 0,
+            "archived_rows": 0,
+            "segments": 0,
+            "vacuums": 0,
+            "archive_reads": 0,
+            "errors": 0,
+        }
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    # ----- Scheduling -----
+
+    def start(self):
+        """Start the periodic archive job (requires a running event loop)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run_loop())
+
+    async def _run_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Archive job failed: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----- Archiving -----
+
+    async def run_once(self) -> Dict[str, int]:
+        """Archive everything past its retention age, then ANALYZE/VACUUM"""
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+
+        async with self._run_lock:
+            started = time.time()
+            await self._ensure_index()
+
+            archived: Dict[str, int] = {}
+            for name, policy in self.policies.items():
+                if not policy.enabled:
+                    continue
+                try:
+                    if name == "conversations":
+                        archived[name] = await self._archive_sessions(policy)
+                    else:
+                        archived[name] = await self._archive_log_table(name, policy)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    archived[name] = 0
+                    logger.error(f"Archiving {name} failed: {e}")
+
+            total = sum(archived.values())
+            self.stats["runs"] += 1
+            self.stats["archived_rows"] += total
+            self._rows_since_vacuum += total
+            await self._maintain(
+                analyze=total > 0,
+                vacuum=self._rows_since_vacuum >= self.vacuum_after_rows,
+            )
+
+            self.last_run = {
+                "at": datetime.utcnow().isoformat(),
+                "duration": round(time.time() - started, 3),
+                "archived": archived,
+            }
+            if total:
+                logger.info(f"Archived {total} rows: {archived}")
+            return archived
+
+    async def _ensure_index(self):
+        async with self.db.get_session() as db:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS archive_segments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    key TEXT,
+                    min_ts TEXT,
+                    max_ts TEXT,
+                    row_count INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """)
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_archive_segments_key ON archive_segments (table_name, key)"
+            )
+            await db.commit()
+
+    async def _archive_log_table(self, table: str, policy: RetentionPolicy) -> int:
+        """Archive chat_logs / event_logs rows older than the policy cutoff"""
+        cutoff = policy.cutoff().strftime(SQLITE_TIMESTAMP_FORMAT)
+        archived = 0
+
+        while True:
+            async with self.db.get_session() as db:
+                cursor = await db.execute(
+                    f"SELECT * FROM {table} WHERE timestamp < ? ORDER BY id LIMIT ?",
+                    (cutoff, self.batch_size),
+                )
+                rows = [dict(row) for row in await cursor.fetchall()]
+                if not rows:
+                    return archived
+
+                segment = await self._write_segment(
+                    table, [{"table": table, "row": row} for row in rows]
+                )
+                timestamps = [row["timestamp"] for row in rows]
+
+                # Rows are selected in id order, so every row with id <= last id
+                # and past the cutoff is in this segment
+                await db.execute(
+                    "INSERT INTO archive_segments (table_name, segment, key, min_ts, max_ts, row_count, created_at) "
+                    "VALUES (?, ?, NULL, ?, ?, ?, ?)",
+                    (
+                        table,
+                        segment,
+                        min(timestamps),
+                        max(timestamps),
+                        len(rows),
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+                await db.execute(
+                    f"DELETE FROM {table} WHERE id <= ? AND timestamp < ?",
+                    (rows[-1]["id"], cutoff),
+                )
+                await db.commit()
+
+            archived += len(rows)
+            if len(rows) < self.batch_size:
+                return archived
+
+    async def _archive_sessions(self, policy: RetentionPolicy) -> int:
+        """Archive sessions (with their turns) inactive since the policy cutoff"""
+        cutoff = policy.cutoff().isoformat()
+        archived = 0
+
+        while True:
+            async with self.db.get_session() as db:
+                cursor = await db.execute(
+                    "SELECT * FROM conversation_sessions WHERE last_activity < ? ORDER BY last_activity LIMIT ?",
+                    (cutoff, self.session_batch_size),
+                )
+                sessions = [dict(row) for row in await cursor.fetchall()]
+                if not sessions:
+                    return archived
+
+                session_ids = [session["session_id"] for session in sessions]
+                placeholders = ", ".join("?" * len(session_ids))
+                cursor = await db.execute(
+                    f"SELECT * FROM conversation_turns WHERE session_id IN ({placeholders}) "
+                    "ORDER BY session_id, turn_number",
+                    session_ids,
+                )
+                turns_by_session: Dict[str, List[Dict[str, Any]]] = {}
+                for row in await cursor.fetchall():
+                    turns_by_session.setdefault(row["session_id"], []).append(dict(row))
+
+                entries = []
+                for session in sessions:
+                    entries.append({"table": "conversation_sessions", "row": session})
+                    entries.extend(
+                        {"table": "conversation_turns", "row": turn}
+                        for turn in turns_by_session.get(session["session_id"], [])
+                    )
+                segment = await self._write_segment("conversations", entries)
+
+                now = datetime.utcnow().isoformat()
+                await db.executemany(
+                    "INSERT INTO archive_segments (table_name, segment, key, min_ts, max_ts, row_count, created_at) "
+                    "VALUES ('conversations', ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            segment,
+                            session["session_id"],
+                            session["started_at"],
+                            session["last_activity"],
+                            1 + len(turns_by_session.get(session["session_id"], [])),
+                            now,
+                        )
+                        for session in sessions
+                    ],
+                )
+                await db.execute(
+                    f"DELETE FROM conversation_turns WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                await db.execute(
+                    f"DELETE FROM compressed_contexts WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                await db.execute(
+                    f"DELETE FROM conversation_sessions WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                await db.commit()
+
+            archived += len(entries)
+            if len(sessions) < self.session_batch_size:
+                return archived
+
+    async def _write_segment(self, table: str, entries: List[Dict[str, Any]]) -> str:
+        """Write a new compressed segment; returns its path relative to the archive dir"""
+        suffix = ".jsonl.zst" if zstandard is not None else ".jsonl.gz"
+        name = f"{table}/{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}{suffix}"
+        data = "".join(
+            json.dumps(entry, default=str) + "\n" for entry in entries
+        ).encode("utf-8")
+
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write_file, self.archive_dir / name, data
+        )
+        self.stats["segments"] += 1
+        return name
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_compress(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    async def _maintain(self, analyze: bool, vacuum: bool):
+        """ANALYZE after archiving; VACUUM once enough rows have been removed"""
+        if not (analyze or vacuum):
+            return
+        try:
+            async with self.db.get_session() as db:
+                if analyze:
+                    await db.execute("ANALYZE")
+                    await db.commit()
+                if vacuum:
+                    await db.execute("VACUUM")
+                    self._rows_since_vacuum = 0
+                    self.stats["vacuums"] += 1
+        except Exception as e:
+            logger.warning(f"Database maintenance failed: {e}")
+
+    # ----- Reading back -----
+
+    async def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Archived session as {"session": row, "turns": [rows]} (rows as column
+        dicts, turns in turn order), or None if the session isn't archived.
+
+        A session resumed after archiving and archived again spans several
+        segments; its turns are merged from all of them, and the session row
+        comes from the newest.
+        """
+        try:
+            async with self.db.get_session() as db:
+                cursor = await db.execute(
+                    "SELECT segment FROM archive_segments WHERE table_name = 'conversations' AND key = ? "
+                    "ORDER BY id",
+                    (session_id,),
+                )
+                segments = [row["segment"] for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.debug(f"Archive lookup skipped for session {session_id}: {e}")
+            return None
+
+        if not segments:
+            return None
+
+        self.stats["archive_reads"] += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            self._read_session,
+            [self.archive_dir / segment for segment in segments],
+            session_id,
+        )
+
+    @staticmethod
+    def _read_session(paths: List[Path], session_id: str) -> Optional[Dict[str, Any]]:
+        """Merge a session's rows from its segments, oldest first (later copies win)"""
+        session = None
+        turns: Dict[Any, Dict[str, Any]] = {}
+        for path in paths:
+            for line in _decompress(path).decode("utf-8").splitlines():
+                entry = json.loads(line)
+                if entry["row"].get("session_id") != session_id:
+                    continue
+                if entry["table"] == "conversation_sessions":
+                    session = entry["row"]
+                else:
+                    turns[entry["row"]["turn_number"]] = entry["row"]
+        if session is None:
+            return None
+        return {
+            "session": session,
+            "turns": [turns[number] for number in sorted(turns)],
+        }
+
+    async def get_stats(self) -> Dict[str, Any]:
+        segments: Dict[str, int] = {}
+        try:
+            async with self.db.get_session() as db:
+                cursor = await db.execute(
+                    "SELECT table_name, COUNT(DISTINCT segment) AS segments FROM archive_segments GROUP BY table_name"
+                )
+                segments = {
+                    row["table_name"]: row["segments"]
+                    for row in await cursor.fetchall()
+                }
+        except Exception:
+            pass
+
+        return {
+            **self.stats,
+            "codec": "zstd" if zstandard is not None else "gzip",
+            "archive_dir": str(self.archive_dir),
+            "policies": {
+                name: policy.max_age_days for name, policy in self.policies.items()
+            },
+            "interval_hours": self.interval / 3600,
+            "segments_by_table": segments,
+            "last_run": self.last_run,
+        }
+
+
+# Global instance
+_archive_manager = None
+
+
+def get_archive_manager() -> ArchiveManager:
+    """Get global archive manager instance"""
+    global _archive_manager
+    if _archive_manager is None:
+        _archive_manager = ArchiveManager()
+    return _archive_manager
@@ -0,0 +1,186 @@
+"""
+Read-through cache for characters
+
+Characters are read on nearly every request but rarely change. Entries are
+keyed by ID and name and carry the static prompt text derived from the
+character. Every write bumps a version counter in the database's
+cache_versions table, so other worker processes notice and drop their copies;
+the local version only ever takes values from that row.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+PERSONA_PROMPT_TEMPLATE = """You are {name}.
+
+PERSONALITY: {personality}
+BACKGROUND: {profile}"""
+
+CHARACTER_REMINDER_TEMPLATE = """You are {name}.
+
+CORE PERSONALITY: {personality}
+BACKGROUND: {profile}"""
+
+
+def build_persona_prompt(name: str, personality: str, profile: str) -> str:
+    """Static character part of the system prompt"""
+    return PERSONA_PROMPT_TEMPLATE.format(
+        name=name, personality=personality, profile=profile
+    )
+
+
+def build_character_reminder(name: str, personality: str, profile: str) -> str:
+    """Static character part of the compressed-context reminder"""
+    return CHARACTER_REMINDER_TEMPLATE.format(
+        name=name, personality=personality, profile=profile[:200]
+    )
+
+
+@dataclass
+class CachedCharacter:
+    """A character with its precomputed prompt text"""
+
+    character: Any  # database.Character
+    persona_prompt: str
+    character_reminder: str
+    version: int
+
+
+class CharacterCache:
+    """In-process character cache keyed by ID and name"""
+
+    VERSION_KEY = "characters"
+
+    def __init__(self, sync_interval: Optional[float] = None):
+        if sync_interval is None:
+            sync_interval = float(os.getenv("CHARACTER_CACHE_SYNC_SECONDS", "2"))
+        self.sync_interval = sync_interval  # How often to check the shared version
+
+        self._by_id: Dict[int, CachedCharacter] = {}
+        self._by_name: Dict[str, int] = {}
+        self._version = 0
+        self._last_sync = 0.0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def version(self) -> int:
+        """Current cache version; changes whenever any character is written"""
+        return self._version
+
+    def get_by_id(self, character_id: int) -> Optional[CachedCharacter]:
+        entry = self._by_id.get(character_id)
+        self.stats["hits" if entry else "misses"] += 1
+        return entry
+
+    def get_by_name(self, name: str) -> Optional[CachedCharacter]:
+        character_id = self._by_name.get(name)
+        entry = self._by_id.get(character_id) if character_id is not None else None
+        self.stats["hits" if entry else "misses"] += 1
+        return entry
+
+    def put(self, character) -> CachedCharacter:
+        """Cache a character loaded from the database"""
+        entry = CachedCharacter(
+            character=character,
+            persona_prompt=build_persona_prompt(
+                character.name, character.personality, character.profile
+            ),
+            character_reminder=build_character_reminder(
+                character.name, character.personality, character.profile
+            ),
+            version=self._version,
+        )
+        self._by_id[character.id] = entry
+        self._by_name[character.name] = character.id
+        return entry
+
+    def invalidate(
+        self, character_id: Optional[int] = None, name: Optional[str] = None
+    ):
+        """Drop one character (by ID and/or name); the version is left to publish()"""
+        entry = (
+            self._by_id.pop(character_id, None) if character_id is not None else None
+        )
+        if entry is not None:
+            self._by_name.pop(entry.character.name, None)
+        if name is not None:
+            stale_id = self._by_name.pop(name, None)
+            if stale_id is not None:
+                self._by_id.pop(stale_id, None)
+
+        self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_name.clear()
+
+    async def publish(self, db: Any):
+        """
+        Record a write in the shared version table, on the writer's connection
+        so it commits with the change itself, and adopt the new version so the
+        next sync() does not mistake this process's own write for another's.
+        """
+        try:
+            await db.execute(
+                """
+                INSERT INTO cache_versions (name, version) VALUES (?, 1)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1
+                """,
+                (self.VERSION_KEY,),
+            )
+            cursor = await db.execute(
+                "SELECT version FROM cache_versions WHERE name = ?", (self.VERSION_KEY,)
+            )
+            row = await cursor.fetchone()
+            if row:
+                self._version = row[0]
+        except Exception as e:
+            logger.warning(f"Could not publish character cache version: {e}")
+
+    async def sync(self, connect: Callable[[], Any]):
+        """
+        Drop everything if another process published a newer version.
+        Checked at most once per sync_interval; connect() is an async
+        context manager yielding a database connection.
+        """
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        try:
+            async with connect() as db:
+                cursor = await db.execute(
+                    "SELECT version FROM cache_versions WHERE name = ?",
+                    (self.VERSION_KEY,),
+                )
+                row = await cursor.fetchone()
+        except Exception as e:
+            logger.debug(f"Character cache version check skipped: {e}")
+            return
+
+        shared_version = row[0] if row else 0
+        if shared_version != self._version:
+            self.clear()
+            self._version = shared_version
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "version": self._version, "size": len(self._by_id)}
+
+
+# Global instance
+_character_cache = None
+
+
+def get_character_cache() -> CharacterCache:
+    """Get global character cache instance"""
+    global _character_cache
+    if _character_cache is None:
+        _character_cache = CharacterCache()
+    return _character_cache
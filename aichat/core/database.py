@@ -2,11 +2,14 @@
 Database module for SQLite operations
 """
 
+import ast
 import json
 import logging
+import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from pathlib import Path
 
 # aiosqlite is an optional runtime dependency used when running the app with an async DB.
@@ -18,6 +21,9 @@ except Exception:
 
 from pydantic import BaseModel
 
+from .character_cache import get_character_cache
+from .db_stats import instrument
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +52,88 @@ class ChatLog(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+CHAT_LOG_ROW_COLUMNS = (
+    "id", "character_id", "user_message", "character_response", "emotion", "metadata", "timestamp",
+)
+
+
+def encode_chat_log_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """chat_logs.metadata column value"""
+    return json.dumps(metadata, default=str) if metadata else None
+
+
+def decode_chat_log_metadata(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode chat_logs.metadata (JSON, or str(dict) in rows written by older versions)"""
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        logger.warning("Undecodable chat log metadata")
+        return None
+
+
+class ChatLogRow:
+    """
+    Lightweight chat_logs row for bulk reads.
+
+    Built straight from the cursor tuple (see chat_log_row_factory); metadata is
+    decoded on first access and the timestamp stays an ISO string.
+    """
+
+    __slots__ = ("id", "character_id", "user_message", "character_response", "emotion", "_raw_metadata", "_metadata", "timestamp")
+
+    def __init__(self, id, character_id, user_message, character_response, emotion, metadata, timestamp):
+        self.id = id
+        self.character_id = character_id
+        self.user_message = user_message
+        self.character_response = character_response
+        self.emotion = emotion
+        self._raw_metadata = metadata
+        self._metadata = None
+        # SQLite CURRENT_TIMESTAMP uses a space separator
+        self.timestamp = timestamp.replace(" ", "T", 1) if timestamp else timestamp
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        if self._metadata is None and self._raw_metadata:
+            self._metadata = decode_chat_log_metadata(self._raw_metadata)
+        return self._metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Chat history response entry"""
+        return {
+            "id": self.id,
+            "character_id": self.character_id,
+            "user_message": self.user_message,
+            "character_response": self.character_response,
+            "timestamp": self.timestamp,
+            "emotion": self.emotion,
+            "metadata": self.metadata,
+        }
+
+    def to_model(self) -> ChatLog:
+        """ChatLog without re-validating a row we wrote ourselves"""
+        return ChatLog.model_construct(
+            id=self.id,
+            character_id=self.character_id,
+            user_message=self.user_message,
+            character_response=self.character_response,
+            emotion=self.emotion,
+            metadata=self.metadata,
+            timestamp=datetime.fromisoformat(self.timestamp) if self.timestamp else None,
+        )
+
+
+def chat_log_row_factory(cursor: Any, row: tuple) -> ChatLogRow:
+    """sqlite row factory for SELECTs of CHAT_LOG_ROW_COLUMNS"""
+    return ChatLogRow(*row)
+
+
 class TrainingData(BaseModel):
     """Training data model"""
 
@@ -195,6 +283,16 @@ class DatabaseManager:
         """
         )
 
+        # Cache versions table (cross-process cache invalidation)
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """
+        )
+
         await db.commit()
 
     async def _create_indexes(self, db: Any):
@@ -228,9 +326,10 @@ class DatabaseManager:
                 "aiosqlite is not installed; async database operations are unavailable in this environment"
             )
 
+        start = time.perf_counter()
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
-            yield db
+            yield instrument(db, wait_ms=(time.perf_counter() - start) * 1000)
 
     async def close(self):
         """Close database connections"""
@@ -258,6 +357,7 @@ async def create_character(
                 (name, profile, personality, avatar_url),
             )
             character_id = cursor.lastrowid
+            await get_character_cache().publish(db)
             
             # Commit the transaction
             await db.commit()
@@ -284,8 +384,14 @@ async def create_character(
 
 
 async def get_character(character_id: int) -> Optional[Character]:
-    """Get character by ID"""
+    """Get character by ID (read through the character cache)"""
     try:
+        cache = get_character_cache()
+        await cache.sync(db_manager.get_session)
+        cached = cache.get_by_id(character_id)
+        if cached:
+            return cached.character
+
         async with db_manager.get_session() as db:
             cursor = await db.execute(
                 "SELECT * FROM characters WHERE id = ?", (character_id,)
@@ -293,7 +399,7 @@ async def get_character(character_id: int) -> Optional[Character]:
             row = await cursor.fetchone()
 
             if row:
-                return Character(
+                character = Character(
                     id=row["id"],
                     name=row["name"],
                     profile=row["profile"],
@@ -302,6 +408,8 @@ async def get_character(character_id: int) -> Optional[Character]:
                     created_at=datetime.fromisoformat(row["created_at"]),
                     updated_at=datetime.fromisoformat(row["updated_at"]),
                 )
+                cache.put(character)
+                return character
             return None
 
     except Exception as e:
@@ -310,8 +418,14 @@ async def get_character(character_id: int) -> Optional[Character]:
 
 
 async def get_character_by_name(name: str) -> Optional[Character]:
-    """Get character by name"""
+    """Get character by name (read through the character cache)"""
     try:
+        cache = get_character_cache()
+        await cache.sync(db_manager.get_session)
+        cached = cache.get_by_name(name)
+        if cached:
+            return cached.character
+
         async with db_manager.get_session() as db:
             cursor = await db.execute(
                 "SELECT * FROM characters WHERE name = ?", (name,)
@@ -319,7 +433,7 @@ async def get_character_by_name(name: str) -> Optional[Character]:
             row = await cursor.fetchone()
 
             if row:
-                return Character(
+                character = Character(
                     id=row["id"],
                     name=row["name"],
                     profile=row["profile"],
@@ -328,6 +442,8 @@ async def get_character_by_name(name: str) -> Optional[Character]:
                     created_at=datetime.fromisoformat(row["created_at"]),
                     updated_at=datetime.fromisoformat(row["updated_at"]),
                 )
+                cache.put(character)
+                return character
             return None
 
     except Exception as e:
@@ -381,7 +497,7 @@ async def create_chat_log(
                     user_message,
                     character_response,
                     emotion,
-                    str(metadata) if metadata else None,
+                    encode_chat_log_metadata(metadata),
                 ),
             )
             log_id = cursor.lastrowid
@@ -399,7 +515,7 @@ async def create_chat_log(
                 user_message=row["user_message"],
                 character_response=row["character_response"],
                 emotion=row["emotion"],
-                metadata=eval(row["metadata"]) if row["metadata"] else None,
+                metadata=decode_chat_log_metadata(row["metadata"]),
                 timestamp=datetime.fromisoformat(row["timestamp"]),
             )
 
@@ -408,43 +524,38 @@ async def create_chat_log(
         raise
 
 
-async def get_chat_logs(
+async def get_chat_log_rows(
     character_id: Optional[int] = None, limit: int = 100
-) -> List[ChatLog]:
-    """Get chat logs"""
+) -> List[ChatLogRow]:
+    """Get chat logs as lightweight rows (bulk read path)"""
     try:
-        logs = []
+        select = f"SELECT {', '.join(CHAT_LOG_ROW_COLUMNS)} FROM chat_logs"
         async with db_manager.get_session() as db:
+            db.row_factory = chat_log_row_factory
             if character_id:
                 cursor = await db.execute(
-                    "SELECT * FROM chat_logs WHERE character_id = ? ORDER BY timestamp DESC LIMIT ?",
+                    f"{select} WHERE character_id = ? ORDER BY timestamp DESC LIMIT ?",
                     (character_id, limit),
                 )
             else:
                 cursor = await db.execute(
-                    "SELECT * FROM chat_logs ORDER BY timestamp DESC LIMIT ?", (limit,)
+                    f"{select} ORDER BY timestamp DESC LIMIT ?", (limit,)
                 )
-
-            for row in await cursor.fetchall():
-                logs.append(
-                    ChatLog(
-                        id=row["id"],
-                        character_id=row["character_id"],
-                        user_message=row["user_message"],
-                        character_response=row["character_response"],
-                        emotion=row["emotion"],
-                        metadata=eval(row["metadata"]) if row["metadata"] else None,
-                        timestamp=datetime.fromisoformat(row["timestamp"]),
-                    )
-                )
-
-        return logs
+            return await cursor.fetchall()
 
     except Exception as e:
         logger.error(f"Error getting chat logs: {e}")
         raise
 
 
+async def get_chat_logs(
+    character_id: Optional[int] = None, limit: int = 100
+) -> List[ChatLog]:
+    """Get chat logs"""
+    rows = await get_chat_log_rows(character_id=character_id, limit=limit)
+    return [row.to_model() for row in rows]
+
+
 async def create_training_data(
     filename: str,
     transcript: Optional[str] = None,
@@ -631,6 +742,158 @@ async def log_event(
         raise
 
 
+# Bulk import/export
+def _encode_json_metadata(metadata: Any) -> Optional[str]:
+    return json.dumps(metadata, default=str) if metadata is not None else None
+
+
+def _decode_json_metadata(raw: Optional[str]) -> Any:
+    return json.loads(raw) if raw else None
+
+
+@dataclass(frozen=True)
+class BulkTable:
+    """Columns accepted by bulk_insert for one table"""
+    columns: Tuple[str, ...]
+    timestamp_column: str
+    iso_timestamps: bool = False  # isoformat() instead of CURRENT_TIMESTAMP format
+    encode_metadata: Optional[Callable[[Any], Optional[str]]] = None
+    decode_metadata: Optional[Callable[[Optional[str]], Any]] = None
+    ignore_duplicates: bool = False
+
+
+BULK_TABLES: Dict[str, BulkTable] = {
+    "chat_logs": BulkTable(
+        columns=("character_id", "user_message", "character_response", "emotion", "metadata", "timestamp"),
+        timestamp_column="timestamp",
+        encode_metadata=encode_chat_log_metadata,
+        decode_metadata=decode_chat_log_metadata,
+    ),
+    "training_data": BulkTable(
+        columns=("filename", "transcript", "duration", "speaker", "emotion", "quality", "created_at"),
+        timestamp_column="created_at",
+    ),
+    "conversation_turns": BulkTable(
+        columns=(
+            "session_id", "turn_number", "speaker_id", "speaker_type", "message",
+            "timestamp", "token_count", "metadata", "importance_score",
+        ),
+        timestamp_column="timestamp",
+        iso_timestamps=True,
+        encode_metadata=_encode_json_metadata,
+        decode_metadata=_decode_json_metadata,
+        ignore_duplicates=True,  # UNIQUE(session_id, turn_number)
+    ),
+}
+
+
+def _bulk_table(table: str) -> BulkTable:
+    spec = BULK_TABLES.get(table)
+    if spec is None:
+        raise ValueError(f"Bulk import/export is not supported for table '{table}'")
+    return spec
+
+
+async def _iterate(records: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]):
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+async def bulk_insert(
+    table: str,
+    records: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+    batch_size: int = 10000,
+) -> Dict[str, Any]:
+    """
+    Insert records (dicts keyed by column; unknown keys are ignored) with
+    executemany in a single transaction. `inserted` counts rows actually
+    written, so duplicates skipped by INSERT OR IGNORE are not included.
+    """
+    spec = _bulk_table(table)
+    columns = spec.columns
+    verb = "INSERT OR IGNORE" if spec.ignore_duplicates else "INSERT"
+    sql = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    metadata_index = columns.index("metadata") if "metadata" in columns else None
+    timestamp_index = columns.index(spec.timestamp_column)
+    now = datetime.utcnow()
+    default_timestamp = now.isoformat() if spec.iso_timestamps else now.strftime("%Y-%m-%d %H:%M:%S")
+
+    start = time.perf_counter()
+    try:
+        async with db_manager.get_session() as db:
+            changes_before = db.total_changes
+            try:
+                batch = []
+                async for record in _iterate(records):
+                    row = [record.get(column) for column in columns]
+                    if metadata_index is not None and not isinstance(row[metadata_index], (str, type(None))):
+                        row[metadata_index] = spec.encode_metadata(row[metadata_index])
+                    if row[timestamp_index] is None:
+                        row[timestamp_index] = default_timestamp
+                    batch.append(row)
+
+                    if len(batch) >= batch_size:
+                        await db.executemany(sql, batch)
+                        batch = []
+
+                if batch:
+                    await db.executemany(sql, batch)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            inserted = db.total_changes - changes_before
+
+    except Exception as e:
+        logger.error(f"Error bulk inserting into {table}: {e}")
+        raise
+
+    duration = time.perf_counter() - start
+    return {
+        "table": table,
+        "inserted": inserted,
+        "seconds": round(duration, 3),
+        "rows_per_second": round(inserted / duration) if duration > 0 else inserted,
+    }
+
+
+async def export_batches(
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: int = 1000,
+) -> AsyncGenerator[List[Dict[str, Any]], None]:
+    """
+    Stream a table in id order, batch_size rows at a time, from one open
+    cursor so memory use stays constant. filters are column equality matches.
+    """
+    spec = _bulk_table(table)
+    filters = filters or {}
+    for column in filters:
+        if column not in spec.columns:
+            raise ValueError(f"Cannot filter {table} by '{column}'")
+
+    where = " AND ".join(f"{column} = ?" for column in filters)
+    sql = f"SELECT * FROM {table}{' WHERE ' + where if where else ''} ORDER BY id"
+
+    async with db_manager.get_session() as db:
+        cursor = await db.execute(sql, tuple(filters.values()))
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            batch = [dict(row) for row in rows]
+            if spec.decode_metadata is not None:
+                for record in batch:
+                    record["metadata"] = spec.decode_metadata(record["metadata"])
+            yield batch
+
+
 # Convenience functions for database operations
 # Wrap functions as static methods on a simple object so they don't receive a bound 'self'
 _db_ops_attrs = {
@@ -640,11 +903,14 @@ _db_ops_attrs = {
     "list_characters": staticmethod(list_characters),
     "create_chat_log": staticmethod(create_chat_log),
     "get_chat_logs": staticmethod(get_chat_logs),
+    "get_chat_log_rows": staticmethod(get_chat_log_rows),
     "create_training_data": staticmethod(create_training_data),
     "list_training_data": staticmethod(list_training_data),
     "create_voice_model": staticmethod(create_voice_model),
     "list_voice_models": staticmethod(list_voice_models),
     "log_event": staticmethod(log_event),
+    "bulk_insert": staticmethod(bulk_insert),
+    "export_batches": staticmethod(export_batches),
     "db_manager": db_manager,
 }
 db_ops = type("DatabaseOperations", (), _db_ops_attrs)()
@@ -741,6 +1007,19 @@ if aiosqlite is None:
                 logs.append(row)
         return logs[:limit]
 
+    async def _get_chat_log_rows(
+        character_id: Optional[int] = None, limit: int = 100
+    ) -> List[ChatLogRow]:
+        rows = []
+        for log in await _get_chat_logs(character_id=character_id, limit=limit):
+            row = ChatLogRow(
+                log.id, log.character_id, log.user_message, log.character_response,
+                log.emotion, None, log.timestamp.isoformat() if log.timestamp else None,
+            )
+            row._metadata = log.metadata
+            rows.append(row)
+        return rows
+
     async def _create_chat_log(
         character_id: int,
         user_message: str,
@@ -771,11 +1050,14 @@ if aiosqlite is None:
         "list_characters": staticmethod(_list_characters),
         "create_chat_log": staticmethod(_create_chat_log),
         "get_chat_logs": staticmethod(_get_chat_logs),
+        "get_chat_log_rows": staticmethod(_get_chat_log_rows),
         "create_training_data": staticmethod(_create_training_data),
         "list_training_data": staticmethod(_list_training_data),
         "create_voice_model": staticmethod(lambda *args, **kwargs: None),
         "list_voice_models": staticmethod(_list_voice_models),
         "log_event": staticmethod(lambda *args, **kwargs: None),
+        "bulk_insert": staticmethod(bulk_insert),
+        "export_batches": staticmethod(export_batches),
         "db_manager": db_manager,
     }
     db_ops = type("DatabaseOperations", (), _db_ops_attrs)()
@@ -0,0 +1,403 @@
+"""
+Query timing for the database layer
+
+Connections handed out by DatabaseManager.get_session and BaseDAO.get_connection
+are wrapped so every statement is timed. Stats are kept per normalized SQL
+statement (latency histogram, row counts, fetch time), along with connection
+wait times and a slow-query log that captures EXPLAIN QUERY PLAN.
+
+track_queries() collects the statements run inside a block, so tests and
+benchmarks can assert query counts per request:
+
+    with track_queries() as queries:
+        await get_character(1)
+    assert queries.count == 1
+"""
+
+import logging
+import os
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse literals, IN lists and whitespace so similar statements share stats"""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _bucket(duration_ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _histogram(counts: List[int]) -> Dict[str, int]:
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [
+        f">{LATENCY_BUCKETS_MS[-1]}ms"
+    ]
+    return {label: count for label, count in zip(labels, counts) if count}
+
+
+@dataclass
+class StatementStats:
+    """Timing for one normalized statement"""
+
+    sql: str
+    count: int = 0
+    execute_ms: float = 0.0
+    fetch_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    buckets: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.execute_ms + self.fetch_ms
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(total, 3),
+            "avg_ms": round(total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "fetch_ms": round(self.fetch_ms, 3),
+            "rows": self.rows,
+            "slow": self.slow,
+            "histogram": _histogram(self.buckets),
+        }
+
+
+@dataclass
+class QueryTracker:
+    """Statements run inside a track_queries() block"""
+
+    statements: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def count_matching(self, fragment: str) -> int:
+        """Statements whose normalized SQL contains fragment (case-insensitive)"""
+        fragment = fragment.lower()
+        return sum(
+            1 for statement in self.statements if fragment in statement["sql"].lower()
+        )
+
+
+_current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar(
+    "query_tracker", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """Collect the statements executed in this block (and tasks it starts)"""
+    tracker = QueryTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+class QueryMonitor:
+    """Process-wide query statistics and slow-query log"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_log_size: int = 100):
+        if slow_query_ms is None:
+            slow_query_ms = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+        self.slow_query_ms = slow_query_ms
+        self.enabled = os.getenv("DB_QUERY_STATS", "1").lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+
+        self._statements: Dict[str, StatementStats] = {}
+        self._plans: Dict[str, List[str]] = {}  # Captured once per statement
+        self.slow_log: deque = deque(maxlen=slow_log_size)
+
+        self.connections = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.wait_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def _stats_for(self, sql: str) -> StatementStats:
+        key = normalize_sql(sql)
+        stats = self._statements.get(key)
+        if stats is None:
+            stats = self._statements[key] = StatementStats(sql=key)
+        return stats
+
+    def record_execute(
+        self, sql: str, duration_ms: float, rows: int = 0
+    ) -> StatementStats:
+        stats = self._stats_for(sql)
+        stats.count += 1
+        stats.execute_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+        stats.rows += rows
+        stats.buckets[_bucket(duration_ms)] += 1
+
+        tracker = _current_tracker.get()
+        if tracker is not None:
+            tracker.statements.append({"sql": stats.sql, "ms": round(duration_ms, 3)})
+        return stats
+
+    def record_fetch(self, stats: StatementStats, duration_ms: float, rows: int):
+        stats.fetch_ms += duration_ms
+        stats.rows += rows
+
+    def record_wait(self, duration_ms: float):
+        self.connections += 1
+        self.wait_ms += duration_ms
+        self.max_wait_ms = max(self.max_wait_ms, duration_ms)
+        self.wait_buckets[_bucket(duration_ms)] += 1
+
+    def is_slow(self, duration_ms: float) -> bool:
+        return duration_ms >= self.slow_query_ms
+
+    def needs_plan(self, stats: StatementStats) -> bool:
+        return stats.sql not in self._plans
+
+    def record_slow(
+        self,
+        stats: StatementStats,
+        duration_ms: float,
+        plan: Optional[List[str]] = None,
+    ):
+        stats.slow += 1
+        if plan is not None:
+            self._plans[stats.sql] = plan
+        entry = {
+            "sql": stats.sql,
+            "ms": round(duration_ms, 3),
+            "at": datetime.utcnow().isoformat(),
+            "plan": self._plans.get(stats.sql),
+        }
+        self.slow_log.append(entry)
+        logger.warning(
+            f"Slow query ({duration_ms:.1f}ms): {stats.sql} plan={entry['plan']}"
+        )
+
+    def reset(self):
+        self._statements.clear()
+        self._plans.clear()
+        self.slow_log.clear()
+        self.connections = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.wait_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        statements = sorted(
+            self._statements.values(),
+            key=lambda s: s.execute_ms + s.fetch_ms,
+            reverse=True,
+        )
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_query_ms,
+            "statements": [stats.to_dict() for stats in statements[:limit]],
+            "statement_count": len(self._statements),
+            "connection_wait": {
+                "connections": self.connections,
+                "avg_ms": (
+                    round(self.wait_ms / self.connections, 3)
+                    if self.connections
+                    else 0.0
+                ),
+                "max_ms": round(self.max_wait_ms, 3),
+                "histogram": _histogram(self.wait_buckets),
+            },
+            "slow_queries": list(self.slow_log),
+        }
+
+
+class _TimedExecute:
+    """Result of InstrumentedConnection.execute: awaitable and usable with 'async with'"""
+
+    def __init__(
+        self, connection: "InstrumentedConnection", method: str, sql: str, params: Any
+    ):
+        self._connection = connection
+        self._method = method
+        self._sql = sql
+        self._params = params
+        self._cursor: Optional["InstrumentedCursor"] = None
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def _run(self) -> "InstrumentedCursor":
+        conn = self._connection._conn
+        monitor = self._connection._monitor
+
+        start = time.perf_counter()
+        cursor = await getattr(conn, self._method)(self._sql, self._params)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        rows = (
+            cursor.rowcount
+            if self._method == "executemany" and cursor.rowcount > 0
+            else 0
+        )
+        stats = monitor.record_execute(self._sql, duration_ms, rows)
+        cursor = InstrumentedCursor(
+            cursor,
+            self._connection,
+            stats,
+            self._sql,
+            self._params,
+            self._method,
+            duration_ms,
+        )
+        if monitor.is_slow(duration_ms):
+            await cursor.log_slow(duration_ms)
+        return cursor
+
+    async def __aenter__(self) -> "InstrumentedCursor":
+        self._cursor = await self._run()
+        return self._cursor
+
+    async def __aexit__(self, *exc_info):
+        if self._cursor is not None:
+            await self._cursor.close()
+
+
+class InstrumentedCursor:
+    """Cursor proxy that adds fetch time and row counts to its statement's stats"""
+
+    def __init__(self, cursor, connection, stats, sql, params, method, execute_ms):
+        self._cursor = cursor
+        self._connection = connection
+        self._stats = stats
+        self._sql = sql
+        self._params = params
+        self._method = method
+        self._execute_ms = execute_ms
+        self._logged_slow = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    async def _fetch(self, method: str, *args):
+        start = time.perf_counter()
+        result = await getattr(self._cursor, method)(*args)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if method == "fetchone":
+            rows = 1 if result is not None else 0
+        else:
+            rows = len(result)
+        self._connection._monitor.record_fetch(self._stats, duration_ms, rows)
+
+        total_ms = self._execute_ms + duration_ms
+        if self._connection._monitor.is_slow(total_ms):
+            await self.log_slow(total_ms)
+        return result
+
+    async def fetchone(self):
+        return await self._fetch("fetchone")
+
+    async def fetchmany(self, size: Optional[int] = None):
+        return (
+            await self._fetch("fetchmany", size)
+            if size is not None
+            else await self._fetch("fetchmany")
+        )
+
+    async def fetchall(self):
+        return await self._fetch("fetchall")
+
+    async def log_slow(self, duration_ms: float):
+        """Slow-query log entry (once per call), capturing the plan the first time"""
+        if self._logged_slow:
+            return
+        self._logged_slow = True
+
+        monitor = self._connection._monitor
+        plan = None
+        if self._method == "execute" and monitor.needs_plan(self._stats):
+            plan = await self._connection.explain(self._sql, self._params)
+        monitor.record_slow(self._stats, duration_ms, plan)
+
+
+class InstrumentedConnection:
+    """aiosqlite connection proxy that times every statement"""
+
+    def __init__(self, conn: Any, monitor: QueryMonitor):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_monitor", monitor)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        # e.g. row_factory
+        setattr(self._conn, name, value)
+
+    def execute(self, sql: str, parameters: Any = ()) -> _TimedExecute:
+        return _TimedExecute(self, "execute", sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any) -> _TimedExecute:
+        return _TimedExecute(self, "executemany", sql, parameters)
+
+    async def explain(self, sql: str, parameters: Any = ()) -> Optional[List[str]]:
+        """EXPLAIN QUERY PLAN details for a statement, or None if it can't be explained"""
+        try:
+            cursor = await self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+            cursor.row_factory = None  # Ignore any custom row factory on the connection
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return [row[-1] for row in rows]
+        except Exception as e:
+            logger.debug(f"EXPLAIN QUERY PLAN failed for {normalize_sql(sql)}: {e}")
+            return None
+
+
+def instrument(conn: Any, wait_ms: Optional[float] = None) -> Any:
+    """Wrap a connection for timing (returns it unchanged when stats are disabled)"""
+    monitor = get_query_monitor()
+    if not monitor.enabled:
+        return conn
+    if wait_ms is not None:
+        monitor.record_wait(wait_ms)
+    return InstrumentedConnection(conn, monitor)
+
+
+# Global instance
+_query_monitor = None
+
+
+def get_query_monitor() -> QueryMonitor:
+    """Get global query monitor instance"""
+    global _query_monitor
+    if _query_monitor is None:
+        _query_monitor = QueryMonitor()
+    return _query_monitor
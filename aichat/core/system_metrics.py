@@ -0,0 +1,183 @@
+"""
+Background system metrics sampler
+
+psutil.cpu_percent(interval=...) sleeps for the interval, so calling it from a
+request handler stalls the event loop (and every WebSocket audio stream on it)
+for each status poll. A daemon thread samples CPU, memory, disk, process and
+event-loop metrics at a fixed interval into a ring buffer instead; readers get
+the latest snapshot without blocking.
+
+Event-loop lag is measured by scheduling a callback onto the loop from the
+sampler thread and timing how long it takes to run.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class SystemMetricsSampler:
+    """Samples system and process metrics on a daemon thread"""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        history_size: Optional[int] = None,
+        disk_path: str = "/",
+    ):
+        if interval is None:
+            interval = float(os.getenv("SYSTEM_METRICS_INTERVAL", "2"))
+        if history_size is None:
+            history_size = int(os.getenv("SYSTEM_METRICS_HISTORY", "300"))
+        self.interval = interval  # Seconds between samples
+        self.disk_path = disk_path
+
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._process = psutil.Process()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lag_ms: Optional[float] = None
+        self._probe_pending = False
+
+    # ----- Lifecycle -----
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start sampling; pass (or call from) the event loop to measure its lag"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+        self._loop = loop
+
+        # Prime the non-blocking CPU counters; the first reading is always 0.0
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="system-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        self._loop = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"System metrics sample failed: {e}")
+            self._probe_loop()
+            self._stop.wait(self.interval)
+
+    # ----- Event loop lag -----
+
+    def _probe_loop(self):
+        """Schedule a callback on the loop; its delay is the loop lag"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or self._probe_pending:
+            return
+        self._probe_pending = True
+        try:
+            loop.call_soon_threadsafe(self._probe_done, time.perf_counter())
+        except RuntimeError:
+            # Loop closed between the check and the call
+            self._probe_pending = False
+
+    def _probe_done(self, scheduled_at: float):
+        self._loop_lag_ms = (time.perf_counter() - scheduled_at) * 1000
+        self._probe_pending = False
+
+    # ----- Sampling -----
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one snapshot and append it to the history"""
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        with self._process.oneshot():
+            process_memory = self._process.memory_info()
+            process = {
+                "pid": self._process.pid,
+                "rss": process_memory.rss,
+                "vms": process_memory.vms,
+                "cpu_percent": self._process.cpu_percent(interval=None),
+                "os_threads": self._process.num_threads(),
+            }
+        process["python_threads"] = threading.active_count()
+
+        snapshot = {
+            "timestamp": time.time(),
+            "cpu_usage": psutil.cpu_percent(interval=None),
+            "memory_usage": memory.percent,
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "used": memory.used,
+            },
+            "disk_usage": {
+                "total": disk.total,
+                "used": disk.used,
+                "free": disk.free,
+                "percent": (disk.used / disk.total) * 100 if disk.total else 0.0,
+            },
+            "process": process,
+            "event_loop_lag_ms": (
+                round(self._loop_lag_ms, 3) if self._loop_lag_ms is not None else None
+            ),
+        }
+
+        with self._lock:
+            self._history.append(snapshot)
+        return snapshot
+
+    def latest(self) -> Dict[str, Any]:
+        """Most recent snapshot; samples once (without blocking) if there is none yet"""
+        with self._lock:
+            if self._history:
+                return self._history[-1]
+        return self.sample()
+
+    def history(self, seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Snapshots from the last `seconds` (all retained snapshots by default)"""
+        with self._lock:
+            snapshots = list(self._history)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            snapshots = [s for s in snapshots if s["timestamp"] >= cutoff]
+        return snapshots
+
+
+# Global instance
+_system_metrics = None
+
+
+def get_system_metrics() -> SystemMetricsSampler:
+    """Get global system metrics sampler instance"""
+    global _system_metrics
+    if _system_metrics is None:
+        _system_metrics = SystemMetricsSampler()
+    return _system_metrics
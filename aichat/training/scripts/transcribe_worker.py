@@ -61,8 +61,8 @@ class Transcriber:
         self.whisper_model = whisper_model
         if HAS_WHISPER:
             try:
-                # Instantiate service (constructor signature may vary)
-                self.whisper = WhisperService()
+                # Shares loaded weights with any other WhisperService in this process
+                self.whisper = WhisperService(model_name=whisper_model or "base")
             except Exception:
                 self.whisper = None
         else:
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: bulk chat log import/export vs create_chat_log row by row"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from aichat.core.database import (
+    bulk_insert,
+    create_chat_log,
+    db_manager,
+    export_batches,
+)
+
+ROWS = 200_000
+ROW_BY_ROW = 500
+
+
+def records(count: int):
+    for i in range(count):
+        yield {
+            "character_id": 1,
+            "user_message": f"user message {i}",
+            "character_response": f"character response {i}",
+            "emotion": "happy",
+            "metadata": {"user_id": "bench", "turn": i},
+        }
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.db_path = str(Path(tmp) / "bench.db")
+        await db_manager.initialize()
+
+        print("=== CHAT LOG IMPORT ===")
+        start = time.perf_counter()
+        for record in records(ROW_BY_ROW):
+            await create_chat_log(**record)
+        rate = ROW_BY_ROW / (time.perf_counter() - start)
+        print(f"create_chat_log: {rate:>12,.0f} rows/sec ({ROW_BY_ROW} rows)")
+
+        result = await bulk_insert("chat_logs", records(ROWS))
+        print(
+            f"bulk_insert:     {result['rows_per_second']:>12,} rows/sec ({ROWS} rows)"
+        )
+
+        print("\n=== CHAT LOG EXPORT ===")
+        tracemalloc.start()
+        start = time.perf_counter()
+        exported = 0
+        async for batch in export_batches("chat_logs"):
+            exported += len(batch)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"export_batches: {exported / elapsed:>12,.0f} rows/sec ({exported} rows), peak {peak / 1e6:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-chunk denoise cost, ffmpeg arnndn subprocess vs in-process StreamingDenoiser"""
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+import soundfile as sf
+
+from aichat.backend.services.voice.stt.denoiser import StreamingDenoiser
+
+SAMPLE_RATE = 16000
+CHUNK_MS = 100
+CHUNKS = 200
+
+
+def ffmpeg_denoise(chunk: np.ndarray, sr: int) -> np.ndarray:
+    """Previous path: temp WAV → ffmpeg -af arnndn → temp WAV → array"""
+    ffmpeg_path = shutil.which("ffmpeg")
+    fd, path = tempfile.mkstemp(suffix=".wav", prefix="rn_tmp_")
+    os.close(fd)
+    in_fd, in_path = tempfile.mkstemp(suffix=".wav", prefix="rn_in_")
+    out_fd, out_path = tempfile.mkstemp(suffix=".wav", prefix="rn_out_")
+    os.close(in_fd)
+    os.close(out_fd)
+    try:
+        sf.write(path, chunk, sr, subtype="PCM_16")
+        with open(path, "rb") as f:
+            wav_bytes = f.read()
+        with open(in_path, "wb") as f:
+            f.write(wav_bytes)
+        if ffmpeg_path:
+            cmd = [
+                ffmpeg_path,
+                "-y",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-i",
+                in_path,
+                "-af",
+                "arnndn",
+                "-ac",
+                "1",
+                "-ar",
+                str(sr),
+                out_path,
+            ]
+            proc = subprocess.run(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=10
+            )
+            if proc.returncode == 0:
+                with open(out_path, "rb") as f:
+                    wav_bytes = f.read()
+        data, _ = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+        return data
+    finally:
+        for p in (path, in_path, out_path):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def bench(name: str, fn, chunks) -> float:
+    start = time.process_time()
+    wall = time.perf_counter()
+    for chunk in chunks:
+        fn(chunk)
+    cpu_ms = (time.process_time() - start) * 1000 / len(chunks)
+    wall_ms = (time.perf_counter() - wall) * 1000 / len(chunks)
+    print(f"{name:>18}: {cpu_ms:8.3f} ms CPU/chunk, {wall_ms:8.3f} ms wall/chunk")
+    return wall_ms
+
+
+def main():
+    rng = np.random.default_rng(0)
+    samples = SAMPLE_RATE * CHUNK_MS // 1000
+    chunks = [
+        (rng.standard_normal(samples) * 0.05).astype(np.float32) for _ in range(CHUNKS)
+    ]
+
+    print(f"=== DENOISE ({CHUNKS} x {CHUNK_MS} ms chunks at {SAMPLE_RATE} Hz) ===")
+    if not shutil.which("ffmpeg"):
+        print(
+            "(ffmpeg not found: the previous path is measured without the subprocess)"
+        )
+    # Subprocess CPU is not counted by process_time; compare wall time as well
+    old_ms = bench(
+        "ffmpeg + tempfiles", lambda c: ffmpeg_denoise(c, SAMPLE_RATE), chunks
+    )
+
+    denoiser = StreamingDenoiser(SAMPLE_RATE)
+    new_ms = bench("StreamingDenoiser", denoiser.process, chunks)
+    print(f"speedup (wall): {old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: chat history row decoding, Pydantic per row vs lightweight rows"""
+
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import orjson
+
+from aichat.core.database import CHAT_LOG_ROW_COLUMNS, ChatLog, chat_log_row_factory
+from aichat.models.schemas import ChatHistoryResponse
+
+ROWS = 1000
+ROUNDS = 50
+
+
+def make_db() -> sqlite3.Connection:
+    db = sqlite3.connect(":memory:")
+    db.execute("""
+        CREATE TABLE chat_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id INTEGER NOT NULL,
+            user_message TEXT NOT NULL,
+            character_response TEXT NOT NULL,
+            emotion TEXT,
+            metadata TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    metadata = json.dumps(
+        {"user_id": "bench", "session_id": "abc123", "model": "test-model"}
+    )
+    db.executemany(
+        "INSERT INTO chat_logs (character_id, user_message, character_response, emotion, metadata) VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, f"user message {i}", f"character response {i} " * 5, "happy", metadata)
+            for i in range(ROWS)
+        ],
+    )
+    return db
+
+
+def before(db: sqlite3.Connection) -> bytes:
+    """Previous path: Row → ChatLog → dict → response model → json"""
+    db.row_factory = sqlite3.Row
+    rows = db.execute(
+        "SELECT * FROM chat_logs ORDER BY timestamp DESC LIMIT ?", (ROWS,)
+    ).fetchall()
+    logs = [
+        ChatLog(
+            id=row["id"],
+            character_id=row["character_id"],
+            user_message=row["user_message"],
+            character_response=row["character_response"],
+            emotion=row["emotion"],
+            metadata=json.loads(row["metadata"]) if row["metadata"] else None,
+            timestamp=datetime.fromisoformat(row["timestamp"]),
+        )
+        for row in rows
+    ]
+    response = ChatHistoryResponse(
+        history=[
+            {
+                "id": log.id,
+                "character_id": log.character_id,
+                "user_message": log.user_message,
+                "character_response": log.character_response,
+                "timestamp": log.timestamp.isoformat(),
+                "emotion": log.emotion,
+                "metadata": log.metadata,
+            }
+            for log in logs
+        ]
+    )
+    return json.dumps(response.model_dump()).encode()
+
+
+def after(db: sqlite3.Connection) -> bytes:
+    """Fast path: tuple → ChatLogRow → dict → orjson"""
+    db.row_factory = chat_log_row_factory
+    rows = db.execute(
+        f"SELECT {', '.join(CHAT_LOG_ROW_COLUMNS)} FROM chat_logs ORDER BY timestamp DESC LIMIT ?",
+        (ROWS,),
+    ).fetchall()
+    return orjson.dumps({"history": [row.to_dict() for row in rows]})
+
+
+def bench(name: str, fn, db: sqlite3.Connection) -> float:
+    fn(db)  # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(db)
+    elapsed = time.perf_counter() - start
+    rate = ROWS * ROUNDS / elapsed
+    print(f"{name:>8}: {rate:>12,.0f} rows/sec")
+    return rate
+
+
+def main():
+    db = make_db()
+    assert json.loads(before(db)) == json.loads(
+        after(db)
+    ), "paths must produce the same response"
+
+    print(f"=== CHAT HISTORY DECODING ({ROWS} rows x {ROUNDS} rounds) ===")
+    old_rate = bench("before", before, db)
+    new_rate = bench("after", after, db)
+    print(f"speedup: {new_rate / old_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
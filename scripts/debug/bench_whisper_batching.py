@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark: Whisper throughput for N simultaneous utterances, one-by-one vs micro-batched"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+
+from aichat.backend.services.voice.stt.audio_input import (
+    WHISPER_SAMPLE_RATE,
+    decode_audio_bytes,
+    prepare_for_whisper,
+)
+from aichat.backend.services.voice.stt.batching import MicroBatcher
+from aichat.backend.services.voice.stt.whisper_service import WhisperService
+
+SPEAKERS = (4, 8, 16)
+ROUNDS = 3
+
+
+def load_clip(path: str, seconds: float) -> np.ndarray:
+    if path:
+        audio, sample_rate = decode_audio_bytes(Path(path).read_bytes())
+        return prepare_for_whisper(audio, sample_rate)
+    # No speech sample given: a voiced-vowel-like harmonic buzz (Whisper may hallucinate on it)
+    t = np.arange(int(seconds * WHISPER_SAMPLE_RATE)) / WHISPER_SAMPLE_RATE
+    f0 = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / WHISPER_SAMPLE_RATE
+    buzz = sum(np.sin(k * phase) / k for k in range(1, 12))
+    return (0.1 * buzz * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+async def run_round(service: WhisperService, clip: np.ndarray, speakers: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            service.transcribe_array(clip, source=f"speaker-{i}")
+            for i in range(speakers)
+        )
+    )
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="base")
+    parser.add_argument(
+        "--audio", default="", help="speech clip (WAV/FLAC/OGG) used for every speaker"
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=4.0,
+        help="synthetic clip length without --audio",
+    )
+    parser.add_argument("--wait-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    clip = load_clip(args.audio, args.seconds)
+    # One worker so the comparison isolates batching, not pool parallelism
+    service = WhisperService(args.model, workers=1)
+    if not await service.wait_until_ready(600):
+        print("Whisper model could not be loaded")
+        return
+    await service.transcribe_array(clip)  # Warm-up
+
+    print(
+        f"=== WHISPER BATCHING ({args.model}, {service.precision}, {len(clip) / WHISPER_SAMPLE_RATE:.1f}s clips) ==="
+    )
+    print(
+        f"{'speakers':>8} {'one-by-one':>12} {'batched':>12} {'speedup':>8}  batch sizes"
+    )
+    for speakers in SPEAKERS:
+        timings = {}
+        for mode, batch_size in (("single", 1), ("batched", speakers)):
+            service._batcher = MicroBatcher(
+                service._decode_batch,
+                max_batch_size=batch_size,
+                max_wait_ms=args.wait_ms,
+            )
+            timings[mode] = min(
+                [await run_round(service, clip, speakers) for _ in range(ROUNDS)]
+            )
+        sizes = service._batcher.get_stats()["batch_sizes"]
+        single, batched = speakers / timings["single"], speakers / timings["batched"]
+        print(
+            f"{speakers:>8} {single:>8.2f} u/s {batched:>8.2f} u/s {batched / single:>7.2f}x  {sizes}"
+        )
+    service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
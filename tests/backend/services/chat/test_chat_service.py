@@ -43,4 +43,40 @@ class TestChatService:
             from aichat.backend.services.chat.voice_service import VoiceService
             assert VoiceService is not None
         except ImportError:
-            pytest.skip("Voice service not available")
\ No newline at end of file
+            pytest.skip("Voice service not available")
+    
+    @pytest.mark.asyncio
+    async def test_request_context_is_passed_down(self, monkeypatch):
+        """Test that a preloaded character is reused and the context reaches the LLM service."""
+        from aichat.backend.services.chat import chat_service as chat_module
+        from aichat.backend.services.llm.memory.models import ConversationSession
+        from aichat.backend.services.llm.request_context import ChatRequestContext
+        from aichat.core.database import Character
+        
+        async def fail_lookup(*args, **kwargs):
+            raise AssertionError("character should not be looked up again")
+        
+        monkeypatch.setattr(chat_module.db_ops, "get_character", fail_lookup)
+        
+        class FakeMemoryManager:
+            async def load_session(self, user_id, character_id, character_name):
+                return ConversationSession(session_id="s1", character_id=character_id)
+        
+        class FakeLLMService:
+            memory_manager = FakeMemoryManager()
+            
+            async def generate_response(self, **kwargs):
+                self.kwargs = kwargs
+                return {"response": "hi", "emotion": "happy", "model_used": "m", "session_id": "s1"}
+        
+        service = chat_module.ChatService()
+        service._llm_service = FakeLLMService()
+        character = Character(id=7, name="Miku", profile="p", personality="cheerful")
+        context = ChatRequestContext(message="hello", user_id="u", character=character, record_chat_log=True)
+        
+        response = await service.process_message("hello", 7, "Miku", "u", request_context=context)
+        
+        assert response.response == "hi"
+        assert service._llm_service.kwargs["request_context"] is context
+        assert service._llm_service.kwargs["session_id"] == "s1"
+        assert context.session.session_id == "s1"
@@ -70,4 +70,468 @@ class TestLLMTools:
             from aichat.backend.services.llm.tools.compact_voice_controller import CompactVoiceController
             assert CompactVoiceController is not None
         except ImportError:
-            pytest.skip("Voice controller tool not available")
\ No newline at end of file
+            pytest.skip("Voice controller tool not available")
+
+class TestBatchImportanceScoring:
+    """Test batched turn importance scoring."""
+    
+    def _turns(self, count):
+        return [
+            {"turn_id": i + 1, "speaker_type": "user", "message": f"message number {i}"}
+            for i in range(count)
+        ]
+    
+    def test_chunks_respect_turn_limit(self):
+        """Test that turns are split into chunks no larger than the batch size."""
+        from aichat.backend.services.llm.summarization_model import SummarizationModel
+        
+        model = SummarizationModel(api_key="test")
+        model.batch_max_turns = 10
+        chunks = model._chunk_turns_for_scoring(self._turns(25))
+        
+        assert [start for start, _ in chunks] == [0, 10, 20]
+        assert sum(len(chunk) for _, chunk in chunks) == 25
+    
+    def test_parse_batch_scores(self):
+        """Test parsing and validation of the JSON score array."""
+        from aichat.backend.services.llm.summarization_model import SummarizationModel
+        
+        model = SummarizationModel(api_key="test")
+        
+        assert model._parse_batch_scores("```json\n[0.2, 1.5, -1]\n```", 3) == [0.2, 1.0, 0.0]
+        assert model._parse_batch_scores("[0.2, 0.4]", 3) is None
+        assert model._parse_batch_scores("not json", 1) is None
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_heuristic_without_api_key(self):
+        """Test that unscored turns use the compression heuristic, not a flat 0.5."""
+        from aichat.backend.services.llm.summarization_model import SummarizationModel
+        
+        model = SummarizationModel()
+        model.api_key = None
+        turns = [
+            {"turn_id": 1, "speaker_type": "user", "message": "ok"},
+            {"turn_id": 2, "speaker_type": "user", "message": "I am so excited, I decided to move!"},
+        ]
+        
+        scores = await model.score_turns_importance(turns, {"name": "Miku"})
+        
+        assert len(scores) == 2
+        assert all(0.0 <= score <= 1.0 for score in scores)
+        assert scores[1] > scores[0]
+
+
+class TestCompressionHeuristicScoring:
+    """Test single-pass heuristic scoring in the compression engine."""
+    
+    def test_batch_scores_match_per_turn_scores(self):
+        """Test that the vectorized scorer reproduces the original per-turn scores."""
+        from aichat.backend.services.llm.memory.compression_engine import CompressionEngine
+        from aichat.backend.services.llm.memory.models import ConversationTurn
+        
+        engine = CompressionEngine()
+        messages = ["I am a teacher", "We will go tomorrow?", "ok", "I love this, so happy"] * 8
+        turns = [
+            ConversationTurn(turn_id=i + 1, session_id="s", speaker_id="u", speaker_type="user", message=m)
+            for i, m in enumerate(messages)
+        ]
+        
+        # Scores from the per-turn scorer (any(word in message) scans) before vectorization
+        expected = [
+            6.0, 12.0, 0.0, 10.0, 6.0, 12.0, 0.0, 10.0, 6.0, 12.0, 0.0, 10.0, 7.0, 13.0, 1.0, 11.0,
+            7.0, 13.0, 1.0, 11.0, 7.0, 13.0, 3.0, 13.0, 9.0, 15.0, 3.0, 15.0, 11.0, 17.0, 5.0, 15.0,
+        ]
+        
+        assert engine.score_turns(turns) == expected
+        assert all(turn.content_score is not None for turn in turns)
+
+
+class TestExtractiveSummarizer:
+    """Test the local extractive summarizer fast path."""
+    
+    def test_summarizes_without_remote_model(self):
+        """Test that a summary with topics and user facts is produced locally."""
+        from aichat.backend.services.llm.extractive_summarizer import create_extractive_summary
+        
+        turns = [
+            {"turn_id": 1, "speaker_type": "user", "message": "My name is Sam and I work as a nurse in Boston."},
+            {"turn_id": 2, "speaker_type": "assistant", "message": "Nursing in Boston sounds demanding!", "metadata": {"emotion": "curious"}},
+            {"turn_id": 3, "speaker_type": "user", "message": "It is. I decided to visit my family in Maine."},
+            {"turn_id": 4, "speaker_type": "assistant", "message": "Maine is lovely. Enjoy the family visit!", "metadata": {"emotion": "happy"}},
+        ]
+        
+        summary = create_extractive_summary(turns, "Miku")
+        
+        assert summary.source == "extractive"
+        assert summary.summary
+        assert "My name is Sam and I work as a nurse in Boston." in summary.user_revealed_info
+        assert "boston" in summary.topic_progression
+        assert summary.emotional_journey == "curious → happy"
+        assert {moment.turn_id for moment in summary.key_moments} <= {1, 2, 3, 4}
+
+
+class TestModelRouter:
+    """Test latency-aware model routing."""
+    
+    def _router(self, monkeypatch, **kwargs):
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+        from aichat.backend.services.llm.model_router import ModelRouter
+        from aichat.backend.services.llm.model_config import ModelTier
+        
+        return ModelRouter(max_tier=ModelTier.FREE, min_samples=2, **kwargs)
+    
+    def test_prefers_fastest_healthy_model(self, monkeypatch):
+        """Test that measured latency and errors reorder the priority list."""
+        router = self._router(monkeypatch)
+        first, second = [spec.name for spec in router.candidates()][:2]
+        
+        for _ in range(3):
+            router.record(first, 3.0, True)
+            router.record(second, 0.5, True)
+        assert router.select().name == second
+        
+        for _ in range(5):
+            router.record(second, 0.5, False, "boom")
+        assert router.select().name == first
+        assert router.snapshot()["models"][second]["error_rate"] > 0.5
+    
+    @pytest.mark.asyncio
+    async def test_hedged_request_cancels_loser(self, monkeypatch):
+        """Test that a hedged duplicate wins over a slow primary and the primary is cancelled."""
+        import asyncio
+        
+        router = self._router(monkeypatch, hedge_requests=True, default_hedge_delay=0.01)
+        primary, secondary = router.rank()[:2]
+        cancelled = []
+        
+        async def send(spec):
+            if spec.name == primary.name:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(spec.name)
+                    raise
+            return f"reply from {spec.name}"
+        
+        result, winner = await router.request(send)
+        await asyncio.sleep(0)
+        
+        assert winner.name == secondary.name
+        assert result == f"reply from {secondary.name}"
+        assert cancelled == [primary.name]
+        assert router.snapshot()["recent_decisions"][-1]["hedged"] is True
+    
+    @pytest.mark.asyncio
+    async def test_fast_failure_falls_back_to_unhedged_model(self, monkeypatch):
+        """Test that a primary failing before the hedge delay leaves the hedge model eligible."""
+        router = self._router(monkeypatch, hedge_requests=True, default_hedge_delay=5)
+        primary, secondary = router.rank()[:2]
+        calls = []
+        
+        async def send(spec):
+            calls.append(spec.name)
+            if spec.name == primary.name:
+                raise RuntimeError("boom")
+            return f"reply from {spec.name}"
+        
+        result, winner = await router.request(send)
+        
+        assert calls == [primary.name, secondary.name]
+        assert winner.name == secondary.name
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_cancels_primary(self, monkeypatch):
+        """Test that cancelling a routed request does not leave the model request running."""
+        import asyncio
+        
+        router = self._router(monkeypatch, hedge_requests=True, default_hedge_delay=5)
+        started, cancelled = asyncio.Event(), []
+        
+        async def send(spec):
+            started.set()
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(spec.name)
+                raise
+        
+        request = asyncio.create_task(router.request(send))
+        await started.wait()
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        await asyncio.sleep(0)
+        
+        assert cancelled == [router.rank()[0].name]
+
+
+class TestConversationSerialization:
+    """Test per-conversation serialization and message coalescing in LLMService."""
+    
+    def _service(self, coalesce_window_ms=0):
+        from aichat.backend.services.llm.llm_service import LLMService
+        
+        service = LLMService(api_key="test-key", coalesce_window_ms=coalesce_window_ms)
+        calls = []
+        active = {}
+        
+        async def fake_generate(message, **kwargs):
+            import asyncio
+            
+            key = kwargs["user_id"]
+            active[key] = active.get(key, 0) + 1
+            calls.append((key, message, max(active.values())))
+            await asyncio.sleep(0.01)
+            active[key] -= 1
+            return {"response": f"re: {message}"}
+        
+        service._generate_response = fake_generate
+        return service, calls
+    
+    @pytest.mark.asyncio
+    async def test_same_conversation_runs_one_at_a_time(self):
+        """Test that a conversation never has overlapping calls while others run in parallel."""
+        import asyncio
+        
+        service, calls = self._service()
+        args = dict(session_id="s", character_id=1, character_name="Miku",
+                    character_personality="", character_profile="")
+        
+        await asyncio.gather(
+            service.generate_response("a", user_id="alice", **args),
+            service.generate_response("b", user_id="alice", **args),
+            service.generate_response("c", user_id="bob", **args),
+        )
+        
+        assert len(calls) == 3
+        assert all(concurrent == 1 for _, _, concurrent in calls)
+        assert service.memory_manager._conversation_locks == {}
+    
+    @pytest.mark.asyncio
+    async def test_rapid_messages_are_coalesced(self):
+        """Test that messages within the window share one LLM call and response."""
+        import asyncio
+        
+        service, calls = self._service(coalesce_window_ms=20)
+        args = dict(session_id="s", user_id="alice", character_id=1, character_name="Miku",
+                    character_personality="", character_profile="")
+        
+        results = await asyncio.gather(
+            service.generate_response("hi", **args),
+            service.generate_response("are you there?", **args),
+        )
+        
+        assert [message for _, message, _ in calls] == ["hi\nare you there?"]
+        assert results[0] == results[1]
+        assert results[0]["coalesced_messages"] == 2
+
+
+class TestTurnJournal:
+    """Test the write-behind turn journal."""
+    
+    @pytest.mark.asyncio
+    async def test_group_commit_and_replay(self, tmp_path, monkeypatch):
+        """Test that journaled turns survive a restart and are committed in one batch."""
+        from aichat.core.database import DatabaseManager
+        from aichat.backend.services.llm.memory import turn_journal
+        from aichat.backend.services.llm.memory.models import ConversationSession, ConversationTurn
+        
+        database = DatabaseManager(str(tmp_path / "memory.db"))
+        monkeypatch.setattr(turn_journal, "db_manager", database)
+        async with database.get_session() as db:
+            await db.execute(
+                "CREATE TABLE conversation_turns (session_id TEXT, turn_number INTEGER, speaker_id TEXT, "
+                "speaker_type TEXT, message TEXT, timestamp TEXT, token_count INTEGER, metadata TEXT, "
+                "importance_score REAL, UNIQUE(session_id, turn_number))"
+            )
+            await db.execute(
+                "CREATE TABLE conversation_sessions (session_id TEXT PRIMARY KEY, character_id INTEGER, "
+                "started_at TEXT, last_activity TEXT, participants TEXT, total_turns INTEGER, "
+                "compression_count INTEGER, metadata TEXT)"
+            )
+            await db.commit()
+        
+        path = tmp_path / "turns.jsonl"
+        journal = turn_journal.TurnJournal(path, flush_interval=60)
+        session = ConversationSession(session_id="s1", character_id=1)
+        for turn_id in (1, 2, 3):
+            await journal.append_turn(ConversationTurn(
+                turn_id=turn_id, session_id="s1", speaker_id="u", speaker_type="user", message=f"m{turn_id}"
+            ))
+            session.total_turns = turn_id
+            await journal.append_session(session)
+        
+        # Simulate a crash: nothing flushed yet, entries only in the journal file
+        assert len(path.read_text().splitlines()) == 6
+        journal._flusher.cancel()
+        
+        recovered = turn_journal.TurnJournal(path, flush_interval=60)
+        assert recovered.pending_count == 6
+        await recovered.flush()
+        
+        assert recovered.stats["transactions"] == 1
+        assert path.read_text() == ""
+        async with database.get_session() as db:
+            rows = await (await db.execute("SELECT turn_number FROM conversation_turns ORDER BY turn_number")).fetchall()
+            sessions = await (await db.execute("SELECT total_turns FROM conversation_sessions")).fetchall()
+        assert [row[0] for row in rows] == [1, 2, 3]
+        assert [row[0] for row in sessions] == [3]
+
+    @pytest.mark.asyncio
+    async def test_replay_skips_committed_turns_and_rejects_collisions(self, tmp_path, monkeypatch):
+        """Test that a replay after commit is idempotent while a reused turn number is set aside."""
+        import json
+        from aichat.core.database import DatabaseManager
+        from aichat.backend.services.llm.memory import turn_journal
+        from aichat.backend.services.llm.memory.models import ConversationTurn
+
+        database = DatabaseManager(str(tmp_path / "memory.db"))
+        monkeypatch.setattr(turn_journal, "db_manager", database)
+        async with database.get_session() as db:
+            await db.execute(
+                "CREATE TABLE conversation_turns (session_id TEXT, turn_number INTEGER, speaker_id TEXT, "
+                "speaker_type TEXT, message TEXT, timestamp TEXT, token_count INTEGER, metadata TEXT, "
+                "importance_score REAL, UNIQUE(session_id, turn_number))"
+            )
+            await db.commit()
+
+        def turn(turn_id, message):
+            return ConversationTurn(turn_id=turn_id, session_id="s1", speaker_id="u", speaker_type="user", message=message)
+
+        path = tmp_path / "turns.jsonl"
+        journal = turn_journal.TurnJournal(path, flush_interval=60)
+        await journal.append_turn(turn(1, "m1"), chat_log=turn_journal.chat_log_row(1, "hi", "m1"))
+        journal._flusher.cancel()
+        journal_lines = path.read_text()
+        await journal.flush()
+
+        # Simulate a crash after the commit but before the journal was truncated
+        path.write_text(journal_lines)
+        recovered = turn_journal.TurnJournal(path, flush_interval=60)
+        await recovered.flush()
+        assert recovered.stats["replay_skipped"] == 2
+
+        # A different turn under an existing number is set aside, not retried forever,
+        # and the turns queued behind it still reach the database
+        await recovered.append_turn(turn(1, "other"))
+        await recovered.append_turn(turn(2, "m2"))
+        recovered._flusher.cancel()
+        await recovered.flush()
+        assert recovered.stats["set_aside"] == 1
+        assert recovered.pending_count == 0
+        rejected = [json.loads(line) for line in recovered.rejected_path.read_text().splitlines()]
+        assert [entry["row"][4] for entry in rejected] == ["other"]
+
+        async with database.get_session() as db:
+            rows = await (await db.execute("SELECT turn_number, message FROM conversation_turns")).fetchall()
+            logs = await (await db.execute("SELECT character_response FROM chat_logs")).fetchall()
+        assert sorted(tuple(row) for row in rows) == [(1, "m1"), (2, "m2")]
+        assert [row[0] for row in logs] == ["m1"]
+    
+    @pytest.mark.asyncio
+    async def test_memory_reads_see_journaled_turns(self, tmp_path, monkeypatch):
+        """Test that MemoryManager reads commit the journal first instead of returning stale rows."""
+        from aichat.core.database import DatabaseManager
+        from aichat.backend.services.llm.memory import memory_manager, turn_journal
+        from aichat.backend.services.llm.memory.models import ConversationTurn
+        
+        database = DatabaseManager(str(tmp_path / "memory.db"))
+        monkeypatch.setattr(turn_journal, "db_manager", database)
+        monkeypatch.setattr(memory_manager, "db_manager", database)
+        async with database.get_session() as db:
+            await db.execute(
+                "CREATE TABLE conversation_turns (session_id TEXT, turn_number INTEGER, speaker_id TEXT, "
+                "speaker_type TEXT, message TEXT, timestamp TEXT, token_count INTEGER, metadata TEXT, "
+                "importance_score REAL, UNIQUE(session_id, turn_number))"
+            )
+            await db.commit()
+        
+        manager = memory_manager.MemoryManager.__new__(memory_manager.MemoryManager)
+        manager.journal = turn_journal.TurnJournal(tmp_path / "turns.jsonl", flush_interval=60)
+        await manager.journal.append_turn(ConversationTurn(
+            turn_id=1, session_id="s1", speaker_id="u", speaker_type="user", message="remember the lighthouse"
+        ))
+        manager.journal._flusher.cancel()
+        
+        found = await manager.search_memories("lighthouse", session_id="s1")
+        assert [turn.message for turn in found] == ["remember the lighthouse"]
+    
+    @pytest.mark.asyncio
+    async def test_shared_turn_numbers_and_per_process_files(self, tmp_path, monkeypatch):
+        """Test that numbering is shared and a dead process's journal is adopted."""
+        from aichat.backend.services.llm.memory import turn_journal
+        
+        base = tmp_path / "turns.jsonl"
+        monkeypatch.setenv("MEMORY_JOURNAL_PATH", str(base))
+        orphan = turn_journal.process_journal_path(base, pid=2 ** 22 + 1)  # Not a running pid
+        orphan.write_text(
+            '{"seq": 7, "type": "turn", "row": ["s1", 4, "u", "user", "m4", "t", 1, "{}", 0.5]}\n'
+        )
+        
+        journal = turn_journal.TurnJournal(flush_interval=60)
+        assert journal.path == turn_journal.process_journal_path(base)
+        assert not orphan.exists()
+        assert journal.pending_count == 1
+        assert journal.path.read_text().count('"m4"') == 1
+        
+        # Two callers that each only know of turn 2 still get distinct numbers
+        assert journal.next_turn_number("s1", 2) == 5
+        assert journal.next_turn_number("s1", 2) == 6
+        assert journal.next_turn_number("s2", 0) == 1
+
+
+class TestCompressionScheduler:
+    """Test the background compression scheduler."""
+    
+    @pytest.mark.asyncio
+    async def test_priority_dedupe_cancel_and_persistence(self, tmp_path, monkeypatch):
+        """Test ordering by closeness to reset, per-session dedupe, cancellation and persisted results."""
+        import asyncio
+        from aichat.core.database import DatabaseManager
+        from aichat.backend.services.llm.memory import compression_scheduler
+        from aichat.backend.services.llm.memory.models import CompressedContext, ConversationSession
+        
+        database = DatabaseManager(str(tmp_path / "memory.db"))
+        monkeypatch.setattr(compression_scheduler, "db_manager", database)
+        async with database.get_session() as db:
+            await db.execute(
+                "CREATE TABLE compressed_contexts (session_id TEXT PRIMARY KEY, "
+                "compressed_at_turn INTEGER, context TEXT, created_at TEXT)"
+            )
+            await db.commit()
+        
+        order = []
+        gate = asyncio.Event()
+        
+        class FakeEngine:
+            async def compress(self, session, turns, character_data, on_refined=None):
+                order.append(session.session_id)
+                await gate.wait()
+                return CompressedContext(session_summary=f"summary of {session.session_id}")
+        
+        scheduler = compression_scheduler.CompressionScheduler(FakeEngine(), max_workers=1)
+        submit = lambda sid, pct: scheduler.submit(sid, ConversationSession(session_id=sid), [], {}, pct)
+        
+        submit("busy", 0.75)
+        await asyncio.sleep(0)  # "busy" occupies the only worker
+        submit("far", 0.75)
+        submit("near", 0.80)
+        submit("closed", 0.84)
+        submit("far", 0.76)  # deduplicated, updated in place
+        await scheduler.cancel("closed")
+        
+        gate.set()
+        for sid in ("busy", "near", "far"):
+            await scheduler.get_job(sid).done.wait()
+        
+        assert order == ["busy", "near", "far"]
+        assert scheduler.stats["deduplicated"] == 1
+        assert scheduler.stats["cancelled"] == 1
+        assert scheduler.take_result("near").session_summary == "summary of near"
+        
+        # A fresh scheduler (e.g. after restart) finds the persisted result
+        restarted = compression_scheduler.CompressionScheduler(FakeEngine(), max_workers=1)
+        persisted = await restarted.load_persisted("far")
+        assert persisted.session_summary == "summary of far"
+        
+        await scheduler.close()
@@ -0,0 +1,51 @@
+"""
+Streaming STT buffer testing.
+Tests the per-stream audio buffer and rolling noise statistics.
+"""
+
+import pytest
+import numpy as np
+
+
+class TestAudioBuffer:
+    """Test utterance accumulation and rolling RMS statistics."""
+
+    def test_buffer_grows_and_serves_views(self):
+        """Appends past capacity keep every sample; tail and view share memory."""
+        try:
+            from aichat.backend.services.voice.stt.audio_buffer import AudioBuffer
+        except ImportError:
+            pytest.skip("Audio buffer not available")
+
+        buffer = AudioBuffer(initial_capacity=1000)
+        chunks = [np.full(300, i, dtype=np.float32) for i in range(10)]
+        for chunk in chunks:
+            buffer.append(chunk)
+
+        assert len(buffer) == 3000
+        assert buffer.capacity >= 3000
+        assert np.array_equal(buffer.view(), np.concatenate(chunks))
+        assert np.array_equal(buffer.tail(450), np.concatenate(chunks)[-450:])
+        assert np.shares_memory(buffer.tail(450), buffer.view())
+        assert len(buffer.tail(10_000)) == 3000
+
+        buffer.clear()
+        assert len(buffer) == 0 and buffer.capacity >= 3000
+
+    def test_rolling_stats_match_numpy_over_window(self):
+        """Sliding Welford mean/std equal numpy over the last N values."""
+        try:
+            from aichat.backend.services.voice.stt.audio_buffer import RollingStats
+        except ImportError:
+            pytest.skip("Audio buffer not available")
+
+        values = np.random.default_rng(0).random(200) * 0.1
+        stats = RollingStats(30)
+        assert stats.mean == 0.0 and stats.std == 0.0
+
+        for i, value in enumerate(values):
+            stats.push(value)
+            window = values[max(0, i - 29) : i + 1]
+            assert stats.mean == pytest.approx(np.mean(window), abs=1e-12)
+            expected_std = np.std(window, ddof=1) if window.size > 1 else 0.0
+            assert stats.std == pytest.approx(expected_std, abs=1e-9)
@@ -0,0 +1,113 @@
+"""
+In-memory STT input testing.
+Tests audio normalisation for Whisper and temp-file-free streaming utterances.
+"""
+
+import io
+
+import pytest
+import numpy as np
+
+
+def _audio_input_module():
+    try:
+        from aichat.backend.services.voice.stt import audio_input
+    except ImportError:
+        pytest.skip("Audio input helpers not available")
+    return audio_input
+
+
+class TestAudioInput:
+    """Test conversion of PCM buffers, arrays and encoded bytes to Whisper input."""
+
+    def test_pcm16_buffer_and_int16_array_agree(self):
+        """Raw PCM16 bytes and the same int16 array normalise identically to [-1, 1)."""
+        audio_input = _audio_input_module()
+
+        pcm = (np.sin(np.linspace(0, 20, 800)) * 20000).astype(np.int16)
+        from_bytes = audio_input.to_float32(pcm.tobytes())
+        from_array = audio_input.to_float32(pcm)
+
+        assert from_bytes.dtype == np.float32
+        assert np.array_equal(from_bytes, from_array)
+        assert np.allclose(from_array, pcm / 32768.0)
+
+        stereo = np.stack([from_array, np.zeros_like(from_array)], axis=1)
+        assert np.allclose(audio_input.to_float32(stereo), from_array / 2)
+
+    def test_prepare_for_whisper_resamples_to_16k(self):
+        """48 kHz input comes out at 16 kHz with the tone preserved."""
+        audio_input = _audio_input_module()
+
+        sr = 48000
+        tone = np.sin(2 * np.pi * 440 * np.arange(sr) / sr).astype(np.float32)
+        prepared = audio_input.prepare_for_whisper(tone, sr)
+
+        assert prepared.dtype == np.float32
+        assert prepared.shape == (audio_input.WHISPER_SAMPLE_RATE,)
+        spectrum = np.abs(np.fft.rfft(prepared))
+        assert np.argmax(spectrum) == 440  # 1 Hz bins over one second
+
+    def test_decode_and_capture_opt_in(self, tmp_path, monkeypatch):
+        """Encoded WAV bytes decode in memory; capture writes only when enabled."""
+        audio_input = _audio_input_module()
+        import soundfile as sf
+
+        audio = (np.random.default_rng(0).standard_normal(1600) * 0.1).astype(
+            np.float32
+        )
+        wav = io.BytesIO()
+        sf.write(wav, audio, 16000, format="WAV", subtype="PCM_16")
+
+        decoded, sr = audio_input.decode_audio_bytes(wav.getvalue())
+        assert sr == 16000
+        assert np.allclose(decoded, audio, atol=1 / 32768)
+
+        monkeypatch.setenv("STT_CAPTURE_DIR", str(tmp_path))
+        monkeypatch.delenv("STT_CAPTURE_AUDIO", raising=False)
+        assert audio_input.capture_audio(audio, 16000, "test") is None
+        assert list(tmp_path.iterdir()) == []
+
+        monkeypatch.setenv("STT_CAPTURE_AUDIO", "1")
+        path = audio_input.capture_audio(audio, 16000, "test")
+        assert path is not None and path.parent == tmp_path
+        assert sf.info(str(path)).frames == 1600
+
+
+class TestStreamingUtterance:
+    """Test that finalized streaming utterances stay in memory."""
+
+    def test_feed_audio_returns_in_memory_utterance(self, monkeypatch):
+        """Silence after speech finalizes an Utterance carrying the audio and no file."""
+        try:
+            from aichat.backend.services.voice.stt import streaming_stt_service as stt
+        except ImportError:
+            pytest.skip("Streaming STT service not available")
+
+        monkeypatch.delenv("STT_CAPTURE_AUDIO", raising=False)
+        monkeypatch.setattr(stt, "DENOISE_ENABLED", False)
+        sr = 16000
+        rng = np.random.default_rng(0)
+        chunks = [rng.standard_normal(1600) * 0.005 for _ in range(5)]
+        chunks += [rng.standard_normal(1600) * 0.3 for _ in range(8)]
+        chunks += [rng.standard_normal(1600) * 0.005 for _ in range(30)]
+
+        stream_id = "test-utterance"
+        stt.reset_session(stream_id)
+        utterance = None
+        fed = 0
+        for chunk in chunks:
+            fed += len(chunk)
+            utterance = stt.feed_audio(
+                stream_id, chunk.astype(np.float32), sample_rate=sr
+            )
+            if utterance is not None:
+                break
+
+        assert utterance is not None
+        assert utterance.path is None
+        assert utterance.sample_rate == sr
+        assert utterance.audio.dtype == np.float32
+        assert len(utterance.audio) == fed
+        assert utterance.duration == pytest.approx(fed / sr)
+        assert stt.get_session_info(stream_id) is None
@@ -0,0 +1,76 @@
+"""
+Whisper micro-batching testing.
+Tests request collection by size and deadline and routing of results.
+"""
+
+import asyncio
+
+import pytest
+
+
+def _batching_module():
+    try:
+        from aichat.backend.services.voice.stt import batching
+    except ImportError:
+        pytest.skip("Batching not available")
+    return batching
+
+
+class TestMicroBatcher:
+    """Test the micro-batching scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_batches_by_size_and_routes_results(self):
+        """Ten concurrent requests with a limit of four run as 4 + 4 + 2, each getting its own result."""
+        batching = _batching_module()
+        seen = []
+
+        async def process(items):
+            seen.append(list(items))
+            await asyncio.sleep(0.01)
+            return [item * 10 for item in items]
+
+        batcher = batching.MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        assert results == [i * 10 for i in range(10)]
+        assert [len(batch) for batch in seen] == [4, 4, 2]
+        stats = batcher.get_stats()
+        assert stats["batches"] == 3 and stats["full_batches"] == 2
+        assert stats["batch_sizes"] == {2: 1, 4: 2}
+
+    @pytest.mark.asyncio
+    async def test_deadline_flush_and_errors(self):
+        """A lone request waits at most max_wait; per-item and batch errors reach their callers."""
+        batching = _batching_module()
+
+        async def process(items):
+            if "boom" in items:
+                raise RuntimeError("decoder crashed")
+            return [
+                ValueError(item) if item == "bad" else item.upper() for item in items
+            ]
+
+        batcher = batching.MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await batcher.submit("solo") == "SOLO"
+        assert loop.time() - started < 0.5
+
+        good, bad = await asyncio.gather(
+            batcher.submit("ok"), batcher.submit("bad"), return_exceptions=True
+        )
+        assert good == "OK" and isinstance(bad, ValueError)
+
+        with pytest.raises(RuntimeError, match="decoder crashed"):
+            await batcher.submit("boom")
+        assert batcher.get_stats()["failed_batches"] == 1
+
+    def test_batch_size_one_disables_batching(self):
+        batching = _batching_module()
+
+        async def process(items):
+            return items
+
+        assert not batching.MicroBatcher(process, max_batch_size=1).enabled
+        assert batching.MicroBatcher(process, max_batch_size=2).enabled
@@ -0,0 +1,94 @@
+"""
+CPU inference tuning testing.
+Tests thread budgeting, precision benchmark selection and int8 quantization.
+"""
+
+import pytest
+
+
+def _cpu_module():
+    try:
+        from aichat.backend.services.voice.stt import cpu_inference
+    except ImportError:
+        pytest.skip("CPU inference tuning not available")
+    return cpu_inference
+
+
+class TestCPUInference:
+    """Test CPU performance mode helpers."""
+
+    def test_threads_split_cores_across_workers(self, monkeypatch):
+        """Workers share the cores instead of each using all of them."""
+        cpu_inference = _cpu_module()
+        monkeypatch.delenv("WHISPER_CPU_THREADS", raising=False)
+        monkeypatch.setattr(cpu_inference.os, "cpu_count", lambda: 8)
+
+        assert cpu_inference.threads_per_worker(1) == 8
+        assert cpu_inference.threads_per_worker(3) == 2
+        assert cpu_inference.threads_per_worker(16) == 1
+        monkeypatch.setenv("WHISPER_CPU_THREADS", "3")
+        assert cpu_inference.threads_per_worker(2) == 3
+
+    def test_benchmark_picks_fastest_and_caches(self):
+        """The lowest RTF wins, failing variants are reported, and results are cached."""
+        cpu_inference = _cpu_module()
+        rtf = {"fp32": 0.20, "int8": 0.08, "onnx-int8": None}
+        calls = []
+
+        def run(precision, measure):
+            calls.append(precision)
+            if rtf[precision] is None:
+                raise RuntimeError("onnxruntime missing")
+            return rtf[precision]
+
+        summary = cpu_inference.benchmark_precisions(
+            "bench-test", 4, run, candidates=list(rtf)
+        )
+        assert summary["selected"] == "int8"
+        assert summary["results"]["fp32"]["rtf"] == 0.2
+        assert summary["results"]["onnx-int8"]["rtf"] is None
+        assert "onnxruntime missing" in summary["results"]["onnx-int8"]["error"]
+
+        again = cpu_inference.benchmark_precisions(
+            "bench-test", 4, run, candidates=list(rtf)
+        )
+        assert again is summary and len(calls) == 3
+        assert cpu_inference.get_benchmark("bench-test", 4) is summary
+
+    def test_int8_quantizes_linear_subclasses(self):
+        """Linear subclasses (as Whisper uses) are quantized, not skipped."""
+        cpu_inference = _cpu_module()
+        torch = pytest.importorskip("torch")
+
+        class WhisperLinear(torch.nn.Linear):
+            pass
+
+        model = torch.nn.Sequential(
+            WhisperLinear(16, 16), torch.nn.ReLU(), torch.nn.Linear(16, 4)
+        )
+        x = torch.randn(2, 16)
+        expected = model(x)
+
+        quantized = cpu_inference.apply_precision(model, "tiny", "int8")
+        assert all(
+            "quantized" in type(m).__module__ for m in (quantized[0], quantized[2])
+        )
+        assert torch.allclose(quantized(x), expected, atol=0.1)
+
+    def test_publish_never_leaves_partial_files(self, tmp_path):
+        """Exports land atomically: a failed write leaves neither the target nor a temp file."""
+        cpu_inference = _cpu_module()
+        target = tmp_path / "encoder.onnx"
+
+        def failing_write(out):
+            with open(out, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("export failed")
+
+        with pytest.raises(RuntimeError):
+            cpu_inference._publish(target, failing_write)
+        assert list(tmp_path.iterdir()) == []
+
+        cpu_inference._publish(target, lambda out: open(out, "wb").write(b"model"))
+        assert target.read_bytes() == b"model"
+        assert list(tmp_path.iterdir()) == [target]
@@ -0,0 +1,104 @@
+"""
+Inference pool testing.
+Tests the worker pool that keeps Whisper calls off the event loop.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def _pool_module():
+    try:
+        from aichat.backend.services.voice.stt import inference_pool
+    except ImportError:
+        pytest.skip("Inference pool not available")
+    return inference_pool
+
+
+class TestInferencePool:
+    """Test queued model inference on worker threads."""
+
+    @pytest.mark.asyncio
+    async def test_jobs_run_in_parallel_on_per_worker_models(self):
+        """Each worker gets its own model and jobs overlap instead of serialising."""
+        pool_module = _pool_module()
+        pool = pool_module.InferencePool(
+            lambda index: f"model-{index}", workers=3, max_queue=10, default_timeout=5
+        )
+        try:
+
+            def job(model):
+                time.sleep(0.2)
+                return model, threading.current_thread().name
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(pool.run(job) for _ in range(3)))
+            elapsed = time.perf_counter() - start
+
+            assert elapsed < 0.5
+            assert {model for model, _ in results} == {"model-0", "model-1", "model-2"}
+            stats = pool.get_stats()
+            assert stats["completed"] == 3
+            assert stats["inference"]["count"] == 3
+        finally:
+            pool.close()
+
+    @pytest.mark.asyncio
+    async def test_priority_timeout_and_queue_bound(self):
+        """Higher priority jobs jump the queue; timeouts skip jobs; a full queue rejects."""
+        pool_module = _pool_module()
+        release = threading.Event()
+        pool = pool_module.InferencePool(
+            lambda index: None, workers=1, max_queue=3, default_timeout=5
+        )
+        try:
+            order = []
+            blocker = pool.submit(lambda model: release.wait(5))
+            await asyncio.sleep(0.05)  # Let the worker pick up the blocker
+
+            low = pool.submit(
+                lambda model: order.append("low"), priority=pool_module.PRIORITY_LOW
+            )
+            high = pool.submit(
+                lambda model: order.append("high"), priority=pool_module.PRIORITY_HIGH
+            )
+            expiring = asyncio.ensure_future(
+                pool.run(lambda model: order.append("expired"), timeout=0.05)
+            )
+            await asyncio.sleep(0)  # Let run() enqueue its job
+            with pytest.raises(pool_module.InferenceQueueFull):
+                pool.submit(lambda model: None)
+
+            with pytest.raises(TimeoutError):
+                await expiring
+            release.set()
+            await asyncio.gather(blocker, low, high)
+
+            assert order == ["high", "low"]
+            stats = pool.get_stats()
+            assert stats["rejected"] == 1
+            assert stats["timed_out"] == 1
+        finally:
+            release.set()
+            pool.close()
+
+    @pytest.mark.asyncio
+    async def test_load_failure_fails_jobs(self):
+        """A worker whose model failed to load reports the error to each job."""
+        pool_module = _pool_module()
+
+        def broken_loader(index):
+            raise RuntimeError("weights missing")
+
+        pool = pool_module.InferencePool(
+            broken_loader, workers=1, max_queue=2, default_timeout=5
+        )
+        try:
+            with pytest.raises(RuntimeError, match="weights missing"):
+                await pool.run(lambda model: "unreachable")
+            assert pool.get_stats()["failed"] == 1
+        finally:
+            pool.close()
@@ -0,0 +1,127 @@
+"""
+Model registry testing.
+Tests shared, reference-counted model loading and idle/budget unloading.
+"""
+
+import threading
+import time
+
+import pytest
+
+
+def _registry_module():
+    try:
+        from aichat.backend.services.voice.stt import model_registry
+    except ImportError:
+        pytest.skip("Model registry not available")
+    return model_registry
+
+
+class _FakeModel:
+    def __init__(self, key, size):
+        self.key = key
+        self.size = size
+
+    def parameters(self):
+        class Param:
+            def __init__(self, size):
+                self.size = size
+
+            def numel(self):
+                return self.size
+
+            def element_size(self):
+                return 1
+
+        return [Param(self.size)]
+
+
+class TestModelRegistry:
+    """Test the process-wide model registry."""
+
+    def test_handles_share_one_background_load(self):
+        """Acquiring the same key twice loads once, off the caller's thread."""
+        module = _registry_module()
+        gate = threading.Event()
+        loads = []
+
+        def loader(key):
+            loads.append(key)
+            gate.wait(5)
+            return _FakeModel(key, 1024)
+
+        registry = module.ModelRegistry(loader, idle_ttl=0, memory_budget_mb=0)
+        first = registry.acquire("base")
+        second = registry.acquire("base")
+        assert not first.ready  # Acquire returned while the load is still running
+
+        gate.set()
+        assert first.wait(5) and second.ready
+        with first.use() as model, pytest.raises(TimeoutError):
+            # One instance is used by one caller at a time
+            with second.use(timeout=0.05):
+                pass
+        assert model is second.call(lambda m: m)
+        assert len(loads) == 1
+        assert registry.get_stats()["models"][0]["refs"] == 2
+
+        first.release()
+        assert registry.get_stats()["models"][0]["state"] == "ready"
+        second.release()
+        assert registry.get_stats()["models"] == []  # Unreferenced with no TTL: dropped
+
+    def test_idle_unload_reloads_on_use(self):
+        """Idle models unload after the TTL and load again on next use."""
+        module = _registry_module()
+        registry = module.ModelRegistry(
+            lambda key: _FakeModel(key, 10), idle_ttl=60, memory_budget_mb=0
+        )
+        handle = registry.acquire("base")
+        assert handle.wait(5)
+
+        assert registry.sweep(now=time.monotonic() + 30) == 0
+        assert registry.sweep(now=time.monotonic() + 120) == 1
+        assert not handle.ready
+        assert handle.call(lambda model: model.key.name) == "base"
+        stats = registry.get_stats()["models"][0]
+        assert stats["loads"] == 2 and stats["unloads"] == 1
+
+        handle.release()
+        registry.shutdown()
+
+    def test_worker_threads_reach_the_loader(self):
+        """The worker's thread count is part of the key, so loaders can size CPU sessions for it."""
+        module = _registry_module()
+        registry = module.ModelRegistry(
+            lambda key: _FakeModel(key, 10), idle_ttl=0, memory_budget_mb=0
+        )
+        handle = registry.acquire("base", precision="onnx-int8", threads=4)
+
+        assert handle.call(lambda model: model.key.threads) == 4
+        other = registry.acquire("base", precision="onnx-int8", preload=False)
+        assert other.key != handle.key
+        other.release()
+        handle.release()
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        """Loading past the budget unloads idle models, oldest first, but never one in use."""
+        module = _registry_module()
+        mb = 1024 * 1024
+        registry = module.ModelRegistry(
+            lambda key: _FakeModel(key, 4 * mb), idle_ttl=0, memory_budget_mb=10
+        )
+
+        a = registry.acquire("a")
+        assert a.wait(5)
+        b = registry.acquire("b")
+        assert b.wait(5)
+        b.call(lambda model: None)  # b is now more recently used than a
+
+        with a.use():
+            c = registry.acquire("c")
+            assert c.wait(5)
+            assert a.ready and not b.ready  # a is in use, so b was evicted
+
+        assert registry.get_stats()["loaded_mb"] == 8.0
+        for handle in (a, b, c):
+            handle.release()
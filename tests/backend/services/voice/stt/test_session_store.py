@@ -0,0 +1,124 @@
+"""
+STT session store testing.
+Tests idle expiry, the max-duration cap and the memory budget for streaming sessions.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+
+def _store_module():
+    try:
+        from aichat.backend.services.voice.stt import session_store
+        from aichat.backend.services.voice.stt.audio_buffer import AudioBuffer
+    except ImportError:
+        pytest.skip("STT session store not available")
+    return session_store, AudioBuffer
+
+
+def _session(AudioBuffer, seconds, sr=16000):
+    buffer = AudioBuffer(initial_capacity=int(seconds * sr))
+    buffer.append(np.zeros(int(seconds * sr), dtype=np.float32))
+    return {"audio": buffer, "sr": sr}
+
+
+class TestSessionStore:
+    """Test the bounded streaming STT session store."""
+
+    def test_idle_streams_expire_with_their_state(self):
+        session_store, AudioBuffer = _store_module()
+        expired = []
+        store = session_store.SessionStore(
+            idle_ttl=10, max_duration=0, memory_budget_mb=0, on_expire=expired.append
+        )
+        store.add("a", _session(AudioBuffer, 1))
+        store.add("b", _session(AudioBuffer, 1))
+        store.finalize(
+            "b"
+        )  # Finalized, but the stream is still known until it idles out
+
+        assert store.sweep(time.monotonic() + 5) == 0
+        assert store.sweep(time.monotonic() + 11) == 1
+        assert len(store) == 0
+        assert sorted(expired) == ["a", "b"]
+        assert store.get_stats()["expired"] == 1
+        store.shutdown()
+
+    def test_memory_budget_evicts_least_recently_fed(self):
+        session_store, AudioBuffer = _store_module()
+        # 1 s at 16 kHz float32 is 64000 bytes; the budget fits two of them
+        store = session_store.SessionStore(
+            idle_ttl=0, max_duration=0, memory_budget_mb=130000 / (1024 * 1024)
+        )
+        for stream_id in ("a", "b", "c"):
+            store.add(stream_id, _session(AudioBuffer, 1))
+        store.touch("a")
+
+        assert store.enforce_budget(keep="c") == ["b"]
+        assert "a" in store and "c" in store and "b" not in store
+        stats = store.get_stats()
+        assert stats["active_sessions"] == 2
+        assert stats["bytes_held"] == 128000
+        assert stats["buffered_seconds"] == pytest.approx(2.0)
+        assert stats["evicted"] == 1
+
+    def test_max_duration_forces_finalization(self, monkeypatch):
+        """A stream that never goes quiet is cut into max-duration utterances."""
+        try:
+            from aichat.backend.services.voice.stt import streaming_stt_service as stt
+        except ImportError:
+            pytest.skip("Streaming STT service not available")
+
+        store = stt.SessionStore(idle_ttl=0, max_duration=2.0, memory_budget_mb=0)
+        monkeypatch.setattr(stt, "_SESSIONS", store)
+        # Stand-in Silero that hears speech in every window
+        monkeypatch.setattr(stt, "SILERO_AVAILABLE", True)
+        monkeypatch.setattr(stt, "SILERO_STREAMING_ENABLED", True)
+        monkeypatch.setattr(stt, "SILERO_MODEL", lambda window, sample_rate: 0.9)
+
+        sr = 16000
+        stt.reset_session("test-endless")
+        rng = np.random.default_rng(0)
+        utterances = []
+        for _ in range(50):
+            chunk = (rng.standard_normal(1600) * 0.3).astype(np.float32)
+            utterance = stt.feed_audio("test-endless", chunk, sample_rate=sr)
+            if utterance is not None:
+                utterances.append(utterance)
+        stt.reset_session("test-endless")
+
+        assert len(utterances) == 2
+        assert all(u.forced for u in utterances)
+        assert all(u.duration == pytest.approx(2.0) for u in utterances)
+        stats = store.get_stats()
+        assert stats["forced_finalizations"] == 2
+        assert stats["created"] == 3
+
+    def test_denoiser_outlives_utterances_until_expiry(self, monkeypatch):
+        """The stream's noise profile is kept across utterances and dropped with the stream."""
+        try:
+            from aichat.backend.services.voice.stt import streaming_stt_service as stt
+        except ImportError:
+            pytest.skip("Streaming STT service not available")
+
+        store = stt.SessionStore(
+            idle_ttl=10,
+            max_duration=0,
+            memory_budget_mb=0,
+            on_expire=stt._drop_stream_state,
+        )
+        monkeypatch.setattr(stt, "_SESSIONS", store)
+        monkeypatch.setattr(stt, "DENOISE_ENABLED", True)
+
+        chunk = np.zeros(1600, dtype=np.float32)
+        stt.feed_audio("test-denoise", chunk, sample_rate=16000)
+        denoiser = stt._DENOISERS["test-denoise"]
+        stt.end_utterance("test-denoise")
+        stt.feed_audio("test-denoise", chunk, sample_rate=16000)
+        assert stt._DENOISERS["test-denoise"] is denoiser
+
+        store.sweep(time.monotonic() + 11)
+        assert "test-denoise" not in stt._DENOISERS
+        store.shutdown()
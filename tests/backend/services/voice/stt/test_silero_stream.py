@@ -0,0 +1,163 @@
+"""
+Streaming Silero VAD testing.
+Tests the stateful per-stream VAD and its resampler with a stand-in model.
+"""
+
+import pytest
+import numpy as np
+
+
+def _silero_module():
+    try:
+        from aichat.backend.services.voice.stt import silero_stream
+    except ImportError:
+        pytest.skip("Streaming Silero VAD not available")
+    return silero_stream
+
+
+class EnergyModel:
+    """Stands in for Silero: records every window it scores, speech = loud window"""
+
+    def __init__(self):
+        self.windows = []
+        self.resets = 0
+
+    def __call__(self, window, sample_rate):
+        window = np.asarray(window)
+        self.windows.append(window.copy())
+        return 0.9 if np.sqrt(np.mean(window**2)) > 0.05 else 0.02
+
+    def reset_states(self):
+        self.resets += 1
+
+
+def _tone_then_silence(sr, speech_seconds, silence_seconds):
+    t = np.arange(int(sr * speech_seconds)) / sr
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t)
+    return np.concatenate((tone, np.zeros(int(sr * silence_seconds)))).astype(
+        np.float32
+    )
+
+
+class TestStreamingResampler:
+    """Test the chunked polyphase resampler."""
+
+    @pytest.mark.parametrize("src_rate", [48000, 44100, 8000])
+    def test_chunked_output_matches_one_shot_filter(self, src_rate):
+        """Carrying filter history across chunks gives exactly the one-shot result."""
+        from scipy.signal import upfirdn
+
+        silero_stream = _silero_module()
+        resampler = silero_stream.StreamingResampler(src_rate, 16000)
+        audio = np.random.default_rng(0).standard_normal(src_rate).astype(np.float32)
+
+        out = np.concatenate(
+            [resampler.process(chunk) for chunk in np.array_split(audio, 23)]
+        )
+
+        assert out.dtype == np.float32
+        assert len(out) == 16000
+        reference = upfirdn(resampler.taps, audio, resampler.up, resampler.down)[
+            : len(out)
+        ]
+        assert np.allclose(out, reference, atol=1e-5)
+
+    def test_same_rate_passes_through(self):
+        silero_stream = _silero_module()
+        resampler = silero_stream.StreamingResampler(16000, 16000)
+        audio = np.linspace(-1, 1, 1000, dtype=np.float32)
+
+        assert np.array_equal(resampler.process(audio), audio)
+        assert resampler.to_input_samples(1000) == 1000
+
+
+class TestStreamingSileroVAD:
+    """Test incremental frame scoring, hysteresis and diagnostics."""
+
+    def test_scores_each_window_once_across_chunks(self):
+        """Odd-sized chunks are buffered so the model only ever sees new 512-sample windows."""
+        silero_stream = _silero_module()
+        model = EnergyModel()
+        vad = silero_stream.StreamingSileroVAD(model, 16000)
+        audio = np.random.default_rng(1).standard_normal(16000).astype(np.float32) * 0.1
+
+        counts = [len(vad.process(chunk)) for chunk in np.array_split(audio, 37)]
+
+        assert sum(counts) == vad.frames == 16000 // 512
+        assert all(window.shape == (512,) for window in model.windows)
+        assert np.array_equal(np.concatenate(model.windows), audio[: vad.frames * 512])
+
+    def test_speech_end_and_snapshot(self):
+        """Speech is tracked per frame and reported without re-running the model."""
+        silero_stream = _silero_module()
+        model = EnergyModel()
+        sr = 48000
+        vad = silero_stream.StreamingSileroVAD(model, sr)
+        audio = _tone_then_silence(sr, 1.0, 1.0)
+
+        for chunk in np.array_split(audio, 20):
+            vad.process(chunk)
+
+        assert not vad.speaking
+        assert vad.last_speech_end == pytest.approx(sr * 1.0, abs=512 * sr / 16000)
+
+        calls = len(model.windows)
+        snapshot = vad.snapshot(tail_seconds=2.0)
+        assert len(model.windows) == calls
+        assert snapshot["has_speech"] is True
+        assert snapshot["speaking"] is False
+        assert snapshot["probability"] == pytest.approx(0.02)
+        assert snapshot["seconds_since_speech"] == pytest.approx(1.0, abs=0.1)
+        assert len(snapshot["segments"]) == 1
+        assert snapshot["segments"][0]["start"] == 0
+        assert snapshot["segments"][0]["end"] == pytest.approx(16000, abs=1024)
+
+        vad.reset()
+        assert model.resets == 2  # Once on construction, once here
+        assert vad.frames == 0 and vad.last_speech_end is None
+
+
+class TestStreamingSTTWithSilero:
+    """Test feed_audio driven by the streaming Silero VAD."""
+
+    def test_finalizes_after_silero_silence(self, monkeypatch):
+        try:
+            from aichat.backend.services.voice.stt import streaming_stt_service as stt
+        except ImportError:
+            pytest.skip("Streaming STT service not available")
+
+        monkeypatch.setattr(stt, "SILERO_AVAILABLE", True)
+        monkeypatch.setattr(stt, "SILERO_STREAMING_ENABLED", True)
+        monkeypatch.setattr(stt, "SILERO_MODEL", EnergyModel())
+        monkeypatch.setattr(stt, "DENOISE_ENABLED", False)
+
+        sr = 16000
+        stream_id = "test-silero"
+        stt.reset_session(stream_id)
+        audio = _tone_then_silence(sr, 0.8, 2.0)
+        utterance = None
+        fed = 0
+        for chunk in np.array_split(audio, 28):
+            fed += len(chunk)
+            utterance = stt.feed_audio(stream_id, chunk, sample_rate=sr)
+            if utterance is not None:
+                break
+
+        assert utterance is not None
+        # Finalized SILENCE_DURATION after the speech ended, within one chunk
+        assert fed / sr == pytest.approx(0.8 + stt.SILENCE_DURATION, abs=0.1 + 0.064)
+
+        diagnostics = stt.get_vad_diagnostics(stream_id)
+        assert diagnostics["session"] is None  # Utterance finalized
+        assert diagnostics["silero"]["has_speech"] is True
+        assert stt.get_silero_decision(stream_id) == diagnostics["silero"]["segments"]
+
+        # Ending an utterance keeps the stream's VAD; only reset_session drops it
+        stt.feed_audio(stream_id, audio[:1600], sample_rate=sr)
+        vad = stt._SILERO_VADS[stream_id]
+        stt.end_utterance(stream_id)
+        assert stt.get_session_info(stream_id) is None
+        assert stt._SILERO_VADS[stream_id] is vad
+
+        stt.reset_session(stream_id)
+        assert stt.get_vad_diagnostics(stream_id)["silero"] is None
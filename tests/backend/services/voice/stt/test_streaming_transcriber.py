@@ -0,0 +1,128 @@
+"""
+Streaming partial transcript testing.
+Tests local agreement commits and buffer trimming with a scripted decoder.
+"""
+
+import pytest
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Scripted speech: word i spans [0.4 i, 0.4 i + 0.3] seconds of stream time
+WORDS = [f"word{i}" for i in range(60)]
+STREAM_SECONDS = len(WORDS) * 0.4 + 1.0
+
+
+def _transcriber_module():
+    try:
+        from aichat.backend.services.voice.stt import streaming_transcriber
+    except ImportError:
+        pytest.skip("Streaming transcriber not available")
+    return streaming_transcriber
+
+
+async def _scripted_decode(window, prompt):
+    """Stand-in for Whisper: samples encode their stream index, the last word is misheard"""
+    offset = round(float(window[0]) * 1e6) / SAMPLE_RATE
+    window_end = offset + len(window) / SAMPLE_RATE
+    words = []
+    for i, text in enumerate(WORDS):
+        start, end = i * 0.4, i * 0.4 + 0.3
+        if start >= offset and end <= window_end:
+            heard = text if end <= window_end - 0.3 else "garbled"
+            words.append(
+                {"word": f" {heard}", "start": start - offset, "end": end - offset}
+            )
+    return words
+
+
+class TestLocalAgreement:
+    """Test the prefix agreement policy."""
+
+    def test_commits_only_agreed_prefix(self):
+        module = _transcriber_module()
+        policy = module.LocalAgreement(2)
+
+        def words(*texts):
+            return [module.Word(f" {t}", i, i + 0.5) for i, t in enumerate(texts)]
+
+        assert policy.update(words("hello", "wor")) == []
+        committed = policy.update(words("hello", "world", "how"))
+        assert [w.text for w in committed] == [" hello"]
+        assert [w.text for w in policy.tentative()] == [" world", " how"]
+        # Punctuation and case differences still agree
+        committed = policy.update(words("World,", "how", "are"))
+        assert [w.text for w in committed] == [" World,", " how"]
+
+
+class TestStreamingTranscriber:
+    """Test partial transcripts over a long stream."""
+
+    @pytest.mark.asyncio
+    async def test_partials_commit_stably_and_buffer_stays_bounded(self):
+        """Committed text only grows, the window is trimmed, and the final text is complete."""
+        module = _transcriber_module()
+        transcriber = module.StreamingTranscriber(
+            _scripted_decode,
+            step_seconds=0.5,
+            trim_seconds=3.0,
+            max_buffer_seconds=10.0,
+        )
+        stream = (np.arange(int(STREAM_SECONDS * SAMPLE_RATE)) * 1e-6).astype(
+            np.float32
+        )
+        chunk = SAMPLE_RATE // 10
+
+        partials = []
+        max_buffer = 0.0
+        for start in range(0, len(stream), chunk):
+            partial = await transcriber.push(stream[start : start + chunk], SAMPLE_RATE)
+            max_buffer = max(max_buffer, transcriber.buffer_seconds)
+            if partial is not None:
+                partials.append(partial)
+        final = await transcriber.finish()
+
+        expected = " ".join(WORDS)
+        assert final["final"] and final["text"] == expected
+        assert "garbled" not in final["text"]
+        for partial in partials:
+            assert expected.startswith(partial["committed"])
+        assert any(p["tentative"] for p in partials)
+        assert partials[-1]["committed"].count(" ") > len(WORDS) // 2
+        # Compute per decode stays bounded: the window never grows far past trim_seconds
+        assert max_buffer < 3.0 + 1.0
+        assert transcriber.buffer_seconds == 0.0
+
+    @pytest.mark.asyncio
+    async def test_audio_keeps_arriving_during_background_decodes(self):
+        """Appending while a step decodes skips steps without losing audio."""
+        import asyncio
+
+        module = _transcriber_module()
+
+        async def slow_decode(window, prompt):
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return await _scripted_decode(window, prompt)
+
+        transcriber = module.StreamingTranscriber(
+            slow_decode, step_seconds=0.5, trim_seconds=3.0, max_buffer_seconds=10.0
+        )
+        stream = (np.arange(int(STREAM_SECONDS * SAMPLE_RATE)) * 1e-6).astype(
+            np.float32
+        )
+        chunk = SAMPLE_RATE // 10
+
+        task = None
+        skipped = 0
+        for start in range(0, len(stream), chunk):
+            if transcriber.append(stream[start : start + chunk], SAMPLE_RATE):
+                if task is None or task.done():
+                    task = asyncio.create_task(transcriber.step())
+                else:
+                    skipped += 1
+            await asyncio.sleep(0)
+        await task
+        final = await transcriber.finish()
+
+        assert skipped > 0
+        assert final["text"] == " ".join(WORDS)
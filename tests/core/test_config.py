@@ -44,4 +44,70 @@ class TestConfiguration:
             pytest.fail(f"Config module import failed: {e}")
         except Exception:
             # Config loading might fail in test environment, that's ok
-            pass
\ No newline at end of file
+            pass
+
+class TestSettingsDAO:
+    """Test cached settings loading."""
+    
+    def test_cache_reload_and_debounced_writes(self, tmp_path):
+        """Lookups hit the cache until the file changes; updates coalesce into one write."""
+        import json
+        from pydantic import BaseModel
+        from aichat.backend.dao.settings_dao import SettingsDAO
+        
+        class VolumeSettings(BaseModel):
+            level: int = 5
+            muted: bool = False
+        
+        dao = SettingsDAO(tmp_path, check_interval=0, write_delay=60, watch=False)
+        changes = []
+        dao.subscribe("volume", lambda name, settings: changes.append(settings.level))
+        
+        first = dao.load_settings(VolumeSettings, "volume")
+        assert dao.load_settings(VolumeSettings, "volume") is first
+        
+        # External edit is picked up and reported
+        settings_file = tmp_path / "volume.json"
+        settings_file.write_text(json.dumps({"level": 9, "muted": False, "extra_padding": "x" * 10}))
+        assert dao.load_settings(VolumeSettings, "volume").level == 9
+        
+        # Bursts of updates are visible immediately and written once on flush
+        dao.update_setting(VolumeSettings, "level", 3, "volume")
+        dao.update_settings(VolumeSettings, {"muted": True}, "volume")
+        assert json.loads(settings_file.read_text())["level"] == 9
+        assert dao.load_settings(VolumeSettings, "volume").muted is True
+        
+        dao.flush()
+        saved = json.loads(settings_file.read_text())
+        assert (saved["level"], saved["muted"]) == (3, True)
+        assert changes == [9, 3, 3]
+        assert not list(tmp_path.glob("*.tmp"))
+    
+    def test_failed_writes_raise_and_stay_pending(self, tmp_path, monkeypatch):
+        """A failed flush or durable update raises SettingsError instead of only logging."""
+        import json
+        from pydantic import BaseModel
+        from aichat.backend.dao import settings_dao
+        
+        class VolumeSettings(BaseModel):
+            level: int = 5
+        
+        dao = settings_dao.SettingsDAO(tmp_path, check_interval=0, write_delay=60, watch=False)
+        dao.update_setting(VolumeSettings, "level", 3, "volume")
+        
+        def fail(src, dst):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(settings_dao.os, "replace", fail)
+        with pytest.raises(settings_dao.SettingsError):
+            dao.flush()
+        with pytest.raises(settings_dao.SettingsError):
+            dao.update_setting(VolumeSettings, "level", 4, "volume", durable=True)
+        assert dao.get_settings_info("volume")["pending_write"]
+        assert not list(tmp_path.glob("*.tmp"))
+        
+        # Shutdown writes what is still pending
+        monkeypatch.undo()
+        dao.update_setting(VolumeSettings, "level", 7, "volume")
+        settings_dao.close_all()
+        assert json.loads((tmp_path / "volume.json").read_text())["level"] == 7
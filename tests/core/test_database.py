@@ -152,4 +152,263 @@ class TestDatabaseSchema:
             pytest.skip("Character schema not available")
         except Exception as e:
             # Schema validation might be implemented differently
-            pass
\ No newline at end of file
+            pass
+
+class TestCharacterCache:
+    """Test the read-through character cache."""
+    
+    def test_lookup_and_invalidation(self):
+        """Cached by ID and name; invalidation drops both."""
+        from aichat.core.character_cache import CharacterCache
+        from aichat.core.database import Character
+        
+        cache = CharacterCache(sync_interval=0)
+        character = Character(id=7, name="Hatsune", profile="A singer", personality="cheerful")
+        
+        entry = cache.put(character)
+        assert cache.get_by_id(7) is entry
+        assert cache.get_by_name("Hatsune") is entry
+        assert entry.persona_prompt.startswith("You are Hatsune.")
+        assert "CORE PERSONALITY: cheerful" in entry.character_reminder
+        
+        cache.invalidate(7)
+        assert cache.get_by_id(7) is None
+        assert cache.get_by_name("Hatsune") is None
+    
+    @pytest.mark.asyncio
+    async def test_own_write_keeps_cache_in_sync(self, tmp_path):
+        """A published write leaves the cache on the shared version; another process's write clears it."""
+        pytest.importorskip("aiosqlite")
+        from aichat.core.character_cache import CharacterCache
+        from aichat.core.database import Character, DatabaseManager
+        
+        db = DatabaseManager(str(tmp_path / "cache.db"))
+        async with db.get_session() as conn:
+            await conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (name TEXT PRIMARY KEY, version INTEGER)")
+            await conn.commit()
+        
+        cache = CharacterCache(sync_interval=0)
+        async with db.get_session() as conn:
+            await cache.publish(conn)
+            await conn.commit()
+        cache.invalidate(7)
+        assert cache.version == 1
+        
+        cache.put(Character(id=8, name="Rin", profile="A singer", personality="energetic"))
+        await cache.sync(db.get_session)
+        assert cache.get_by_id(8) is not None
+        
+        other = CharacterCache(sync_interval=0)
+        async with db.get_session() as conn:
+            await other.publish(conn)
+            await conn.commit()
+        await cache.sync(db.get_session)
+        assert cache.get_by_id(8) is None
+        assert cache.version == 2
+    
+    @pytest.mark.asyncio
+    async def test_character_dao_writes_invalidate(self, tmp_path, monkeypatch):
+        """CharacterDAO writes drop the cached character and publish the shared version."""
+        pytest.importorskip("aiosqlite")
+        from aichat.backend.dao import character_dao
+        from aichat.core.character_cache import CharacterCache
+        from aichat.core.database import Character, DatabaseManager
+        
+        db = DatabaseManager(str(tmp_path / "dao.db"))
+        async with db.get_session() as conn:
+            await conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (name TEXT PRIMARY KEY, version INTEGER)")
+            await conn.execute(
+                "CREATE TABLE IF NOT EXISTS characters (id INTEGER PRIMARY KEY, name TEXT, profile TEXT, "
+                "personality TEXT, avatar_url TEXT, created_at TEXT, updated_at TEXT)"
+            )
+            await conn.execute("INSERT INTO characters (id, name, profile, personality) VALUES (7, 'Hatsune', '', '')")
+            await conn.commit()
+        
+        cache = CharacterCache(sync_interval=0)
+        monkeypatch.setattr(character_dao, "get_character_cache", lambda: cache)
+        cache.put(Character(id=7, name="Hatsune", profile="", personality=""))
+        
+        assert await character_dao.CharacterDAO(str(tmp_path / "dao.db")).delete_character(7)
+        assert cache.get_by_id(7) is None
+        assert cache.version == 1
+
+
+class TestRowDecoding:
+    """Test lightweight row objects for bulk reads."""
+    
+    def test_chat_log_row_decoding(self):
+        """Rows decode metadata lazily, including the legacy str(dict) encoding."""
+        from aichat.core.database import ChatLogRow, encode_chat_log_metadata
+        
+        row = ChatLogRow(1, 2, "hi", "hello", "happy", encode_chat_log_metadata({"a": 1}), "2024-01-01 10:00:00")
+        assert row._metadata is None
+        assert row.to_dict()["metadata"] == {"a": 1}
+        assert row.to_dict()["timestamp"] == "2024-01-01T10:00:00"
+        assert row.to_model().timestamp.hour == 10
+        
+        legacy = ChatLogRow(1, 2, "hi", "hello", None, str({"a": 1}), "2024-01-01 10:00:00")
+        assert legacy.metadata == {"a": 1}
+
+
+class TestArchive:
+    """Test hot/cold archiving of old rows."""
+    
+    @pytest.mark.asyncio
+    async def test_archive_round_trip(self, tmp_path):
+        """Old rows leave the hot tables and archived sessions can be read back."""
+        pytest.importorskip("aiosqlite")
+        from aichat.core.archive import ArchiveManager, RetentionPolicy
+        from aichat.core.database import DatabaseManager
+        
+        db = DatabaseManager(str(tmp_path / "hot.db"))
+        async with db.get_session() as conn:
+            await conn.execute(
+                "CREATE TABLE conversation_sessions (session_id TEXT PRIMARY KEY, character_id INTEGER, "
+                "started_at TEXT, last_activity TEXT, participants TEXT, total_turns INTEGER, "
+                "compression_count INTEGER, metadata TEXT)"
+            )
+            await conn.execute(
+                "CREATE TABLE conversation_turns (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, "
+                "turn_number INTEGER, speaker_id TEXT, speaker_type TEXT, message TEXT, timestamp TEXT, "
+                "token_count INTEGER, metadata TEXT, importance_score REAL)"
+            )
+            await conn.execute(
+                "CREATE TABLE compressed_contexts (session_id TEXT PRIMARY KEY, compressed_at_turn INTEGER, "
+                "context TEXT, created_at TEXT)"
+            )
+            await conn.execute(
+                "INSERT INTO conversation_sessions VALUES ('old', 1, '2020-01-01T00:00:00', "
+                "'2020-01-01T01:00:00', '[\"u\"]', 1, 0, '{}')"
+            )
+            await conn.execute(
+                "INSERT INTO conversation_turns (session_id, turn_number, speaker_id, speaker_type, message, "
+                "timestamp, token_count, metadata, importance_score) "
+                "VALUES ('old', 1, 'u', 'user', 'hello', '2020-01-01T00:30:00', 1, '{}', 0.5)"
+            )
+            await conn.execute(
+                "INSERT INTO event_logs (event_type, message, severity, timestamp) VALUES "
+                "('vad', 'old frame', 'info', '2020-01-01 00:00:00'), ('vad', 'new frame', 'info', CURRENT_TIMESTAMP)"
+            )
+            await conn.commit()
+        
+        archive = ArchiveManager(
+            archive_dir=tmp_path / "archive",
+            policies={
+                "conversations": RetentionPolicy("conversations", 30),
+                "event_logs": RetentionPolicy("event_logs", 7),
+            },
+            db=db,
+        )
+        archived = await archive.run_once()
+        assert archived == {"conversations": 2, "event_logs": 1}
+        
+        async with db.get_session() as conn:
+            cursor = await conn.execute("SELECT message FROM event_logs")
+            assert [row["message"] for row in await cursor.fetchall()] == ["new frame"]
+            cursor = await conn.execute("SELECT COUNT(*) FROM conversation_turns")
+            assert (await cursor.fetchone())[0] == 0
+        
+        restored = await archive.load_session("old")
+        assert restored["session"]["character_id"] == 1
+        assert [turn["message"] for turn in restored["turns"]] == ["hello"]
+        assert await archive.load_session("missing") is None
+        
+        # Resumed and archived again: both segments contribute their turns
+        async with db.get_session() as conn:
+            await conn.execute(
+                "INSERT INTO conversation_sessions VALUES ('old', 1, '2020-01-01T00:00:00', "
+                "'2020-01-02T01:00:00', '[\"u\"]', 2, 0, '{}')"
+            )
+            await conn.execute(
+                "INSERT INTO conversation_turns (session_id, turn_number, speaker_id, speaker_type, message, "
+                "timestamp, token_count, metadata, importance_score) "
+                "VALUES ('old', 2, 'u', 'user', 'back again', '2020-01-02T00:30:00', 1, '{}', 0.5)"
+            )
+            await conn.commit()
+        await archive.run_once()
+        
+        restored = await archive.load_session("old")
+        assert restored["session"]["total_turns"] == 2
+        assert [turn["message"] for turn in restored["turns"]] == ["hello", "back again"]
+
+
+class TestQueryStats:
+    """Test query timing instrumentation."""
+    
+    def test_normalize_sql(self):
+        """Literals, IN lists and whitespace collapse to one statement key."""
+        from aichat.core.db_stats import normalize_sql
+        
+        assert normalize_sql("SELECT *\n  FROM t WHERE id = 5 AND name = 'x'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+        assert normalize_sql("DELETE FROM t WHERE id IN (?, ?, ?)") == "DELETE FROM t WHERE id IN (...)"
+    
+    @pytest.mark.asyncio
+    async def test_query_counts_and_slow_log(self, tmp_path):
+        """Statements are counted per block and slow ones are logged with their plan."""
+        pytest.importorskip("aiosqlite")
+        from aichat.core.database import DatabaseManager
+        from aichat.core.db_stats import get_query_monitor, track_queries
+        
+        db = DatabaseManager(str(tmp_path / "stats.db"))
+        monitor = get_query_monitor()
+        threshold = monitor.slow_query_ms
+        monitor.slow_query_ms = 0  # Everything counts as slow
+        try:
+            with track_queries() as queries:
+                async with db.get_session() as conn:
+                    cursor = await conn.execute("SELECT * FROM characters WHERE name = ?", ("nobody",))
+                    assert await cursor.fetchall() == []
+        finally:
+            monitor.slow_query_ms = threshold
+        
+        assert queries.count == 1
+        assert queries.count_matching("from characters") == 1
+        
+        entry = monitor.slow_log[-1]
+        assert entry["sql"] == "SELECT * FROM characters WHERE name = ?"
+        assert entry["plan"]
+
+
+class TestBulkIO:
+    """Test bulk import/export."""
+    
+    @pytest.mark.asyncio
+    async def test_bulk_round_trip(self, tmp_path):
+        """Records imported in bulk export back with decoded metadata."""
+        pytest.importorskip("aiosqlite")
+        from aichat.core import database
+        
+        original_path = database.db_manager.db_path
+        original_initialized = database.db_manager._initialized
+        database.db_manager.db_path = str(tmp_path / "bulk.db")
+        database.db_manager._initialized = False
+        try:
+            records = [
+                {"character_id": i % 2, "user_message": f"hi {i}", "character_response": "hello", "metadata": {"n": i}}
+                for i in range(25)
+            ]
+            result = await database.bulk_insert("chat_logs", records, batch_size=10)
+            assert result["inserted"] == 25
+            
+            batches = [batch async for batch in database.export_batches("chat_logs", {"character_id": 1}, batch_size=5)]
+            exported = [record for batch in batches for record in batch]
+            assert len(batches) == 3
+            assert [record["metadata"]["n"] for record in exported] == list(range(1, 25, 2))
+            
+            # Duplicates skipped by INSERT OR IGNORE are not counted as inserted
+            async with database.db_manager.get_session() as conn:
+                await conn.execute(
+                    "CREATE TABLE conversation_turns (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, "
+                    "turn_number INTEGER, speaker_id TEXT, speaker_type TEXT, message TEXT, timestamp TEXT, "
+                    "token_count INTEGER, metadata TEXT, importance_score REAL, UNIQUE(session_id, turn_number))"
+                )
+                await conn.commit()
+            turns = [{"session_id": "s", "turn_number": i % 3, "message": f"m{i}"} for i in range(5)]
+            result = await database.bulk_insert("conversation_turns", turns)
+            assert result["inserted"] == 3
+            
+            with pytest.raises(ValueError):
+                await database.bulk_insert("characters", [])
+        finally:
+            database.db_manager.db_path = original_path
+            database.db_manager._initialized = original_initialized
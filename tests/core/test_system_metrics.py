@@ -0,0 +1,50 @@
+"""
+Core system metrics testing.
+Tests the background metrics sampler behind /api/system/status.
+"""
+
+import pytest
+
+
+class TestSystemMetrics:
+    """Test background system metrics sampling."""
+
+    def test_snapshot_fields_and_history_bound(self):
+        """Snapshots carry the status fields and the history is a bounded ring."""
+        from aichat.core.system_metrics import SystemMetricsSampler
+
+        sampler = SystemMetricsSampler(interval=60, history_size=3)
+        snapshot = sampler.latest()
+        for key in (
+            "cpu_usage",
+            "memory_usage",
+            "disk_usage",
+            "process",
+            "event_loop_lag_ms",
+        ):
+            assert key in snapshot
+        assert snapshot["process"]["rss"] > 0
+        assert snapshot["process"]["python_threads"] >= 1
+
+        for _ in range(5):
+            sampler.sample()
+        assert len(sampler.history()) == 3
+
+    @pytest.mark.asyncio
+    async def test_background_thread_measures_loop_lag(self):
+        """The sampler thread fills the buffer and times a callback on the loop."""
+        import asyncio
+        from aichat.core.system_metrics import SystemMetricsSampler
+
+        sampler = SystemMetricsSampler(interval=0.02, history_size=50)
+        sampler.start()
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if sampler.latest()["event_loop_lag_ms"] is not None:
+                    break
+            assert sampler.running
+            assert sampler.latest()["event_loop_lag_ms"] >= 0
+        finally:
+            sampler.stop()
+        assert not sampler.running